@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from typing import Dict, List
 
@@ -45,38 +46,66 @@ def _find_zone_candidates(
     last_bar_idx: int,
     context: AOIContext,
 ) -> List[AOIZoneCandidate]:
+    """Score every (lower, upper) swing-price pair that forms a valid zone.
+
+    For a fixed lower swing, the swings inside [lower_price, upper_price] only
+    shrink as the upper swing moves down the price-sorted list. The pairs are
+    walked from the highest upper swing that fits max height downwards, with
+    the in-range swings in a doubly linked list in swing order and a running
+    count of valid gaps. Each removal is O(1), so a lower swing costs O(n) and
+    the whole search O(n^2). Pairs are then scored in ascending order, as the
+    original search did.
+    """
     pairs: List[tuple[int, float]] = [(int(s.index), float(s.price)) for s in swings]
-    price_sorted: List[tuple[int, float]] = sorted(pairs, key=lambda x: x[1])
+    # Positions into `pairs`, sorted by price (stable, like sorting the pairs)
+    order: List[int] = sorted(range(len(pairs)), key=lambda k: pairs[k][1])
+    sorted_prices: List[float] = [pairs[k][1] for k in order]
+    bars: List[int] = [bar for bar, _ in pairs]
 
     candidates: Dict[tuple, AOIZoneCandidate] = {}
     settings = context.settings
-    total = len(price_sorted)
+    min_gap = settings.min_swing_gap_bars
+    total = len(order)
 
     for i in range(total):
-        lower_idx, lower_price = price_sorted[i]
+        first_j = i + settings.min_touches - 1
+        if first_j >= total:
+            break
+        lower_price = sorted_prices[i]
 
-        for j in range(i + settings.min_touches - 1, total):
-            upper_idx, upper_price = price_sorted[j]
-            
-            mid_indices = [
-                idx for (idx, price) in pairs if lower_price <= price <= upper_price
-            ]
-            
-            if len(mid_indices) < settings.min_touches:
+        # Heights only grow with j: pairs past the first too-tall one never qualify
+        end_j = first_j
+        while end_j < total and sorted_prices[end_j] - lower_price <= context.max_height_price:
+            end_j += 1
+        if end_j == first_j:
+            continue
+
+        # Swings with price in [lower_price, upper_price] are order[start:stop]
+        start = bisect_left(sorted_prices, lower_price)
+        stop = bisect_right(sorted_prices, sorted_prices[end_j - 1])
+        links = _SwingLinks(bars, order[start:stop], min_gap)
+
+        # (j, touches) of the qualifying pairs, highest upper swing first
+        qualifying: List[tuple[int, int]] = []
+        for j in range(end_j - 1, first_j - 1, -1):
+            upper_stop = bisect_right(sorted_prices, sorted_prices[j], lo=j)
+            while stop > upper_stop:
+                stop -= 1
+                links.remove(order[stop])
+
+            if links.size < settings.min_touches:
                 continue
-            if not _has_sufficient_spacing(mid_indices, settings.min_swing_gap_bars):
+            # Same as _has_sufficient_spacing: at least two spaced gaps
+            if links.valid_gaps < 2:
                 continue
-                        
-            height = upper_price - lower_price 
-            
-            if (height < context.min_height_price):
+            if sorted_prices[j] - lower_price < context.min_height_price:
                 continue
-            
-            if (height > context.max_height_price):
-                break
-            
-            touches = calculate_valid_touches(mid_indices, settings.min_swing_gap_bars)
-            
+            qualifying.append((j, links.valid_gaps))
+
+        for j, touches in reversed(qualifying):
+            upper_idx, upper_price = pairs[order[j]]
+            height = upper_price - lower_price
+
             base_score = _calculate_base_zone_score(
                 height,
                 touches,
@@ -101,6 +130,53 @@ def _find_zone_candidates(
 
     return list(candidates.values())
 
+class _SwingLinks:
+    """Swing positions in swing order, as a doubly linked list with O(1) removal.
+
+    Keeps the number of valid gaps between consecutive members: a gap is
+    valid when the swings are at least `min_gap_bars` bars apart, as in
+    calculate_valid_touches.
+    """
+
+    def __init__(self, bars: List[int], members: List[int], min_gap_bars: int):
+        self._bars = bars
+        self._min_gap = min_gap_bars
+        self._prev: List[int] = [-1] * len(bars)
+        self._next: List[int] = [-1] * len(bars)
+        self.size = len(members)
+        self.valid_gaps = 0
+
+        # Link the members in swing order in O(n), without sorting them
+        included = [False] * len(bars)
+        for position in members:
+            included[position] = True
+        previous = -1
+        for position, member in enumerate(included):
+            if not member:
+                continue
+            self._prev[position] = previous
+            if previous >= 0:
+                self._next[previous] = position
+                self.valid_gaps += self._valid(previous, position)
+            previous = position
+
+    def _valid(self, earlier: int, later: int) -> bool:
+        return self._bars[later] - self._bars[earlier] >= self._min_gap
+
+    def remove(self, position: int) -> None:
+        before = self._prev[position]
+        after = self._next[position]
+
+        if before >= 0:
+            self.valid_gaps -= self._valid(before, position)
+            self._next[before] = after
+        if after >= 0:
+            self.valid_gaps -= self._valid(position, after)
+            self._prev[after] = before
+        if before >= 0 and after >= 0:
+            self.valid_gaps += self._valid(before, after)
+        self.size -= 1
+
 def calculate_valid_touches(zone_points_indexes: List[int], min_gap_bars: int) -> int:
     valid_touches = 0
     for i in range(0, len(zone_points_indexes) - 1):
@@ -21,6 +21,7 @@ from .broker_config import (
     MT5_BROKER_TIMEZONE,
     MT5_BROKER_UTC_OFFSET,
     get_broker_utc_offset,
+    get_broker_offset_transitions,
 )
 from .trading_config import (
     MT5_ORDER_COMMENT,
@@ -52,4 +53,5 @@ __all__ = [
     "MT5_BROKER_TIMEZONE",
     "MT5_BROKER_UTC_OFFSET",
     "get_broker_utc_offset",
+    "get_broker_offset_transitions",
 ]
@@ -3,8 +3,11 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
+import numpy as np
+
 
 # MT5 Config
 MT5_MAGIC_NUMBER: int = int(os.getenv("MT5_MAGIC_NUMBER", "123456"))
@@ -54,3 +57,51 @@ def get_broker_utc_offset(timestamp: datetime | None = None) -> int:
     except Exception:
         # Fallback to static offset if timezone lookup fails
         return MT5_BROKER_UTC_OFFSET
+
+
+def get_broker_offset_transitions(start_year: int, end_year: int) -> tuple[np.ndarray, np.ndarray]:
+    """Table of broker UTC-offset changes covering start_year..end_year.
+    
+    Lets callers convert whole timestamp columns with one searchsorted
+    instead of calling get_broker_utc_offset() per value.
+    
+    Returns:
+        (starts, offsets): epoch seconds at which each offset takes effect,
+        beginning with 1 January of start_year, and the offset in hours that
+        get_broker_utc_offset() reports from that second on. Read-only arrays.
+    """
+    return _offset_transitions(MT5_BROKER_TIMEZONE, start_year, end_year)
+
+
+@lru_cache(maxsize=32)
+def _offset_transitions(tz_name: str, start_year: int, end_year: int) -> tuple[np.ndarray, np.ndarray]:
+    # tz_name is part of the cache key; the offsets come from get_broker_utc_offset
+    def offset_at(seconds: int) -> int:
+        return get_broker_utc_offset(datetime.fromtimestamp(seconds, tz=timezone.utc))
+    
+    start = int(datetime(start_year, 1, 1, tzinfo=timezone.utc).timestamp())
+    end = int(datetime(end_year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+    starts = [start]
+    offsets = [offset_at(start)]
+    
+    # Sample once a day; bisect to the exact second where the offset changes
+    day = start
+    while day < end:
+        next_day = min(day + 86_400, end)
+        if offset_at(next_day) != offsets[-1]:
+            before, after = day, next_day
+            while after - before > 1:
+                middle = (before + after) // 2
+                if offset_at(middle) == offsets[-1]:
+                    before = middle
+                else:
+                    after = middle
+            starts.append(after)
+            offsets.append(offset_at(after))
+        day = next_day
+    
+    starts_array = np.array(starts, dtype=np.int64)
+    offsets_array = np.array(offsets, dtype=np.int64)
+    starts_array.flags.writeable = False
+    offsets_array.flags.writeable = False
+    return starts_array, offsets_array
@@ -2,7 +2,10 @@
 from dataclasses import dataclass
 from typing import Mapping
 
-import MetaTrader5 as mt5
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # MT5 is Windows-only; offline tools (e.g. cached replay) run without it
+    mt5 = None
 
 
 @dataclass(frozen=True)
@@ -47,12 +50,12 @@ FOREX_PAIRS = [
     "SGDJPY"
 ]
 
-# MT5 timeframes
+# MT5 timeframes (raw MT5 constant values are used when the package is absent)
 TIMEFRAMES = {
-    "1W": mt5.TIMEFRAME_W1,
-    "1D": mt5.TIMEFRAME_D1,
-    "4H": mt5.TIMEFRAME_H4,
-    "1H": mt5.TIMEFRAME_H1,
+    "1W": mt5.TIMEFRAME_W1 if mt5 else 32769,
+    "1D": mt5.TIMEFRAME_D1 if mt5 else 16408,
+    "4H": mt5.TIMEFRAME_H4 if mt5 else 16388,
+    "1H": mt5.TIMEFRAME_H1 if mt5 else 16385,
 }
 
 # Analysis parameters per timeframe
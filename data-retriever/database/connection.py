@@ -159,6 +159,17 @@ class DBConnectionManager:
                     cls._pool = None
                     cls._pool_details_logged = False
 
+    @classmethod
+    def discard_pool(cls) -> None:
+        """Forget the current pool without closing its connections.
+        
+        Used in child processes: connections inherited from a forked parent
+        belong to the parent and must not be closed or reused by the child.
+        """
+        with cls._pool_lock:
+            cls._pool = None
+            cls._pool_details_logged = False
+
     @classmethod
     def get_pool_stats(cls) -> dict:
         if not cls._pool:
@@ -10,7 +10,7 @@ Gate 4 — Obstacle clearance: distance_to_next_htf_obstacle_atr >= 1.0
 """
 
 from .validator import check_all_gates, GATES
-from .models import Gate, GateContext, GateResult, GateCheckResult
+from .models import Gate, GateContext, GateResult, GateCheckResult, GateThresholds
 from .time_of_day import TimeOfDayGate
 from .timeframe_conflict import TimeframeConflictGate
 from .htf_alignment import HTFAlignmentGate
@@ -25,6 +25,7 @@ __all__ = [
     "GateContext",
     "GateResult",
     "GateCheckResult",
+    "GateThresholds",
     # Gate implementations
     "TimeOfDayGate",
     "TimeframeConflictGate",
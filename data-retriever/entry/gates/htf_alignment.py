@@ -8,12 +8,6 @@ from typing import Optional
 
 from models import TrendDirection
 
-from .config import (
-    MAX_BULLISH_DAILY_POSITION,
-    MAX_BULLISH_WEEKLY_POSITION,
-    MIN_BEARISH_DAILY_POSITION,
-    MIN_BEARISH_WEEKLY_POSITION,
-)
 from .models import Gate, GateContext, GateResult
 
 
@@ -59,17 +53,18 @@ class HTFAlignmentGate(Gate):
     
     def check(self, ctx: GateContext) -> GateResult:
         is_bullish = ctx.direction == TrendDirection.BULLISH
+        thresholds = ctx.thresholds
         
         # Define checks based on direction
         if is_bullish:
             checks = [
-                (ctx.htf_range_position_daily, MAX_BULLISH_DAILY_POSITION, True, "daily", "Bullish"),
-                (ctx.htf_range_position_weekly, MAX_BULLISH_WEEKLY_POSITION, True, "weekly", "Bullish"),
+                (ctx.htf_range_position_daily, thresholds.max_bullish_daily_position, True, "daily", "Bullish"),
+                (ctx.htf_range_position_weekly, thresholds.max_bullish_weekly_position, True, "weekly", "Bullish"),
             ]
         else:
             checks = [
-                (ctx.htf_range_position_daily, MIN_BEARISH_DAILY_POSITION, False, "daily", "Bearish"),
-                (ctx.htf_range_position_weekly, MIN_BEARISH_WEEKLY_POSITION, False, "weekly", "Bearish"),
+                (ctx.htf_range_position_daily, thresholds.min_bearish_daily_position, False, "daily", "Bearish"),
+                (ctx.htf_range_position_weekly, thresholds.min_bearish_weekly_position, False, "weekly", "Bearish"),
             ]
         
         # Run all checks
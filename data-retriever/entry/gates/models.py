@@ -1,9 +1,18 @@
 """Gate models and protocol for signal filtering."""
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Optional
 
+from .config import (
+    EXCLUDED_CONFLICTED_TF,
+    MAX_BULLISH_DAILY_POSITION,
+    MAX_BULLISH_WEEKLY_POSITION,
+    MIN_BEARISH_DAILY_POSITION,
+    MIN_BEARISH_WEEKLY_POSITION,
+    MIN_OBSTACLE_DISTANCE_ATR,
+)
+
 
 @dataclass
 class GateResult:
@@ -33,6 +42,17 @@ class GateCheckResult:
         )
 
 
+@dataclass(frozen=True)
+class GateThresholds:
+    """Gate thresholds; the defaults are the production values from config."""
+    excluded_conflicted_tf: Optional[str] = EXCLUDED_CONFLICTED_TF
+    max_bullish_daily_position: float = MAX_BULLISH_DAILY_POSITION
+    max_bullish_weekly_position: float = MAX_BULLISH_WEEKLY_POSITION
+    min_bearish_daily_position: float = MIN_BEARISH_DAILY_POSITION
+    min_bearish_weekly_position: float = MIN_BEARISH_WEEKLY_POSITION
+    min_obstacle_distance_atr: float = MIN_OBSTACLE_DISTANCE_ATR
+
+
 @dataclass
 class GateContext:
     """Context data passed to all gates."""
@@ -43,6 +63,7 @@ class GateContext:
     htf_range_position_daily: Optional[float]
     htf_range_position_weekly: Optional[float]
     distance_to_next_htf_obstacle_atr: Optional[float]
+    thresholds: GateThresholds = field(default_factory=GateThresholds)
 
 
 class Gate(ABC):
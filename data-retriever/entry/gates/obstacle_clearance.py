@@ -3,7 +3,6 @@
 Distance to next HTF obstacle must be >= 1.0 ATR.
 """
 
-from .config import MIN_OBSTACLE_DISTANCE_ATR
 from .models import Gate, GateContext, GateResult
 
 
@@ -16,6 +15,7 @@ class ObstacleClearanceGate(Gate):
     
     def check(self, ctx: GateContext) -> GateResult:
         distance = ctx.distance_to_next_htf_obstacle_atr
+        min_distance = ctx.thresholds.min_obstacle_distance_atr
         
         if distance is None:
             return GateResult(
@@ -24,11 +24,11 @@ class ObstacleClearanceGate(Gate):
                 reason="Distance to HTF obstacle is NULL",
             )
         
-        if distance < MIN_OBSTACLE_DISTANCE_ATR:
+        if distance < min_distance:
             return GateResult(
                 passed=False,
                 gate_name=self.name,
-                reason=f"Obstacle at {distance:.2f} ATR, minimum {MIN_OBSTACLE_DISTANCE_ATR} required",
+                reason=f"Obstacle at {distance:.2f} ATR, minimum {min_distance} required",
             )
         
         return GateResult(passed=True, gate_name=self.name)
@@ -3,7 +3,6 @@
 Excludes signals where conflicted_tf == '4H'.
 """
 
-from .config import EXCLUDED_CONFLICTED_TF
 from .models import Gate, GateContext, GateResult
 
 
@@ -20,11 +19,12 @@ class TimeframeConflictGate(Gate):
             return GateResult(passed=True, gate_name=self.name)
         
         # Check if the conflicted TF is the excluded one
-        if ctx.conflicted_tf == EXCLUDED_CONFLICTED_TF:
+        excluded_tf = ctx.thresholds.excluded_conflicted_tf
+        if ctx.conflicted_tf == excluded_tf:
             return GateResult(
                 passed=False,
                 gate_name=self.name,
-                reason=f"{EXCLUDED_CONFLICTED_TF} timeframe conflicts with trade direction",
+                reason=f"{excluded_tf} timeframe conflicts with trade direction",
             )
         
         # Other conflicts (e.g., 1W) are allowed
@@ -5,7 +5,7 @@ from typing import List, Optional, Type
 
 from models import TrendDirection
 
-from .models import Gate, GateContext, GateCheckResult
+from .models import Gate, GateContext, GateCheckResult, GateThresholds
 from .time_of_day import TimeOfDayGate
 from .timeframe_conflict import TimeframeConflictGate
 from .htf_alignment import HTFAlignmentGate
@@ -29,6 +29,7 @@ def check_all_gates(
     htf_range_position_daily: Optional[float],
     htf_range_position_weekly: Optional[float],
     distance_to_next_htf_obstacle_atr: Optional[float],
+    thresholds: Optional[GateThresholds] = None,
 ) -> GateCheckResult:
     """
     Run all gates on a signal. Returns immediately on first failure.
@@ -41,6 +42,7 @@ def check_all_gates(
         htf_range_position_daily: Position within daily range (0-1)
         htf_range_position_weekly: Position within weekly range (0-1)
         distance_to_next_htf_obstacle_atr: Distance to next obstacle in ATR units
+        thresholds: Gate thresholds (production values from config when None)
         
     Returns:
         GateCheckResult indicating pass/fail and reason if failed
@@ -54,6 +56,7 @@ def check_all_gates(
         htf_range_position_daily=htf_range_position_daily,
         htf_range_position_weekly=htf_range_position_weekly,
         distance_to_next_htf_obstacle_atr=distance_to_next_htf_obstacle_atr,
+        thresholds=thresholds or GateThresholds(),
     )
     
     # Run each gate in sequence
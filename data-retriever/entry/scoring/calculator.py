@@ -15,6 +15,7 @@ def calculate_score(
     direction: TrendDirection,
     htf_range_position_daily: float,
     htf_range_position_weekly: float,
+    min_total_score: float = MIN_TOTAL_SCORE,
 ) -> ScoreResult:
     """
     Calculate total score and determine if it passes threshold.
@@ -23,6 +24,7 @@ def calculate_score(
         direction: Trade direction
         htf_range_position_daily: Position within daily range (0-1)
         htf_range_position_weekly: Position within weekly range (0-1)
+        min_total_score: Minimum total score to pass
         
     Returns:
         ScoreResult with all scores and pass/fail status
@@ -41,7 +43,7 @@ def calculate_score(
     total_score = htf_score + obstacle_score
     
     # Check threshold
-    passed = total_score >= MIN_TOTAL_SCORE
+    passed = total_score >= min_total_score
     
     return ScoreResult(
         htf_score=htf_score,
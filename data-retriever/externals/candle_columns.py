@@ -0,0 +1,107 @@
+"""Columnar candles backed by the MT5 rate record array.
+
+``copy_rates_*`` returns a NumPy structured array with one record per candle
+(time, open, high, low, close, tick_volume, spread, real_volume). CandleColumns
+keeps that array as the backing buffer: columns are zero-copy field views,
+head/tail/time slices are views too, and a DataFrame is only built when a
+caller asks for one.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+
+def _epoch_seconds(value: datetime) -> int:
+    """Whole epoch seconds at or before `value` (naive values are UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return math.floor(value.timestamp())
+
+
+class CandleColumns:
+    """Zero-copy column access over a structured array of MT5 rates.
+
+    The ``time`` field holds int64 epoch seconds and is treated as UTC once
+    shift_times() has removed the broker offset.
+    """
+
+    def __init__(self, records: np.ndarray):
+        self._records = records
+
+    @property
+    def records(self) -> np.ndarray:
+        """The backing structured array."""
+        return self._records
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self._records.dtype.names
+
+    @property
+    def empty(self) -> bool:
+        return len(self._records) == 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Field view; ``time`` is returned as datetime64[s] (UTC)."""
+        if name == "time":
+            return self.times
+        return self._records[name]
+
+    @property
+    def time_seconds(self) -> np.ndarray:
+        """Candle open times as int64 epoch seconds (view)."""
+        return self._records["time"]
+
+    @property
+    def times(self) -> np.ndarray:
+        """Candle open times as datetime64[s] (view)."""
+        return self._records["time"].view("datetime64[s]")
+
+    def shift_times(self, offset_seconds: int | np.ndarray) -> None:
+        """Subtract a broker offset (scalar or per candle) from the time field in place."""
+        if not self._records.flags.writeable:
+            self._records = self._records.copy()
+        self._records["time"] -= offset_seconds
+
+    # -------------------------------------------------------------------------
+    # Slicing (views into the same buffer)
+    # -------------------------------------------------------------------------
+
+    def head(self, count: int) -> "CandleColumns":
+        return CandleColumns(self._records[:max(count, 0)])
+
+    def tail(self, count: int) -> "CandleColumns":
+        return CandleColumns(self._records[max(len(self._records) - count, 0):])
+
+    def up_to(self, cutoff: datetime) -> "CandleColumns":
+        """Candles with time <= cutoff (times are ascending)."""
+        end = np.searchsorted(self.time_seconds, _epoch_seconds(cutoff), side="right")
+        return CandleColumns(self._records[:end])
+
+    def after(self, start: datetime) -> "CandleColumns":
+        """Candles with time > start (times are ascending)."""
+        first = np.searchsorted(self.time_seconds, _epoch_seconds(start), side="right")
+        return CandleColumns(self._records[first:])
+
+    # -------------------------------------------------------------------------
+    # DataFrame adapter
+    # -------------------------------------------------------------------------
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build a DataFrame with a tz-aware UTC ``time`` column.
+
+        Each field is copied once into a contiguous array that the frame
+        then uses without further copies.
+        """
+        data = {"time": pd.to_datetime(self.time_seconds, unit="s", utc=True)}
+        for name in self.columns:
+            if name != "time":
+                data[name] = np.ascontiguousarray(self._records[name])
+        return pd.DataFrame(data, copy=False)
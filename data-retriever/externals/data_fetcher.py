@@ -8,10 +8,12 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from constants import DATA_ERROR_MSG
-from utils.candles import last_expected_close_time, trim_to_closed_candles
+from utils.candles import last_expected_close_time
+from externals.candle_columns import CandleColumns
 from externals.meta_trader import mt5_lock, initialize_mt5, mt5
 from logger import get_logger
 
@@ -35,6 +37,9 @@ def fetch_data(
     beyond the last expected close for that timeframe are dropped to ensure only
     closed candles are returned.
     
+    DataFrame adapter over fetch_candle_columns() for callers that work
+    with frames.
+    
     Args:
         symbol: Forex pair symbol (e.g., "EURUSD")
         timeframe: MT5 timeframe constant (e.g., 16385 for H1)
@@ -45,19 +50,47 @@ def fetch_data(
         end_date: If provided, fetches `lookback` candles ending at this date.
                   Used for historical/replay data fetching.
     """
-    df = _fetch_from_mt5(symbol, timeframe, lookback, end_date=end_date)
+    candles = fetch_candle_columns(
+        symbol,
+        timeframe,
+        lookback,
+        timeframe_label=timeframe_label,
+        now=now,
+        closed_candles_only=closed_candles_only,
+        end_date=end_date,
+    )
+    if candles is None:
+        return None
+    return candles.to_frame()
+
+
+def fetch_candle_columns(
+    symbol: str,
+    timeframe: int | str,
+    lookback: int,
+    *,
+    timeframe_label: str | None = None,
+    now: datetime | None = None,
+    closed_candles_only: bool = True,
+    end_date: datetime | None = None,
+) -> Optional[CandleColumns]:
+    """Fetch OHLC data from MT5 as columns over the MT5 record array.
+    
+    Same arguments and trimming as fetch_data(), but no DataFrame is built:
+    times are converted to UTC in place and trimming returns views.
+    """
+    candles = _fetch_from_mt5(symbol, timeframe, lookback, end_date=end_date)
 
-    if df is None or timeframe_label is None:
-        return df
+    if candles is None or timeframe_label is None:
+        return candles
 
     if closed_candles_only:
         cutoff_time = last_expected_close_time(
             timeframe_label, now=now or datetime.now(timezone.utc)
         )
-        trimmed = trim_to_closed_candles(df, timeframe_label, now=cutoff_time)
-        return trimmed
+        return candles.up_to(cutoff_time)
 
-    return df
+    return candles
 
 
 def _fetch_from_mt5(
@@ -66,7 +99,7 @@ def _fetch_from_mt5(
     lookback: int,
     *,
     end_date: datetime | None = None,
-) -> Optional[pd.DataFrame]:
+) -> Optional[CandleColumns]:
     """Fetch candles from MT5.
     
     Args:
@@ -137,8 +170,8 @@ def _fetch_from_mt5(
             logger.error("%s for %s on TF %s", DATA_ERROR_MSG, symbol, timeframe_mt5)
             return None
 
-    # DataFrame processing outside the lock
-    df = pd.DataFrame(rates)
+    # Column processing outside the lock
+    candles = CandleColumns(rates)
     
     # MT5 timestamps are in BROKER LOCAL TIME (EET/EEST, UTC+2/+3)
     # but encoded as Unix timestamps without proper UTC conversion.
@@ -147,43 +180,34 @@ def _fetch_from_mt5(
     if is_historical:
         # For historical data, calculate offset PER CANDLE to handle DST boundaries
         # This ensures candles from summer (UTC+3) and winter (UTC+2) are both correct
-        df["time"] = df["time"].apply(_convert_mt5_timestamp_to_utc)
+        candles.shift_times(_broker_offset_seconds(candles.time_seconds))
     else:
         # For live data, all candles are recent - use single current offset
         from configuration.broker_config import get_broker_utc_offset
         current_offset = get_broker_utc_offset()
-        broker_offset_seconds = current_offset * 3600
-        df["time"] = pd.to_datetime(df["time"] - broker_offset_seconds, unit="s", utc=True)
+        candles.shift_times(current_offset * 3600)
     
     # If we used date range, trim to requested lookback
-    if is_historical and len(df) > lookback:
-        df = df.tail(lookback)
+    if is_historical and len(candles) > lookback:
+        candles = candles.tail(lookback)
     
-    return df
+    return candles
 
 
-def _convert_mt5_timestamp_to_utc(mt5_timestamp: int) -> datetime:
-    """Convert MT5 timestamp to proper UTC datetime.
+def _broker_offset_seconds(mt5_timestamps: np.ndarray) -> np.ndarray:
+    """Broker UTC offset in seconds for each MT5 timestamp.
     
-    MT5 timestamps are Unix timestamps but in BROKER LOCAL TIME (not UTC).
-    This function:
-    1. Interprets the timestamp as if it were UTC
-    2. Determines what the broker offset was at that time (handles DST)
-    3. Subtracts the offset to get true UTC
+    The offset in effect at each timestamp read as UTC (DST included), found
+    with one searchsorted into the DST transition table for the years spanned.
     """
-    # First, interpret as naive datetime (as if UTC)
-    # Using fromtimestamp with UTC instead of deprecated utcfromtimestamp
-    naive_dt = datetime.fromtimestamp(mt5_timestamp, tz=timezone.utc).replace(tzinfo=None)
-    
-    # Create a UTC datetime to pass to offset calculator
-    assumed_utc = naive_dt.replace(tzinfo=timezone.utc)
+    from configuration.broker_config import get_broker_offset_transitions
     
-    # Get the broker offset that was in effect at this timestamp
-    # This correctly handles DST transitions
-    from configuration.broker_config import get_broker_utc_offset
-    offset_hours = get_broker_utc_offset(assumed_utc)
+    seconds = np.asarray(mt5_timestamps, dtype=np.int64)
+    if len(seconds) == 0:
+        return np.empty(0, dtype=np.int64)
     
-    # Subtract the offset to get true UTC
-    true_utc = assumed_utc - timedelta(hours=offset_hours)
+    first_year = datetime.fromtimestamp(int(seconds.min()), tz=timezone.utc).year
+    last_year = datetime.fromtimestamp(int(seconds.max()), tz=timezone.utc).year
+    starts, offsets = get_broker_offset_transitions(first_year, last_year)
     
-    return true_utc
+    return offsets[np.searchsorted(starts, seconds, side="right") - 1] * 3600
@@ -13,7 +13,7 @@ from configuration import (
 from logger import get_logger
 
 logger = get_logger(__name__)
-from externals.data_fetcher import fetch_data
+from externals.data_fetcher import fetch_candle_columns
 from trend import analyze_single_symbol_trend
 
 
@@ -29,7 +29,7 @@ def _process_symbol_pipeline(
     """Fetch and analyze data for a single symbol in its own thread."""
     try:
         # 1. Fetch
-        data = fetch_data(
+        data = fetch_candle_columns(
             symbol,
             broker_timeframe,
             lookback,
@@ -41,14 +41,15 @@ def _process_symbol_pipeline(
             return
 
         # 2. Slice Data & Run Trend Analysis
-        trend_data = data.tail(trend_lookback)
+        # Slices are views; a frame is built only for the rows each analysis needs
+        trend_data = data.tail(trend_lookback).to_frame()
         analyze_single_symbol_trend(symbol, timeframe, trend_data)
 
         # 3. Slice Data & Run AOI Analysis (if requested)
         if include_aoi and aoi_lookback:
             # AOI usually needs a different lookback or the same, but we slice explicitly
             # to match original logic where we had specific subsets.
-            aoi_data = data.tail(aoi_lookback)
+            aoi_data = data.tail(aoi_lookback).to_frame()
             analyze_single_symbol_aoi(symbol, timeframe, aoi_data)
 
     except Exception as exc:
@@ -0,0 +1,392 @@
+"""Persistent on-disk candle cache for replay.
+
+Keeps one columnar NPZ file per (symbol, timeframe) holding every candle
+fetched so far. Requests that fall inside the cached range are served from
+disk; only a missing head (older history) or tail (newer candles) is fetched
+from the data source and appended. Rerunning the same replay window needs no
+broker calls at all, so cached replays also run where MT5 is not available.
+
+Each file is owned by a single symbol, so parallel replay workers (one per
+symbol) never write the same file.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from logger import get_logger
+
+from .config import MT5_INTERVALS, TIMEFRAME_HOURS, CANDLE_FETCH_BUFFER, FETCH_PAGE_CANDLES
+
+logger = get_logger(__name__)
+
+_NS_PER_HOUR = 3600 * 10**9
+
+# Reverse lookup: MT5 interval constant -> timeframe label (e.g. 16385 -> "1H")
+_INTERVAL_LABELS = {interval: label for label, interval in MT5_INTERVALS.items()}
+
+
+def _to_epoch_ns(value) -> int:
+    """Convert a datetime-like value to int64 epoch nanoseconds (naive = UTC)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(timezone.utc).tz_localize(None)
+    return int(ts.value)
+
+
+@dataclass
+class CachedSeries:
+    """Cached candles for one (symbol, timeframe) plus coverage metadata."""
+
+    columns: dict[str, np.ndarray]
+    covered_until_ns: int      # Source was queried for everything up to here
+    head_exhausted: bool       # Source has no history before the first candle
+
+    @property
+    def time_ns(self) -> np.ndarray:
+        return self.columns["time"]
+
+    def __len__(self) -> int:
+        return len(self.columns["time"])
+
+
+class CandleCache:
+    """Columnar candle cache rooted at a directory.
+
+    Wraps a replay fetch function ``(symbol, interval, lookback, end_date)``
+    returning a DataFrame or CandleColumns, and returns candles as a
+    DataFrame, reading from and extending the on-disk cache instead of
+    always hitting the data source.
+    """
+
+    def __init__(self, cache_dir: str):
+        self._dir = cache_dir
+        self._series: dict[tuple[str, str], CachedSeries] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(
+        self,
+        symbol: str,
+        interval: int,
+        lookback: int,
+        end_date: datetime,
+        fetch_func: Callable,
+    ) -> Optional[pd.DataFrame]:
+        """Return up to `lookback` candles with time <= end_date.
+
+        Only the parts of the range the cache has never seen are requested
+        from `fetch_func`, at most FETCH_PAGE_CANDLES per request.
+        """
+        label = _INTERVAL_LABELS.get(int(interval))
+        if label is None:
+            # Unknown interval - nothing sensible to key the cache on
+            return fetch_func(symbol, interval, lookback, end_date)
+
+        end_ns = _to_epoch_ns(end_date)
+        series = self._load(symbol, label)
+
+        if series is None or not len(series):
+            # Nothing cached yet (or only still-forming candles were fetched)
+            fresh, exhausted = self._fetch_backwards(symbol, interval, lookback, end_date, fetch_func)
+            if fresh is None or not len(fresh["time"]):
+                return None
+            series = self._store(
+                symbol, label, None, fresh,
+                covered_until_ns=end_ns,
+                head_exhausted=exhausted,
+            )
+        else:
+            if end_ns > series.covered_until_ns:
+                series = self._extend_tail(symbol, label, interval, series, end_date, fetch_func)
+            if not series.head_exhausted:
+                available = int(np.searchsorted(series.time_ns, end_ns, side="right"))
+                if available < lookback:
+                    series = self._extend_head(
+                        symbol, label, interval, series, lookback, end_ns, fetch_func
+                    )
+
+        return self._slice(series, end_ns, lookback)
+
+    # -------------------------------------------------------------------------
+    # Extension
+    # -------------------------------------------------------------------------
+
+    def _extend_tail(
+        self,
+        symbol: str,
+        label: str,
+        interval: int,
+        series: CachedSeries,
+        end_date: datetime,
+        fetch_func: Callable,
+    ) -> CachedSeries:
+        """Fetch candles newer than the cached range and append them."""
+        end_ns = _to_epoch_ns(end_date)
+        gap_start_ns = int(series.time_ns[-1]) if len(series) else series.covered_until_ns
+        count = _bars_between(gap_start_ns, end_ns, label) + CANDLE_FETCH_BUFFER
+
+        fresh, _ = self._fetch_backwards(
+            symbol, interval, count, end_date, fetch_func, stop_ns=gap_start_ns
+        )
+        if fresh is None:
+            # Source unavailable: serve what we have, retry next time
+            logger.warning(f"  ⚠️ Candle cache: could not extend {symbol} {label} tail")
+            return series
+
+        return self._store(
+            symbol, label, series, fresh,
+            covered_until_ns=end_ns,
+            head_exhausted=series.head_exhausted,
+        )
+
+    def _extend_head(
+        self,
+        symbol: str,
+        label: str,
+        interval: int,
+        series: CachedSeries,
+        lookback: int,
+        end_ns: int,
+        fetch_func: Callable,
+    ) -> CachedSeries:
+        """Fetch history older than the first cached candle and prepend it."""
+        first_ns = int(series.time_ns[0])
+        count = lookback + max(_bars_between(end_ns, first_ns, label), 0) + CANDLE_FETCH_BUFFER
+        first_time = pd.Timestamp(first_ns, tz=timezone.utc).to_pydatetime()
+
+        fresh, exhausted = self._fetch_backwards(
+            symbol, interval, count, first_time, fetch_func, before_ns=first_ns
+        )
+        if fresh is None:
+            logger.warning(f"  ⚠️ Candle cache: could not extend {symbol} {label} head")
+            return series
+
+        return self._store(
+            symbol, label, series, fresh,
+            covered_until_ns=series.covered_until_ns,
+            head_exhausted=exhausted,
+        )
+
+    def _fetch_backwards(
+        self,
+        symbol: str,
+        interval: int,
+        count: int,
+        end_date: datetime,
+        fetch_func: Callable,
+        before_ns: Optional[int] = None,
+        stop_ns: Optional[int] = None,
+    ) -> tuple[Optional[dict[str, np.ndarray]], bool]:
+        """Fetch up to `count` candles ending at end_date, FETCH_PAGE_CANDLES per request.
+
+        Pages go backwards, each ending at the oldest candle received so far,
+        until `count` candles arrived or a page reaches stop_ns. Only candles
+        older than before_ns (default: all up to end_date) are kept.
+
+        The source counts as exhausted only when a page brings no candle older
+        than the ones already received. A short page is not enough: brokers
+        cap and truncate responses.
+
+        Returns:
+            (columns, exhausted); columns is None if any request failed
+        """
+        oldest_ns = before_ns if before_ns is not None else _to_epoch_ns(end_date) + 1
+        pages: list[dict[str, np.ndarray]] = []
+        remaining = count
+        page_end = end_date
+        exhausted = False
+        while remaining > 0:
+            # One extra candle: the page ends at a candle that is already known
+            request = min(remaining + (1 if pages or before_ns is not None else 0), FETCH_PAGE_CANDLES)
+            df = fetch_func(symbol, interval, request, page_end)
+            if df is None:
+                return None, False
+
+            fresh = _frame_to_columns(df)
+            keep = fresh["time"] < oldest_ns
+            fresh = {name: values[keep] for name, values in fresh.items()}
+            if not len(fresh["time"]):
+                exhausted = True
+                if not pages:
+                    pages.append(fresh)  # Keep the column layout
+                break
+
+            pages.append(fresh)
+            remaining -= len(fresh["time"])
+            oldest_ns = int(fresh["time"][0])
+            if stop_ns is not None and oldest_ns <= stop_ns:
+                break
+            page_end = pd.Timestamp(oldest_ns, tz=timezone.utc).to_pydatetime()
+
+        columns = pages[0]
+        for page in pages[1:]:
+            columns = _merge_columns(columns, page)
+        return columns, exhausted
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _path(self, symbol: str, label: str) -> str:
+        return os.path.join(self._dir, f"{symbol}_{label}.npz")
+
+    def _load(self, symbol: str, label: str) -> Optional[CachedSeries]:
+        key = (symbol, label)
+        if key in self._series:
+            return self._series[key]
+
+        path = self._path(symbol, label)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = data["__meta__"]
+                columns = {
+                    name: data[name] for name in data.files if name != "__meta__"
+                }
+        except Exception as e:
+            logger.warning(f"  ⚠️ Candle cache: ignoring unreadable {path}: {e}")
+            return None
+
+        series = CachedSeries(
+            columns=columns,
+            covered_until_ns=int(meta[0]),
+            head_exhausted=bool(meta[1]),
+        )
+        self._series[key] = series
+        return series
+
+    def _store(
+        self,
+        symbol: str,
+        label: str,
+        existing: Optional[CachedSeries],
+        fresh: dict[str, np.ndarray],
+        covered_until_ns: int,
+        head_exhausted: bool,
+    ) -> CachedSeries:
+        """Merge fetched candles into the cached series and persist it."""
+        # Never mark still-forming candles as covered
+        now_ns = _to_epoch_ns(datetime.now(timezone.utc))
+        last_closed_ns = now_ns - TIMEFRAME_HOURS[label] * _NS_PER_HOUR
+        covered_until_ns = min(covered_until_ns, last_closed_ns)
+
+        keep = fresh["time"] <= last_closed_ns
+        fresh = {name: values[keep] for name, values in fresh.items()}
+
+        if existing is not None and len(existing):
+            columns = _merge_columns(existing.columns, fresh)
+            covered_until_ns = max(covered_until_ns, existing.covered_until_ns)
+        else:
+            columns = fresh
+
+        series = CachedSeries(
+            columns=columns,
+            covered_until_ns=covered_until_ns,
+            head_exhausted=head_exhausted,
+        )
+        self._series[(symbol, label)] = series
+        self._write(self._path(symbol, label), series)
+        return series
+
+    def _write(self, path: str, series: CachedSeries) -> None:
+        """Write atomically so an interrupted run never leaves a torn file."""
+        meta = np.array([series.covered_until_ns, int(series.head_exhausted)], dtype=np.int64)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, __meta__=meta, **series.columns)
+        os.replace(tmp_path, path)
+
+    def _slice(self, series: CachedSeries, end_ns: int, lookback: int) -> Optional[pd.DataFrame]:
+        end = int(np.searchsorted(series.time_ns, end_ns, side="right"))
+        start = max(end - lookback, 0)
+        if end <= start:
+            return None
+        return _columns_to_frame(series.columns, start, end)
+
+
+def _bars_between(start_ns: int, end_ns: int, label: str) -> int:
+    """Upper bound on the number of bars of `label` between two times."""
+    hours = (end_ns - start_ns) / _NS_PER_HOUR
+    return int(math.ceil(hours / TIMEFRAME_HOURS[label])) + 1
+
+
+def _frame_to_columns(df) -> dict[str, np.ndarray]:
+    """Convert fetched candles to sorted, de-duplicated column arrays.
+    
+    Accepts a DataFrame or CandleColumns (datetime64 UTC time field).
+    """
+    times = df["time"]
+    if not isinstance(times, pd.Series):
+        time_ns = np.asarray(times).astype("datetime64[ns]").view(np.int64)
+    else:
+        if getattr(times.dt, "tz", None) is not None:
+            times = times.dt.tz_convert(timezone.utc).dt.tz_localize(None)
+        time_ns = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+    order = np.argsort(time_ns, kind="stable")
+    time_ns = time_ns[order]
+    unique = np.r_[True, time_ns[1:] != time_ns[:-1]] if len(time_ns) else np.empty(0, bool)
+
+    columns = {"time": time_ns[unique]}
+    for name in df.columns:
+        if name == "time":
+            continue
+        values = np.asarray(df[name])
+        if values.dtype == object:
+            continue  # Only numeric columns are cached
+        columns[name] = values[order][unique]
+    return columns
+
+
+def _merge_columns(
+    existing: dict[str, np.ndarray],
+    fresh: dict[str, np.ndarray],
+) -> dict[str, np.ndarray]:
+    """Union two column sets by time; fresh rows win on duplicate times."""
+    names = [name for name in existing if name in fresh]
+    combined_time = np.concatenate([fresh["time"], existing["time"]])
+    # Stable sort keeps fresh rows ahead of cached rows with the same time
+    order = np.argsort(combined_time, kind="stable")
+    sorted_time = combined_time[order]
+    unique = np.r_[True, sorted_time[1:] != sorted_time[:-1]] if len(sorted_time) else np.empty(0, bool)
+
+    merged = {}
+    for name in names:
+        values = np.concatenate([fresh[name], existing[name]])
+        merged[name] = values[order][unique]
+    return merged
+
+
+def _columns_to_frame(columns: dict[str, np.ndarray], start: int, end: int) -> pd.DataFrame:
+    data = {"time": pd.to_datetime(columns["time"][start:end], unit="ns", utc=True)}
+    for name, values in columns.items():
+        if name != "time":
+            data[name] = values[start:end]
+    return pd.DataFrame(data)
+
+
+def create_cached_candle_fetcher(fetch_func: Callable, cache_dir: str) -> Callable:
+    """Wrap a replay fetch function with the on-disk candle cache.
+
+    Returns a function with the same signature:
+    (symbol, interval, lookback, end_date) -> DataFrame
+    """
+    cache = CandleCache(cache_dir)
+
+    def fetcher(
+        symbol: str,
+        interval: int,
+        lookback: int,
+        end_date: datetime,
+    ) -> Optional[pd.DataFrame]:
+        return cache.fetch(symbol, interval, lookback, end_date, fetch_func)
+
+    return fetcher
@@ -7,12 +7,14 @@ with no API calls during replay iteration.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 
+from logger import get_logger
+
 from .config import (
     LOOKBACK_4H,
     LOOKBACK_1D,
@@ -26,7 +28,16 @@ from .config import (
     TIMEFRAME_1W,
     MT5_INTERVALS,
     CANDLE_FETCH_BUFFER,
+    CANDLE_CACHE_DIR,
+    FETCH_PAGE_CANDLES,
 )
+from .candle_cache import create_cached_candle_fetcher
+from .feature_store import FeatureStore
+
+if TYPE_CHECKING:
+    from .pre_entry_context import PreEntryFeatureSeries
+
+logger = get_logger(__name__)
 
 
 def get_broker_intervals() -> dict:
@@ -34,30 +45,211 @@ def get_broker_intervals() -> dict:
     return MT5_INTERVALS
 
 
-@dataclass
+def _to_epoch_ns(value) -> int:
+    """Convert a datetime-like value to int64 epoch nanoseconds (UTC).
+    
+    Naive values are interpreted as UTC, matching how candle times are stored.
+    """
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(timezone.utc).tz_localize(None)
+    return int(ts.value)
+
+
+def _time_column_to_ns(times: pd.Series) -> np.ndarray:
+    """Convert a candle time column to a contiguous int64 epoch-ns array (UTC)."""
+    if getattr(times.dt, "tz", None) is not None:
+        times = times.dt.tz_convert(timezone.utc).dt.tz_localize(None)
+    return np.ascontiguousarray(
+        times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    )
+
+
+def _utc_time_column(time_ns: np.ndarray) -> pd.Series:
+    """tz-aware UTC time column over an int64 epoch-ns array.
+    
+    pandas has no public constructor that wraps UTC epoch values without
+    copying them, so the private one is used when it exists.
+    """
+    values = time_ns.view("datetime64[ns]")
+    try:
+        array = pd.arrays.DatetimeArray._simple_new(values, dtype=pd.DatetimeTZDtype("ns", "UTC"))
+    except (AttributeError, TypeError):
+        return pd.Series(values).dt.tz_localize("UTC")
+    return pd.Series(array, copy=False)
+
+
+def _page_time_ns(page) -> np.ndarray:
+    """Candle times of a fetched page (DataFrame or CandleColumns) as epoch ns."""
+    if isinstance(page, pd.DataFrame):
+        return _time_column_to_ns(page["time"])
+    return page.time_seconds.astype(np.int64) * 1_000_000_000
+
+
 class TimeframeCandles:
-    """Container for candles of a single timeframe."""
+    """Container for candles of a single timeframe.
+    
+    Candles are held column-wise: an int64 epoch-ns time array plus float64
+    OHLC arrays. Time lookups are binary searches over the sorted time column,
+    and slices are returned as views rather than copies.
+    
+    `candles` may be a DataFrame or CandleColumns straight from the fetcher.
+    CandleColumns fill the arrays directly; the DataFrame adapter (`candles`)
+    is then only built the first time a caller asks for it.
+    """
+    
+    def __init__(self, timeframe: str, candles=None) -> None:
+        self.timeframe = timeframe
+        self._frame: Optional[pd.DataFrame] = None
+        # Non-OHLC fields (tick_volume, spread, ...) for a lazily built frame
+        self._extra: dict[str, np.ndarray] = {}
+        
+        if candles is None:
+            candles = pd.DataFrame()
+        if isinstance(candles, pd.DataFrame):
+            self._init_from_frame(candles)
+        else:
+            self._init_from_columns(candles)
+        
+        # (window, length) -> windowed ATR series, filled on first use
+        self._atr_series: dict[tuple[int, int], np.ndarray] = {}
     
-    timeframe: str
-    candles: pd.DataFrame = field(default_factory=pd.DataFrame)
+    def _init_from_frame(self, frame: pd.DataFrame) -> None:
+        if not frame.empty and "time" in frame.columns:
+            # MT5 and the candle cache deliver ascending times; skip the sort copy
+            if not frame["time"].is_monotonic_increasing:
+                frame = frame.sort_values("time")
+            if not frame.index.equals(pd.RangeIndex(len(frame))):
+                frame = frame.reset_index(drop=True)
+            self._time_ns = _time_column_to_ns(frame["time"])
+        else:
+            self._time_ns = np.empty(0, dtype=np.int64)
+        self._frame = frame
+        
+        self._columns: dict[str, np.ndarray] = {}
+        for column in ("open", "high", "low", "close"):
+            if column in frame.columns:
+                self._columns[column] = np.ascontiguousarray(
+                    frame[column].to_numpy(dtype=np.float64)
+                )
+            else:
+                # Missing prices read as NaN, never as uninitialized memory
+                self._columns[column] = np.full(len(self._time_ns), np.nan)
     
-    def __post_init__(self) -> None:
-        if not self.candles.empty and "time" in self.candles.columns:
-            self.candles = self.candles.sort_values("time").reset_index(drop=True)
+    def _init_from_columns(self, columns) -> None:
+        """Fill the arrays from CandleColumns without going through a frame."""
+        records = columns.records
+        time_seconds = columns.time_seconds
+        if len(time_seconds) > 1 and not np.all(time_seconds[1:] >= time_seconds[:-1]):
+            order = np.argsort(time_seconds, kind="stable")
+            records, time_seconds = records[order], time_seconds[order]
+        self._time_ns = time_seconds.astype(np.int64) * 1_000_000_000
+        
+        self._columns = {}
+        for name in columns.columns:
+            if name == "time":
+                continue
+            if name in ("open", "high", "low", "close"):
+                self._columns[name] = np.ascontiguousarray(records[name], dtype=np.float64)
+            else:
+                self._extra[name] = np.ascontiguousarray(records[name])
+        for column in ("open", "high", "low", "close"):
+            if column not in self._columns:
+                # Missing prices read as NaN, never as uninitialized memory
+                self._columns[column] = np.full(len(self._time_ns), np.nan)
+    
+    @classmethod
+    def from_arrays(
+        cls,
+        timeframe: str,
+        time_ns: np.ndarray,
+        opens: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+    ) -> "TimeframeCandles":
+        """Wrap existing column arrays (e.g. shared memory) without copying them.
+        
+        time_ns must be ascending int64 epoch-ns (UTC) and the OHLC arrays
+        contiguous float64 of the same length. The frame adapter uses the
+        same buffers and has only the time and OHLC columns.
+        """
+        candles = cls.__new__(cls)
+        candles.timeframe = timeframe
+        candles._frame = None
+        candles._extra = {}
+        candles._time_ns = time_ns
+        candles._columns = {"open": opens, "high": highs, "low": lows, "close": closes}
+        candles._atr_series = {}
+        return candles
+    
+    @property
+    def candles(self) -> pd.DataFrame:
+        """DataFrame adapter over the column arrays, built on first access."""
+        if self._frame is None:
+            data = {"time": _utc_time_column(self._time_ns)}
+            data.update(self._columns)
+            data.update(self._extra)
+            self._frame = pd.DataFrame(data, copy=False)
+        return self._frame
     
     @property
     def is_empty(self) -> bool:
-        return self.candles.empty
+        return len(self._time_ns) == 0
+    
+    # -------------------------------------------------------------------------
+    # Columnar access
+    # -------------------------------------------------------------------------
+    
+    @property
+    def time_ns(self) -> np.ndarray:
+        """Candle open times as int64 epoch nanoseconds (UTC), ascending."""
+        return self._time_ns
+    
+    @property
+    def opens(self) -> np.ndarray:
+        return self._columns["open"]
+    
+    @property
+    def highs(self) -> np.ndarray:
+        return self._columns["high"]
+    
+    @property
+    def lows(self) -> np.ndarray:
+        return self._columns["low"]
+    
+    @property
+    def closes(self) -> np.ndarray:
+        return self._columns["close"]
+    
+    def count_up_to(self, as_of_time: datetime) -> int:
+        """Return the number of candles where time <= as_of_time."""
+        if self.is_empty:
+            return 0
+        return int(np.searchsorted(self._time_ns, _to_epoch_ns(as_of_time), side="right"))
+    
+    def count_before(self, as_of_time: datetime) -> int:
+        """Return the number of candles where time < as_of_time."""
+        if self.is_empty:
+            return 0
+        return int(np.searchsorted(self._time_ns, _to_epoch_ns(as_of_time), side="left"))
+    
+    # -------------------------------------------------------------------------
+    # DataFrame-compatible access
+    # -------------------------------------------------------------------------
     
     def get_candles_up_to(self, as_of_time: datetime) -> pd.DataFrame:
-        """Return candles where time <= as_of_time (closed candles only)."""
+        """Return candles where time <= as_of_time (closed candles only).
+        
+        The result is a positional slice of the stored frame, not a copy.
+        """
         if self.is_empty:
             return pd.DataFrame()
-        return self.candles[self.candles["time"] <= as_of_time].copy()
+        return self.candles.iloc[:self.count_up_to(as_of_time)]
     
     def get_candle_at_index(self, index: int) -> Optional[pd.Series]:
         """Get candle at specific index (0-based)."""
-        if self.is_empty or index < 0 or index >= len(self.candles):
+        if self.is_empty or index < 0 or index >= len(self):
             return None
         return self.candles.iloc[index]
     
@@ -67,7 +259,7 @@ class TimeframeCandles:
             return pd.DataFrame()
         start = start_index + 1
         end = start + count
-        return self.candles.iloc[start:end].copy()
+        return self.candles.iloc[start:end]
     
     def find_index_by_time(self, target_time: datetime) -> Optional[int]:
         """Find index of candle with matching time.
@@ -78,41 +270,44 @@ class TimeframeCandles:
         if self.is_empty:
             return None
         
-        # Normalize target_time to naive UTC
-        if target_time.tzinfo is not None:
-            target_utc = target_time.replace(tzinfo=None) if target_time.utcoffset().total_seconds() == 0 else target_time.astimezone(timezone.utc).replace(tzinfo=None)
-        else:
-            target_utc = target_time
-        
-        # Check if candle times are timezone-aware
-        first_candle_time = self.candles.iloc[0]["time"]
-        candle_times_are_tz_aware = hasattr(first_candle_time, 'tzinfo') and first_candle_time.tzinfo is not None
-        
-        if candle_times_are_tz_aware:
-            # Convert candle times to naive UTC for comparison
-            candle_times_utc = self.candles["time"].apply(
-                lambda t: t.replace(tzinfo=None) if t.utcoffset().total_seconds() == 0 else t.astimezone(timezone.utc).replace(tzinfo=None)
-            )
-            matches = self.candles[candle_times_utc == target_utc]
-        else:
-            # Candle times are already naive - compare directly
-            matches = self.candles[self.candles["time"] == target_utc]
-        
-        if matches.empty:
+        target_ns = _to_epoch_ns(target_time)
+        idx = int(np.searchsorted(self._time_ns, target_ns, side="left"))
+        if idx >= len(self._time_ns) or self._time_ns[idx] != target_ns:
             return None
-        return int(matches.index[0])
+        return idx
     
     def get_last_closed_index(self, as_of_time: datetime) -> Optional[int]:
         """Return index of the last candle where time <= as_of_time."""
-        if self.is_empty:
+        count = self.count_up_to(as_of_time)
+        if count == 0:
             return None
-        closed = self.candles[self.candles["time"] <= as_of_time]
-        if closed.empty:
-            return None
-        return int(closed.index[-1])
+        return count - 1
+    
+    # -------------------------------------------------------------------------
+    # Indicators
+    # -------------------------------------------------------------------------
+    
+    def atr_series(self, window: int, length: int = 14) -> np.ndarray:
+        """ATR of the `window` candles ending at every index.
+        
+        Element i is the same value as calculate_atr() on that slice. The
+        series is computed once per (window, length).
+        """
+        key = (window, length)
+        series = self._atr_series.get(key)
+        if series is None:
+            from utils.indicators import windowed_atr_series
+            
+            series = windowed_atr_series(self.highs, self.lows, self.closes, window, length)
+            self._atr_series[key] = series
+        return series
+    
+    def atr_at(self, index: int, window: int, length: int = 14) -> float:
+        """ATR of the `window` candles ending at `index`, read in O(1)."""
+        return float(self.atr_series(window, length)[index])
     
     def __len__(self) -> int:
-        return len(self.candles)
+        return len(self._time_ns)
 
 
 class CandleStore:
@@ -130,6 +325,12 @@ class CandleStore:
             TIMEFRAME_1D: TimeframeCandles(TIMEFRAME_1D),
             TIMEFRAME_1W: TimeframeCandles(TIMEFRAME_1W),
         }
+        # Derived per-bar columns, computed on first use
+        self.features = FeatureStore(self)
+        # Rolling pre-entry features over the 1H candles, built on first use
+        self._pre_entry_features: Optional["PreEntryFeatureSeries"] = None
+        # Shared memory the candles live in, when attached (see shared_candles.py)
+        self._shared_block = None
     
     def load_candles(
         self,
@@ -142,7 +343,8 @@ class CandleStore:
         Args:
             start_date: Replay start date
             end_date: Replay end date
-            fetch_func: Function to fetch candles: (symbol, interval, lookback, end_date) -> DataFrame
+            fetch_func: Function to fetch candles: (symbol, interval, lookback, end_date)
+                -> DataFrame or CandleColumns
         """
         # Calculate the end date for fetching (end_date + outcome window for 1H)
         # Add extra buffer to ensure we have enough candles for outcome computation
@@ -158,6 +360,16 @@ class CandleStore:
         
         # Fetch 1H candles with end_date
         self._fetch_and_store(TIMEFRAME_1H, total_1h_candles, fetch_func, fetch_end_date)
+        candles_1h = self.get_1h_candles()
+        if candles_1h.is_empty or int(candles_1h.time_ns[0]) > _to_epoch_ns(start_date):
+            first = (
+                "none" if candles_1h.is_empty
+                else pd.Timestamp(int(candles_1h.time_ns[0]), tz="UTC").isoformat()
+            )
+            logger.warning(
+                f"  ⚠️ {self.symbol}: 1H history starts at {first}, after the replay "
+                f"start {start_date.isoformat()}; earlier hours are not replayed"
+            )
         
         # Fetch 4H candles
         lookback_4h = max(LOOKBACK_4H, LOOKBACK_AOI_4H) + CANDLE_FETCH_BUFFER
@@ -187,9 +399,75 @@ class CandleStore:
         if interval is None:
             raise ValueError(f"Unknown timeframe: {timeframe}")
         
-        df = fetch_func(self.symbol, interval, lookback, end_date)
+        df = self._fetch_paged(interval, lookback, fetch_func, end_date)
         if df is not None and not df.empty:
             self._candles[timeframe] = TimeframeCandles(timeframe, df)
+            self.features.invalidate(timeframe)
+            if timeframe == TIMEFRAME_1H:
+                self._pre_entry_features = None
+    
+    def _fetch_paged(
+        self,
+        interval: int,
+        lookback: int,
+        fetch_func: callable,
+        end_date: datetime,
+    ):
+        """Fetch `lookback` candles ending at end_date, FETCH_PAGE_CANDLES per request.
+        
+        A history that fits one page is a single request. Longer ones are
+        fetched backwards: each page ends at the first candle of the page
+        after it, and the pages are stitched with the overlapping candles
+        dropped. CandleColumns pages are stitched as records, without frames.
+        
+        Every page asks for a full FETCH_PAGE_CANDLES and the result is cut to
+        `lookback` at the end. Paging stops only when a page brings no candle
+        older than the ones already received. A short page is not enough: the
+        MT5 fetcher asks for a time range, and weekends leave it fewer candles
+        than requested, so a page smaller than a weekend could come back empty.
+        """
+        if lookback <= FETCH_PAGE_CANDLES:
+            return fetch_func(self.symbol, interval, lookback, end_date)
+        
+        pages = []
+        page_times: list[np.ndarray] = []
+        remaining = lookback
+        page_end = end_date
+        while remaining > 0:
+            # The previous page's first candle comes back as this page's last
+            page = fetch_func(self.symbol, interval, FETCH_PAGE_CANDLES, page_end)
+            if page is None or page.empty:
+                break
+            
+            times = _page_time_ns(page)
+            first_ns = int(times.min())
+            new = len(page) if not pages else int((times < page_times[-1].min()).sum())
+            pages.append(page)
+            page_times.append(times)
+            remaining -= new
+            if new == 0:
+                break  # Start of the source's history
+            page_end = pd.Timestamp(first_ns, tz="UTC").to_pydatetime()
+        
+        if not pages:
+            return None
+        
+        # Oldest first; each page keeps only candles before the next page's first
+        pages, page_times = pages[::-1], page_times[::-1]
+        kept = []
+        for i, (page, times) in enumerate(zip(pages, page_times)):
+            if i + 1 < len(pages):
+                keep = times < page_times[i + 1].min()
+                page = page[keep] if isinstance(page, pd.DataFrame) else page.records[keep]
+            elif not isinstance(page, pd.DataFrame):
+                page = page.records
+            kept.append(page)
+        
+        if isinstance(pages[0], pd.DataFrame):
+            return pd.concat(kept, ignore_index=True).tail(lookback).reset_index(drop=True)
+        from externals.candle_columns import CandleColumns
+        
+        return CandleColumns(np.concatenate(kept)[-lookback:])
     
     def get(self, timeframe: str) -> TimeframeCandles:
         """Get candles for a specific timeframe."""
@@ -213,6 +491,18 @@ class CandleStore:
         """Convenience accessor for 1W candles."""
         return self._candles[TIMEFRAME_1W]
     
+    def atr_at(self, timeframe: str, index: int, window: int, length: int = 14) -> float:
+        """ATR of the `window` candles of `timeframe` ending at `index`."""
+        return self.get(timeframe).atr_at(index, window, length)
+    
+    def get_pre_entry_features(self) -> "PreEntryFeatureSeries":
+        """Rolling pre-entry features for the 1H candles (computed once)."""
+        if self._pre_entry_features is None:
+            from .pre_entry_context import PreEntryFeatureSeries
+            
+            self._pre_entry_features = PreEntryFeatureSeries(self.features)
+        return self._pre_entry_features
+    
     def get_replay_1h_indices(
         self,
         start_date: datetime,
@@ -227,9 +517,10 @@ class CandleStore:
         if candles_1h.is_empty:
             return []
         
-        df = candles_1h.candles
-        mask = (df["time"] >= start_date) & (df["time"] <= end_date)
-        return list(df[mask].index)
+        times = candles_1h.time_ns
+        first = int(np.searchsorted(times, _to_epoch_ns(start_date), side="left"))
+        last = int(np.searchsorted(times, _to_epoch_ns(end_date), side="right"))
+        return list(range(first, last))
     
     def summary(self) -> dict[str, int]:
         """Return count of candles per timeframe."""
@@ -239,18 +530,19 @@ class CandleStore:
 def create_candle_fetcher():
     """Create a fetch function using MT5 for historical data.
     
-    Returns a function: (symbol, interval, lookback, end_date) -> DataFrame
+    Returns a function: (symbol, interval, lookback, end_date) -> CandleColumns
     """
-    from externals.data_fetcher import fetch_data
-    
     def fetcher(
         symbol: str,
         interval: str,
         lookback: int,
         end_date: datetime,
-    ) -> Optional[pd.DataFrame]:
+    ):
         """Fetch historical candles ending at end_date."""
-        return fetch_data(
+        # Imported lazily so fully cached replays never touch MT5
+        from externals.data_fetcher import fetch_candle_columns
+        
+        return fetch_candle_columns(
             symbol=symbol,
             timeframe=interval,
             lookback=lookback,
@@ -279,6 +571,8 @@ def load_symbol_candles(
     """
     store = CandleStore(symbol)
     fetcher = create_candle_fetcher()
+    if CANDLE_CACHE_DIR:
+        fetcher = create_cached_candle_fetcher(fetcher, CANDLE_CACHE_DIR)
     store.load_candles(start_date, end_date, fetcher)
     return store
 
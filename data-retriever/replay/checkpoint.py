@@ -0,0 +1,131 @@
+"""Replay progress records for checkpoint and resume.
+
+Each (run, symbol) has one row in the replay schema holding the last
+1H candle that was fully processed plus the in-memory state needed to carry
+on from there: the market state (trend/AOI state and the last higher-timeframe
+closes) and the signals still waiting for an outcome.
+
+The runner queues a record on the result sink just before flushing it, so a
+checkpoint is committed in the same transaction as every row produced up to
+that candle. A resumed replay restores the state and continues with the next
+candle; nothing already written is scanned again.
+
+The state is pickled, so it is only valid for the code that wrote it. It is
+stored with CHECKPOINT_STATE_VERSION; a checkpoint of another version (or
+one that no longer unpickles) is discarded with a warning and the symbol is
+replayed from the start of its window. The run id does not depend on the
+version, so that check is the one place where stale state is caught.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from logger import get_logger
+
+from .config import SL_MODEL_VERSION, TP_MODEL_VERSION
+from .replay_queries import FETCH_REPLAY_CHECKPOINT
+
+logger = get_logger(__name__)
+
+# Bump whenever the pickled state changes shape: MarketStateManager.snapshot(),
+# ReplayPendingSignal or anything they reference
+CHECKPOINT_STATE_VERSION = 1
+
+
+def make_run_id(start_date: datetime, end_date: datetime) -> str:
+    """Stable id for a replay window (same window and models -> same id)."""
+    payload = json.dumps({
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "sl_model": SL_MODEL_VERSION,
+        "tp_model": TP_MODEL_VERSION,
+    }, sort_keys=True)
+    return "run_" + hashlib.sha1(payload.encode()).hexdigest()[:10]
+
+
+@dataclass
+class ReplayCheckpoint:
+    """Stored progress of one symbol's replay."""
+
+    last_1h_index: Optional[int]
+    last_candle_time: Optional[datetime]
+    completed: bool
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ReplayProgress:
+    """Identifies the progress record of one (run, symbol).
+
+    chunk_start/chunk_end hold the symbol's replay window.
+    """
+
+    run_id: str
+    symbol: str
+    chunk_start: datetime
+    chunk_end: datetime
+
+    def load(self) -> Optional[ReplayCheckpoint]:
+        """Fetch the stored checkpoint, or None if there is no usable one.
+
+        A checkpoint whose state was written by another state version, or
+        fails to unpickle, is discarded (logged) and None is returned.
+        """
+        from database.executor import DBExecutor
+
+        row = DBExecutor.fetch_one(
+            FETCH_REPLAY_CHECKPOINT,
+            params=(self.run_id, self.symbol, self.chunk_start),
+            context="fetch_replay_checkpoint",
+        )
+        if row is None:
+            return None
+
+        last_1h_index, last_candle_time, completed, state = row
+        try:
+            payload = pickle.loads(bytes(state)) if state is not None else {}
+        except Exception as e:
+            logger.warning(f"  ⚠️ Discarding unreadable checkpoint of {self.symbol} in {self.run_id}: {e}")
+            return None
+        version = payload.get("version") if isinstance(payload, dict) else None
+        if version != CHECKPOINT_STATE_VERSION:
+            logger.warning(
+                f"  ⚠️ Discarding checkpoint of {self.symbol} in {self.run_id}: "
+                f"state version {version}, expected {CHECKPOINT_STATE_VERSION}"
+            )
+            return None
+
+        return ReplayCheckpoint(
+            last_1h_index=last_1h_index,
+            last_candle_time=last_candle_time,
+            completed=bool(completed),
+            state=payload["state"],
+        )
+
+    def params(
+        self,
+        last_1h_index: Optional[int],
+        last_candle_time: Optional[datetime],
+        completed: bool,
+        state: dict[str, Any],
+    ) -> tuple:
+        """UPSERT_REPLAY_CHECKPOINT parameters with the state pickled (and versioned)."""
+        return (
+            self.run_id,
+            self.symbol,
+            self.chunk_start,
+            self.chunk_end,
+            last_1h_index,
+            last_candle_time,
+            completed,
+            pickle.dumps(
+                {"version": CHECKPOINT_STATE_VERSION, "state": state},
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+        )
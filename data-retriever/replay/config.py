@@ -4,8 +4,9 @@ All parameters are locked to ensure deterministic replay behavior.
 Values are sourced from production configuration where applicable.
 """
 
+import os
 from datetime import datetime, timezone
-from typing import Final
+from typing import Final, Optional
 
 # =============================================================================
 # Replay Symbols
@@ -50,9 +51,18 @@ REPLAY_SYMBOLS: Final[list[str]] = [
 REPLAY_START_DATE: Final[datetime] = datetime(2026, 1, 28, 0, 0, 0, tzinfo=timezone.utc)
 REPLAY_END_DATE: Final[datetime] = datetime(2026, 1, 28, 8, 0, 0, tzinfo=timezone.utc)
 
-# Maximum days per chunk to avoid terminal candle limits (typically 5000)
-# 120 days * 24 hours = 2880 1H candles (safe margin)
+# Maximum days of 1H candles per data-source request, to avoid terminal
+# candle limits (typically 5000): 120 days * 24 hours = 2880 (safe margin)
 MAX_CHUNK_DAYS: Final[int] = 120
+# Candles per data-source request; longer histories are fetched in pages
+# and stitched into one CandleStore
+FETCH_PAGE_CANDLES: Final[int] = MAX_CHUNK_DAYS * 24
+
+# Worker processes for parallel replay (1 = serial, in-process)
+REPLAY_WORKERS: Final[int] = 1
+
+# On-disk candle cache, off unless REPLAY_CANDLE_CACHE_DIR names a directory
+CANDLE_CACHE_DIR: Final[Optional[str]] = os.getenv("REPLAY_CANDLE_CACHE_DIR") or None
 
 # =============================================================================
 # SL/TP Model Versions
@@ -81,6 +91,12 @@ LOOKBACK_AOI_1D: Final[int] = 140
 # =============================================================================
 OUTCOME_WINDOW_BARS: Final[int] = 96  # 72 hours (3 days)
 
+# Portfolio replay: a simulated trade that hits neither SL nor TP is closed
+# this many 1H bars after its signal, freeing its slot under the trade limits
+PORTFOLIO_MAX_HOLD_BARS: Final[int] = int(
+    os.getenv("REPLAY_PORTFOLIO_MAX_HOLD_BARS", str(OUTCOME_WINDOW_BARS))
+)
+
 # =============================================================================
 # Exit Simulation Configuration (Production Only)
 # =============================================================================
@@ -133,6 +149,13 @@ MT5_INTERVALS: Final[dict[str, int]] = {
 BATCH_SIZE: Final[int] = 100
 CANDLE_FETCH_BUFFER: Final[int] = 50  # Extra candles for weekend gaps
 
+# Buffered result writes: flush once this many rows are queued (and at window end)
+SINK_FLUSH_ROWS: Final[int] = 5000
+# Entry signal / outcome ids reserved from the sequences per round trip
+SINK_ID_PREFETCH: Final[int] = 100
+# Replay progress is checkpointed (with a flush) at least this often
+CHECKPOINT_INTERVAL_HOURS: Final[int] = 24
+
 # =============================================================================
 # Pre-Entry Context Windows
 # =============================================================================
@@ -7,14 +7,13 @@ Uses path extremes to determine SL/TP hits.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, TYPE_CHECKING
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from .config import SL_MODELS, RR_MULTIPLES, OUTCOME_WINDOW_BARS
-from .sl_geometry import SLGeometryData
-from .path_extremes import PathExtremeRow
+import numpy as np
 
-if TYPE_CHECKING:
-    pass
+from .config import SL_MODELS, RR_MULTIPLES
+from .sl_geometry import SLGeometryData
+from .path_extremes import PathExtremeRow, PathExtremes
 
 
 @dataclass
@@ -36,34 +35,138 @@ class ExitSimulationRow:
     is_bad_pre48: bool
 
 
+# SL models as (geometry field or None for a fixed distance, offset in ATR, floor in ATR).
+# For PLUS_X models the offset pushes the SL further from entry: sl_atr is
+# always a positive distance, so adding the buffer moves it away regardless
+# of direction.
+SL_MODEL_RULES: Dict[str, Tuple[Optional[str], float, Optional[float]]] = {
+    # Fixed ATR-based SL distances
+    "SL_ATR_0_1": (None, 0.1, None),
+    "SL_ATR_0_2": (None, 0.2, None),
+    "SL_ATR_0_3": (None, 0.3, None),
+    "SL_ATR_0_4": (None, 0.4, None),
+    "SL_ATR_0_5": (None, 0.5, None),
+    "SL_ATR_0_6": (None, 0.6, None),
+    "SL_ATR_0_7": (None, 0.7, None),
+    "SL_ATR_0_8": (None, 0.8, None),
+    "SL_ATR_0_9": (None, 0.9, None),
+    "SL_ATR_1_0": (None, 1.0, None),
+    "SL_ATR_1_1": (None, 1.1, None),
+    "SL_ATR_1_2": (None, 1.2, None),
+    "SL_ATR_1_5": (None, 1.5, None),
+    # AOI-based SL distances
+    "SL_AOI_FAR": ("aoi_far_edge_atr", 0.0, None),
+    "SL_AOI_FAR_PLUS_0_25": ("aoi_far_edge_atr", 0.25, None),
+    "SL_AOI_NEAR": ("aoi_near_edge_atr", 0.0, None),
+    "SL_AOI_NEAR_PLUS_0_25": ("aoi_near_edge_atr", 0.25, None),
+    # Signal candle-based SL distances
+    "SL_SIGNAL_CANDLE": ("signal_candle_opposite_extreme_atr", 0.0, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_1": ("signal_candle_opposite_extreme_atr", 0.1, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_2": ("signal_candle_opposite_extreme_atr", 0.2, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_25": ("signal_candle_opposite_extreme_atr", 0.25, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_3": ("signal_candle_opposite_extreme_atr", 0.3, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_4": ("signal_candle_opposite_extreme_atr", 0.4, None),
+    "SL_SIGNAL_CANDLE_PLUS_0_5": ("signal_candle_opposite_extreme_atr", 0.5, None),
+    # Hybrid SL model
+    "SL_MAX_AOI_ATR_1_0": ("aoi_far_edge_atr", 0.0, 1.0),
+}
+
+# Bars up to which an SL hit marks the trade as bad (is_bad_pre48)
+BAD_TRADE_BARS = 48
+
+
 class ExitSimulator:
-    """Simulates exits for all SL model × R multiple combinations."""
+    """Simulates exits for all SL model × R multiple combinations.
+    
+    The path's intrabar excursions are turned into arrays once, and the first
+    SL and TP hit bars for the whole SL × R grid are found with boolean
+    matrices, so adding SL models or R multiples costs little.
+    """
     
     def __init__(
         self,
         geometry: SLGeometryData,
-        path_extremes: List[PathExtremeRow],
+        path_extremes: Sequence[PathExtremeRow],
+        sl_models: Sequence[str] = SL_MODELS,
+        rr_multiples: Sequence[float] = RR_MULTIPLES,
     ):
         self._geometry = geometry
         self._path = path_extremes
+        self._sl_models = sl_models
+        self._rr_multiples = rr_multiples
     
     def simulate_all(self) -> List[ExitSimulationRow]:
         """Simulate exits for all SL × R combinations.
         
         Returns:
-            List of ExitSimulationRow (9 SL models × 5 R multiples = 45 rows)
+            List of ExitSimulationRow, ordered by SL model then R multiple
+            (SL models that cannot be resolved are skipped)
         """
-        results = []
-        
-        for sl_model in SL_MODELS:
+        models = []
+        sl_values = []
+        for sl_model in self._sl_models:
             sl_atr = self._resolve_sl(sl_model)
             if sl_atr is None or sl_atr <= 0:
                 continue
+            models.append(sl_model)
+            sl_values.append(sl_atr)
+        
+        if not models or not self._rr_multiples:
+            return []
+        
+        sl = np.array(sl_values, dtype=np.float64)                          # (S,)
+        tp = sl[:, None] * np.array(self._rr_multiples, dtype=np.float64)   # (S, R)
+        
+        bar_index, mfe, mae = _path_arrays(self._path)
+        
+        # Overall MFE/MAE using high/low (shared by every combination)
+        mfe_atr = float(np.fmax.reduce(mfe, initial=0.0))
+        mae_atr = float(np.fmin.reduce(mae, initial=0.0))
+        
+        sl_hits = mae[None, :] <= -sl[:, None]                              # (S, B)
+        tp_hits = mfe[None, None, :] >= tp[:, :, None]                      # (S, R, B)
+        sl_bar = _first_hit_bar(sl_hits, bar_index)                         # (S,)
+        tp_bar = _first_hit_bar(tp_hits, bar_index)                         # (S, R)
+        is_bad_pre48 = (sl_hits & (bar_index <= BAD_TRADE_BARS)).any(axis=1)
+        
+        timeout_bar = len(self._path)
+        timeout_return = self._path[-1].return_atr_at_bar if self._path else 0.0
+        
+        results = []
+        for s, sl_model in enumerate(models):
+            sl_atr = sl_values[s]
+            bars_to_sl_hit = int(sl_bar[s]) if sl_bar[s] >= 0 else None
             
-            for rr_multiple in RR_MULTIPLES:
-                tp_atr = sl_atr * rr_multiple
-                result = self._simulate_one(sl_model, rr_multiple, sl_atr, tp_atr)
-                results.append(result)
+            for r, rr_multiple in enumerate(self._rr_multiples):
+                tp_atr = float(tp[s, r])
+                bars_to_tp_hit = int(tp_bar[s, r]) if tp_bar[s, r] >= 0 else None
+                
+                # SL wins ties: it is checked first within a bar
+                if bars_to_sl_hit is not None and (
+                    bars_to_tp_hit is None or bars_to_sl_hit <= bars_to_tp_hit
+                ):
+                    exit_reason, exit_bar, return_atr = "SL", bars_to_sl_hit, -sl_atr
+                elif bars_to_tp_hit is not None:
+                    exit_reason, exit_bar, return_atr = "TP", bars_to_tp_hit, tp_atr
+                else:
+                    # Timeout - use return at last bar
+                    exit_reason, exit_bar, return_atr = "TIMEOUT", timeout_bar, timeout_return
+                
+                results.append(ExitSimulationRow(
+                    sl_model=sl_model,
+                    rr_multiple=rr_multiple,
+                    sl_atr=sl_atr,
+                    tp_atr=tp_atr,
+                    exit_reason=exit_reason,
+                    exit_bar=exit_bar,
+                    return_atr=return_atr,
+                    return_r=return_atr / sl_atr,
+                    mfe_atr=mfe_atr,
+                    mae_atr=mae_atr,
+                    bars_to_sl_hit=bars_to_sl_hit,
+                    bars_to_tp_hit=bars_to_tp_hit,
+                    is_bad_pre48=bool(is_bad_pre48[s]),
+                ))
         
         return results
     
@@ -71,193 +174,68 @@ class ExitSimulator:
         """Resolve SL distance in ATR units for a given model.
         
         Args:
-            sl_model: The SL model name
+            sl_model: The SL model name (see SL_MODEL_RULES)
             
         Returns:
             SL distance in ATR units, or None if cannot resolve
-            
-        Note:
-            For PLUS_X models, the buffer pushes SL further from entry.
-            Since sl_atr is always a positive distance, adding the buffer
-            means the SL is further away regardless of direction.
         """
-        # Fixed ATR-based SL distances
-        if sl_model == "SL_ATR_0_1":
-            return 0.1
-        elif sl_model == "SL_ATR_0_2":
-            return 0.2
-        elif sl_model == "SL_ATR_0_3":
-            return 0.3
-        elif sl_model == "SL_ATR_0_4":
-            return 0.4
-        elif sl_model == "SL_ATR_0_5":
-            return 0.5
-        elif sl_model == "SL_ATR_0_6":
-            return 0.6
-        elif sl_model == "SL_ATR_0_7":
-            return 0.7
-        elif sl_model == "SL_ATR_0_8":
-            return 0.8
-        elif sl_model == "SL_ATR_0_9":
-            return 0.9
-        elif sl_model == "SL_ATR_1_0":
-            return 1.0
-        elif sl_model == "SL_ATR_1_1":
-            return 1.1
-        elif sl_model == "SL_ATR_1_2":
-            return 1.2
-        elif sl_model == "SL_ATR_1_5":
-            return 1.5
-        # AOI-based SL distances
-        elif sl_model == "SL_AOI_FAR":
-            return self._geometry.aoi_far_edge_atr
-        elif sl_model == "SL_AOI_FAR_PLUS_0_25":
-            return self._geometry.aoi_far_edge_atr + 0.25
-        elif sl_model == "SL_AOI_NEAR":
-            return self._geometry.aoi_near_edge_atr
-        elif sl_model == "SL_AOI_NEAR_PLUS_0_25":
-            return self._geometry.aoi_near_edge_atr + 0.25
-        # Signal candle-based SL distances
-        elif sl_model == "SL_SIGNAL_CANDLE":
-            return self._geometry.signal_candle_opposite_extreme_atr
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_1":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.1
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_2":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.2
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_25":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.25
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_3":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.3
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_4":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.4
-        elif sl_model == "SL_SIGNAL_CANDLE_PLUS_0_5":
-            return self._geometry.signal_candle_opposite_extreme_atr + 0.5
-        # Hybrid SL model
-        elif sl_model == "SL_MAX_AOI_ATR_1_0":
-            return max(self._geometry.aoi_far_edge_atr, 1.0)
-        else:
+        rule = SL_MODEL_RULES.get(sl_model)
+        if rule is None:
             return None
-    
-    def _simulate_one(
-        self,
-        sl_model: str,
-        rr_multiple: float,
-        sl_atr: float,
-        tp_atr: float,
-    ) -> ExitSimulationRow:
-        """Simulate exit for one SL × R configuration.
-        
-        Scans path to find first SL hit, TP hit, or timeout at bar 72.
-        Uses high/low prices for hit detection (not close prices).
-        """
-        bars_to_sl_hit = None
-        bars_to_tp_hit = None
-        exit_reason = "TIMEOUT"
-        exit_bar = OUTCOME_WINDOW_BARS
-        mfe_atr = 0.0
-        mae_atr = 0.0
-        is_bad_pre48 = False
-        
-        for row in self._path:
-            # Track overall MFE/MAE using high/low (intrabar extremes)
-            if row.mfe_atr_high_low is not None:
-                mfe_atr = max(mfe_atr, row.mfe_atr_high_low)
-            if row.mae_atr_high_low is not None:
-                mae_atr = min(mae_atr, row.mae_atr_high_low)
-            
-            # Check for SL hit using high/low (MAE reaches -sl_atr)
-            if bars_to_sl_hit is None and row.mae_atr_high_low is not None:
-                if row.mae_atr_high_low <= -sl_atr:
-                    bars_to_sl_hit = row.bar_index
-            
-            # Check for TP hit using high/low (MFE reaches +tp_atr)
-            if bars_to_tp_hit is None and row.mfe_atr_high_low is not None:
-                if row.mfe_atr_high_low >= tp_atr:
-                    bars_to_tp_hit = row.bar_index
-            
-            # Check for bad trade pre-48 (MAE hits SL before bar 48)
-            if row.bar_index <= 48 and row.mae_atr_high_low is not None:
-                if row.mae_atr_high_low <= -sl_atr:
-                    is_bad_pre48 = True
-        
-        # Determine exit reason and bar
-        if bars_to_sl_hit is not None and bars_to_tp_hit is not None:
-            # Both hit - which came first?
-            if bars_to_sl_hit <= bars_to_tp_hit:
-                exit_reason = "SL"
-                exit_bar = bars_to_sl_hit
-            else:
-                exit_reason = "TP"
-                exit_bar = bars_to_tp_hit
-        elif bars_to_sl_hit is not None:
-            exit_reason = "SL"
-            exit_bar = bars_to_sl_hit
-        elif bars_to_tp_hit is not None:
-            exit_reason = "TP"
-            exit_bar = bars_to_tp_hit
-        else:
-            exit_reason = "TIMEOUT"
-            exit_bar = len(self._path) if self._path else 0
-        
-        # Calculate return based on exit reason
-        if exit_reason == "SL":
-            return_atr = -sl_atr
-        elif exit_reason == "TP":
-            return_atr = tp_atr
-        else:
-            # Timeout - use return at last bar
-            if self._path:
-                return_atr = self._path[-1].return_atr_at_bar
-            else:
-                return_atr = 0.0
         
-        return_r = return_atr / sl_atr if sl_atr > 0 else 0.0
+        field, offset, floor = rule
+        if field is None:
+            return offset
         
-        return ExitSimulationRow(
-            sl_model=sl_model,
-            rr_multiple=rr_multiple,
-            sl_atr=sl_atr,
-            tp_atr=tp_atr,
-            exit_reason=exit_reason,
-            exit_bar=exit_bar,
-            return_atr=return_atr,
-            return_r=return_r,
-            mfe_atr=mfe_atr,
-            mae_atr=mae_atr,
-            bars_to_sl_hit=bars_to_sl_hit,
-            bars_to_tp_hit=bars_to_tp_hit,
-            is_bad_pre48=is_bad_pre48,
-        )
+        sl_atr = getattr(self._geometry, field) + offset
+        if floor is not None:
+            sl_atr = max(sl_atr, floor)
+        return sl_atr
 
 
-def persist_exit_simulations(signal_id: int, rows: List[ExitSimulationRow]) -> None:
-    """Persist exit simulation results to database."""
-    from database.executor import DBExecutor
-    from .replay_queries import INSERT_EXIT_SIMULATION
-    
-    if not rows:
-        return
+def _path_arrays(path: Sequence[PathExtremeRow]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bar indices and intrabar MFE/MAE; missing values become NaN (never a hit)."""
+    if isinstance(path, PathExtremes):
+        return path.bar_index, path.mfe_atr_high_low, path.mae_atr_high_low
     
-    def _persist(cursor):
-        for row in rows:
-            cursor.execute(
-                INSERT_EXIT_SIMULATION,
-                (
-                    signal_id,
-                    row.sl_model,
-                    row.rr_multiple,
-                    row.sl_atr,
-                    row.tp_atr,
-                    row.exit_reason,
-                    row.exit_bar,
-                    row.return_atr,
-                    row.return_r,
-                    row.mfe_atr,
-                    row.mae_atr,
-                    row.bars_to_sl_hit,
-                    row.bars_to_tp_hit,
-                    row.is_bad_pre48,
-                ),
-            )
-    
-    DBExecutor.execute_transaction(_persist, context="persist_exit_simulations")
+    bar_index = np.array([row.bar_index for row in path], dtype=np.int64)
+    mfe = np.array(
+        [np.nan if row.mfe_atr_high_low is None else row.mfe_atr_high_low for row in path],
+        dtype=np.float64,
+    )
+    mae = np.array(
+        [np.nan if row.mae_atr_high_low is None else row.mae_atr_high_low for row in path],
+        dtype=np.float64,
+    )
+    return bar_index, mfe, mae
+
+
+def _first_hit_bar(hits: np.ndarray, bar_index: np.ndarray) -> np.ndarray:
+    """bar_index of the first True along the last axis, or -1 if never hit."""
+    if hits.shape[-1] == 0:
+        return np.full(hits.shape[:-1], -1, dtype=np.int64)
+    first = hits.argmax(axis=-1)
+    return np.where(hits.any(axis=-1), bar_index[first], -1)
+
+
+def exit_simulation_params(signal_id: int, rows: List[ExitSimulationRow]) -> List[tuple]:
+    """Build INSERT parameter tuples for exit simulation rows."""
+    return [
+        (
+            signal_id,
+            row.sl_model,
+            row.rr_multiple,
+            row.sl_atr,
+            row.tp_atr,
+            row.exit_reason,
+            row.exit_bar,
+            row.return_atr,
+            row.return_r,
+            row.mfe_atr,
+            row.mae_atr,
+            row.bars_to_sl_hit,
+            row.bars_to_tp_hit,
+            row.is_bad_pre48,
+        )
+        for row in rows
+    ]
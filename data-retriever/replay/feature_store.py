@@ -0,0 +1,243 @@
+"""Per-symbol columnar feature store for replay.
+
+Derived per-bar quantities (body size, range, true range, session bucket,
+ATR, rolling HTF extremes) are computed once per timeframe as numpy columns
+and shared by the signal detector, pre-entry context, SL geometry and HTF
+context instead of being rederived from DataFrame slices for every signal.
+
+Features are registered by name with the columns they depend on. A feature
+is computed on first request, after its dependencies, and cached until the
+candles of its timeframe are reloaded.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional, TYPE_CHECKING
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .config import (
+    LOOKBACK_1H,
+    LOOKBACK_AOI_4H,
+    LOOKBACK_AOI_1D,
+    TIMEFRAME_1H,
+    TIMEFRAME_4H,
+    TIMEFRAME_1D,
+)
+
+if TYPE_CHECKING:
+    from .candle_store import CandleStore
+
+
+# Raw columns served straight from TimeframeCandles
+BASE_COLUMNS = ("time_ns", "open", "high", "low", "close")
+
+# Candle window used for the ATR feature of each timeframe
+ATR_WINDOWS: dict[str, int] = {
+    TIMEFRAME_1H: LOOKBACK_1H,
+    TIMEFRAME_4H: LOOKBACK_AOI_4H,
+    TIMEFRAME_1D: LOOKBACK_AOI_1D,
+}
+
+# Rolling windows for HTF range extremes (last 12 weekly / 20 daily candles)
+HTF_RANGE_WINDOWS = (12, 20)
+
+_NS_PER_HOUR = 3_600 * 1_000_000_000
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """A named per-bar feature and the columns it is computed from."""
+
+    name: str
+    depends_on: tuple[str, ...]
+    compute: Callable[..., np.ndarray]
+
+
+FEATURES: dict[str, FeatureSpec] = {}
+
+
+def register_feature(name: str, depends_on: tuple[str, ...] = ()):
+    """Register a feature computed as compute(candles, *dependency_columns)."""
+    def decorator(compute: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        if name in FEATURES or name in BASE_COLUMNS:
+            raise ValueError(f"Feature already registered: {name}")
+        FEATURES[name] = FeatureSpec(name, tuple(depends_on), compute)
+        return compute
+    return decorator
+
+
+def session_bucket_for_hour(hour: int) -> str:
+    """Get session bucket from UTC hour."""
+    if 4 <= hour <= 6:
+        return "pre_london"
+    elif 7 <= hour <= 11:
+        return "london"
+    elif 12 <= hour <= 16:
+        return "ny"
+    else:
+        return "post_ny"
+
+
+# =============================================================================
+# Built-in features
+# =============================================================================
+
+@register_feature("body", depends_on=("open", "close"))
+def _body(candles, opens, closes):
+    return np.abs(closes - opens)
+
+
+@register_feature("range", depends_on=("high", "low"))
+def _range(candles, highs, lows):
+    return highs - lows
+
+
+@register_feature("is_bullish", depends_on=("open", "close"))
+def _is_bullish(candles, opens, closes):
+    return closes > opens
+
+
+@register_feature("is_bearish", depends_on=("open", "close"))
+def _is_bearish(candles, opens, closes):
+    return closes < opens
+
+
+@register_feature("true_range", depends_on=("high", "low", "close"))
+def _true_range(candles, highs, lows, closes):
+    """True range against the previous close; NaN for the first candle."""
+    true_ranges = np.full(len(closes), np.nan)
+    if len(closes) > 1:
+        prev_closes = closes[:-1]
+        true_ranges[1:] = np.maximum(
+            highs[1:] - lows[1:],
+            np.maximum(np.abs(highs[1:] - prev_closes), np.abs(lows[1:] - prev_closes)),
+        )
+    return true_ranges
+
+
+@register_feature("hour_utc", depends_on=("time_ns",))
+def _hour_utc(candles, time_ns):
+    return (time_ns // _NS_PER_HOUR) % 24
+
+
+@register_feature("session_bucket", depends_on=("hour_utc",))
+def _session_bucket(candles, hours):
+    buckets = np.array([session_bucket_for_hour(hour) for hour in range(24)], dtype=object)
+    return buckets[hours]
+
+
+@register_feature("atr")
+def _atr(candles):
+    """ATR over the timeframe's analysis window (see ATR_WINDOWS)."""
+    window = ATR_WINDOWS.get(candles.timeframe)
+    if window is None:
+        raise KeyError(f"No ATR window configured for {candles.timeframe}")
+    return candles.atr_series(window)
+
+
+def _register_rolling_extremes(window: int) -> None:
+    def rolling(values: np.ndarray, reduce) -> np.ndarray:
+        result = np.full(len(values), np.nan)
+        if len(values) >= window:
+            result[window - 1:] = reduce(sliding_window_view(values, window), axis=1)
+        return result
+
+    register_feature(f"high_max_{window}", depends_on=("high",))(
+        lambda candles, highs: rolling(highs, np.max)
+    )
+    register_feature(f"low_min_{window}", depends_on=("low",))(
+        lambda candles, lows: rolling(lows, np.min)
+    )
+
+
+for _window in HTF_RANGE_WINDOWS:
+    _register_rolling_extremes(_window)
+
+
+# =============================================================================
+# Store
+# =============================================================================
+
+class FeatureStore:
+    """Lazily computed feature columns for every timeframe of a CandleStore.
+
+    Columns are aligned to the timeframe's candle indices, so a signal's
+    features are index lookups.
+    """
+
+    def __init__(self, candle_store: "CandleStore"):
+        self._store = candle_store
+        self._cache: dict[tuple[str, str], np.ndarray] = {}
+
+    def get(self, name: str, timeframe: str = TIMEFRAME_1H) -> np.ndarray:
+        """Return feature `name` for every candle of `timeframe`."""
+        return self._resolve(name, timeframe, ())
+
+    def value_at(self, name: str, timeframe: str, as_of_time: datetime):
+        """Feature value of the last candle with time <= as_of_time, or None.
+        
+        Numpy scalars are returned as plain Python values.
+        """
+        index = self._store.get(timeframe).get_last_closed_index(as_of_time)
+        if index is None:
+            return None
+        value = self.get(name, timeframe)[index]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def candle_at(self, index: int, timeframe: str = TIMEFRAME_1H) -> Optional[dict]:
+        """OHLC of one candle as plain floats, or None if out of range."""
+        candles = self._store.get(timeframe)
+        if index < 0 or index >= len(candles):
+            return None
+        return {
+            "open": float(candles.opens[index]),
+            "high": float(candles.highs[index]),
+            "low": float(candles.lows[index]),
+            "close": float(candles.closes[index]),
+        }
+
+    def invalidate(self, timeframe: Optional[str] = None) -> None:
+        """Drop cached features for one timeframe (or all of them)."""
+        if timeframe is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[1] == timeframe]:
+            del self._cache[key]
+
+    def _resolve(self, name: str, timeframe: str, resolving: tuple[str, ...]) -> np.ndarray:
+        if name in BASE_COLUMNS:
+            return self._base_column(name, timeframe)
+
+        key = (name, timeframe)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        spec = FEATURES.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown feature: {name}")
+        if name in resolving:
+            raise ValueError(f"Circular feature dependency: {' -> '.join(resolving + (name,))}")
+
+        dependencies = [
+            self._resolve(dependency, timeframe, resolving + (name,))
+            for dependency in spec.depends_on
+        ]
+        column = spec.compute(self._store.get(timeframe), *dependencies)
+        self._cache[key] = column
+        return column
+
+    def _base_column(self, name: str, timeframe: str) -> np.ndarray:
+        candles = self._store.get(timeframe)
+        if name == "time_ns":
+            return candles.time_ns
+        return {
+            "open": candles.opens,
+            "high": candles.highs,
+            "low": candles.lows,
+            "close": candles.closes,
+        }[name]
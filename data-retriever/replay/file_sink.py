@@ -0,0 +1,323 @@
+"""Parquet output for replay results, without a database.
+
+ParquetResultSink queues rows exactly like ReplayResultSink but writes each
+flush as Parquet files, one per table, with the columns of the replay
+schema's batch INSERTs (see replay_queries.py) and types from
+replay_schema.sql. Files are laid out as
+
+    <dir>/<table>/mode=<mode>/run=<run id>/<SYMBOL>/<start>_<end>-<flush>.parquet
+
+so ``pd.read_parquet("<dir>/entry_signal")`` loads a table for every symbol,
+with the run mode ("replay" or "portfolio") and run id (see make_run_id) as
+extra columns to tell runs apart. Replaying the same run again replaces its
+own files; runs of another mode or run id are left alone.
+
+Two pieces of DB bookkeeping have no file counterpart: entry_signal has no
+outcome_computed column (join signal_outcome instead), and replay progress
+checkpoints are not written, so file runs cannot be resumed.
+
+Ids are reserved from counters in <dir>/_sequences, shared by every process
+writing to the directory, so entry_signal_id / signal_outcome_id joins work
+across symbols like the SERIAL columns they replace.
+
+Requires pyarrow.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import glob
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from .checkpoint import make_run_id
+from .config import SINK_ID_PREFETCH
+from .replay_queries import (
+    PREFETCH_ENTRY_SIGNAL_IDS,
+    PREFETCH_SIGNAL_OUTCOME_IDS,
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+    BATCH_INSERT_REPLAY_SIGNAL_OUTCOME,
+    BATCH_INSERT_REPLAY_CHECKPOINT_RETURN,
+    BATCH_INSERT_SIGNAL_PATH_EXTREMES,
+    BATCH_INSERT_ENTRY_SL_GEOMETRY,
+    BATCH_INSERT_EXIT_SIMULATIONS,
+    BATCH_INSERT_SWEEP_RESULTS,
+)
+from .result_sink import ReplayResultSink
+
+PARQUET_SINK_PREFIX = "parquet:"
+
+# Column order of each batch INSERT; types follow replay_schema.sql
+# (NUMERIC -> double, INTEGER -> int32, TIMESTAMPTZ -> UTC timestamp)
+TABLE_COLUMNS: dict[str, tuple[tuple[str, str], ...]] = {
+    "entry_signal": (
+        ("id", "int32"),
+        ("symbol", "string"),
+        ("signal_time", "timestamp"),
+        ("direction", "string"),
+        ("trend_4h", "string"),
+        ("trend_1d", "string"),
+        ("trend_1w", "string"),
+        ("trend_alignment_strength", "int32"),
+        ("aoi_timeframe", "string"),
+        ("aoi_low", "double"),
+        ("aoi_high", "double"),
+        ("aoi_classification", "string"),
+        ("entry_price", "double"),
+        ("atr_1h", "double"),
+        ("final_score", "double"),
+        ("tier", "string"),
+        ("is_break_candle_last", "bool"),
+        ("sl_model_version", "string"),
+        ("tp_model_version", "string"),
+        ("conflicted_tf", "string"),
+        ("max_retest_penetration_atr", "double"),
+        ("bars_between_retest_and_break", "int32"),
+        ("hour_of_day_utc", "int32"),
+        ("session_bucket", "string"),
+        ("aoi_touch_count_since_creation", "int32"),
+        ("trade_id", "string"),
+    ),
+    "signal_outcome": (
+        ("id", "int32"),
+        ("entry_signal_id", "int32"),
+        ("window_bars", "int32"),
+        ("mfe_atr", "double"),
+        ("mae_atr", "double"),
+        ("bars_to_mfe", "int32"),
+        ("bars_to_mae", "int32"),
+        ("first_extreme", "string"),
+    ),
+    "checkpoint_return": (
+        ("signal_outcome_id", "int32"),
+        ("bars_after", "int32"),
+        ("return_atr", "double"),
+    ),
+    "signal_path_extremes": (
+        ("entry_signal_id", "int32"),
+        ("bar_index", "int32"),
+        ("return_atr_at_bar", "double"),
+        ("mfe_atr_to_here", "double"),
+        ("mae_atr_to_here", "double"),
+        ("mfe_atr_high_low", "double"),
+        ("mae_atr_high_low", "double"),
+    ),
+    "entry_sl_geometry": (
+        ("entry_signal_id", "int32"),
+        ("direction", "string"),
+        ("aoi_far_edge_atr", "double"),
+        ("aoi_near_edge_atr", "double"),
+        ("aoi_height_atr", "double"),
+        ("aoi_age_bars", "int32"),
+        ("signal_candle_opposite_extreme_atr", "double"),
+        ("signal_candle_range_atr", "double"),
+        ("signal_candle_body_atr", "double"),
+    ),
+    "exit_simulation": (
+        ("entry_signal_id", "int32"),
+        ("sl_model", "string"),
+        ("rr_multiple", "double"),
+        ("sl_atr", "double"),
+        ("tp_atr", "double"),
+        ("exit_reason", "string"),
+        ("exit_bar", "int32"),
+        ("return_atr", "double"),
+        ("return_r", "double"),
+        ("mfe_atr", "double"),
+        ("mae_atr", "double"),
+        ("bars_to_sl_hit", "int32"),
+        ("bars_to_tp_hit", "int32"),
+        ("is_bad_pre48", "bool"),
+    ),
+    "sweep_result": (
+        ("config_id", "string"),
+        ("symbol", "string"),
+        ("signal_time", "timestamp"),
+        ("direction", "string"),
+        ("aoi_timeframe", "string"),
+        ("aoi_low", "double"),
+        ("aoi_high", "double"),
+        ("entry_price", "double"),
+        ("atr_1h", "double"),
+        ("final_score", "double"),
+        ("conflicted_tf", "string"),
+        ("trade_id", "string"),
+        ("sl_model", "string"),
+        ("rr_multiple", "double"),
+        ("sl_atr", "double"),
+        ("tp_atr", "double"),
+        ("exit_reason", "string"),
+        ("exit_bar", "int32"),
+        ("return_atr", "double"),
+        ("return_r", "double"),
+        ("mfe_atr", "double"),
+        ("mae_atr", "double"),
+        ("bars_to_sl_hit", "int32"),
+        ("bars_to_tp_hit", "int32"),
+        ("is_bad_pre48", "bool"),
+    ),
+}
+
+# Batch INSERT -> table it fills
+BATCH_TABLES: dict[str, str] = {
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL: "entry_signal",
+    BATCH_INSERT_REPLAY_SIGNAL_OUTCOME: "signal_outcome",
+    BATCH_INSERT_REPLAY_CHECKPOINT_RETURN: "checkpoint_return",
+    BATCH_INSERT_SIGNAL_PATH_EXTREMES: "signal_path_extremes",
+    BATCH_INSERT_ENTRY_SL_GEOMETRY: "entry_sl_geometry",
+    BATCH_INSERT_EXIT_SIMULATIONS: "exit_simulation",
+    BATCH_INSERT_SWEEP_RESULTS: "sweep_result",
+}
+
+_SEQUENCES = {
+    PREFETCH_ENTRY_SIGNAL_IDS: "entry_signal_id",
+    PREFETCH_SIGNAL_OUTCOME_IDS: "signal_outcome_id",
+}
+
+# A sequence lock older than this was left by a killed process
+_STALE_LOCK_SECONDS = 30.0
+
+
+def parse_sink_spec(spec: Optional[str]) -> Optional[str]:
+    """Return the output directory of a ``parquet:<dir>`` spec.
+
+    None and "postgres" select the replay schema (returns None).
+    """
+    if spec is None or spec == "postgres":
+        return None
+    if spec.startswith(PARQUET_SINK_PREFIX) and spec[len(PARQUET_SINK_PREFIX):]:
+        return spec[len(PARQUET_SINK_PREFIX):]
+    raise ValueError(f"Unknown replay sink {spec!r} (expected 'postgres' or 'parquet:<dir>')")
+
+
+def arrow_schema(table: str):
+    """pyarrow schema of a replay table."""
+    import pyarrow as pa
+
+    types = {
+        "int32": pa.int32(),
+        "double": pa.float64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in TABLE_COLUMNS[table]])
+
+
+class ParquetResultSink(ReplayResultSink):
+    """ReplayResultSink that writes Parquet files instead of the replay schema.
+
+    Files are keyed by (mode, run id, symbol, window); a new sink removes
+    only the files an earlier sink with the same key wrote.
+    """
+
+    uses_database = False
+
+    def __init__(
+        self,
+        directory: str,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        run_id: Optional[str] = None,
+        mode: str = "replay",
+        flush_rows: Optional[int] = None,
+        id_prefetch: int = SINK_ID_PREFETCH,
+    ):
+        super().__init__(flush_rows=flush_rows, id_prefetch=id_prefetch)
+        self._directory = directory
+        self._symbol = symbol
+        self._run_path = os.path.join(
+            f"mode={mode}", f"run={run_id or make_run_id(start_date, end_date)}", symbol
+        )
+        self._part = f"{start_date:%Y%m%dT%H%M}_{end_date:%Y%m%dT%H%M}"
+        self._flushes = 0
+        self._remove_previous_parts()
+
+    def _write(
+        self,
+        batches: list[tuple[str, list]],
+        computed_ids: list[int],
+        checkpoint: Optional[tuple],
+    ) -> None:
+        """Write one file per non-empty table, renamed into place together."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        staged = []
+        try:
+            for sql, rows in batches:
+                if not rows:
+                    continue
+                table = BATCH_TABLES[sql]
+                schema = arrow_schema(table)
+                columns = list(zip(*rows))
+                arrow_table = pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                )
+                path = self._part_path(table)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                staged.append(path)
+                pq.write_table(arrow_table, path + ".tmp")
+        except Exception:
+            for path in staged:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path + ".tmp")
+            raise
+
+        for path in staged:
+            os.replace(path + ".tmp", path)
+        self._flushes += 1
+
+    def _reserve_ids(self, prefetch_sql: str, count: int) -> list[int]:
+        """Reserve ids from the directory's counter file for this sequence."""
+        path = os.path.join(self._directory, "_sequences", _SEQUENCES[prefetch_sql])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with _directory_lock(path + ".lock"):
+            try:
+                with open(path) as f:
+                    last = int(f.read().strip() or 0)
+            except FileNotFoundError:
+                last = 0
+            with open(path + ".tmp", "w") as f:
+                f.write(str(last + count))
+            os.replace(path + ".tmp", path)
+
+        return list(range(last + 1, last + count + 1))
+
+    def _part_path(self, table: str) -> str:
+        return os.path.join(
+            self._directory, table, self._run_path, f"{self._part}-{self._flushes:04d}.parquet"
+        )
+
+    def _remove_previous_parts(self) -> None:
+        """Drop files an earlier replay of this run, symbol and window wrote."""
+        pattern = os.path.join(self._directory, "*", self._run_path, f"{self._part}-*.parquet")
+        for path in glob.glob(pattern):
+            os.remove(path)
+
+
+@contextmanager
+def _directory_lock(path: str) -> Iterator[None]:
+    """Cross-process lock via an atomic mkdir (works on every platform)."""
+    while True:
+        try:
+            os.mkdir(path)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > _STALE_LOCK_SECONDS:
+                    os.rmdir(path)
+                    continue
+            except OSError:
+                pass  # Released meanwhile
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.rmdir(path)
@@ -14,6 +14,8 @@ from typing import Optional, TYPE_CHECKING
 
 from models import TrendDirection
 
+from .config import TIMEFRAME_4H, TIMEFRAME_1D, TIMEFRAME_1W
+
 if TYPE_CHECKING:
     from .candle_store import CandleStore
 
@@ -43,39 +45,28 @@ def compute_lightweight_htf_context(
     is_long = direction == TrendDirection.BULLISH
     result = LightweightHTFContext()
     
-    # Get last closed daily candle for range position
-    daily_candles = candle_store.get_1d_candles().get_candles_up_to(signal_time)
-    daily_high = None
-    daily_low = None
-    if daily_candles is not None and len(daily_candles) > 0:
-        last_daily = daily_candles.iloc[-1]
-        daily_high = float(last_daily["high"])
-        daily_low = float(last_daily["low"])
+    features = candle_store.features
+    
+    # Last closed daily candle for range position
+    daily_high = features.value_at("high", TIMEFRAME_1D, signal_time)
+    daily_low = features.value_at("low", TIMEFRAME_1D, signal_time)
+    if daily_high is not None:
         daily_range = daily_high - daily_low
         if daily_range > 0:
             result.htf_range_position_daily = (entry_price - daily_low) / daily_range
     
-    # Get last closed weekly candle for range position
-    weekly_candles = candle_store.get_1w_candles().get_candles_up_to(signal_time)
-    weekly_high = None
-    weekly_low = None
-    if weekly_candles is not None and len(weekly_candles) > 0:
-        last_weekly = weekly_candles.iloc[-1]
-        weekly_high = float(last_weekly["high"])
-        weekly_low = float(last_weekly["low"])
+    # Last closed weekly candle for range position
+    weekly_high = features.value_at("high", TIMEFRAME_1W, signal_time)
+    weekly_low = features.value_at("low", TIMEFRAME_1W, signal_time)
+    if weekly_high is not None:
         weekly_range = weekly_high - weekly_low
         if weekly_range > 0:
             result.htf_range_position_weekly = (entry_price - weekly_low) / weekly_range
     
     # Compute distance to next HTF obstacle
     # Get 4H levels as well
-    candles_4h = candle_store.get_4h_candles().get_candles_up_to(signal_time)
-    h4_high = None
-    h4_low = None
-    if candles_4h is not None and len(candles_4h) > 0:
-        last_4h = candles_4h.iloc[-1]
-        h4_high = float(last_4h["high"])
-        h4_low = float(last_4h["low"])
+    h4_high = features.value_at("high", TIMEFRAME_4H, signal_time)
+    h4_low = features.value_at("low", TIMEFRAME_4H, signal_time)
     
     # Collect obstacles based on direction
     obstacles = []
@@ -25,6 +25,7 @@ from aoi.analyzer import filter_noisy_points
 from configuration import require_analysis_params
 
 from .candle_store import CandleStore
+from .profiling import stage
 from .timeframe_alignment import (
     TimeframeAligner,
     get_candles_for_analysis,
@@ -41,6 +42,12 @@ from .config import (
     TREND_ALIGNMENT_TIMEFRAMES,
 )
 
+# Candle windows passed to AOI analysis (ATR is computed over the same window)
+AOI_LOOKBACKS: Mapping[str, int] = {
+    TIMEFRAME_4H: LOOKBACK_AOI_4H,
+    TIMEFRAME_1D: LOOKBACK_AOI_1D,
+}
+
 
 @dataclass
 class SymbolState:
@@ -126,7 +133,7 @@ class MarketStateManager:
         """Get current market state."""
         return self._state
     
-    def update_state(self, current_time: datetime) -> None:
+    def update_state(self, current_time: datetime, index_1h: Optional[int] = None) -> None:
         """Update market state based on new timeframe closes.
         
         Checks for new 4H/1D/1W closes and recomputes the corresponding
@@ -134,9 +141,15 @@ class MarketStateManager:
         
         Args:
             current_time: Current simulation time (1H candle close)
+            index_1h: Store index of the current 1H candle; when given, new
+                closes come from the aligner's precomputed close schedule
         """
         # Detect which timeframes have new closes
-        close_flags = self._aligner.detect_new_closes(current_time)
+        with stage("aligner"):
+            if index_1h is not None:
+                close_flags = self._aligner.detect_new_closes_at(index_1h)
+            else:
+                close_flags = self._aligner.detect_new_closes(current_time)
         
         # Update 4H state if new 4H candle closed
         if close_flags.new_4h:
@@ -158,7 +171,8 @@ class MarketStateManager:
         )
         
         if trend_candles is not None and not trend_candles.empty:
-            self._state.trend_result_4h = self._compute_trend(trend_candles)
+            with stage("trend_recompute"):
+                self._state.trend_result_4h = self._compute_trend(trend_candles)
             self._state.trend_4h = (
                 self._state.trend_result_4h.trend
                 if self._state.trend_result_4h else None
@@ -166,13 +180,14 @@ class MarketStateManager:
         
         # Get 4H candles for AOI analysis (may need more lookback)
         aoi_candles = get_candles_for_analysis(
-            self._store, TIMEFRAME_4H, as_of_time, LOOKBACK_AOI_4H
+            self._store, TIMEFRAME_4H, as_of_time, AOI_LOOKBACKS[TIMEFRAME_4H]
         )
         
         if aoi_candles is not None and not aoi_candles.empty:
-            self._state.aois_4h = self._compute_aois(
-                TIMEFRAME_4H, aoi_candles, self._state.get_overall_trend()
-            )
+            with stage("aoi_recompute"):
+                self._state.aois_4h = self._compute_aois(
+                    TIMEFRAME_4H, aoi_candles, self._state.get_overall_trend()
+                )
         
         self._state.last_4h_update = as_of_time
     
@@ -184,7 +199,8 @@ class MarketStateManager:
         )
         
         if trend_candles is not None and not trend_candles.empty:
-            self._state.trend_result_1d = self._compute_trend(trend_candles)
+            with stage("trend_recompute"):
+                self._state.trend_result_1d = self._compute_trend(trend_candles)
             self._state.trend_1d = (
                 self._state.trend_result_1d.trend
                 if self._state.trend_result_1d else None
@@ -192,13 +208,14 @@ class MarketStateManager:
         
         # Get 1D candles for AOI analysis
         aoi_candles = get_candles_for_analysis(
-            self._store, TIMEFRAME_1D, as_of_time, LOOKBACK_AOI_1D
+            self._store, TIMEFRAME_1D, as_of_time, AOI_LOOKBACKS[TIMEFRAME_1D]
         )
         
         if aoi_candles is not None and not aoi_candles.empty:
-            self._state.aois_1d = self._compute_aois(
-                TIMEFRAME_1D, aoi_candles, self._state.get_overall_trend()
-            )
+            with stage("aoi_recompute"):
+                self._state.aois_1d = self._compute_aois(
+                    TIMEFRAME_1D, aoi_candles, self._state.get_overall_trend()
+                )
         
         self._state.last_1d_update = as_of_time
     
@@ -209,7 +226,8 @@ class MarketStateManager:
         )
         
         if trend_candles is not None and not trend_candles.empty:
-            self._state.trend_result_1w = self._compute_trend(trend_candles)
+            with stage("trend_recompute"):
+                self._state.trend_result_1w = self._compute_trend(trend_candles)
             self._state.trend_1w = (
                 self._state.trend_result_1w.trend
                 if self._state.trend_result_1w else None
@@ -257,10 +275,12 @@ class MarketStateManager:
         current_price = float(prices[-1])
         
         # Build AOI context
-        from utils.indicators import calculate_atr
         from utils.forex import get_pip_size, price_to_pips
         
-        atr = calculate_atr(candles, length=14)
+        # Store frames keep their positional index, so the last label is the candle index
+        atr = self._store.atr_at(
+            timeframe, int(candles.index[-1]), AOI_LOOKBACKS[timeframe], length=14
+        )
         pip_size = get_pip_size(self._symbol)
         atr_pips = price_to_pips(atr, pip_size) if atr > 0 else None
         
@@ -295,3 +315,15 @@ class MarketStateManager:
         """Reset state for a new replay run."""
         self._state = SymbolState()
         self._aligner.reset()
+    
+    def snapshot(self) -> dict:
+        """Picklable state for a replay checkpoint."""
+        return {
+            "state": self._state,
+            "closes": self._aligner.snapshot_closes(),
+        }
+    
+    def restore(self, snapshot: dict) -> None:
+        """Continue from a snapshot() taken by an earlier run."""
+        self._state = snapshot["state"]
+        self._aligner.restore_closes(snapshot["closes"])
@@ -6,6 +6,7 @@ using in-memory candle data instead of API calls.
 
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
@@ -18,15 +19,11 @@ from signal_outcome.models import PendingSignal
 
 from .candle_store import CandleStore
 from .config import OUTCOME_WINDOW_BARS, BATCH_SIZE
-from .replay_queries import (
-    FETCH_PENDING_REPLAY_SIGNALS,
-    INSERT_REPLAY_SIGNAL_OUTCOME,
-    INSERT_REPLAY_CHECKPOINT_RETURN,
-    MARK_REPLAY_OUTCOME_COMPUTED,
-)
-from .path_extremes import PathExtremesCalculator, persist_path_extremes
-from .sl_geometry import SLGeometryCalculator, persist_sl_geometry
-from .exit_simulator import ExitSimulator, persist_exit_simulations
+from .replay_queries import FETCH_PENDING_REPLAY_SIGNALS
+from .result_sink import ReplayResultSink
+from .path_extremes import PathExtremesCalculator, path_extreme_params
+from .sl_geometry import SLGeometryCalculator, sl_geometry_params
+from .exit_simulator import ExitSimulator, exit_simulation_params
 
 
 @dataclass
@@ -68,26 +65,93 @@ class ReplayOutcomeCalculator:
     the replay loop.
     """
     
-    def __init__(self, symbol: str, candle_store: CandleStore, start_date: datetime = None, end_date: datetime = None):
+    def __init__(
+        self,
+        symbol: str,
+        candle_store: CandleStore,
+        sink: ReplayResultSink,
+        start_date: datetime = None,
+        end_date: datetime = None,
+    ):
         self._symbol = symbol
         self._store = candle_store
+        self._sink = sink
         self._start_date = start_date
         self._end_date = end_date
-        self._signal_indices: dict[int, int] = {}  # signal_id -> 1H candle index
+        # Min-heap of (eligible 1H index, signal_id, signal)
+        self._pending: list[tuple[int, int, ReplayPendingSignal]] = []
+        self._registered_ids: set[int] = set()
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of registered signals still awaiting an outcome."""
+        return len(self._pending)
     
-    def register_signal(self, signal_id: int, signal_time: datetime) -> None:
-        """Register a signal with its 1H candle index for later outcome computation.
+    def register_signal(self, signal: ReplayPendingSignal) -> bool:
+        """Queue a signal for outcome computation once its window has closed.
         
         Called when a signal is inserted so we can track its position in the candle store.
+        The signal becomes eligible at its 1H index + OUTCOME_WINDOW_BARS.
+        
+        Returns:
+            True if the signal was queued, False if it is unknown to the store
+            or already queued.
         """
-        idx = self._store.get_1h_candles().find_index_by_time(signal_time)
-        if idx is not None:
-            self._signal_indices[signal_id] = idx
+        if signal.id in self._registered_ids:
+            return False
+        
+        idx = signal.signal_1h_index
+        if idx is None:
+            idx = self._store.get_1h_candles().find_index_by_time(signal.signal_time)
+            if idx is None:
+                return False
+            signal.signal_1h_index = idx
+        
+        heapq.heappush(self._pending, (idx + OUTCOME_WINDOW_BARS, signal.id, signal))
+        self._registered_ids.add(signal.id)
+        return True
+    
+    def recover_pending_signals(self) -> int:
+        """Queue signals left pending in the replay schema by a previous run.
+        
+        Used once when a replay (re)starts so signals inserted before a crash
+        still get their outcomes. The replay loop itself never polls the DB.
+        
+        Returns:
+            Number of signals queued
+        """
+        recovered = 0
+        for signal in self._fetch_pending_signals(limit=None):
+            if self.register_signal(signal):
+                recovered += 1
+        return recovered
+    
+    def snapshot(self) -> List[ReplayPendingSignal]:
+        """Signals still awaiting an outcome, for a replay checkpoint."""
+        return [signal for _, _, signal in sorted(self._pending)]
+    
+    def restore(self, signals: List[ReplayPendingSignal]) -> int:
+        """Queue the pending signals of a checkpoint.
+        
+        Store indices are resolved again from the signal times, since the
+        candles may have been reloaded with a different history length.
+        
+        Returns:
+            Number of signals queued
+        """
+        restored = 0
+        for signal in signals:
+            signal.signal_1h_index = None
+            if self.register_signal(signal):
+                restored += 1
+        return restored
     
     def compute_eligible_outcomes(self, current_1h_index: int) -> int:
         """Compute outcomes for signals that are now eligible.
         
-        A signal is eligible when 48 candles have passed since its signal time.
+        A signal is eligible when OUTCOME_WINDOW_BARS candles have passed since
+        its signal candle. Only due signals are popped from the queue; the
+        database is touched only to persist results.
         
         Args:
             current_1h_index: Current index in the 1H candle iteration
@@ -96,52 +160,51 @@ class ReplayOutcomeCalculator:
             Number of outcomes computed
         """
         computed_count = 0
+        deferred = []
         
-        # Fetch pending signals from replay DB (filtered by symbol and time range)
-        pending_signals = self._fetch_pending_signals()
-        
-        for signal in pending_signals:
-            # Get signal's 1H index
-            signal_idx = self._signal_indices.get(signal.id)
-            if signal_idx is None:
-                # Try to find it
-                signal_idx = self._store.get_1h_candles().find_index_by_time(
-                    signal.signal_time
+        try:
+            while self._pending and self._pending[0][0] <= current_1h_index:
+                entry = heapq.heappop(self._pending)
+                _, signal_id, signal = entry
+                
+                # Get future candles from store
+                future_candles = self._store.get_1h_candles().get_candles_after_index(
+                    signal.signal_1h_index, OUTCOME_WINDOW_BARS
                 )
-                if signal_idx is not None:
-                    self._signal_indices[signal.id] = signal_idx
-            
-            if signal_idx is None:
-                continue
-            
-            # Check if eligible (72 candles have passed)
-            if current_1h_index < signal_idx + OUTCOME_WINDOW_BARS:
-                continue
-            
-            # Get future candles from store
-            future_candles = self._store.get_1h_candles().get_candles_after_index(
-                signal_idx, OUTCOME_WINDOW_BARS
-            )
-            
-            if len(future_candles) < OUTCOME_WINDOW_BARS:
-                continue
-            
-            # Compute and persist outcome
-            if self._compute_and_persist_outcome(signal, future_candles):
-                computed_count += 1
-                # Remove from tracking
-                self._signal_indices.pop(signal.id, None)
+                
+                if len(future_candles) < OUTCOME_WINDOW_BARS:
+                    # Stays queued, so later steps and the final pass (snapshot) retry it
+                    deferred.append(entry)
+                    continue
+                
+                # Compute and persist outcome
+                try:
+                    persisted = self._compute_and_persist_outcome(signal, future_candles)
+                except Exception:
+                    # Retried on a later candle unless its outcome was already queued
+                    if signal_id in self._registered_ids:
+                        heapq.heappush(self._pending, entry)
+                    raise
+                self._registered_ids.discard(signal_id)
+                if persisted:
+                    computed_count += 1
+        finally:
+            for entry in deferred:
+                heapq.heappush(self._pending, entry)
         
         return computed_count
     
-    def _fetch_pending_signals(self) -> List[ReplayPendingSignal]:
-        """Fetch signals where outcome_computed = FALSE from replay schema."""
+    def _fetch_pending_signals(self, limit: Optional[int] = BATCH_SIZE) -> List[ReplayPendingSignal]:
+        """Fetch signals where outcome_computed = FALSE from replay schema.
+        
+        A limit of None fetches every pending signal in the window.
+        """
         from psycopg2.extras import RealDictCursor
         from database.executor import DBExecutor
         
         rows = DBExecutor.fetch_all(
             FETCH_PENDING_REPLAY_SIGNALS,
-            params=(self._symbol, self._start_date, self._end_date, BATCH_SIZE),
+            params=(self._symbol, self._start_date, self._end_date, limit),
             cursor_factory=RealDictCursor,
             context="fetch_pending_replay_signals",
         )
@@ -202,8 +265,10 @@ class ReplayOutcomeCalculator:
             checkpoint_returns=[],  # Replay uses its own checkpoint calculation
         )
         
-        # Persist main outcome atomically
+        # Queue main outcome (written with the next sink flush)
         success = self._persist_outcome(signal.id, replay_result)
+        # The outcome is queued, so a failure below must not compute it again
+        self._registered_ids.discard(signal.id)
         
         if success:
             # Compute and persist exit simulation data
@@ -225,22 +290,15 @@ class ReplayOutcomeCalculator:
     ) -> None:
         """Compute and persist exit simulation data (path, geometry, simulations)."""
         # Get signal candle index
-        signal_idx = self._signal_indices.get(signal_id)
+        signal_idx = signal.signal_1h_index
         if signal_idx is None:
             return
         
         # Get the signal candle (last candle at signal time)
-        signal_candle_data = self._store.get_1h_candles().get_candle_at_index(signal_idx)
-        if signal_candle_data is None:
+        signal_candle = self._store.features.candle_at(signal_idx)
+        if signal_candle is None:
             return
         
-        signal_candle = {
-            "open": float(signal_candle_data["open"]),
-            "high": float(signal_candle_data["high"]),
-            "low": float(signal_candle_data["low"]),
-            "close": float(signal_candle_data["close"]),
-        }
-        
         # 1. Compute path extremes (bars 1-72)
         path_calc = PathExtremesCalculator(
             candle_store=self._store,
@@ -251,7 +309,7 @@ class ReplayOutcomeCalculator:
         )
         path_rows = path_calc.compute()
         if path_rows:
-            persist_path_extremes(signal_id, path_rows)
+            self._sink.add_path_extremes(signal_id, path_extreme_params(signal_id, path_rows))
         
         # 2. Compute SL geometry
         geometry_calc = SLGeometryCalculator(
@@ -265,48 +323,30 @@ class ReplayOutcomeCalculator:
         )
         geometry = geometry_calc.compute()
         if geometry:
-            persist_sl_geometry(signal_id, geometry)
+            self._sink.add_sl_geometry(signal_id, sl_geometry_params(signal_id, geometry))
             
             # 3. Run exit simulator (requires both path and geometry)
             if path_rows:
                 simulator = ExitSimulator(geometry=geometry, path_extremes=path_rows)
                 sim_rows = simulator.simulate_all()
                 if sim_rows:
-                    persist_exit_simulations(signal_id, sim_rows)
+                    self._sink.add_exit_simulations(
+                        signal_id, exit_simulation_params(signal_id, sim_rows)
+                    )
     
     def _persist_outcome(self, signal_id: int, result: ReplayOutcomeResult) -> bool:
-        """Persist outcome and mark signal as computed in a transaction."""
-        from database.executor import DBExecutor
-        
-        def _work(cursor):
-            # Insert outcome with simplified schema
-            cursor.execute(
-                INSERT_REPLAY_SIGNAL_OUTCOME,
-                (
-                    signal_id,
-                    result.window_bars,
-                    float(result.mfe_atr),
-                    float(result.mae_atr),
-                    result.bars_to_mfe,
-                    result.bars_to_mae,
-                    result.first_extreme,
-                ),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return False
-            outcome_id = row[0]
-            
-            # Insert checkpoint returns
-            for cp in result.checkpoint_returns:
-                cursor.execute(
-                    INSERT_REPLAY_CHECKPOINT_RETURN,
-                    (outcome_id, cp.bars_after, float(cp.return_atr)),
-                )
-            
-            # Mark as computed
-            cursor.execute(MARK_REPLAY_OUTCOME_COMPUTED, (signal_id,))
-            return True
-        
-        result = DBExecutor.execute_transaction(_work, context="persist_replay_outcome")
-        return result if result is not None else False
+        """Queue outcome, checkpoint returns and the outcome_computed flag."""
+        return self._sink.add_outcome(
+            signal_id,
+            (
+                result.window_bars,
+                float(result.mfe_atr),
+                float(result.mae_atr),
+                result.bars_to_mfe,
+                result.bars_to_mae,
+                result.first_extreme,
+            ),
+            checkpoint_returns=[
+                (cp.bars_after, float(cp.return_atr)) for cp in result.checkpoint_returns
+            ],
+        )
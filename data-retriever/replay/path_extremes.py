@@ -2,13 +2,17 @@
 
 Computes per-bar return, MFE, and MAE for bars 1-72 after entry.
 This is raw price path data, completely SL-agnostic.
+
+Paths are computed with NumPy over slices of the 1H candle arrays and
+returned as a PathExtremes struct-of-arrays.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, TYPE_CHECKING
+from typing import List, Optional, Sequence, TYPE_CHECKING
 
+import numpy as np
 
 from models import TrendDirection
 from .config import OUTCOME_WINDOW_BARS
@@ -28,6 +32,66 @@ class PathExtremeRow:
     mae_atr_high_low: Optional[float] = None  # Intrabar MAE using high/low
 
 
+class PathExtremes(Sequence[PathExtremeRow]):
+    """Path extremes for bars 1-72 as parallel arrays (struct-of-arrays).
+    
+    Indexing or iterating yields PathExtremeRow objects built on demand, so
+    code written against List[PathExtremeRow] keeps working; hot paths
+    (exit simulation, INSERT params) read the arrays directly.
+    """
+    
+    __slots__ = (
+        "bar_index",
+        "return_atr_at_bar",
+        "mfe_atr_to_here",
+        "mae_atr_to_here",
+        "mfe_atr_high_low",
+        "mae_atr_high_low",
+    )
+    
+    def __init__(
+        self,
+        bar_index: np.ndarray,
+        return_atr_at_bar: np.ndarray,
+        mfe_atr_to_here: np.ndarray,
+        mae_atr_to_here: np.ndarray,
+        mfe_atr_high_low: np.ndarray,
+        mae_atr_high_low: np.ndarray,
+    ):
+        self.bar_index = bar_index
+        self.return_atr_at_bar = return_atr_at_bar
+        self.mfe_atr_to_here = mfe_atr_to_here
+        self.mae_atr_to_here = mae_atr_to_here
+        self.mfe_atr_high_low = mfe_atr_high_low
+        self.mae_atr_high_low = mae_atr_high_low
+    
+    @classmethod
+    def empty(cls) -> "PathExtremes":
+        return cls(
+            np.empty(0, dtype=np.int64),
+            *(np.empty(0, dtype=np.float64) for _ in range(5)),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.bar_index)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return PathExtremeRow(
+            bar_index=int(self.bar_index[index]),
+            return_atr_at_bar=float(self.return_atr_at_bar[index]),
+            mfe_atr_to_here=float(self.mfe_atr_to_here[index]),
+            mae_atr_to_here=float(self.mae_atr_to_here[index]),
+            mfe_atr_high_low=float(self.mfe_atr_high_low[index]),
+            mae_atr_high_low=float(self.mae_atr_high_low[index]),
+        )
+    
+    def columns(self) -> List[list]:
+        """All columns as Python lists, in PathExtremeRow field order."""
+        return [getattr(self, name).tolist() for name in self.__slots__]
+
+
 class PathExtremesCalculator:
     """Computes per-bar return/MFE/MAE for bars 1-72."""
     
@@ -45,71 +109,71 @@ class PathExtremesCalculator:
         self._atr = atr_at_entry
         self._is_long = direction == TrendDirection.BULLISH
     
-    def compute(self) -> List[PathExtremeRow]:
+    def compute(self) -> PathExtremes:
         """Compute path extremes for bars 1-72.
         
+        Works on array slices of the 1H candles: returns are computed for
+        the whole window at once and the running extremes with
+        np.maximum.accumulate / np.minimum.accumulate.
+        
         Returns:
-            List of PathExtremeRow for each bar (up to 72)
+            PathExtremes for each bar (up to 72; empty if ATR is not positive)
         """
         if self._atr <= 0:
-            return []
+            return PathExtremes.empty()
         
-        # Get future candles after entry
+        # Future candles after entry (fewer at the end of the store)
         candles_1h = self._store.get_1h_candles()
-        max_idx = len(candles_1h.candles) - 1
+        start = self._entry_idx + 1
+        end = min(start + OUTCOME_WINDOW_BARS, len(candles_1h))
+        if start >= end:
+            return PathExtremes.empty()
         
-        results = []
-        running_mfe = float('-inf')
-        running_mae = float('inf')
-        running_mfe_hl = float('-inf')
-        running_mae_hl = float('inf')
+        closes = candles_1h.closes[start:end]
+        highs = candles_1h.highs[start:end]
+        lows = candles_1h.lows[start:end]
         
-        for bar_idx in range(1, OUTCOME_WINDOW_BARS + 1):
-            candle_idx = self._entry_idx + bar_idx
-            if candle_idx > max_idx:
-                break
-            
-            candle = candles_1h.get_candle_at_index(candle_idx)
-            if candle is None:
-                break
-            
-            close = float(candle["close"])
-            high = float(candle["high"])
-            low = float(candle["low"])
-            
-            # Calculate signed return at bar close
-            if self._is_long:
-                return_atr = (close - self._entry_price) / self._atr
-                # Intrabar extremes
-                intrabar_mfe = (high - self._entry_price) / self._atr
-                intrabar_mae = (low - self._entry_price) / self._atr
-            else:
-                return_atr = (self._entry_price - close) / self._atr
-                # Intrabar extremes (inverted for bearish)
-                intrabar_mfe = (self._entry_price - low) / self._atr
-                intrabar_mae = (self._entry_price - high) / self._atr
-            
-            # Update running MFE/MAE (using close prices)
-            running_mfe = max(running_mfe, return_atr)
-            running_mae = min(running_mae, return_atr)
-            
-            # Update running MFE/MAE using high/low (intrabar)
-            running_mfe_hl = max(running_mfe_hl, intrabar_mfe)
-            running_mae_hl = min(running_mae_hl, intrabar_mae)
-            
-            results.append(PathExtremeRow(
-                bar_index=bar_idx,
-                return_atr_at_bar=return_atr,
-                mfe_atr_to_here=running_mfe,
-                mae_atr_to_here=running_mae,
-                mfe_atr_high_low=running_mfe_hl,
-                mae_atr_high_low=running_mae_hl,
-            ))
+        # Signed returns at bar close and intrabar extremes (inverted for bearish)
+        if self._is_long:
+            return_atr = (closes - self._entry_price) / self._atr
+            intrabar_mfe = (highs - self._entry_price) / self._atr
+            intrabar_mae = (lows - self._entry_price) / self._atr
+        else:
+            return_atr = (self._entry_price - closes) / self._atr
+            intrabar_mfe = (self._entry_price - lows) / self._atr
+            intrabar_mae = (self._entry_price - highs) / self._atr
         
-        return results
+        return PathExtremes(
+            bar_index=np.arange(1, end - start + 1, dtype=np.int64),
+            return_atr_at_bar=return_atr,
+            # Running MFE/MAE using close prices
+            mfe_atr_to_here=np.maximum.accumulate(return_atr),
+            mae_atr_to_here=np.minimum.accumulate(return_atr),
+            # Running MFE/MAE using high/low (intrabar)
+            mfe_atr_high_low=np.maximum.accumulate(intrabar_mfe),
+            mae_atr_high_low=np.minimum.accumulate(intrabar_mae),
+        )
+
+
+def path_extreme_params(signal_id: int, rows: Sequence[PathExtremeRow]) -> List[tuple]:
+    """Build INSERT parameter tuples for path extreme rows."""
+    if isinstance(rows, PathExtremes):
+        return [(signal_id, *values) for values in zip(*rows.columns())]
+    return [
+        (
+            signal_id,
+            row.bar_index,
+            row.return_atr_at_bar,
+            row.mfe_atr_to_here,
+            row.mae_atr_to_here,
+            row.mfe_atr_high_low,
+            row.mae_atr_high_low,
+        )
+        for row in rows
+    ]
 
 
-def persist_path_extremes(signal_id: int, rows: List[PathExtremeRow]) -> None:
+def persist_path_extremes(signal_id: int, rows: Sequence[PathExtremeRow]) -> None:
     """Persist path extremes to database."""
     from database.executor import DBExecutor
     from .replay_queries import INSERT_SIGNAL_PATH_EXTREME
@@ -118,18 +182,7 @@ def persist_path_extremes(signal_id: int, rows: List[PathExtremeRow]) -> None:
         return
     
     def _persist(cursor):
-        for row in rows:
-            cursor.execute(
-                INSERT_SIGNAL_PATH_EXTREME,
-                (
-                    signal_id,
-                    row.bar_index,
-                    row.return_atr_at_bar,
-                    row.mfe_atr_to_here,
-                    row.mae_atr_to_here,
-                    row.mfe_atr_high_low,
-                    row.mae_atr_high_low,
-                ),
-            )
+        for params in path_extreme_params(signal_id, rows):
+            cursor.execute(INSERT_SIGNAL_PATH_EXTREME, params)
     
     DBExecutor.execute_transaction(_persist, context="persist_path_extremes")
@@ -0,0 +1,187 @@
+"""Portfolio-level trade constraints for multi-symbol replay.
+
+Before scanning a symbol, the live entry job asks MT5Constraints whether
+the bot may open another trade (externals/meta_trader/constraints.py):
+- Global limit: fewer than MT5_MAX_ACTIVE_TRADES of the bot's positions open
+- Symbol interval: the symbol's last trade opened at least
+  MT5_MIN_TRADE_INTERVAL_MINUTES ago
+
+PortfolioConstraints applies the same checks to replayed signals. Every
+admitted signal opens a simulated position with the live SL/TP
+(SL_AOI_FAR_PLUS_0_25 and RR_MULTIPLE from the signal candle close, see
+entry/live_execution.py), which stays open until a later 1H candle hits
+either level. A position that hits neither within PORTFOLIO_MAX_HOLD_BARS
+1H candles is closed at the last of them (or at the last candle of the
+data, if that comes first), so an unresolved trade never holds its slot
+for the rest of the run.
+
+A signal counts as blocked once per symbol and signal time, however many
+of the scan's AOIs had an entry pattern.
+
+Only meaningful when all symbols advance on one clock, see
+run_replay(portfolio=True).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from configuration.broker_config import MT5_MAX_ACTIVE_TRADES, MT5_MIN_TRADE_INTERVAL_MINUTES
+from entry.gates.config import SL_BUFFER_ATR, RR_MULTIPLE
+
+from .candle_store import TimeframeCandles
+from .config import PORTFOLIO_MAX_HOLD_BARS
+from .outcome_calculator import ReplayPendingSignal
+
+# 1H candles scanned per step when looking for a position's SL/TP hit
+_EXIT_SCAN_BARS = 256
+
+
+@dataclass
+class SimulatedPosition:
+    """A replayed trade, open from its signal candle until SL/TP or the max hold."""
+
+    symbol: str
+    signal_id: int
+    open_ns: int                    # Signal candle time (epoch ns)
+    is_long: bool
+    sl_price: float
+    tp_price: float
+    close_ns: Optional[int] = None  # Time of the candle that hits SL/TP or ends the hold
+    timed_out: bool = False         # Closed by the max hold, not by SL/TP
+
+
+def _epoch_ns(value) -> int:
+    return pd.Timestamp(value).value
+
+
+class PortfolioConstraints:
+    """Live MT5 trade limits across all symbols of a replay.
+
+    Times are 1H candle times. A position closed by the candle at time t
+    no longer counts for signals at t or later, which are decided after
+    that candle closed.
+    """
+
+    def __init__(
+        self,
+        max_active_trades: int = MT5_MAX_ACTIVE_TRADES,
+        min_interval_minutes: int = MT5_MIN_TRADE_INTERVAL_MINUTES,
+        max_hold_bars: int = PORTFOLIO_MAX_HOLD_BARS,
+    ):
+        self._max_active_trades = max_active_trades
+        self._max_hold_bars = max_hold_bars
+        self._min_gap_ns = min_interval_minutes * 60 * 1_000_000_000
+        self._open: list[SimulatedPosition] = []
+        self._last_open_ns: dict[str, int] = {}
+        # Last blocked signal time per symbol, so a scan's AOIs count once
+        self._last_blocked_ns: dict[str, int] = {}
+        self.trades_opened = 0
+        self.blocked_global = 0
+        self.blocked_interval = 0
+
+    @property
+    def blocked(self) -> int:
+        """Signals rejected by either limit."""
+        return self.blocked_global + self.blocked_interval
+
+    def active_positions(self, as_of_time: datetime) -> list[SimulatedPosition]:
+        """Positions still open at a candle time (closed ones are dropped)."""
+        now = _epoch_ns(as_of_time)
+        self._open = [
+            position for position in self._open
+            if position.close_ns is None or position.close_ns > now
+        ]
+        return list(self._open)
+
+    def admit(self, symbol: str, signal_time: datetime) -> bool:
+        """Whether a signal may open a trade, counting it as blocked if not.
+
+        The live check runs once before a symbol's AOI scan, so positions
+        opened by other AOIs of the same scan (same symbol and time) are
+        not held against it.
+        """
+        now = _epoch_ns(signal_time)
+        active = sum(
+            1 for position in self.active_positions(signal_time)
+            if not (position.symbol == symbol and position.open_ns == now)
+        )
+        if active >= self._max_active_trades:
+            if self._count_block(symbol, now):
+                self.blocked_global += 1
+            return False
+
+        last_open_ns = self._last_open_ns.get(symbol)
+        if last_open_ns is not None and last_open_ns < now and now - last_open_ns < self._min_gap_ns:
+            if self._count_block(symbol, now):
+                self.blocked_interval += 1
+            return False
+
+        return True
+
+    def _count_block(self, symbol: str, now: int) -> bool:
+        """Whether this block is the first for the symbol's signal time."""
+        if self._last_blocked_ns.get(symbol) == now:
+            return False
+        self._last_blocked_ns[symbol] = now
+        return True
+
+    def open(self, signal: ReplayPendingSignal, candles_1h: TimeframeCandles) -> SimulatedPosition:
+        """Open a position for an admitted signal and find where it exits."""
+        is_long = signal.direction == "bullish"
+        entry_price = signal.entry_price
+        if is_long:
+            far_edge_distance = entry_price - signal.aoi_low
+        else:
+            far_edge_distance = signal.aoi_high - entry_price
+        sl_distance = (far_edge_distance / signal.atr_1h + SL_BUFFER_ATR) * signal.atr_1h
+        tp_distance = sl_distance * RR_MULTIPLE
+
+        position = SimulatedPosition(
+            symbol=signal.symbol,
+            signal_id=signal.id,
+            open_ns=_epoch_ns(signal.signal_time),
+            is_long=is_long,
+            sl_price=entry_price - sl_distance if is_long else entry_price + sl_distance,
+            tp_price=entry_price + tp_distance if is_long else entry_price - tp_distance,
+        )
+        _resolve_exit(position, candles_1h, self._max_hold_bars)
+
+        self._open.append(position)
+        self._last_open_ns[signal.symbol] = max(
+            position.open_ns, self._last_open_ns.get(signal.symbol, position.open_ns)
+        )
+        self.trades_opened += 1
+        return position
+
+
+def _resolve_exit(position: SimulatedPosition, candles_1h: TimeframeCandles, max_hold_bars: int) -> None:
+    """Set close_ns to the first candle after the signal that hits SL or TP.
+
+    Without a hit in the `max_hold_bars` candles after the signal, the
+    position closes at the last of them, or at the last candle of the data.
+    """
+    time_ns = candles_1h.time_ns
+    start = int(np.searchsorted(time_ns, position.open_ns, side="right"))
+    end = min(start + max_hold_bars, len(time_ns))
+
+    for window_start in range(start, end, _EXIT_SCAN_BARS):
+        window = slice(window_start, min(window_start + _EXIT_SCAN_BARS, end))
+        highs = candles_1h.highs[window]
+        lows = candles_1h.lows[window]
+        if position.is_long:
+            hits = (lows <= position.sl_price) | (highs >= position.tp_price)
+        else:
+            hits = (highs >= position.sl_price) | (lows <= position.tp_price)
+        if hits.any():
+            position.close_ns = int(time_ns[window_start + int(np.argmax(hits))])
+            return
+
+    # Neither level hit: the hold ends with the last candle scanned
+    position.close_ns = int(time_ns[end - 1]) if end > start else position.open_ns
+    position.timed_out = True
@@ -17,7 +17,7 @@ from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 from models import TrendDirection
 
@@ -29,7 +29,8 @@ from .config import (
 )
 
 if TYPE_CHECKING:
-    from .candle_store import CandleStore
+    from .candle_store import CandleStore, TimeframeCandles
+    from .feature_store import FeatureStore
 
 
 @dataclass
@@ -85,10 +86,103 @@ def _to_python_int(value) -> Optional[int]:
     return int(value) if value is not None else None
 
 
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of the `window` values ending at each index, NaN before that.
+    
+    Each window is reduced exactly like np.sum on the slice would be.
+    """
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = sliding_window_view(values, window).sum(axis=1)
+    return result
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the `window` values ending at each index, NaN before that."""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return result
+
+
+def _rolling_running_total(values: np.ndarray, window: int) -> np.ndarray:
+    """Left-to-right running total of each window (matches a Python += loop)."""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.cumsum(sliding_window_view(values, window), axis=1)[:, -1]
+    return result
+
+
+class PreEntryFeatureSeries:
+    """Rolling pre-entry features for every 1H candle of a symbol.
+    
+    Element i of each array describes the lookback window that ends at 1H
+    candle i, i.e. what a signal on candle i + 1 sees. Only direction- and
+    AOI-independent quantities are precomputed; the calculator applies the
+    trade direction and AOI bounds at lookup time. Arrays are NaN where the
+    window does not fit.
+    """
+    
+    def __init__(self, features: "FeatureStore"):
+        opens = features.get("open")
+        highs = features.get("high")
+        lows = features.get("low")
+        closes = features.get("close")
+        true_ranges = features.get("true_range")
+        n = len(closes)
+        lookback = PRE_ENTRY_LOOKBACK_BARS
+        
+        # Mean true range of a window skips the window's first candle
+        self.pre_atr = _rolling_mean(true_ranges, lookback - 1)
+        
+        # Long ATR uses up to PRE_ENTRY_LONG_ATR_WINDOW candles, at least half of them
+        self.long_atr = _rolling_mean(true_ranges, PRE_ENTRY_LONG_ATR_WINDOW - 1)
+        for available in range(PRE_ENTRY_LONG_ATR_WINDOW // 2, min(n, PRE_ENTRY_LONG_ATR_WINDOW)):
+            self.long_atr[available - 1] = np.mean(true_ranges[1:available])
+        
+        self.range_high = np.full(n, np.nan)
+        self.range_low = np.full(n, np.nan)
+        if n >= lookback:
+            self.range_high[lookback - 1:] = sliding_window_view(highs, lookback).max(axis=1)
+            self.range_low[lookback - 1:] = sliding_window_view(lows, lookback).min(axis=1)
+        
+        bodies = features.get("body")
+        self.body_total = _rolling_sum(bodies, lookback)
+        self.impulse_body_total = _rolling_sum(bodies, PRE_ENTRY_IMPULSE_BARS)
+        self.bullish_bars = _rolling_sum(features.get("is_bullish").astype(np.int64), lookback)
+        self.bearish_bars = _rolling_sum(features.get("is_bearish").astype(np.int64), lookback)
+        
+        # Bars in the large-bar window whose body beats the lookback average
+        avg_body = _rolling_mean(bodies, lookback)
+        self.large_bar_ratio = np.full(n, np.nan)
+        window = PRE_ENTRY_LARGE_BAR_WINDOW
+        if n >= lookback:
+            recent = sliding_window_view(bodies, window)[lookback - window:]
+            averages = avg_body[lookback - 1:]
+            large = np.count_nonzero(recent > averages[:, None], axis=1) / window
+            self.large_bar_ratio[lookback - 1:] = np.where(averages > 0, large, np.nan)
+        
+        # Overlap of each candle with the previous one; the window's first has none
+        overlaps = np.zeros(n)
+        if n > 1:
+            overlaps[1:] = np.maximum(
+                0.0,
+                np.minimum(highs[1:], highs[:-1]) - np.maximum(lows[1:], lows[:-1]),
+            )
+        self.overlap_total = np.full(n, np.nan)
+        self.overlap_total[1:] = _rolling_running_total(overlaps[1:], lookback - 1)
+        
+        upper_wicks = highs - np.maximum(opens, closes)
+        lower_wicks = np.minimum(opens, closes) - lows
+        self.wick_total = _rolling_sum(upper_wicks, lookback) + _rolling_sum(lower_wicks, lookback)
+
+
 class PreEntryContextCalculator:
     """Computes pre-entry context metrics from candle data.
     
-    All computations use candles strictly before the entry candle.
+    All computations use candles strictly before the entry candle. Window
+    aggregates come from the symbol's PreEntryFeatureSeries, so a signal's
+    context is a handful of index lookups.
     """
     
     def __init__(
@@ -112,41 +206,30 @@ class PreEntryContextCalculator:
         Returns:
             PreEntryContextData with all computed metrics, or None if insufficient data.
         """
-        # Get candles strictly before signal time
-        candles_1h = self._store.get_1h_candles().get_candles_up_to(self._signal_time)
-        if candles_1h is None or candles_1h.empty:
+        candles_1h = self._store.get_1h_candles()
+        if candles_1h.is_empty:
             return None
         
-        # Exclude the entry candle itself (use candles before entry)
-        # The signal_time is the time of the entry candle, so we need candles before it
-        candles_before = candles_1h[candles_1h["time"] < self._signal_time].copy()
-        if len(candles_before) < PRE_ENTRY_LOOKBACK_BARS:
+        # Candles strictly before the entry candle (signal_time is its open time)
+        count_before = candles_1h.count_before(self._signal_time)
+        if count_before < PRE_ENTRY_LOOKBACK_BARS:
             return None
         
-        # Get main lookback window (last N candles before entry)
-        main_window = candles_before.tail(PRE_ENTRY_LOOKBACK_BARS)
-        
-        # Get long window for ATR ratio (need more history)
-        long_window = candles_before.tail(PRE_ENTRY_LONG_ATR_WINDOW)
-        
-        # Get impulse window (shorter, most recent)
-        impulse_window = candles_before.tail(PRE_ENTRY_IMPULSE_BARS)
-        
-        # Get large bar window
-        large_bar_window = candles_before.tail(PRE_ENTRY_LARGE_BAR_WINDOW)
+        features = self._store.get_pre_entry_features()
+        last = count_before - 1
         
         # Compute pre_atr first (needed for normalization)
-        pre_atr = self._compute_pre_atr(main_window)
-        if pre_atr is None or pre_atr <= 0:
+        pre_atr = features.pre_atr[last]
+        if not pre_atr > 0:
             return None
         
         # Compute all metrics
-        volatility = self._compute_volatility_metrics(main_window, long_window, pre_atr)
-        directional = self._compute_directional_metrics(main_window, pre_atr)
-        aoi_metrics = self._compute_aoi_metrics(main_window, candles_before, pre_atr)
-        impulse = self._compute_impulse_metrics(impulse_window, pre_atr)
-        large_bar = self._compute_large_bar_ratio(large_bar_window, main_window)
-        microstructure = self._compute_microstructure_metrics(main_window)
+        volatility = self._compute_volatility_metrics(features, last, pre_atr)
+        directional = self._compute_directional_metrics(candles_1h, features, last, pre_atr)
+        aoi_metrics = self._compute_aoi_metrics(candles_1h, count_before, pre_atr)
+        impulse = self._compute_impulse_metrics(candles_1h, features, last, pre_atr)
+        large_bar = features.large_bar_ratio[last]
+        microstructure = self._compute_microstructure_metrics(features, last)
         
         return PreEntryContextData(
             lookback_bars=PRE_ENTRY_LOOKBACK_BARS,
@@ -168,71 +251,40 @@ class PreEntryContextCalculator:
             # Impulse
             pre_impulse_net_atr=_to_python_float(impulse.get("pre_impulse_net_atr")),
             pre_impulse_efficiency=_to_python_float(impulse.get("pre_impulse_efficiency")),
-            pre_large_bar_ratio=_to_python_float(large_bar),
+            pre_large_bar_ratio=None if np.isnan(large_bar) else _to_python_float(large_bar),
             # Microstructure
             pre_overlap_ratio=_to_python_float(microstructure.get("pre_overlap_ratio")),
             pre_wick_ratio=_to_python_float(microstructure.get("pre_wick_ratio")),
         )
     
-    def _compute_pre_atr(self, candles: pd.DataFrame) -> Optional[float]:
-        """Compute average ATR over the lookback window.
-        
-        Uses the ATR value from each candle (True Range) and takes arithmetic mean.
-        """
-        if len(candles) < 2:
-            return None
-        
-        # Compute True Range for each candle
-        highs = candles["high"].values
-        lows = candles["low"].values
-        closes = candles["close"].values
-        
-        # TR = max(high - low, |high - prev_close|, |low - prev_close|)
-        prev_closes = np.roll(closes, 1)
-        tr1 = highs - lows
-        tr2 = np.abs(highs - prev_closes)
-        tr3 = np.abs(lows - prev_closes)
-        
-        true_ranges = np.maximum(tr1, np.maximum(tr2, tr3))
-        # Skip first element (no previous close)
-        true_ranges = true_ranges[1:]
-        
-        if len(true_ranges) == 0:
-            return None
-        
-        return float(np.mean(true_ranges))
-    
     def _compute_volatility_metrics(
         self,
-        main_window: pd.DataFrame,
-        long_window: pd.DataFrame,
+        features: PreEntryFeatureSeries,
+        last: int,
         pre_atr: float,
     ) -> dict:
         """Compute volatility and range metrics."""
         result = {}
         
-        # pre_atr_ratio: pre_atr / median_atr_over_long_window
-        if len(long_window) >= PRE_ENTRY_LONG_ATR_WINDOW // 2:
-            long_atr = self._compute_pre_atr(long_window)
-            if long_atr and long_atr > 0:
-                # Use median of rolling ATR values for stability
-                result["pre_atr_ratio"] = pre_atr / long_atr
+        # pre_atr_ratio: pre_atr / mean true range over the long window
+        long_atr = features.long_atr[last]
+        if long_atr > 0:
+            result["pre_atr_ratio"] = pre_atr / long_atr
         
         # pre_range_atr: (max(high) - min(low)) / pre_atr
-        max_high = main_window["high"].max()
-        min_low = main_window["low"].min()
-        total_range = max_high - min_low
-        result["pre_range_atr"] = total_range / pre_atr if pre_atr > 0 else None
+        total_range = features.range_high[last] - features.range_low[last]
+        result["pre_range_atr"] = total_range / pre_atr
         
         # pre_range_to_atr_ratio: pre_range_atr / lookback_bars
-        if result.get("pre_range_atr") is not None:
-            result["pre_range_to_atr_ratio"] = result["pre_range_atr"] / PRE_ENTRY_LOOKBACK_BARS
+        result["pre_range_to_atr_ratio"] = result["pre_range_atr"] / PRE_ENTRY_LOOKBACK_BARS
         
         return result
     
     def _compute_directional_metrics(
         self,
-        candles: pd.DataFrame,
+        candles_1h: "TimeframeCandles",
+        features: PreEntryFeatureSeries,
+        last: int,
         pre_atr: float,
     ) -> dict:
         """Compute directional pressure and balance metrics.
@@ -241,184 +293,117 @@ class PreEntryContextCalculator:
         """
         result = {}
         
-        if len(candles) < 2:
-            return result
-        
-        # Get first open and last close
-        first_open = candles.iloc[0]["open"]
-        last_close = candles.iloc[-1]["close"]
-        
         # pre_net_move_atr: (last_close - first_open) / pre_atr
         # Direction-aware: positive = pressure aligned with trade direction
-        raw_net_move = last_close - first_open
+        first_open = candles_1h.opens[last - PRE_ENTRY_LOOKBACK_BARS + 1]
+        raw_net_move = candles_1h.closes[last] - first_open
         if not self._is_long:
             raw_net_move = -raw_net_move  # Invert for short trades
-        result["pre_net_move_atr"] = raw_net_move / pre_atr if pre_atr > 0 else None
+        result["pre_net_move_atr"] = raw_net_move / pre_atr
         
         # pre_total_move_atr: SUM(ABS(close - open)) / pre_atr
-        body_moves = np.abs(candles["close"].values - candles["open"].values)
-        total_move = float(np.sum(body_moves))
-        result["pre_total_move_atr"] = total_move / pre_atr if pre_atr > 0 else None
+        result["pre_total_move_atr"] = float(features.body_total[last]) / pre_atr
         
         # pre_efficiency: ABS(pre_net_move_atr) / pre_total_move_atr
-        if result.get("pre_net_move_atr") is not None and result.get("pre_total_move_atr"):
-            if result["pre_total_move_atr"] > 0:
-                result["pre_efficiency"] = abs(result["pre_net_move_atr"]) / result["pre_total_move_atr"]
+        if result["pre_total_move_atr"] > 0:
+            result["pre_efficiency"] = abs(result["pre_net_move_atr"]) / result["pre_total_move_atr"]
         
         # pre_counter_bar_ratio: COUNT(counter_direction_closes) / total_bars
         # Long: close < open (bearish candle = counter)
         # Short: close > open (bullish candle = counter)
-        closes = candles["close"].values
-        opens = candles["open"].values
-        
         if self._is_long:
-            counter_bars = np.sum(closes < opens)
+            counter_bars = features.bearish_bars[last]
         else:
-            counter_bars = np.sum(closes > opens)
+            counter_bars = features.bullish_bars[last]
         
-        result["pre_counter_bar_ratio"] = counter_bars / len(candles)
+        result["pre_counter_bar_ratio"] = counter_bars / PRE_ENTRY_LOOKBACK_BARS
         
         return result
     
     def _compute_aoi_metrics(
         self,
-        main_window: pd.DataFrame,
-        all_candles: pd.DataFrame,
+        candles_1h: "TimeframeCandles",
+        count_before: int,
         pre_atr: float,
     ) -> dict:
         """Compute AOI interaction metrics.
         
         Uses full candle range (high/low) for interaction detection, not just body.
+        These depend on the AOI bounds, so they are evaluated per signal on the
+        lookback slice of the high/low arrays.
         """
         result = {}
         
         aoi_low = self._aoi_low
         aoi_high = self._aoi_high
+        first = count_before - PRE_ENTRY_LOOKBACK_BARS
         
         # Determine if each candle is inside AOI
         # candle_inside_aoi = high >= aoi_low AND low <= aoi_high
-        highs = main_window["high"].values
-        lows = main_window["low"].values
+        highs = candles_1h.highs[first:count_before]
+        lows = candles_1h.lows[first:count_before]
         
         inside_aoi = (highs >= aoi_low) & (lows <= aoi_high)
         
         # pre_bars_in_aoi: Total candles interacting with AOI
-        result["pre_bars_in_aoi"] = int(np.sum(inside_aoi))
+        result["pre_bars_in_aoi"] = int(np.count_nonzero(inside_aoi))
         
         # pre_aoi_touch_count: Number of distinct entry sequences into AOI
         # Count transitions: outside -> inside
-        touch_count = 0
-        was_inside = False
-        for is_inside in inside_aoi:
-            if is_inside and not was_inside:
-                touch_count += 1
-            was_inside = is_inside
-        result["pre_aoi_touch_count"] = touch_count
+        entered = inside_aoi.copy()
+        entered[1:] &= ~inside_aoi[:-1]
+        result["pre_aoi_touch_count"] = int(np.count_nonzero(entered))
         
         # pre_last_touch_distance_atr: Distance from AOI on last pre-entry candle
-        # Use the very last candle before entry
-        if len(main_window) > 0:
-            last_candle = main_window.iloc[-1]
-            last_close = last_candle["close"]
-            
-            # Distance = min(|close - aoi_low|, |close - aoi_high|)
-            dist_to_low = abs(last_close - aoi_low)
-            dist_to_high = abs(last_close - aoi_high)
-            min_distance = min(dist_to_low, dist_to_high)
-            
-            result["pre_last_touch_distance_atr"] = min_distance / pre_atr if pre_atr > 0 else None
+        # Distance = min(|close - aoi_low|, |close - aoi_high|)
+        last_close = candles_1h.closes[count_before - 1]
+        min_distance = min(abs(last_close - aoi_low), abs(last_close - aoi_high))
+        result["pre_last_touch_distance_atr"] = min_distance / pre_atr
         
         return result
     
     def _compute_impulse_metrics(
         self,
-        impulse_window: pd.DataFrame,
+        candles_1h: "TimeframeCandles",
+        features: PreEntryFeatureSeries,
+        last: int,
         pre_atr: float,
     ) -> dict:
         """Compute impulse/energy metrics over the short impulse window."""
         result = {}
         
-        if len(impulse_window) < 2:
-            return result
-        
         # pre_impulse_net_atr: (last_close - first_open) / pre_atr
-        first_open = impulse_window.iloc[0]["open"]
-        last_close = impulse_window.iloc[-1]["close"]
-        
-        raw_impulse_net = last_close - first_open
+        first_open = candles_1h.opens[last - PRE_ENTRY_IMPULSE_BARS + 1]
+        raw_impulse_net = candles_1h.closes[last] - first_open
         if not self._is_long:
             raw_impulse_net = -raw_impulse_net
         
-        result["pre_impulse_net_atr"] = raw_impulse_net / pre_atr if pre_atr > 0 else None
+        result["pre_impulse_net_atr"] = raw_impulse_net / pre_atr
         
         # pre_impulse_efficiency: ABS(net_impulse) / SUM(ABS(bar_moves))
-        body_moves = np.abs(impulse_window["close"].values - impulse_window["open"].values)
-        total_impulse_move = float(np.sum(body_moves))
-        
-        if total_impulse_move > 0 and result.get("pre_impulse_net_atr") is not None:
-            # Raw efficiency (not normalized by ATR, just ratio)
-            raw_efficiency = abs(raw_impulse_net) / total_impulse_move
-            result["pre_impulse_efficiency"] = raw_efficiency
+        # Raw efficiency (not normalized by ATR, just ratio)
+        total_impulse_move = float(features.impulse_body_total[last])
+        if total_impulse_move > 0:
+            result["pre_impulse_efficiency"] = abs(raw_impulse_net) / total_impulse_move
         
         return result
     
-    def _compute_large_bar_ratio(
+    def _compute_microstructure_metrics(
         self,
-        large_bar_window: pd.DataFrame,
-        main_window: pd.DataFrame,
-    ) -> Optional[float]:
-        """Compute ratio of bars with large bodies.
-        
-        Large = |close - open| > avg_body_size_over_main_window
-        """
-        if len(large_bar_window) == 0 or len(main_window) == 0:
-            return None
-        
-        # Compute average body size over main lookback window
-        main_bodies = np.abs(main_window["close"].values - main_window["open"].values)
-        avg_body_size = float(np.mean(main_bodies))
-        
-        if avg_body_size <= 0:
-            return None
-        
-        # Count large bars in the large_bar_window
-        window_bodies = np.abs(large_bar_window["close"].values - large_bar_window["open"].values)
-        large_bar_count = np.sum(window_bodies > avg_body_size)
-        
-        return large_bar_count / len(large_bar_window)
-    
-    def _compute_microstructure_metrics(self, candles: pd.DataFrame) -> dict:
+        features: PreEntryFeatureSeries,
+        last: int,
+    ) -> dict:
         """Compute microstructure cleanliness metrics."""
         result = {}
         
-        if len(candles) < 2:
-            return result
-        
-        highs = candles["high"].values
-        lows = candles["low"].values
-        opens = candles["open"].values
-        closes = candles["close"].values
-        
-        # pre_overlap_ratio: sum(overlapping_range) / total_range
-        # overlapping_range = min(high_i, high_{i-1}) - max(low_i, low_{i-1})
-        total_overlap = 0.0
-        for i in range(1, len(candles)):
-            overlap_high = min(highs[i], highs[i - 1])
-            overlap_low = max(lows[i], lows[i - 1])
-            overlap = max(0.0, overlap_high - overlap_low)
-            total_overlap += overlap
-        
-        total_range = highs.max() - lows.min()
+        total_range = features.range_high[last] - features.range_low[last]
         if total_range > 0:
-            result["pre_overlap_ratio"] = total_overlap / total_range
-        
-        # pre_wick_ratio: total_wick_size / total_range
-        # wick = (high - max(open, close)) + (min(open, close) - low)
-        upper_wicks = highs - np.maximum(opens, closes)
-        lower_wicks = np.minimum(opens, closes) - lows
-        total_wick = float(np.sum(upper_wicks) + np.sum(lower_wicks))
-        
-        if total_range > 0:
-            result["pre_wick_ratio"] = total_wick / total_range
+            # pre_overlap_ratio: sum(overlapping_range) / total_range
+            # overlapping_range = min(high_i, high_{i-1}) - max(low_i, low_{i-1})
+            result["pre_overlap_ratio"] = features.overlap_total[last] / total_range
+            
+            # pre_wick_ratio: total_wick_size / total_range
+            # wick = (high - max(open, close)) + (min(open, close) - low)
+            result["pre_wick_ratio"] = float(features.wick_total[last]) / total_range
         
         return result
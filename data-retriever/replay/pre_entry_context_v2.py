@@ -31,6 +31,9 @@ from .config import (
     SESSION_LONDON_END,
     SESSION_NY_START,
     SESSION_NY_END,
+    TIMEFRAME_4H,
+    TIMEFRAME_1D,
+    TIMEFRAME_1W,
 )
 
 if TYPE_CHECKING:
@@ -112,6 +115,41 @@ def _to_python_int(value) -> Optional[int]:
     return int(value) if value is not None else None
 
 
+def _first_true_index(mask: np.ndarray) -> Optional[int]:
+    """Index of the first True in a boolean array, or None."""
+    if not mask.any():
+        return None
+    return int(mask.argmax())
+
+
+def _last_true_index(mask: np.ndarray) -> Optional[int]:
+    """Index of the last True in a boolean array, or None."""
+    if not mask.any():
+        return None
+    return len(mask) - 1 - int(mask[::-1].argmax())
+
+
+def _positive_run_totals(moves: np.ndarray) -> np.ndarray:
+    """Sum each maximal run of strictly positive moves.
+    
+    Runs are laid out as rows of a zero-padded matrix and summed with a
+    row-wise cumulative sum, which adds left to right exactly like a running
+    total would (np.sum may reorder the additions).
+    """
+    positive = np.concatenate(([False], moves > 0, [False]))
+    edges = np.flatnonzero(positive[1:] != positive[:-1])
+    if len(edges) == 0:
+        return np.empty(0, dtype=np.float64)
+    
+    starts = edges[0::2]
+    lengths = edges[1::2] - starts
+    offsets = np.arange(int(lengths.max()))
+    in_run = offsets < lengths[:, None]
+    positions = np.where(in_run, starts[:, None] + offsets, 0)
+    runs = np.where(in_run, moves[positions], 0.0)
+    return np.cumsum(runs, axis=1)[:, -1]
+
+
 class PreEntryContextV2Calculator:
     """Computes pre-entry market environment metrics from candle data.
     
@@ -226,25 +264,13 @@ class PreEntryContextV2Calculator:
         """
         result = {}
         
-        # Get last closed daily candle
-        daily_candles = self._store.get_1d_candles().get_candles_up_to(self._signal_time)
-        if daily_candles is not None and len(daily_candles) > 0:
-            last_daily = daily_candles.iloc[-1]
-            daily_high = float(last_daily["high"])
-            daily_low = float(last_daily["low"])
-            daily_range = daily_high - daily_low
-            if daily_range > 0:
-                result["daily"] = (self._entry_price - daily_low) / daily_range
-        
-        # Get last closed weekly candle
-        weekly_candles = self._store.get_1w_candles().get_candles_up_to(self._signal_time)
-        if weekly_candles is not None and len(weekly_candles) > 0:
-            last_weekly = weekly_candles.iloc[-1]
-            weekly_high = float(last_weekly["high"])
-            weekly_low = float(last_weekly["low"])
-            weekly_range = weekly_high - weekly_low
-            if weekly_range > 0:
-                result["weekly"] = (self._entry_price - weekly_low) / weekly_range
+        for key, timeframe in (("daily", TIMEFRAME_1D), ("weekly", TIMEFRAME_1W)):
+            high, low = self._last_htf_high_low(timeframe)
+            if high is None:
+                continue
+            htf_range = high - low
+            if htf_range > 0:
+                result[key] = (self._entry_price - low) / htf_range
         
         return result
     
@@ -252,35 +278,13 @@ class PreEntryContextV2Calculator:
         """Compute distances to 4H/daily/weekly high/low in ATR units."""
         result = {}
         
-        # Get last closed 4H candle
-        candles_4h = self._store.get_4h_candles().get_candles_up_to(self._signal_time)
-        if candles_4h is not None and len(candles_4h) > 0:
-            last_4h = candles_4h.iloc[-1]
-            h4_high = float(last_4h["high"])
-            h4_low = float(last_4h["low"])
-            
-            result["4h_high"] = abs(h4_high - self._entry_price) / self._atr_1h
-            result["4h_low"] = abs(self._entry_price - h4_low) / self._atr_1h
-        
-        # Get last closed daily candle
-        daily_candles = self._store.get_1d_candles().get_candles_up_to(self._signal_time)
-        if daily_candles is not None and len(daily_candles) > 0:
-            last_daily = daily_candles.iloc[-1]
-            daily_high = float(last_daily["high"])
-            daily_low = float(last_daily["low"])
-            
-            result["daily_high"] = abs(daily_high - self._entry_price) / self._atr_1h
-            result["daily_low"] = abs(self._entry_price - daily_low) / self._atr_1h
-        
-        # Get last closed weekly candle
-        weekly_candles = self._store.get_1w_candles().get_candles_up_to(self._signal_time)
-        if weekly_candles is not None and len(weekly_candles) > 0:
-            last_weekly = weekly_candles.iloc[-1]
-            weekly_high = float(last_weekly["high"])
-            weekly_low = float(last_weekly["low"])
-            
-            result["weekly_high"] = abs(weekly_high - self._entry_price) / self._atr_1h
-            result["weekly_low"] = abs(self._entry_price - weekly_low) / self._atr_1h
+        # Last closed 4H, daily and weekly candles
+        for key, timeframe in (("4h", TIMEFRAME_4H), ("daily", TIMEFRAME_1D), ("weekly", TIMEFRAME_1W)):
+            high, low = self._last_htf_high_low(timeframe)
+            if high is None:
+                continue
+            result[f"{key}_high"] = abs(high - self._entry_price) / self._atr_1h
+            result[f"{key}_low"] = abs(self._entry_price - low) / self._atr_1h
         
         # Compute next obstacle based on direction (includes 4H, daily, weekly)
         if self._is_long:
@@ -304,6 +308,25 @@ class PreEntryContextV2Calculator:
         
         return result
     
+    def _last_htf_high_low(self, timeframe: str) -> tuple[Optional[float], Optional[float]]:
+        """High and low of the most recent HTF candle at signal time."""
+        features = self._store.features
+        high = features.value_at("high", timeframe, self._signal_time)
+        if high is None:
+            return None, None
+        return high, features.value_at("low", timeframe, self._signal_time)
+    
+    def _htf_range_extremes(self, timeframe: str, window: int) -> tuple[Optional[float], Optional[float]]:
+        """Highest high and lowest low over the last `window` HTF candles.
+        
+        Returns (None, None) when fewer than `window` candles are available.
+        """
+        features = self._store.features
+        range_high = features.value_at(f"high_max_{window}", timeframe, self._signal_time)
+        if range_high is None or np.isnan(range_high):
+            return None, None
+        return range_high, features.value_at(f"low_min_{window}", timeframe, self._signal_time)
+    
     def _get_session_window(self, signal_time: datetime) -> tuple[int, int]:
         """Get the session window containing the signal hour."""
         hour = signal_time.hour
@@ -464,49 +487,45 @@ class PreEntryContextV2Calculator:
         """
         # Get candles for the timeframe
         if timeframe == "4H":
-            tf_candles = self._store.get_4h_candles().get_candles_up_to(self._signal_time)
+            tf_candles = self._store.get_4h_candles()
             lookback = 50  # ~8 days
         elif timeframe == "1D":
-            tf_candles = self._store.get_1d_candles().get_candles_up_to(self._signal_time)
+            tf_candles = self._store.get_1d_candles()
             lookback = 30  # ~1 month
         elif timeframe == "1W":
-            tf_candles = self._store.get_1w_candles().get_candles_up_to(self._signal_time)
+            tf_candles = self._store.get_1w_candles()
             lookback = 20  # ~5 months
         else:
             return None
         
-        if tf_candles is None or len(tf_candles) < 3:
+        end = tf_candles.count_up_to(self._signal_time)
+        if end < 3:
             return None
         
         # Limit lookback
-        tf_candles = tf_candles.tail(lookback)
-        
-        # Scan backwards to find where trend flipped
-        # For bullish: look for where we transitioned from lower-lows to higher-lows
-        # For bearish: look for where we transitioned from higher-highs to lower-highs
-        for i in range(len(tf_candles) - 2, 1, -1):
-            current = tf_candles.iloc[i]
-            prev = tf_candles.iloc[i - 1]
-            prev2 = tf_candles.iloc[i - 2]
-            
-            if self._is_long:
-                # Bullish: higher lows forming
-                current_hl = current["low"] > prev["low"]
-                prev_ll = prev["low"] < prev2["low"]
-                if prev_ll and current_hl:
-                    # Found flip point
-                    return pd.Timestamp(current["time"]).to_pydatetime()
-            else:
-                # Bearish: lower highs forming
-                current_lh = current["high"] < prev["high"]
-                prev_hh = prev["high"] > prev2["high"]
-                if prev_hh and current_lh:
-                    # Found flip point
-                    return pd.Timestamp(current["time"]).to_pydatetime()
+        start = max(0, end - lookback)
         
-        # No flip found in lookback - trend has been established longer
-        # Return the earliest candle time as a fallback
-        return pd.Timestamp(tf_candles.iloc[0]["time"]).to_pydatetime()
+        # Flip at bar i: the previous swing went against us and bar i turns back.
+        # For bullish: lower low at i-1, then a higher low at i
+        # For bearish: higher high at i-1, then a lower high at i
+        # Candidates are i in [2, n-2]; the latest one is the flip point.
+        if self._is_long:
+            values = tf_candles.lows[start:end]
+            turned = values[2:-1] > values[1:-2]
+            against = values[1:-2] < values[:-3]
+        else:
+            values = tf_candles.highs[start:end]
+            turned = values[2:-1] < values[1:-2]
+            against = values[1:-2] > values[:-3]
+        
+        flip = _last_true_index(turned & against)
+        if flip is None:
+            # No flip found in lookback - trend has been established longer
+            # Return the earliest candle time as a fallback
+            index = start
+        else:
+            index = start + flip + 2
+        return pd.Timestamp(int(tf_candles.time_ns[index]), tz="UTC").to_pydatetime()
     
     def _count_impulses(self, candles: pd.DataFrame) -> int:
         """Count directional impulse runs in the lookback window.
@@ -517,30 +536,12 @@ class PreEntryContextV2Calculator:
             return 0
         
         threshold = PRE_ENTRY_V2_IMPULSE_THRESHOLD_ATR * self._atr_1h
-        impulse_count = 0
-        current_run = 0.0
-        
-        for i in range(1, len(candles)):
-            prev_close = float(candles.iloc[i - 1]["close"])
-            curr_close = float(candles.iloc[i]["close"])
-            
-            move = curr_close - prev_close
-            if not self._is_long:
-                move = -move
-            
-            if move > 0:
-                current_run += move
-            else:
-                # Direction changed, check if run was an impulse
-                if current_run >= threshold:
-                    impulse_count += 1
-                current_run = 0.0
-        
-        # Check final run
-        if current_run >= threshold:
-            impulse_count += 1
+        moves = np.diff(candles["close"].to_numpy(dtype=np.float64))
+        if not self._is_long:
+            moves = -moves
         
-        return impulse_count
+        run_totals = _positive_run_totals(moves)
+        return int(np.count_nonzero(run_totals >= threshold))
     
     def _compute_session_directional_bias(self, candles: pd.DataFrame) -> Optional[float]:
         """Compute current session bias: (session_close - session_open) / ATR."""
@@ -578,21 +579,23 @@ class PreEntryContextV2Calculator:
         result = {}
         
         # Use 1H candles up to retest_time
-        candles = candles_1h[candles_1h["time"] < self._retest_time].copy()
+        before_retest = (candles_1h["time"] < self._retest_time).to_numpy()
+        highs = candles_1h["high"].to_numpy(dtype=np.float64)[before_retest]
+        lows = candles_1h["low"].to_numpy(dtype=np.float64)[before_retest]
+        closes = candles_1h["close"].to_numpy(dtype=np.float64)[before_retest]
+        count = len(highs)
         
-        if candles is None or len(candles) < 2:
+        if count < 2:
             result["bars_since"] = None
             result["reaction"] = None
             return result
         
-        # Find previous 1H candle that touched AOI (scanning backwards)
-        last_touch_idx = None
-        for i in range(len(candles) - 1, -1, -1):
-            row = candles.iloc[i]
-            if ((row["low"] <= self._aoi_high and row["low"] >= self._aoi_low)
-              or (row["high"] <= self._aoi_high and row["high"] >= self._aoi_low)):
-                last_touch_idx = i
-                break
+        # Find previous 1H candle that touched AOI (wick end inside the zone)
+        touched = (
+            ((lows <= self._aoi_high) & (lows >= self._aoi_low))
+            | ((highs <= self._aoi_high) & (highs >= self._aoi_low))
+        )
+        last_touch_idx = _last_true_index(touched)
         
         if last_touch_idx is None:
             # No prior interaction
@@ -601,42 +604,33 @@ class PreEntryContextV2Calculator:
             return result
         
         # aoi_time_since_last_touch = 1H bars between last touch and retest bar
-        result["bars_since"] = len(candles) - 1 - last_touch_idx
+        result["bars_since"] = count - 1 - last_touch_idx
         
         # Find exit candle: first 1H bar fully outside AOI after last touch
-        exit_idx = None
-        for i in range(last_touch_idx + 1, len(candles)):
-            row = candles.iloc[i]
-            if row["high"] < self._aoi_low or row["low"] > self._aoi_high:
-                exit_idx = i
-                break
-        
-        if exit_idx is None:
+        after = last_touch_idx + 1
+        outside = (highs[after:] < self._aoi_low) | (lows[after:] > self._aoi_high)
+        exit_offset = _first_true_index(outside)
+        
+        if exit_offset is None:
             result["reaction"] = None
             return result
+        exit_idx = after + exit_offset
         
         # Find next AOI touch after exit (to limit reaction window)
-        next_touch_idx = None
-        for i in range(exit_idx + 1, len(candles)):
-            row = candles.iloc[i]
-            if row["high"] >= self._aoi_low and row["low"] <= self._aoi_high:
-                next_touch_idx = i
-                break
+        overlaps = (
+            (highs[exit_idx + 1:] >= self._aoi_low) & (lows[exit_idx + 1:] <= self._aoi_high)
+        )
+        next_offset = _first_true_index(overlaps)
         
         # Reaction window: exit_candle to next_touch or end of available candles
-        reaction_end = next_touch_idx if next_touch_idx else len(candles)
-        reaction_candles = candles.iloc[exit_idx:reaction_end]
+        reaction_end = count if next_offset is None else exit_idx + 1 + next_offset
         
-        if len(reaction_candles) == 0:
-            result["reaction"] = None
-            return result
-        
-        exit_close = float(candles.iloc[exit_idx]["close"])
+        exit_close = float(closes[exit_idx])
         
         if self._is_long:
-            mfe = float(reaction_candles["high"].max()) - exit_close
+            mfe = float(highs[exit_idx:reaction_end].max()) - exit_close
         else:
-            mfe = exit_close - float(reaction_candles["low"].min())
+            mfe = exit_close - float(lows[exit_idx:reaction_end].min())
         
         result["reaction"] = mfe / self._atr_1h if self._atr_1h > 0 else None
         
@@ -650,10 +644,12 @@ class PreEntryContextV2Calculator:
         if len(candles) < 10:
             return None
         
+        opens = candles["open"].to_numpy(dtype=np.float64)
+        closes = candles["close"].to_numpy(dtype=np.float64)
+        bodies = np.abs(closes - opens)
+        
         # Compute average body size
-        recent_candles = candles.tail(50)
-        bodies = np.abs(recent_candles["close"].values - recent_candles["open"].values)
-        avg_body = float(np.mean(bodies))
+        avg_body = float(np.mean(bodies[-50:]))
         
         if avg_body <= 0:
             return None
@@ -661,19 +657,14 @@ class PreEntryContextV2Calculator:
         threshold = PRE_ENTRY_V2_LARGE_BAR_MULTIPLIER * avg_body
         
         # Find last large bar aligned with direction
-        for i in range(len(candles) - 1, -1, -1):
-            row = candles.iloc[i]
-            body = abs(row["close"] - row["open"])
-            
-            if body >= threshold:
-                # Check if aligned with direction
-                is_bullish = row["close"] > row["open"]
-                if (self._is_long and is_bullish) or (not self._is_long and not is_bullish):
-                    last_impulse_close = float(row["close"])
-                    distance = abs(self._entry_price - last_impulse_close) / self._atr_1h
-                    return distance
+        is_bullish = closes > opens
+        aligned = is_bullish if self._is_long else ~is_bullish
+        last_impulse = _last_true_index((bodies >= threshold) & aligned)
+        if last_impulse is None:
+            return None
         
-        return None
+        last_impulse_close = float(closes[last_impulse])
+        return abs(self._entry_price - last_impulse_close) / self._atr_1h
     
     def _compute_htf_range_size(self) -> dict:
         """Compute HTF range size (compressed vs expanded markets).
@@ -683,21 +674,10 @@ class PreEntryContextV2Calculator:
         """
         result = {}
         
-        # Daily range size over last 20 candles
-        daily_candles = self._store.get_1d_candles().get_candles_up_to(self._signal_time)
-        if daily_candles is not None and len(daily_candles) >= 20:
-            last_20_daily = daily_candles.tail(20)
-            range_high = float(last_20_daily["high"].max())
-            range_low = float(last_20_daily["low"].min())
-            result["daily"] = (range_high - range_low) / self._atr_1h
-        
-        # Weekly range size over last 12 candles
-        weekly_candles = self._store.get_1w_candles().get_candles_up_to(self._signal_time)
-        if weekly_candles is not None and len(weekly_candles) >= 12:
-            last_12_weekly = weekly_candles.tail(12)
-            range_high = float(last_12_weekly["high"].max())
-            range_low = float(last_12_weekly["low"].min())
-            result["weekly"] = (range_high - range_low) / self._atr_1h
+        for key, timeframe, window in (("daily", TIMEFRAME_1D, 20), ("weekly", TIMEFRAME_1W, 12)):
+            range_high, range_low = self._htf_range_extremes(timeframe, window)
+            if range_high is not None:
+                result[key] = (range_high - range_low) / self._atr_1h
         
         return result
     
@@ -710,25 +690,14 @@ class PreEntryContextV2Calculator:
         result = {}
         aoi_mid = (self._aoi_low + self._aoi_high) / 2
         
-        # Daily range (last 20 candles)
-        daily_candles = self._store.get_1d_candles().get_candles_up_to(self._signal_time)
-        if daily_candles is not None and len(daily_candles) >= 20:
-            last_20_daily = daily_candles.tail(20)
-            range_high = float(last_20_daily["high"].max())
-            range_low = float(last_20_daily["low"].min())
-            range_size = range_high - range_low
-            if range_size > 0:
-                result["daily"] = (aoi_mid - range_low) / range_size
-        
-        # Weekly range (last 12 candles)
-        weekly_candles = self._store.get_1w_candles().get_candles_up_to(self._signal_time)
-        if weekly_candles is not None and len(weekly_candles) >= 12:
-            last_12_weekly = weekly_candles.tail(12)
-            range_high = float(last_12_weekly["high"].max())
-            range_low = float(last_12_weekly["low"].min())
+        # Daily range (last 20 candles), weekly range (last 12 candles)
+        for key, timeframe, window in (("daily", TIMEFRAME_1D, 20), ("weekly", TIMEFRAME_1W, 12)):
+            range_high, range_low = self._htf_range_extremes(timeframe, window)
+            if range_high is None:
+                continue
             range_size = range_high - range_low
             if range_size > 0:
-                result["weekly"] = (aoi_mid - range_low) / range_size
+                result[key] = (aoi_mid - range_low) / range_size
         
         return result
     
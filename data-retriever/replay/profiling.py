@@ -0,0 +1,132 @@
+"""Per-stage timing for replay.
+
+Replay components wrap their work in ``with stage("..."):`` blocks. While a
+StageTimings collector is active (see collect()), each stage accumulates
+its call count and wall time; otherwise the blocks are no-ops.
+
+Times are exclusive: while a nested stage runs (e.g. a DB write issued
+from the pattern scan), its time is charged to the nested stage only, so
+the stage times add up to the instrumented total.
+
+For function-level detail, run_replay(profile_dir=...) additionally dumps
+a cProfile/pstats file per symbol.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator, Optional
+
+# Reporting order; stages not listed here are appended alphabetically
+REPLAY_STAGES = (
+    "candle_load",
+    "aligner",
+    "trend_recompute",
+    "aoi_recompute",
+    "signal_setup",
+    "gate_check",
+    "pattern_scan",
+    "pre_entry_context",
+    "outcomes",
+    "db_reads",
+    "db_writes",
+)
+
+
+class StageTimings:
+    """Call counts and exclusive wall time per stage (picklable, mergeable)."""
+
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def merge(self, other: "StageTimings") -> None:
+        """Add another collector's totals (e.g. from a worker process)."""
+        for name, seconds in other.seconds.items():
+            self.add(name, seconds, other.calls.get(name, 0))
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def report(self) -> str:
+        """Breakdown table, one row per stage, largest share visible at a glance."""
+        if not self.seconds:
+            return "  (no stage timings recorded)"
+
+        names = [name for name in REPLAY_STAGES if name in self.seconds]
+        names += sorted(name for name in self.seconds if name not in REPLAY_STAGES)
+        total = self.total_seconds
+
+        lines = [f"  {'Stage':<18} {'Calls':>10} {'Total s':>10} {'ms/call':>10} {'Share':>7}"]
+        for name in names:
+            seconds = self.seconds[name]
+            calls = self.calls.get(name, 0)
+            per_call = seconds * 1000 / calls if calls else 0.0
+            share = seconds / total * 100 if total > 0 else 0.0
+            lines.append(
+                f"  {name:<18} {calls:>10} {seconds:>10.2f} {per_call:>10.3f} {share:>6.1f}%"
+            )
+        lines.append(f"  {'total':<18} {'':>10} {total:>10.2f}")
+        return "\n".join(lines)
+
+
+# Collector for this process and the stack of running stages
+_active: Optional[StageTimings] = None
+_stack: list[list] = []  # [name, started_at, nested_seconds]
+
+
+@contextmanager
+def collect(timings: StageTimings) -> Iterator[StageTimings]:
+    """Record stage() blocks into `timings` for the duration of the block."""
+    global _active, _stack
+    previous, previous_stack = _active, _stack
+    _active, _stack = timings, []
+    try:
+        yield timings
+    finally:
+        _active, _stack = previous, previous_stack
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as stage `name` (no-op unless a collector is active)."""
+    timings = _active
+    if timings is None:
+        yield
+        return
+
+    frame = [name, perf_counter(), 0.0]
+    _stack.append(frame)
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - frame[1]
+        _stack.pop()
+        timings.add(name, elapsed - frame[2])
+        if _stack:
+            _stack[-1][2] += elapsed
+
+
+@contextmanager
+def profile_to(path: Optional[str]) -> Iterator[None]:
+    """Run the block under cProfile and dump pstats to `path` (None = off)."""
+    if path is None:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -31,6 +31,17 @@ GET_RELATED_SIGNAL_TRADE_ID = f"""
     LIMIT 1
 """
 
+# Seed for ReplaySignalIndex: every signal of a symbol in a time window
+FETCH_REPLAY_SIGNAL_INDEX = f"""
+    SELECT signal_time, id, trade_id,
+           (sl_model_version = %s AND tp_model_version = %s) AS current_models
+    FROM {SCHEMA_NAME}.entry_signal
+    WHERE symbol = %s
+      AND signal_time >= %s
+      AND signal_time <= %s
+    ORDER BY id ASC
+"""
+
 INSERT_REPLAY_ENTRY_SIGNAL = f"""
     INSERT INTO {SCHEMA_NAME}.entry_signal (
         symbol, signal_time, direction,
@@ -332,10 +343,90 @@ INSERT_ENTRY_SL_GEOMETRY = f"""
 """
 
 # =============================================================================
-# Exit Simulation Queries
+# Batched Writes (ReplayResultSink)
 # =============================================================================
+# Multi-row variants for psycopg2.extras.execute_values; ids are prefetched
+# from the SERIAL sequences so child rows can reference them before flushing.
+
+PREFETCH_ENTRY_SIGNAL_IDS = f"""
+    SELECT nextval(pg_get_serial_sequence('{SCHEMA_NAME}.entry_signal', 'id'))
+    FROM generate_series(1, %s)
+"""
+
+PREFETCH_SIGNAL_OUTCOME_IDS = f"""
+    SELECT nextval(pg_get_serial_sequence('{SCHEMA_NAME}.signal_outcome', 'id'))
+    FROM generate_series(1, %s)
+"""
+
+BATCH_INSERT_REPLAY_ENTRY_SIGNAL = f"""
+    INSERT INTO {SCHEMA_NAME}.entry_signal (
+        id,
+        symbol, signal_time, direction,
+        trend_4h, trend_1d, trend_1w, trend_alignment_strength,
+        aoi_timeframe, aoi_low, aoi_high, aoi_classification,
+        entry_price, atr_1h,
+        final_score, tier,
+        is_break_candle_last,
+        sl_model_version, tp_model_version,
+        conflicted_tf,
+        max_retest_penetration_atr, bars_between_retest_and_break,
+        hour_of_day_utc, session_bucket,
+        aoi_touch_count_since_creation,
+        trade_id
+    )
+    VALUES %s
+"""
+
+BATCH_INSERT_REPLAY_SIGNAL_OUTCOME = f"""
+    INSERT INTO {SCHEMA_NAME}.signal_outcome (
+        id, entry_signal_id, window_bars,
+        mfe_atr, mae_atr,
+        bars_to_mfe, bars_to_mae, first_extreme
+    )
+    VALUES %s
+    ON CONFLICT (entry_signal_id) DO NOTHING
+"""
+
+# Skips rows whose outcome was dropped by ON CONFLICT above
+BATCH_INSERT_REPLAY_CHECKPOINT_RETURN = f"""
+    INSERT INTO {SCHEMA_NAME}.checkpoint_return (
+        signal_outcome_id, bars_after, return_atr
+    )
+    SELECT v.signal_outcome_id, v.bars_after, v.return_atr
+    FROM (VALUES %s) AS v(signal_outcome_id, bars_after, return_atr)
+    WHERE EXISTS (
+        SELECT 1 FROM {SCHEMA_NAME}.signal_outcome o WHERE o.id = v.signal_outcome_id
+    )
+    ON CONFLICT (signal_outcome_id, bars_after) DO NOTHING
+"""
+
+BATCH_MARK_REPLAY_OUTCOMES_COMPUTED = f"""
+    UPDATE {SCHEMA_NAME}.entry_signal
+    SET outcome_computed = TRUE
+    WHERE id = ANY(%s)
+"""
+
+BATCH_INSERT_SIGNAL_PATH_EXTREMES = f"""
+    INSERT INTO {SCHEMA_NAME}.signal_path_extremes (
+        entry_signal_id, bar_index, return_atr_at_bar,
+        mfe_atr_to_here, mae_atr_to_here,
+        mfe_atr_high_low, mae_atr_high_low
+    )
+    VALUES %s
+    ON CONFLICT (entry_signal_id, bar_index) DO NOTHING
+"""
+
+BATCH_INSERT_ENTRY_SL_GEOMETRY = f"""
+    INSERT INTO {SCHEMA_NAME}.entry_sl_geometry (
+        entry_signal_id, direction,
+        aoi_far_edge_atr, aoi_near_edge_atr, aoi_height_atr, aoi_age_bars,
+        signal_candle_opposite_extreme_atr, signal_candle_range_atr, signal_candle_body_atr
+    )
+    VALUES %s
+    ON CONFLICT (entry_signal_id) DO NOTHING
+"""
 
-INSERT_EXIT_SIMULATION = f"""
+BATCH_INSERT_EXIT_SIMULATIONS = f"""
     INSERT INTO {SCHEMA_NAME}.exit_simulation (
         entry_signal_id, sl_model, rr_multiple,
         sl_atr, tp_atr,
@@ -343,6 +434,56 @@ INSERT_EXIT_SIMULATION = f"""
         mfe_atr, mae_atr, bars_to_sl_hit, bars_to_tp_hit,
         is_bad_pre48
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    VALUES %s
     ON CONFLICT (entry_signal_id, sl_model, rr_multiple) DO NOTHING
 """
+
+# =============================================================================
+# Parameter Sweep (replay/sweep.py)
+# =============================================================================
+
+UPSERT_SWEEP_CONFIG = f"""
+    INSERT INTO {SCHEMA_NAME}.sweep_config (config_id, params)
+    VALUES (%s, %s)
+    ON CONFLICT (config_id) DO NOTHING
+"""
+
+BATCH_INSERT_SWEEP_RESULTS = f"""
+    INSERT INTO {SCHEMA_NAME}.sweep_result (
+        config_id, symbol, signal_time, direction,
+        aoi_timeframe, aoi_low, aoi_high,
+        entry_price, atr_1h, final_score, conflicted_tf, trade_id,
+        sl_model, rr_multiple, sl_atr, tp_atr,
+        exit_reason, exit_bar, return_atr, return_r,
+        mfe_atr, mae_atr, bars_to_sl_hit, bars_to_tp_hit,
+        is_bad_pre48
+    )
+    VALUES %s
+    ON CONFLICT (config_id, symbol, signal_time, sl_model, rr_multiple) DO NOTHING
+"""
+
+
+# =============================================================================
+# Checkpoint Queries
+# =============================================================================
+
+UPSERT_REPLAY_CHECKPOINT = f"""
+    INSERT INTO {SCHEMA_NAME}.replay_checkpoint (
+        run_id, symbol, chunk_start, chunk_end,
+        last_1h_index, last_candle_time, completed, state
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (run_id, symbol, chunk_start) DO UPDATE SET
+        chunk_end = EXCLUDED.chunk_end,
+        last_1h_index = EXCLUDED.last_1h_index,
+        last_candle_time = EXCLUDED.last_candle_time,
+        completed = EXCLUDED.completed,
+        state = EXCLUDED.state,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+FETCH_REPLAY_CHECKPOINT = f"""
+    SELECT last_1h_index, last_candle_time, completed, state
+    FROM {SCHEMA_NAME}.replay_checkpoint
+    WHERE run_id = %s AND symbol = %s AND chunk_start = %s
+"""
@@ -56,7 +56,7 @@ CREATE TABLE IF NOT EXISTS trenda_replay.entry_signal (
     hour_of_day_utc INTEGER,
     session_bucket VARCHAR(20),
     
-    -- AOI decay
+    -- AOI decay (always 0 in replay: AOIZone has no creation time)
     aoi_touch_count_since_creation INTEGER,
     
     -- Trade grouping (groups break + after-break signals together)
@@ -252,6 +252,77 @@ CREATE TABLE IF NOT EXISTS trenda_replay.exit_simulation (
 CREATE INDEX IF NOT EXISTS idx_exit_simulation_signal
 ON trenda_replay.exit_simulation (entry_signal_id);
 
+-- =============================================================================
+-- Parameter Sweep Tables (replay/sweep.py)
+-- =============================================================================
+-- One row per swept configuration; params holds the overridden values
+CREATE TABLE IF NOT EXISTS trenda_replay.sweep_config (
+    config_id VARCHAR(20) PRIMARY KEY,
+    params JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One row per config × signal × sl_model × rr_multiple
+CREATE TABLE IF NOT EXISTS trenda_replay.sweep_result (
+    id SERIAL PRIMARY KEY,
+    config_id VARCHAR(20) NOT NULL REFERENCES trenda_replay.sweep_config(config_id) ON DELETE CASCADE,
+    symbol VARCHAR(20) NOT NULL,
+    signal_time TIMESTAMPTZ NOT NULL,
+    direction VARCHAR(10) NOT NULL,
+    
+    -- Signal data
+    aoi_timeframe VARCHAR(10),
+    aoi_low NUMERIC,
+    aoi_high NUMERIC,
+    entry_price NUMERIC,
+    atr_1h NUMERIC,
+    final_score NUMERIC,
+    conflicted_tf VARCHAR(10),
+    trade_id VARCHAR(50),
+    
+    -- Exit simulation (same columns as exit_simulation)
+    sl_model VARCHAR(30) NOT NULL,
+    rr_multiple NUMERIC NOT NULL,
+    sl_atr NUMERIC NOT NULL,
+    tp_atr NUMERIC NOT NULL,
+    exit_reason VARCHAR(10),
+    exit_bar INTEGER,
+    return_atr NUMERIC,
+    return_r NUMERIC,
+    mfe_atr NUMERIC,
+    mae_atr NUMERIC,
+    bars_to_sl_hit INTEGER,
+    bars_to_tp_hit INTEGER,
+    is_bad_pre48 BOOLEAN,
+    
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(config_id, symbol, signal_time, sl_model, rr_multiple)
+);
+
+-- Index for per-config analysis
+CREATE INDEX IF NOT EXISTS idx_sweep_result_config
+ON trenda_replay.sweep_result (config_id, symbol);
+
+-- =============================================================================
+-- Replay Progress (replay/checkpoint.py)
+-- =============================================================================
+-- One row per run × symbol; written in the same transaction as the
+-- replay rows it covers. state is the pickled market / pending-outcome state.
+-- Each symbol replays its whole window in one pass, so chunk_start/chunk_end
+-- hold that window (the names predate single-pass replay).
+CREATE TABLE IF NOT EXISTS trenda_replay.replay_checkpoint (
+    run_id VARCHAR(20) NOT NULL,
+    symbol VARCHAR(20) NOT NULL,
+    chunk_start TIMESTAMPTZ NOT NULL,     -- Replay window start
+    chunk_end TIMESTAMPTZ NOT NULL,       -- Replay window end
+    last_1h_index INTEGER,
+    last_candle_time TIMESTAMPTZ,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    state BYTEA,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, symbol, chunk_start)
+);
+
 -- =============================================================================
 -- Utility: Drop and recreate all tables (use with caution!)
 -- =============================================================================
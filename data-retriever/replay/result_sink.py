@@ -0,0 +1,267 @@
+"""Buffered writer for replay results.
+
+Replay used to open one transaction per signal, per outcome and per child
+table, which dominates wall time once candles come from the cache.
+ReplayResultSink queues rows per table and writes them in a single
+transaction of multi-row INSERTs (execute_values), either when the buffer
+reaches SINK_FLUSH_ROWS or when the runner flushes at a checkpoint or at the
+end of the window. A replay progress record (see checkpoint.py) can be queued to
+commit in the same transaction.
+
+Signal and outcome ids are reserved up front from their SERIAL sequences,
+so outcome and exit-simulation rows can reference a signal that has not
+been written yet.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Optional, Sequence
+
+from logger import get_logger
+
+from .config import SINK_FLUSH_ROWS, SINK_ID_PREFETCH
+from .replay_queries import (
+    PREFETCH_ENTRY_SIGNAL_IDS,
+    PREFETCH_SIGNAL_OUTCOME_IDS,
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+    BATCH_INSERT_REPLAY_SIGNAL_OUTCOME,
+    BATCH_INSERT_REPLAY_CHECKPOINT_RETURN,
+    BATCH_MARK_REPLAY_OUTCOMES_COMPUTED,
+    BATCH_INSERT_SIGNAL_PATH_EXTREMES,
+    BATCH_INSERT_ENTRY_SL_GEOMETRY,
+    BATCH_INSERT_EXIT_SIMULATIONS,
+    BATCH_INSERT_SWEEP_RESULTS,
+    UPSERT_REPLAY_CHECKPOINT,
+)
+
+logger = get_logger(__name__)
+
+
+class ReplayResultSink:
+    """Collects replay rows per table and writes them in batches.
+
+    One sink is used per symbol replay. Rows are written in foreign-key
+    order inside one transaction, so a flush is all-or-nothing.
+
+    Subclasses can send the rows elsewhere by overriding _write() and
+    _reserve_ids() (see file_sink.ParquetResultSink).
+    """
+
+    # The runner reads pending signals and the dedup index back from the
+    # replay schema only when the sink writes there
+    uses_database = True
+
+    def __init__(
+        self,
+        flush_rows: Optional[int] = SINK_FLUSH_ROWS,
+        id_prefetch: int = SINK_ID_PREFETCH,
+    ):
+        # None: only explicit flush() calls write (the runner flushes at
+        # candle boundaries so checkpoints match what has been written)
+        self._flush_rows = flush_rows
+        self._id_prefetch = id_prefetch
+        self._signal_ids: deque[int] = deque()
+        self._outcome_ids: deque[int] = deque()
+
+        self._signals: list[tuple] = []
+        self._outcomes: list[tuple] = []
+        self._checkpoints: list[tuple] = []
+        self._computed_ids: list[int] = []
+        self._path_extremes: list[tuple] = []
+        self._sl_geometry: list[tuple] = []
+        self._exit_simulations: list[tuple] = []
+        self._sweep_results: list[tuple] = []
+        self._checkpoint: Optional[tuple] = None
+
+        # Signals lost in a failed flush; their child rows are dropped too
+        self._failed_signal_ids: set[int] = set()
+
+    @property
+    def pending_rows(self) -> int:
+        """Number of rows waiting to be written."""
+        return (
+            len(self._signals)
+            + len(self._outcomes)
+            + len(self._checkpoints)
+            + len(self._path_extremes)
+            + len(self._sl_geometry)
+            + len(self._exit_simulations)
+            + len(self._sweep_results)
+        )
+
+    # -------------------------------------------------------------------------
+    # Queueing
+    # -------------------------------------------------------------------------
+
+    def add_signal(self, params: Sequence) -> int:
+        """Queue an entry_signal row and return its reserved id.
+
+        Args:
+            params: INSERT_REPLAY_ENTRY_SIGNAL parameters (without id)
+        """
+        signal_id = self._next_id(self._signal_ids, PREFETCH_ENTRY_SIGNAL_IDS)
+        self._signals.append((signal_id, *params))
+        self._maybe_flush()
+        return signal_id
+
+    def add_outcome(
+        self,
+        signal_id: int,
+        params: Sequence,
+        checkpoint_returns: Iterable[tuple] = (),
+    ) -> bool:
+        """Queue a signal_outcome row and mark the signal as computed.
+
+        Args:
+            signal_id: Entry signal the outcome belongs to
+            params: Outcome columns after entry_signal_id
+                (window_bars, mfe_atr, mae_atr, bars_to_mfe, bars_to_mae, first_extreme)
+            checkpoint_returns: (bars_after, return_atr) pairs
+
+        Returns:
+            False if the signal was lost in a failed flush
+        """
+        if signal_id in self._failed_signal_ids:
+            return False
+
+        outcome_id = self._next_id(self._outcome_ids, PREFETCH_SIGNAL_OUTCOME_IDS)
+        self._outcomes.append((outcome_id, signal_id, *params))
+        self._checkpoints.extend(
+            (outcome_id, bars_after, return_atr) for bars_after, return_atr in checkpoint_returns
+        )
+        self._computed_ids.append(signal_id)
+        self._maybe_flush()
+        return True
+
+    def add_path_extremes(self, signal_id: int, rows: list[tuple]) -> None:
+        """Queue signal_path_extremes rows (see path_extreme_params)."""
+        if signal_id not in self._failed_signal_ids:
+            self._path_extremes.extend(rows)
+            self._maybe_flush()
+
+    def add_sl_geometry(self, signal_id: int, row: tuple) -> None:
+        """Queue an entry_sl_geometry row (see sl_geometry_params)."""
+        if signal_id not in self._failed_signal_ids:
+            self._sl_geometry.append(row)
+            self._maybe_flush()
+
+    def add_exit_simulations(self, signal_id: int, rows: list[tuple]) -> None:
+        """Queue exit_simulation rows (see exit_simulation_params)."""
+        if signal_id not in self._failed_signal_ids:
+            self._exit_simulations.extend(rows)
+            self._maybe_flush()
+
+    def add_sweep_results(self, rows: list[tuple]) -> None:
+        """Queue sweep_result rows (see sweep_result_params)."""
+        self._sweep_results.extend(rows)
+        self._maybe_flush()
+
+    def set_checkpoint(self, params: tuple) -> None:
+        """Write this progress record with the next flush (see ReplayProgress.params)."""
+        self._checkpoint = params
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write all queued rows in one transaction.
+
+        Buffers are cleared either way. On failure the queued signals are
+        remembered as lost so later child rows for them are skipped, and the
+        error is re-raised.
+
+        Returns:
+            Number of rows written
+        """
+        row_count = self.pending_rows
+        if row_count == 0 and not self._computed_ids and self._checkpoint is None:
+            return 0
+
+        # Parents before children (foreign keys)
+        batches = [
+            (BATCH_INSERT_REPLAY_ENTRY_SIGNAL, self._signals),
+            (BATCH_INSERT_REPLAY_SIGNAL_OUTCOME, self._outcomes),
+            (BATCH_INSERT_REPLAY_CHECKPOINT_RETURN, self._checkpoints),
+            (BATCH_INSERT_SIGNAL_PATH_EXTREMES, self._path_extremes),
+            (BATCH_INSERT_ENTRY_SL_GEOMETRY, self._sl_geometry),
+            (BATCH_INSERT_EXIT_SIMULATIONS, self._exit_simulations),
+            (BATCH_INSERT_SWEEP_RESULTS, self._sweep_results),
+        ]
+        computed_ids = list(self._computed_ids)
+        checkpoint = self._checkpoint
+
+        try:
+            self._write(batches, computed_ids, checkpoint)
+        except Exception:
+            self._failed_signal_ids.update(row[0] for row in self._signals)
+            logger.error(
+                f"  ❌ Replay sink flush failed, dropped {row_count} rows "
+                f"({len(self._signals)} signals)"
+            )
+            raise
+        finally:
+            self._clear()
+
+        return row_count
+
+    def _write(
+        self,
+        batches: list[tuple[str, list]],
+        computed_ids: list[int],
+        checkpoint: Optional[tuple],
+    ) -> None:
+        """Write one flush as a single transaction.
+
+        Args:
+            batches: (batch INSERT statement, rows) in foreign-key order
+            computed_ids: Signals whose outcome is in this flush
+            checkpoint: UPSERT_REPLAY_CHECKPOINT parameters, if any
+        """
+        from psycopg2.extras import execute_values
+        from database.executor import DBExecutor
+
+        def _work(cursor):
+            for sql, rows in batches:
+                if rows:
+                    execute_values(cursor, sql, rows, page_size=1000)
+            if computed_ids:
+                cursor.execute(BATCH_MARK_REPLAY_OUTCOMES_COMPUTED, (computed_ids,))
+            # Progress last, so it only commits together with the rows it covers
+            if checkpoint is not None:
+                cursor.execute(UPSERT_REPLAY_CHECKPOINT, checkpoint)
+
+        DBExecutor.execute_transaction(_work, context="flush_replay_results")
+
+    def _maybe_flush(self) -> None:
+        if self._flush_rows is not None and self.pending_rows >= self._flush_rows:
+            self.flush()
+
+    def _clear(self) -> None:
+        self._signals = []
+        self._outcomes = []
+        self._checkpoints = []
+        self._computed_ids = []
+        self._path_extremes = []
+        self._sl_geometry = []
+        self._exit_simulations = []
+        self._sweep_results = []
+        self._checkpoint = None
+
+    def _next_id(self, pool: deque[int], prefetch_sql: str) -> int:
+        """Pop a reserved id, reserving a new block from the sequence if empty."""
+        if not pool:
+            pool.extend(self._reserve_ids(prefetch_sql, self._id_prefetch))
+        return pool.popleft()
+
+    def _reserve_ids(self, prefetch_sql: str, count: int) -> list[int]:
+        """Reserve `count` ids from the SERIAL sequence behind `prefetch_sql`."""
+        from database.executor import DBExecutor
+
+        rows = DBExecutor.fetch_all(
+            prefetch_sql,
+            (count,),
+            context="prefetch_replay_ids",
+        )
+        return [row[0] for row in rows]
@@ -8,53 +8,40 @@ Single entrypoint to run full replay simulation. Coordinates:
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional, List
 
 from .config import (
     REPLAY_SYMBOLS,
     REPLAY_START_DATE,
     REPLAY_END_DATE,
     SCHEMA_NAME,
-    MAX_CHUNK_DAYS,
+    FETCH_PAGE_CANDLES,
+    REPLAY_WORKERS,
+    SINK_FLUSH_ROWS,
+    CHECKPOINT_INTERVAL_HOURS,
 )
-from .candle_store import load_symbol_candles
+from .candle_store import CandleStore, load_symbol_candles
+from .checkpoint import ReplayProgress, make_run_id
+from .file_sink import ParquetResultSink, parse_sink_spec
 from .timeframe_alignment import TimeframeAligner
 from .market_state import MarketStateManager
 from .signal_detector import ReplaySignalDetector
-from .outcome_calculator import ReplayOutcomeCalculator
+from .outcome_calculator import ReplayOutcomeCalculator, ReplayPendingSignal
+from .result_sink import ReplayResultSink
+from .portfolio import PortfolioConstraints
+from .signal_index import ReplaySignalIndex
+from .profiling import StageTimings, collect, profile_to, stage
+from configuration.broker_config import MT5_MAX_ACTIVE_TRADES, MT5_MIN_TRADE_INTERVAL_MINUTES
 from logger import get_logger
 
 logger = get_logger(__name__)
 
 
-def _generate_date_chunks(
-    start_date: datetime, 
-    end_date: datetime, 
-    chunk_days: int = MAX_CHUNK_DAYS
-) -> List[Tuple[datetime, datetime]]:
-    """Split a date range into chunks to avoid terminal candle limits.
-    
-    Args:
-        start_date: Overall start date
-        end_date: Overall end date
-        chunk_days: Maximum days per chunk (default: MAX_CHUNK_DAYS)
-        
-    Returns:
-        List of (chunk_start, chunk_end) tuples
-    """
-    chunks = []
-    current_start = start_date
-    
-    while current_start < end_date:
-        # Calculate chunk end (start + chunk_days or end_date)
-        chunk_end = min(current_start + timedelta(days=chunk_days), end_date)
-        chunks.append((current_start, chunk_end))
-        current_start = chunk_end
-    
-    return chunks
-
-
 class ReplayStats:
     """Statistics for a replay run."""
     
@@ -62,12 +49,25 @@ class ReplayStats:
         self.candles_processed = 0
         self.signals_inserted = 0
         self.outcomes_computed = 0
+        self.signals_blocked = 0
         self.errors = 0
+        self.timings = StageTimings()
+    
+    def merge(self, other: "ReplayStats") -> None:
+        """Add another run's counters (e.g. from a worker process) into this one."""
+        self.candles_processed += other.candles_processed
+        self.signals_inserted += other.signals_inserted
+        self.outcomes_computed += other.outcomes_computed
+        self.signals_blocked += other.signals_blocked
+        self.errors += other.errors
+        self.timings.merge(other.timings)
     
     def summary(self) -> str:
+        blocked = f"Blocked: {self.signals_blocked} | " if self.signals_blocked else ""
         return (
             f"Candles: {self.candles_processed} | "
             f"Signals: {self.signals_inserted} | "
+            f"{blocked}"
             f"Outcomes: {self.outcomes_computed} | "
             f"Errors: {self.errors}"
         )
@@ -77,16 +77,49 @@ def run_replay(
     symbols: Optional[List[str]] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    resume: bool = False,
+    profile_dir: Optional[str] = None,
+    sink: Optional[str] = None,
+    portfolio: bool = False,
 ) -> ReplayStats:
     """Run the offline replay simulation.
     
-    For long date ranges (>MAX_CHUNK_DAYS), the range is automatically split 
-    into chunks to avoid terminal candle limits.
+    Each symbol's window is replayed in one pass over a single CandleStore,
+    so market state and pending outcomes carry through the whole window.
+    Only the candle fetch is split, into requests of at most
+    FETCH_PAGE_CANDLES candles, to stay within terminal candle limits.
+    
+    Symbols are independent, so with workers > 1 each symbol is replayed in
+    its own worker process and the per-symbol stats are merged here.
+    
+    Progress is checkpointed per (run, symbol), where the run id is
+    derived from the window. With resume=True, completed symbols are skipped
+    and interrupted ones continue after their last checkpointed candle.
+    
+    Wall time and call counts per replay stage are collected for every
+    symbol and logged as one breakdown table at the end.
+    
+    With sink="parquet:<dir>", results are written as Parquet files under
+    <dir> (see file_sink.py), tagged with the run mode and run id, and the
+    database is not used at all. File runs keep no checkpoints, so they
+    cannot be resumed.
+    
+    With portfolio=True, all symbols are replayed in one process on a single
+    1H clock (see _replay_portfolio), and the live MT5 trade limits are
+    applied across them at signal time. Blocked signals are not stored.
+    Portfolio runs need a file sink, so their constrained results never
+    mix with per-symbol results in the replay schema.
     
     Args:
         symbols: List of forex symbols to replay (default: REPLAY_SYMBOLS)
         start_date: Replay start date (default: REPLAY_START_DATE)
         end_date: Replay end date (default: REPLAY_END_DATE)
+        workers: Number of worker processes (default: REPLAY_WORKERS)
+        resume: Continue from the checkpoints of an earlier run of this window
+        profile_dir: Also write a cProfile dump per symbol (<symbol>.pstats) here
+        sink: "postgres" (default, the replay schema) or "parquet:<dir>"
+        portfolio: Replay symbols together under the live portfolio limits
         
     Returns:
         ReplayStats with summary of what was processed
@@ -94,9 +127,15 @@ def run_replay(
     symbols = symbols or REPLAY_SYMBOLS
     start_date = start_date or REPLAY_START_DATE
     end_date = end_date or REPLAY_END_DATE
+    workers = max(1, min(workers or REPLAY_WORKERS, len(symbols)))
+    
+    output_dir = parse_sink_spec(sink)
+    if output_dir and resume:
+        raise ValueError("Resume needs the postgres sink (file runs keep no checkpoints)")
+    if portfolio and not output_dir:
+        raise ValueError("Portfolio replay needs a file sink (parquet:<dir>)")
     
-    # Generate date chunks for long ranges
-    chunks = _generate_date_chunks(start_date, end_date)
+    run_id = make_run_id(start_date, end_date)
     
     stats = ReplayStats()
     
@@ -105,39 +144,122 @@ def run_replay(
     logger.info("=" * 60)
     logger.info(f"  Symbols: {', '.join(symbols)}")
     logger.info(f"  Window: {start_date.isoformat()} to {end_date.isoformat()}")
-    if len(chunks) > 1:
-        logger.info(f"  Chunks: {len(chunks)} (max {MAX_CHUNK_DAYS} days each)")
-    logger.info(f"  Schema: {SCHEMA_NAME}")
+    logger.info(f"  Candle fetch: max {FETCH_PAGE_CANDLES} candles per request")
+    if portfolio:
+        logger.info(
+            f"  Portfolio: one clock, max {MT5_MAX_ACTIVE_TRADES} active trades, "
+            f"{MT5_MIN_TRADE_INTERVAL_MINUTES} min between trades per symbol"
+        )
+    elif workers > 1:
+        logger.info(f"  Workers: {workers} processes")
+    if output_dir:
+        logger.info(f"  Output: Parquet files in {output_dir}")
+    else:
+        logger.info(f"  Schema: {SCHEMA_NAME}")
+    logger.info(f"  Run: {run_id}{' (resuming)' if resume else ''}")
     logger.info("=" * 60 + "\n")
     
-    # Process each symbol, chunk by chunk
-    for symbol in symbols:
-        for chunk_idx, (chunk_start, chunk_end) in enumerate(chunks):
-            if len(chunks) > 1:
-                logger.info(
-                    f"\n📦 Chunk {chunk_idx + 1}/{len(chunks)}: "
-                    f"{chunk_start.strftime('%Y-%m-%d')} to {chunk_end.strftime('%Y-%m-%d')}"
-                )
-            
-            symbol_stats = _replay_symbol(symbol, chunk_start, chunk_end)
-            stats.candles_processed += symbol_stats.candles_processed
-            stats.signals_inserted += symbol_stats.signals_inserted
-            stats.outcomes_computed += symbol_stats.outcomes_computed
-            stats.errors += symbol_stats.errors
+    # Process each symbol over the whole window
+    if portfolio:
+        stats.merge(_replay_portfolio(symbols, start_date, end_date, run_id, profile_dir, output_dir))
+    elif workers > 1:
+        stats.merge(_replay_symbols_in_pool(
+            symbols, start_date, end_date, workers, run_id, resume, profile_dir, output_dir
+        ))
+    else:
+        for symbol in symbols:
+            stats.merge(_replay_symbol_profiled(
+                symbol, start_date, end_date, run_id, resume, profile_dir, output_dir
+            ))
     
     logger.info("\n" + "=" * 60)
     logger.info("✅ REPLAY COMPLETE")
     logger.info(f"  {stats.summary()}")
+    logger.info("  ⏱️ Time per stage:\n" + stats.timings.report())
+    if profile_dir:
+        logger.info(f"  🔬 Profiles written to {profile_dir}")
     logger.info("=" * 60 + "\n")
         
     
     return stats
 
 
+def _replay_symbols_in_pool(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    workers: int,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    profile_dir: Optional[str] = None,
+    output_dir: Optional[str] = None,
+) -> ReplayStats:
+    """Replay symbols in parallel, one worker process per symbol at a time.
+    
+    Each worker opens its own DB pool (unless writing files) and returns its
+    ReplayStats, which are merged here. A crashed worker counts as one error
+    for its symbol.
+    """
+    stats = ReplayStats()
+    
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_replay_worker if output_dir is None else None,
+    ) as executor:
+        futures = {
+            executor.submit(
+                _replay_symbol_profiled,
+                symbol, start_date, end_date, run_id, resume, profile_dir, output_dir
+            ): symbol
+            for symbol in symbols
+        }
+        
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                stats.merge(future.result())
+            except Exception as e:
+                logger.error(f"  ❌ Worker for {symbol} crashed: {e}")
+                stats.errors += 1
+    
+    return stats
+
+
+def _init_replay_worker() -> None:
+    """Give each worker process its own DB pool.
+    
+    A forked worker inherits the parent's pool object; its connections are
+    dropped (not closed) so the parent's sessions stay intact.
+    """
+    from database.connection import DBConnectionManager
+    
+    DBConnectionManager.discard_pool()
+    DBConnectionManager.init_pool(minconn=1, maxconn=2)
+
+
+def _replay_symbol_profiled(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    profile_dir: Optional[str] = None,
+    output_dir: Optional[str] = None,
+) -> ReplayStats:
+    """Replay one symbol, with a cProfile dump (<symbol>.pstats) if profile_dir is set."""
+    profile_path = os.path.join(profile_dir, f"{symbol}.pstats") if profile_dir else None
+    
+    with profile_to(profile_path):
+        return _replay_symbol(symbol, start_date, end_date, run_id, resume, output_dir)
+
+
 def _replay_symbol(
     symbol: str,
     start_date: datetime,
     end_date: datetime,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    output_dir: Optional[str] = None,
 ) -> ReplayStats:
     """Run replay for a single symbol.
     
@@ -145,131 +267,438 @@ def _replay_symbol(
         symbol: Forex pair symbol
         start_date: Replay start date
         end_date: Replay end date
+        run_id: Run to record progress (or tag files) under; None disables checkpoints
+        resume: Continue from this window's checkpoint, if there is one
+        output_dir: Write Parquet files here instead of the replay schema
         
     Returns:
         ReplayStats for this symbol
     """
     stats = ReplayStats()
     
-    logger.info(f"\n--- 🔄 Processing {symbol} ---")
-    
-    # Step 1: Load candles
-    logger.info(f"  📊 Loading candles for {symbol}...")
-    try:
-        candle_store = load_symbol_candles(symbol, start_date, end_date)
-        candle_summary = candle_store.summary()
-        logger.info(f"  ✅ Loaded: {candle_summary}")
-    except Exception as e:
-        import traceback
-        logger.error(f"  ❌ Failed to load candles: {e}")
-        traceback.print_exc()  # Print full traceback
-        stats.errors += 1
-        return stats
-    
-    # Step 2: Initialize components
-    aligner = TimeframeAligner(candle_store)
-    state_manager = MarketStateManager(symbol, candle_store, aligner)
-    signal_detector = ReplaySignalDetector(symbol, candle_store)
-    outcome_calculator = ReplayOutcomeCalculator(symbol, candle_store, start_date, end_date)
-    
-    # Step 3: Get 1H candle indices for replay window
-    replay_indices = candle_store.get_replay_1h_indices(start_date, end_date)
-    total_candles = len(replay_indices)
-    
-    logger.info(f"  📈 Replaying {total_candles} 1H candles...")
-    
-    # Progress tracking
-    log_interval = max(total_candles // 10, 1)  # Log every 10%
-    
-    # Step 4: Main replay loop
-    for i, candle_idx in enumerate(replay_indices):
+    with collect(stats.timings):
+        progress = (
+            ReplayProgress(run_id, symbol, start_date, end_date)
+            if run_id and output_dir is None else None
+        )
+        
+        checkpoint = None
+        if resume and progress is not None:
+            try:
+                with stage("db_reads"):
+                    checkpoint = progress.load()
+            except Exception as e:
+                logger.error(f"  ❌ Failed to load checkpoint for {symbol}: {e}")
+                stats.errors += 1
+                return stats
+            if checkpoint is not None and checkpoint.completed:
+                logger.info(f"\n--- ⏭️ {symbol} already complete in {run_id}, skipping ---")
+                return stats
+        
+        logger.info(f"\n--- 🔄 Processing {symbol} ---")
+        
+        # Step 1: Load candles
+        logger.info(f"  📊 Loading candles for {symbol}...")
         try:
+            with stage("candle_load"):
+                candle_store = load_symbol_candles(symbol, start_date, end_date)
+            candle_summary = candle_store.summary()
+            logger.info(f"  ✅ Loaded: {candle_summary}")
+        except Exception as e:
+            import traceback
+            logger.error(f"  ❌ Failed to load candles: {e}")
+            traceback.print_exc()  # Print full traceback
+            stats.errors += 1
+            return stats
+        
+        # Step 2: Initialize components
+        aligner = TimeframeAligner(candle_store)
+        state_manager = MarketStateManager(symbol, candle_store, aligner)
+        # Flushed by this loop only, at candle boundaries, so every write can
+        # carry a checkpoint that matches it exactly
+        if output_dir:
+            sink = ParquetResultSink(output_dir, symbol, start_date, end_date, run_id)
+        else:
+            sink = ReplayResultSink(flush_rows=None)
+        signal_index = ReplaySignalIndex(symbol)
+        signal_detector = ReplaySignalDetector(symbol, candle_store, sink, signal_index)
+        outcome_calculator = ReplayOutcomeCalculator(symbol, candle_store, sink, start_date, end_date)
+        
+        # Existing signals for dedup and trade grouping (no per-candidate SELECTs);
+        # a file sink replaces this window's earlier files instead
+        if sink.uses_database:
+            try:
+                with stage("db_reads"):
+                    existing = signal_index.load(start_date, end_date)
+            except Exception as e:
+                logger.error(f"  ❌ Failed to load existing signals: {e}")
+                stats.errors += 1
+                return stats
+            if existing > 0:
+                logger.info(f"  🗂️ Indexed {existing} existing signals")
+        
+        # Pick up where an interrupted run of this window stopped
+        last_idx = None
+        last_time = None
+        if checkpoint is not None:
+            state_manager.restore(checkpoint.state["market_state"])
+            restored = outcome_calculator.restore(checkpoint.state["pending_signals"])
+            last_idx = checkpoint.last_1h_index
+            last_time = checkpoint.last_candle_time
+            if last_time is not None:
+                logger.info(
+                    f"  ⏩ Resuming after {last_time.isoformat()} "
+                    f"({restored} pending signals restored)"
+                )
+        
+        # Recover signals left pending by an interrupted run (the loop never polls the DB)
+        if sink.uses_database:
+            with stage("db_reads"):
+                recovered = outcome_calculator.recover_pending_signals()
+            if recovered > 0:
+                logger.info(f"  ♻️ Recovered {recovered} pending signals from a previous run")
+        
+        # Step 3: Get 1H candle indices for replay window
+        replay_indices = candle_store.get_replay_1h_indices(start_date, end_date)
+        if last_time is not None:
+            done = candle_store.get_1h_candles().count_up_to(last_time)
+            replay_indices = [idx for idx in replay_indices if idx >= done]
+        total_candles = len(replay_indices)
+        
+        logger.info(f"  📈 Replaying {total_candles} 1H candles...")
+        
+        # Progress tracking
+        log_interval = max(total_candles // 10, 1)  # Log every 10%
+        hours_since_checkpoint = 0
+        
+        # Step 4: Main replay loop
+        for i, candle_idx in enumerate(replay_indices):
             candle = candle_store.get_1h_candles().get_candle_at_index(candle_idx)
             if candle is None:
                 continue
-            
             current_time = candle["time"]
             
-            # Update market state (only recomputes if new TF close)
-            state_manager.update_state(current_time)
-            
-            # Detect entry signals
-            signal_ids = signal_detector.detect_signals(
-                current_time, state_manager.state
-            )
-            stats.signals_inserted += len(signal_ids)
-            
-            # Register signals for outcome tracking
-            for sig_id in signal_ids:
-                outcome_calculator.register_signal(sig_id, current_time)
-            
-            # Compute outcomes for eligible signals
-            outcomes = outcome_calculator.compute_eligible_outcomes(candle_idx)
-            stats.outcomes_computed += outcomes
+            try:
+                # Update market state (only recomputes if new TF close)
+                state_manager.update_state(current_time, candle_idx)
+                
+                # Detect entry signals
+                signals = signal_detector.detect_signals(
+                    current_time, state_manager.state
+                )
+                stats.signals_inserted += len(signals)
+                
+                # Register signals for outcome tracking
+                for signal in signals:
+                    outcome_calculator.register_signal(signal)
+                
+                # Compute outcomes for eligible signals
+                with stage("outcomes"):
+                    outcomes = outcome_calculator.compute_eligible_outcomes(candle_idx)
+                stats.outcomes_computed += outcomes
+                
+                stats.candles_processed += 1
+                
+                # Progress logging
+                if (i + 1) % log_interval == 0 or i == total_candles - 1:
+                    pct = ((i + 1) / total_candles) * 100
+                    logger.info(
+                        f"    [{pct:5.1f}%] {stats.candles_processed} candles | "
+                        f"{stats.signals_inserted} signals | "
+                        f"{stats.outcomes_computed} outcomes"
+                    )
+                    
+            except Exception as e:
+                logger.error(f"    ❌ Error at candle {candle_idx}: {e}")
+                stats.errors += 1
             
-            stats.candles_processed += 1
+            # Rows queued for this candle (even by a failed step) go out with its checkpoint
+            last_idx, last_time = candle_idx, current_time.to_pydatetime()
             
-            # Progress logging
-            if (i + 1) % log_interval == 0 or i == total_candles - 1:
-                pct = ((i + 1) / total_candles) * 100
-                logger.info(
-                    f"    [{pct:5.1f}%] {stats.candles_processed} candles | "
-                    f"{stats.signals_inserted} signals | "
-                    f"{stats.outcomes_computed} outcomes"
+            # Write queued rows together with the progress they cover
+            hours_since_checkpoint += 1
+            if (
+                sink.pending_rows >= SINK_FLUSH_ROWS
+                or (progress is not None and hours_since_checkpoint >= CHECKPOINT_INTERVAL_HOURS)
+            ):
+                flushed = _flush_with_progress(
+                    sink, stats, progress, last_idx, last_time, state_manager, outcome_calculator
                 )
-                
-        except Exception as e:
-            logger.error(f"    ❌ Error at candle {candle_idx}: {e}")
-            stats.errors += 1
+                if not flushed and progress is not None:
+                    # The dropped rows were never written, so no later checkpoint may skip them
+                    logger.warning(
+                        f"  ⚠️ Checkpoints stopped for {symbol}; "
+                        f"a resume continues from the last committed one"
+                    )
+                    progress = None
+                hours_since_checkpoint = 0
+        
+        # End of the window: write everything queued during the loop
+        if not _flush_with_progress(
+            sink, stats, progress, last_idx, last_time, state_manager, outcome_calculator
+        ):
+            return stats
+        
+        # Step 5: Final pass - compute outcomes for ALL remaining pending signals
+        # This catches signals near the end of the replay window that didn't have 
+        # enough future candles during the main loop
+        logger.info(f"  🔄 Final pass: computing remaining outcomes...")
+        with stage("outcomes"):
+            final_outcomes = _compute_remaining_outcomes(
+                symbol, start_date, end_date, candle_store, sink,
+                pending=None if sink.uses_database else outcome_calculator.snapshot(),
+            )
+        if _flush_with_progress(
+            sink, stats, progress, last_idx, last_time, state_manager, outcome_calculator,
+            completed=True,
+        ):
+            stats.outcomes_computed += final_outcomes
+            if final_outcomes > 0:
+                logger.info(f"    ✅ Computed {final_outcomes} additional outcomes in final pass")
+        
+        logger.info(f"  ✅ {symbol} complete: {stats.summary()}")
+        
+        return stats
+
+
+@dataclass
+class _SymbolLane:
+    """One symbol's replay components within a portfolio replay."""
+    
+    symbol: str
+    candle_store: CandleStore
+    state_manager: MarketStateManager
+    signal_detector: ReplaySignalDetector
+    outcome_calculator: ReplayOutcomeCalculator
+    sink: ReplayResultSink
+    replay_indices: List[int]
+
+
+def _replay_portfolio(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    run_id: Optional[str] = None,
+    profile_dir: Optional[str] = None,
+    output_dir: Optional[str] = None,
+) -> ReplayStats:
+    """Replay all symbols together under the live portfolio trade limits.
     
-    # Step 5: Final pass - compute outcomes for ALL remaining pending signals
-    # This catches signals near the end of the replay window that didn't have 
-    # enough future candles during the main loop
-    logger.info(f"  🔄 Final pass: computing remaining outcomes...")
-    final_outcomes = _compute_remaining_outcomes(symbol, start_date, end_date, candle_store)
-    stats.outcomes_computed += final_outcomes
-    if final_outcomes > 0:
-        logger.info(f"    ✅ Computed {final_outcomes} additional outcomes in final pass")
+    Runs in a single process; the cProfile dump (if any) covers the whole
+    run (portfolio.pstats).
+    """
+    stats = ReplayStats()
+    portfolio = PortfolioConstraints()
+    profile_path = os.path.join(profile_dir, "portfolio.pstats") if profile_dir else None
     
-    logger.info(f"  ✅ {symbol} complete: {stats.summary()}")
+    with profile_to(profile_path), collect(stats.timings):
+        _replay_portfolio_window(symbols, start_date, end_date, portfolio, run_id, output_dir, stats)
+    
+    stats.signals_blocked = portfolio.blocked
+    logger.info(
+        f"  💼 Portfolio: {portfolio.trades_opened} trades opened | "
+        f"{portfolio.blocked_global} signals blocked by the active trade limit | "
+        f"{portfolio.blocked_interval} by the per-symbol interval"
+    )
     
     return stats
 
 
+def _replay_portfolio_window(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    portfolio: PortfolioConstraints,
+    run_id: Optional[str],
+    output_dir: str,
+    stats: ReplayStats,
+) -> None:
+    """Replay the window of every symbol on a single 1H clock.
+    
+    A heap of (next 1H candle time, symbol position) merges the symbols'
+    timelines, so each timestamp advances every symbol that has a candle
+    there before any later candle is replayed. Symbols sharing a timestamp
+    go in the given symbol order, like the live scan. Only the columnar
+    candle stores are held in memory.
+    """
+    lanes: List[_SymbolLane] = []
+    for symbol in symbols:
+        logger.info(f"  📊 Loading candles for {symbol}...")
+        try:
+            with stage("candle_load"):
+                candle_store = load_symbol_candles(symbol, start_date, end_date)
+            logger.info(f"  ✅ Loaded: {candle_store.summary()}")
+        except Exception as e:
+            logger.error(f"  ❌ Failed to load candles for {symbol}: {e}")
+            stats.errors += 1
+            continue
+        
+        aligner = TimeframeAligner(candle_store)
+        sink = ParquetResultSink(output_dir, symbol, start_date, end_date, run_id, mode="portfolio")
+        lanes.append(_SymbolLane(
+            symbol=symbol,
+            candle_store=candle_store,
+            state_manager=MarketStateManager(symbol, candle_store, aligner),
+            signal_detector=ReplaySignalDetector(
+                symbol, candle_store, sink, ReplaySignalIndex(symbol), portfolio
+            ),
+            outcome_calculator=ReplayOutcomeCalculator(symbol, candle_store, sink, start_date, end_date),
+            sink=sink,
+            replay_indices=candle_store.get_replay_1h_indices(start_date, end_date),
+        ))
+    
+    # Global clock: (candle time ns, lane, position in the lane's replay indices)
+    clock = [
+        (int(lane.candle_store.get_1h_candles().time_ns[lane.replay_indices[0]]), order, 0)
+        for order, lane in enumerate(lanes)
+        if lane.replay_indices
+    ]
+    heapq.heapify(clock)
+    
+    total_candles = sum(len(lane.replay_indices) for lane in lanes)
+    logger.info(f"  📈 Replaying {total_candles} 1H candles across {len(lanes)} symbols...")
+    log_interval = max(total_candles // 10, 1)  # Log every 10%
+    step = 0
+    
+    while clock:
+        _, order, position = heapq.heappop(clock)
+        lane = lanes[order]
+        candles_1h = lane.candle_store.get_1h_candles()
+        candle_idx = lane.replay_indices[position]
+        
+        try:
+            candle = candles_1h.get_candle_at_index(candle_idx)
+            if candle is not None:
+                current_time = candle["time"]
+                
+                lane.state_manager.update_state(current_time, candle_idx)
+                
+                # Signals are admitted against trades opened so far on any symbol
+                signals = lane.signal_detector.detect_signals(
+                    current_time, lane.state_manager.state
+                )
+                stats.signals_inserted += len(signals)
+                
+                for signal in signals:
+                    lane.outcome_calculator.register_signal(signal)
+                    portfolio.open(signal, candles_1h)
+                
+                with stage("outcomes"):
+                    outcomes = lane.outcome_calculator.compute_eligible_outcomes(candle_idx)
+                stats.outcomes_computed += outcomes
+                
+                stats.candles_processed += 1
+        except Exception as e:
+            logger.error(f"    ❌ Error at {lane.symbol} candle {candle_idx}: {e}")
+            stats.errors += 1
+        
+        if lane.sink.pending_rows >= SINK_FLUSH_ROWS:
+            _flush_sink(lane.sink, stats)
+        
+        if position + 1 < len(lane.replay_indices):
+            next_idx = lane.replay_indices[position + 1]
+            heapq.heappush(clock, (int(candles_1h.time_ns[next_idx]), order, position + 1))
+        
+        # Progress logging
+        step += 1
+        if step % log_interval == 0 or step == total_candles:
+            pct = (step / total_candles) * 100
+            logger.info(
+                f"    [{pct:5.1f}%] {stats.candles_processed} candles | "
+                f"{stats.signals_inserted} signals | "
+                f"{portfolio.blocked} blocked | "
+                f"{stats.outcomes_computed} outcomes"
+            )
+    
+    # End of the window: write what is queued, then the final outcome pass per symbol
+    for lane in lanes:
+        if not _flush_sink(lane.sink, stats):
+            continue
+        with stage("outcomes"):
+            final_outcomes = _compute_remaining_outcomes(
+                lane.symbol, start_date, end_date, lane.candle_store, lane.sink,
+                pending=lane.outcome_calculator.snapshot(),
+            )
+        if _flush_sink(lane.sink, stats):
+            stats.outcomes_computed += final_outcomes
+
+
+def _flush_sink(sink: ReplayResultSink, stats: ReplayStats) -> bool:
+    """Flush queued replay rows, counting a failed flush as an error."""
+    try:
+        with stage("db_writes"):
+            sink.flush()
+        return True
+    except Exception as e:
+        logger.error(f"  ❌ Failed to write replay results: {e}")
+        stats.errors += 1
+        return False
+
+
+def _flush_with_progress(
+    sink: ReplayResultSink,
+    stats: ReplayStats,
+    progress: Optional[ReplayProgress],
+    last_idx: Optional[int],
+    last_time: Optional[datetime],
+    state_manager: MarketStateManager,
+    outcome_calculator: ReplayOutcomeCalculator,
+    completed: bool = False,
+) -> bool:
+    """Flush queued rows with a checkpoint after the last processed candle."""
+    if progress is not None:
+        with stage("db_writes"):
+            sink.set_checkpoint(progress.params(
+                last_idx,
+                last_time,
+                completed,
+                {
+                    "market_state": state_manager.snapshot(),
+                    "pending_signals": outcome_calculator.snapshot(),
+                },
+            ))
+    return _flush_sink(sink, stats)
+
+
 def _compute_remaining_outcomes(
     symbol: str,
     start_date: datetime,
     end_date: datetime,
     candle_store,
+    sink: ReplayResultSink,
+    pending: Optional[List[ReplayPendingSignal]] = None,
 ) -> int:
     """Compute outcomes for all remaining pending signals.
     
     This is called after the main replay loop to catch signals that
     didn't have enough future candles during the loop.
+    
+    Pending signals are read from the replay schema, or taken from
+    `pending` (the outcome calculator's queue) when the sink writes files.
     """
-    from database.executor import DBExecutor
-    from psycopg2.extras import RealDictCursor
     from models import TrendDirection
     from signal_outcome.outcome_calculator import compute_outcome
     from signal_outcome.models import PendingSignal
-    from .replay_queries import (
-        INSERT_REPLAY_SIGNAL_OUTCOME,
-        MARK_REPLAY_OUTCOME_COMPUTED,
-    )
     from .config import OUTCOME_WINDOW_BARS
     
     computed_count = 0
     skipped_no_idx = 0
     skipped_no_candles = 0
     
-    # Fetch ALL pending signals for this symbol (no time range filter)
-    from .replay_queries import FETCH_ALL_PENDING_REPLAY_SIGNALS
-    rows = DBExecutor.fetch_all(
-        FETCH_ALL_PENDING_REPLAY_SIGNALS,
-        params=(symbol, 1000),  # Just symbol and limit
-        cursor_factory=RealDictCursor,
-        context="fetch_final_pending_signals",
-    )
+    if pending is None:
+        # Fetch ALL pending signals for this symbol (no time range filter)
+        from database.executor import DBExecutor
+        from psycopg2.extras import RealDictCursor
+        from .replay_queries import FETCH_ALL_PENDING_REPLAY_SIGNALS
+        with stage("db_reads"):
+            rows = DBExecutor.fetch_all(
+                FETCH_ALL_PENDING_REPLAY_SIGNALS,
+                params=(symbol, 1000),  # Just symbol and limit
+                cursor_factory=RealDictCursor,
+                context="fetch_final_pending_signals",
+            )
+    else:
+        rows = [asdict(signal) for signal in pending]
     
     logger.info(f"    📋 Found {len(rows)} pending signals to process")
     
@@ -319,25 +748,18 @@ def _compute_remaining_outcomes(
         try:
             outcome = compute_outcome(pending, future_candles)
             
-            # Persist outcome
-            def _work(cursor):
-                cursor.execute(
-                    INSERT_REPLAY_SIGNAL_OUTCOME,
-                    (
-                        row["id"],
-                        outcome.window_bars,
-                        float(outcome.mfe_atr),
-                        float(outcome.mae_atr),
-                        outcome.bars_to_mfe,
-                        outcome.bars_to_mae,
-                        outcome.first_extreme,
-                    ),
-                )
-                result = cursor.fetchone()
-                cursor.execute(MARK_REPLAY_OUTCOME_COMPUTED, (row["id"],))
-                return result is not None
-            
-            if DBExecutor.execute_transaction(_work, context="persist_final_outcome"):
+            # Queue outcome (the caller flushes the sink)
+            if sink.add_outcome(
+                row["id"],
+                (
+                    outcome.window_bars,
+                    float(outcome.mfe_atr),
+                    float(outcome.mae_atr),
+                    outcome.bars_to_mfe,
+                    outcome.bars_to_mae,
+                    outcome.first_extreme,
+                ),
+            ):
                 computed_count += 1
                 
         except Exception:
@@ -377,6 +799,44 @@ def main():
         default=None,
         help=f"End date ISO format (default: {REPLAY_END_DATE.isoformat()})",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"Worker processes, split across symbols (default: {REPLAY_WORKERS})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted replay of the same window from its checkpoints",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="replay_profiles",
+        default=None,
+        metavar="DIR",
+        help="Write a cProfile dump per symbol (<symbol>.pstats) to DIR (default: replay_profiles)",
+    )
+    parser.add_argument(
+        "--sink",
+        type=str,
+        default="postgres",
+        metavar="SINK",
+        help="Where results go: 'postgres' (replay schema, default) or 'parquet:<dir>'",
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Replay all symbols on one clock under the live trade limits (needs --sink parquet:<dir>)",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        default=None,
+        metavar="GRID_JSON",
+        help="Run a parameter sweep over the configs in this grid file (see replay/sweep.py)",
+    )
     
     args = parser.parse_args()
     
@@ -388,11 +848,39 @@ def main():
     if args.end:
         end_date = datetime.fromisoformat(args.end)
     
+    try:
+        parse_sink_spec(args.sink)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.resume and args.sink != "postgres":
+        parser.error("--resume needs the postgres sink (file runs keep no checkpoints)")
+    if args.sweep and args.sink != "postgres":
+        parser.error("--sweep writes to the replay schema; --sink is not supported with it")
+    if args.portfolio and (args.sink == "postgres" or args.sweep):
+        parser.error("--portfolio needs --sink parquet:<dir> and cannot be combined with --sweep")
+    
+    if args.sweep:
+        from .sweep import load_sweep_configs, run_sweep
+        
+        stats = run_sweep(
+            load_sweep_configs(args.sweep),
+            symbols=args.symbols,
+            start_date=start_date,
+            end_date=end_date,
+            workers=args.workers,
+        )
+        exit(1 if stats.errors > 0 else 0)
+    
     # Run replay
     stats = run_replay(
         symbols=args.symbols,
         start_date=start_date,
         end_date=end_date,
+        workers=args.workers,
+        resume=args.resume,
+        profile_dir=args.profile,
+        sink=args.sink,
+        portfolio=args.portfolio,
     )
     
     # Exit with error code if any errors occurred
@@ -0,0 +1,121 @@
+"""Candle stores shared between worker processes.
+
+Workers that run on the same symbol would each otherwise load and hold
+their own copy of the symbol's candle history. Instead the parent
+publishes the store once:
+
+    with SharedCandleStore(load_symbol_candles(symbol, start, end)) as shared:
+        executor.submit(work, shared.handle)   # small, picklable
+
+and each worker calls attach_candle_store(handle), which maps the same
+shared memory block and wraps it in a CandleStore without copying. All
+workers then read one physical copy of the candles.
+
+Only the time and OHLC columns are shared. Derived data (FeatureStore
+columns, ATR series, pre-entry features) is still computed per process on
+first use. Attached arrays are read-only.
+
+The publisher owns the block and unlinks it on close(). Workers have to
+be child processes of the publisher, so they share its resource tracker
+and never unlink the block themselves.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .candle_store import CandleStore, TimeframeCandles
+
+# Per timeframe, in block order: int64 time_ns, then float64 OHLC (8 bytes each)
+_FIELDS = ("time_ns", "open", "high", "low", "close")
+_ITEM_SIZE = 8
+
+
+@dataclass(frozen=True)
+class SharedCandleHandle:
+    """What a worker needs to attach to a published candle store."""
+
+    symbol: str
+    block_name: str
+    lengths: tuple[tuple[str, int], ...]  # (timeframe, candle count) in block order
+
+    @property
+    def nbytes(self) -> int:
+        return sum(count for _, count in self.lengths) * len(_FIELDS) * _ITEM_SIZE
+
+
+class SharedCandleStore:
+    """Publishes a CandleStore's candles into one shared memory block."""
+
+    def __init__(self, store: CandleStore):
+        lengths = tuple((timeframe, len(store.get(timeframe))) for timeframe in store.summary())
+        self._block = shared_memory.SharedMemory(
+            create=True, size=max(sum(count for _, count in lengths) * len(_FIELDS) * _ITEM_SIZE, 1)
+        )
+        self.handle = SharedCandleHandle(store.symbol, self._block.name, lengths)
+
+        for timeframe, columns in _map_columns(self._block, lengths, writeable=True).items():
+            candles = store.get(timeframe)
+            columns["time_ns"][:] = candles.time_ns
+            columns["open"][:] = candles.opens
+            columns["high"][:] = candles.highs
+            columns["low"][:] = candles.lows
+            columns["close"][:] = candles.closes
+
+    def close(self) -> None:
+        """Release the block; call once no worker uses it any more."""
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def __enter__(self) -> "SharedCandleStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_candle_store(handle: SharedCandleHandle) -> CandleStore:
+    """CandleStore over a published block (zero-copy, read-only)."""
+    block = shared_memory.SharedMemory(name=handle.block_name)
+
+    store = CandleStore(handle.symbol)
+    for timeframe, columns in _map_columns(block, handle.lengths, writeable=False).items():
+        store._candles[timeframe] = TimeframeCandles.from_arrays(
+            timeframe,
+            columns["time_ns"],
+            columns["open"],
+            columns["high"],
+            columns["low"],
+            columns["close"],
+        )
+    # The arrays are views into the block: keep it mapped as long as the store lives
+    store._shared_block = block
+    return store
+
+
+def _map_columns(
+    block: shared_memory.SharedMemory,
+    lengths: tuple[tuple[str, int], ...],
+    writeable: bool,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Column arrays per timeframe, as views into the block."""
+    columns: dict[str, dict[str, np.ndarray]] = {}
+    offset = 0
+    for timeframe, count in lengths:
+        columns[timeframe] = {}
+        for name in _FIELDS:
+            array = np.ndarray(
+                (count,),
+                dtype=np.int64 if name == "time_ns" else np.float64,
+                buffer=block.buf,
+                offset=offset,
+            )
+            array.flags.writeable = writeable
+            columns[timeframe][name] = array
+            offset += count * _ITEM_SIZE
+    return columns
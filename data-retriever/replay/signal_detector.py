@@ -6,7 +6,8 @@ then persists to the replay schema with idempotency checks.
 
 from __future__ import annotations
 
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Optional, List
 
 import pandas as pd
@@ -15,18 +16,31 @@ from models import AOIZone, TrendDirection
 from entry.pattern_finder import find_entry_pattern
 from entry.gates import check_all_gates
 from entry.scoring import calculate_score, ScoreResult
-from utils.indicators import calculate_atr
 
 from .market_state import SymbolState
 from .candle_store import CandleStore
+from .outcome_calculator import ReplayPendingSignal
+from .result_sink import ReplayResultSink
+from .signal_index import ReplaySignalIndex
+from .portfolio import PortfolioConstraints
 from .config import LOOKBACK_1H, SL_MODEL_VERSION, TP_MODEL_VERSION
-from .replay_queries import (
-    CHECK_SIGNAL_EXISTS,
-    GET_SIGNAL_ID,
-    GET_RELATED_SIGNAL_TRADE_ID,
-    INSERT_REPLAY_ENTRY_SIGNAL,
-)
-from .lightweight_htf_context import compute_lightweight_htf_context
+from .lightweight_htf_context import LightweightHTFContext, compute_lightweight_htf_context
+from .profiling import stage
+
+
+@dataclass
+class EntrySetup:
+    """Symbol-level inputs for gates, scoring and the AOI scan at one 1H close."""
+    
+    direction: TrendDirection
+    candles_1h: pd.DataFrame         # Last LOOKBACK_1H candles
+    signal_1h_index: int
+    signal_time: datetime
+    atr_1h: float
+    trend_snapshot: dict
+    trend_alignment: int
+    conflicted_tf: Optional[str]
+    htf_context: LightweightHTFContext
 
 
 class ReplaySignalDetector:
@@ -37,18 +51,29 @@ class ReplaySignalDetector:
     2. Gets tradable AOIs from current market state
     3. Finds entry patterns for each AOI
     4. Evaluates quality and computes SL/TP distances
-    5. Persists to replay schema (if not duplicate)
+    5. Queues new signals on the result sink (if not duplicate)
     """
     
-    def __init__(self, symbol: str, candle_store: CandleStore):
+    def __init__(
+        self,
+        symbol: str,
+        candle_store: CandleStore,
+        sink: ReplayResultSink,
+        signal_index: ReplaySignalIndex,
+        portfolio: Optional[PortfolioConstraints] = None,
+    ):
         self._symbol = symbol
         self._store = candle_store
+        self._sink = sink
+        self._index = signal_index
+        # Live trade limits across symbols (portfolio replay only)
+        self._portfolio = portfolio
     
     def detect_signals(
         self,
         current_time: datetime,
         state: SymbolState,
-    ) -> List[int]:
+    ) -> List[ReplayPendingSignal]:
         """Detect and store entry signals at current time.
         
         Uses production gates and scoring - symbols that don't pass gates
@@ -59,27 +84,97 @@ class ReplaySignalDetector:
             state: Current market state (trends + AOIs)
             
         Returns:
-            List of signal IDs that were inserted
+            List of inserted signals, ready to be queued for outcome tracking
         """
-        inserted_ids = []
+        inserted_signals = []
+        
+        with stage("signal_setup"):
+            setup = self.prepare_setup(current_time, state)
+        if setup is None:
+            return inserted_signals
+        htf_context = setup.htf_context
+        
+        with stage("gate_check"):
+            # Run production gates using entry module
+            gate_result = check_all_gates(
+                signal_time=setup.signal_time,
+                symbol=self._symbol,
+                direction=setup.direction,
+                conflicted_tf=setup.conflicted_tf,
+                htf_range_position_daily=htf_context.htf_range_position_daily,
+                htf_range_position_weekly=htf_context.htf_range_position_weekly,
+                distance_to_next_htf_obstacle_atr=htf_context.distance_to_next_htf_obstacle_atr,
+            )
+            
+            if not gate_result.passed:
+                # Symbol fails gates, skip all AOIs
+                return inserted_signals
+            
+            # Calculate score ONCE per symbol (using production scoring)
+            score_result = calculate_score(
+                direction=setup.direction,
+                htf_range_position_daily=htf_context.htf_range_position_daily,
+                htf_range_position_weekly=htf_context.htf_range_position_weekly,
+            )
+        
+        if not score_result.passed:
+            # Score too low, skip all AOIs
+            return inserted_signals
         
+        # Get tradable AOIs
+        tradable_aois = state.get_tradable_aois()
+        
+        # === AOI LOOP (only pattern finding and signal creation) ===
+        for aoi in tradable_aois:
+            with stage("pattern_scan"):
+                signal = self._scan_aoi_for_entry(
+                    candles_1h=setup.candles_1h,
+                    signal_1h_index=setup.signal_1h_index,
+                    aoi=aoi,
+                    direction=setup.direction,
+                    trend_snapshot=setup.trend_snapshot,
+                    trend_alignment=setup.trend_alignment,
+                    atr_1h=setup.atr_1h,
+                    conflicted_tf=setup.conflicted_tf,
+                    score_result=score_result,
+                )
+            if signal:
+                inserted_signals.append(signal)
+        
+        return inserted_signals
+    
+    def prepare_setup(
+        self,
+        current_time: datetime,
+        state: SymbolState,
+    ) -> Optional[EntrySetup]:
+        """Build the gate/scoring inputs for the current 1H close.
+        
+        Nothing here depends on gate or scoring thresholds, so a parameter
+        sweep computes it once per candle and shares it across configs.
+        
+        Returns:
+            EntrySetup, or None if there is no aligned trend, no 1H data,
+            no valid ATR or no HTF context
+        """
         # Get overall trend direction (with 2/3 TF support - not need to be consecutive)
         direction = self._get_replay_trend_direction(state)
         if direction is None:
-            return inserted_ids
+            return None
         
         # Get 1H candles for pattern detection
         candles_1h = self._store.get_1h_candles().get_candles_up_to(current_time)
         if candles_1h is None or candles_1h.empty:
-            return inserted_ids
+            return None
+        signal_1h_index = len(candles_1h) - 1
         
         # Limit to lookback
         candles_1h = candles_1h.tail(LOOKBACK_1H)
         
-        # Calculate 1H ATR
-        atr_1h = calculate_atr(candles_1h)
+        # 1H ATR over the same LOOKBACK_1H candles (feature column per store)
+        atr_1h = float(self._store.features.get("atr")[signal_1h_index])
         if atr_1h <= 0:
-            return inserted_ids
+            return None
         
         # Build trend snapshot
         trend_snapshot = {
@@ -98,66 +193,34 @@ class ReplaySignalDetector:
         signal_time = candles_1h.iloc[-1]["time"]
         
         # Compute lightweight HTF context for gate checks (fast)
-        htf_context = compute_lightweight_htf_context(
-            candle_store=self._store,
-            signal_time=signal_time,
-            entry_price=reference_price,
-            atr_1h=atr_1h,
-            direction=direction,
-        )
+        with stage("pre_entry_context"):
+            htf_context = compute_lightweight_htf_context(
+                candle_store=self._store,
+                signal_time=signal_time,
+                entry_price=reference_price,
+                atr_1h=atr_1h,
+                direction=direction,
+            )
         
         if htf_context is None:
-            return inserted_ids
+            return None
         
-        # Run production gates using entry module
-        gate_result = check_all_gates(
-            signal_time=signal_time,
-            symbol=self._symbol,
+        return EntrySetup(
             direction=direction,
+            candles_1h=candles_1h,
+            signal_1h_index=signal_1h_index,
+            signal_time=signal_time,
+            atr_1h=atr_1h,
+            trend_snapshot=trend_snapshot,
+            trend_alignment=trend_alignment,
             conflicted_tf=conflicted_tf,
-            htf_range_position_daily=htf_context.htf_range_position_daily,
-            htf_range_position_weekly=htf_context.htf_range_position_weekly,
-            distance_to_next_htf_obstacle_atr=htf_context.distance_to_next_htf_obstacle_atr,
-        )
-        
-        if not gate_result.passed:
-            # Symbol fails gates, skip all AOIs
-            return inserted_ids
-        
-        # Calculate score ONCE per symbol (using production scoring)
-        score_result = calculate_score(
-            direction=direction,
-            htf_range_position_daily=htf_context.htf_range_position_daily,
-            htf_range_position_weekly=htf_context.htf_range_position_weekly,
+            htf_context=htf_context,
         )
-        
-        if not score_result.passed:
-            # Score too low, skip all AOIs
-            return inserted_ids
-        
-        # Get tradable AOIs
-        tradable_aois = state.get_tradable_aois()
-        
-        # === AOI LOOP (only pattern finding and signal creation) ===
-        for aoi in tradable_aois:
-            signal_id = self._scan_aoi_for_entry(
-                candles_1h=candles_1h,
-                aoi=aoi,
-                direction=direction,
-                trend_snapshot=trend_snapshot,
-                trend_alignment=trend_alignment,
-                atr_1h=atr_1h,
-                conflicted_tf=conflicted_tf,
-                score_result=score_result,
-            )
-            if signal_id:
-                inserted_ids.append(signal_id)
-        
-        return inserted_ids
     
     def _scan_aoi_for_entry(
         self,
         candles_1h: pd.DataFrame,
+        signal_1h_index: int,
         aoi: AOIZone,
         direction: TrendDirection,
         trend_snapshot: dict,
@@ -165,7 +228,7 @@ class ReplaySignalDetector:
         atr_1h: float,
         conflicted_tf: Optional[str],
         score_result: ScoreResult,
-    ) -> Optional[int]:
+    ) -> Optional[ReplayPendingSignal]:
         """Scan a single AOI for entry pattern and store if found.
         
         Gates and scoring have already passed at symbol level.
@@ -195,14 +258,19 @@ class ReplaySignalDetector:
         if existing_signal_id:
             return None  # Signal already exists
         
+        # Portfolio replay: the live trade limits may block this trade
+        if self._portfolio is not None and not self._portfolio.admit(self._symbol, signal_time):
+            return None
+        
         # Compute minimal entry_signal fields (fast)
         retest_idx = 0  # First candle is retest
         max_retest_penetration_atr = self._compute_max_retest_penetration(
             pattern.candles, retest_idx, break_index, aoi, direction, atr_1h
         )
         bars_between_retest_and_break = break_index - retest_idx - 1 if break_index > retest_idx else 0
-        hour_of_day_utc = signal_time.hour
-        session_bucket = self._get_session_bucket(signal_time.hour)
+        # The pattern ends on the signal candle
+        hour_of_day_utc = int(self._store.features.get("hour_utc")[signal_1h_index])
+        session_bucket = self._store.features.get("session_bucket")[signal_1h_index]
         
         # Generate trade_id
         trade_id = self._get_or_generate_trade_id(signal_time)
@@ -226,33 +294,31 @@ class ReplaySignalDetector:
             bars_between_retest_and_break=bars_between_retest_and_break,
             hour_of_day_utc=hour_of_day_utc,
             session_bucket=session_bucket,
-            aoi_touch_count_since_creation=0,  # Skip expensive computation
+            aoi_touch_count_since_creation=0,  # AOIZone has no creation time to count from
             trade_id=trade_id,
         )
+        if not signal_id:
+            return None
         
-        return signal_id
+        return ReplayPendingSignal(
+            id=signal_id,
+            symbol=self._symbol,
+            signal_time=signal_time,
+            direction=direction.value,
+            entry_price=float(entry_price),
+            atr_1h=float(atr_1h),
+            aoi_low=float(aoi.lower),
+            aoi_high=float(aoi.upper),
+            signal_1h_index=signal_1h_index,
+        )
     
     def _signal_exists(self, signal_time: datetime) -> bool:
         """Check if a signal already exists for this symbol/time."""
-        from database.executor import DBExecutor
-        
-        row = DBExecutor.fetch_one(
-            CHECK_SIGNAL_EXISTS,
-            (self._symbol, signal_time, SL_MODEL_VERSION, TP_MODEL_VERSION),
-            context="check_signal_exists",
-        )
-        return row and row[0]
+        return self._index.get_signal_id(signal_time) is not None
     
     def _get_existing_signal_id(self, signal_time: datetime) -> Optional[int]:
         """Get the ID of an existing signal, or None if it doesn't exist."""
-        from database.executor import DBExecutor
-        
-        row = DBExecutor.fetch_one(
-            GET_SIGNAL_ID,
-            (self._symbol, signal_time, SL_MODEL_VERSION, TP_MODEL_VERSION),
-            context="get_existing_signal_id",
-        )
-        return row[0] if row else None
+        return self._index.get_signal_id(signal_time)
     
     def _store_signal(
         self,
@@ -276,56 +342,47 @@ class ReplaySignalDetector:
         aoi_touch_count_since_creation: Optional[int],
         trade_id: str,
     ) -> Optional[int]:
-        """Persist signal to replay schema with new column structure."""
-        from database.executor import DBExecutor
+        """Queue signal for the replay schema and return its reserved id."""
         from database.validation import DBValidator
         
         normalized_symbol = DBValidator.validate_symbol(self._symbol)
         if not normalized_symbol:
             return None
         
-        def _persist(cursor):
-            # Insert main entry signal with new schema
-            cursor.execute(
-                INSERT_REPLAY_ENTRY_SIGNAL,
-                (
-                    normalized_symbol,
-                    signal_time,
-                    direction.value,
-                    self._get_trend_value(trend_snapshot, "4H"),
-                    self._get_trend_value(trend_snapshot, "1D"),
-                    self._get_trend_value(trend_snapshot, "1W"),
-                    trend_alignment,
-                    aoi.timeframe or "",
-                    aoi.lower,
-                    aoi.upper,
-                    aoi.classification or "",
-                    entry_price,
-                    atr_1h,
-                    final_score,
-                    tier,
-                    is_break_candle_last,
-                    # Model versions
-                    sl_model_version,
-                    tp_model_version,
-                    # Conflicted TF
-                    conflicted_tf,
-                    # Entry metrics
-                    max_retest_penetration_atr,
-                    bars_between_retest_and_break,
-                    hour_of_day_utc,
-                    session_bucket,
-                    aoi_touch_count_since_creation,
-                    trade_id,
-                ),
-            )
-            signal_id = cursor.fetchone()[0]
-            
-            # Stage scores no longer computed (quality system deprecated)
-            
-            return signal_id
-        
-        return DBExecutor.execute_transaction(_persist, context="store_replay_signal")
+        signal_id = self._sink.add_signal(
+            (
+                normalized_symbol,
+                signal_time,
+                direction.value,
+                self._get_trend_value(trend_snapshot, "4H"),
+                self._get_trend_value(trend_snapshot, "1D"),
+                self._get_trend_value(trend_snapshot, "1W"),
+                trend_alignment,
+                aoi.timeframe or "",
+                aoi.lower,
+                aoi.upper,
+                aoi.classification or "",
+                entry_price,
+                atr_1h,
+                final_score,
+                tier,
+                is_break_candle_last,
+                # Model versions
+                sl_model_version,
+                tp_model_version,
+                # Conflicted TF
+                conflicted_tf,
+                # Entry metrics
+                max_retest_penetration_atr,
+                bars_between_retest_and_break,
+                hour_of_day_utc,
+                session_bucket,
+                aoi_touch_count_since_creation,
+                trade_id,
+            ),
+        )
+        self._index.add(signal_time, signal_id, trade_id)
+        return signal_id
     
     def _get_trend_value(self, snapshot: dict, timeframe: str) -> str:
         """Get trend value as string."""
@@ -555,59 +612,16 @@ class ReplaySignalDetector:
         
         return max_penetration / atr_1h if max_penetration > 0 else 0.0
     
-    def _get_session_bucket(self, hour: int) -> str:
-        """Get session bucket from UTC hour."""
-        if 4 <= hour <= 6:
-            return "pre_london"
-        elif 7 <= hour <= 11:
-            return "london"
-        elif 12 <= hour <= 16:
-            return "ny"
-        else:
-            return "post_ny"
-    
-    def _compute_aoi_touch_count(self, aoi: AOIZone, signal_time: datetime) -> Optional[int]:
-        """Count AOI touches since creation on AOI's timeframe."""
-        timeframe = aoi.timeframe
-        if not timeframe:
-            return None
-        
-        # Get appropriate candles for AOI's timeframe
-        if timeframe == "4H":
-            tf_candles = self._store.get_4h_candles().get_candles_up_to(signal_time)
-        elif timeframe == "1D":
-            tf_candles = self._store.get_1d_candles().get_candles_up_to(signal_time)
-        else:
-            return None
-        
-        if tf_candles is None or tf_candles.empty:
-            return None
-        
-        # Count candles that overlap AOI
-        touch_count = 0
-        for _, row in tf_candles.iterrows():
-            if row["high"] >= aoi.lower and row["low"] <= aoi.upper:
-                touch_count += 1
-        
-        return touch_count
-    
     def _get_or_generate_trade_id(self, signal_time: datetime) -> str:
         """Get existing trade_id from a related signal 1 hour ago, or generate new one.
         
         Groups break + after-break signals together with the same trade_id.
         Format: {symbol}_{timestamp} where timestamp is the first signal's time.
         """
-        from database.executor import DBExecutor
-        
         # Check if there's a signal from 1 hour ago with a trade_id
-        row = DBExecutor.fetch_one(
-            GET_RELATED_SIGNAL_TRADE_ID,
-            (self._symbol, signal_time),
-            context="get_related_trade_id",
-        )
-        
-        if row and row[0]:
-            return row[0]  # Use existing trade_id
+        trade_id = self._index.get_trade_id(signal_time - timedelta(hours=1))
+        if trade_id:
+            return trade_id  # Use existing trade_id
         
         # Generate new trade_id: symbol_timestamp
         timestamp_str = signal_time.strftime("%Y%m%d_%H%M")
@@ -0,0 +1,85 @@
+"""In-memory index of replay signals for one symbol.
+
+Answers the detector's duplicate check and "signal 1 hour ago" trade_id
+grouping with dictionary lookups instead of a SELECT per candidate. The
+index is seeded once from the replay schema and updated as new signals are
+queued on the result sink, so it also covers rows not yet flushed.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+from .config import SL_MODEL_VERSION, TP_MODEL_VERSION
+from .replay_queries import FETCH_REPLAY_SIGNAL_INDEX
+
+
+def _time_key(signal_time: datetime) -> pd.Timestamp:
+    """Normalize a signal time for dictionary lookups (naive = UTC)."""
+    ts = pd.Timestamp(signal_time)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class ReplaySignalIndex:
+    """signal_time -> (signal id, trade_id) for a single symbol."""
+
+    def __init__(self, symbol: str):
+        self._symbol = symbol
+        # Signals of the current SL/TP model versions (duplicate check)
+        self._signal_ids: dict[pd.Timestamp, int] = {}
+        # trade_ids of any model version (matches GET_RELATED_SIGNAL_TRADE_ID)
+        self._trade_ids: dict[pd.Timestamp, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._signal_ids)
+
+    def load(self, start_date: datetime, end_date: datetime) -> int:
+        """Seed the index with signals already stored for the replay window.
+
+        Includes the hour before start_date so the first signal of the window
+        can still join a trade started just before it.
+
+        Returns:
+            Number of existing signals loaded
+        """
+        from database.executor import DBExecutor
+
+        rows = DBExecutor.fetch_all(
+            FETCH_REPLAY_SIGNAL_INDEX,
+            params=(
+                SL_MODEL_VERSION,
+                TP_MODEL_VERSION,
+                self._symbol,
+                start_date - timedelta(hours=1),
+                end_date,
+            ),
+            context="load_replay_signal_index",
+        )
+
+        loaded = 0
+        for signal_time, signal_id, trade_id, current_models in rows:
+            key = _time_key(signal_time)
+            if current_models and key not in self._signal_ids:
+                self._signal_ids[key] = signal_id
+                loaded += 1
+            if trade_id and key not in self._trade_ids:
+                self._trade_ids[key] = trade_id
+        return loaded
+
+    def add(self, signal_time: datetime, signal_id: int, trade_id: Optional[str]) -> None:
+        """Record a newly queued signal."""
+        key = _time_key(signal_time)
+        self._signal_ids.setdefault(key, signal_id)
+        if trade_id:
+            self._trade_ids.setdefault(key, trade_id)
+
+    def get_signal_id(self, signal_time: datetime) -> Optional[int]:
+        """Return the id of a current-model signal at this time, if any."""
+        return self._signal_ids.get(_time_key(signal_time))
+
+    def get_trade_id(self, signal_time: datetime) -> Optional[str]:
+        """Return the trade_id of any signal at this time, if any."""
+        return self._trade_ids.get(_time_key(signal_time))
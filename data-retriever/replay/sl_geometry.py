@@ -140,6 +140,21 @@ class SLGeometryCalculator:
         }
 
 
+def sl_geometry_params(signal_id: int, data: SLGeometryData) -> tuple:
+    """Build the INSERT parameter tuple for an SL geometry row."""
+    return (
+        signal_id,
+        data.direction,
+        data.aoi_far_edge_atr,
+        data.aoi_near_edge_atr,
+        data.aoi_height_atr,
+        data.aoi_age_bars,
+        data.signal_candle_opposite_extreme_atr,
+        data.signal_candle_range_atr,
+        data.signal_candle_body_atr,
+    )
+
+
 def persist_sl_geometry(signal_id: int, data: SLGeometryData) -> None:
     """Persist SL geometry to database."""
     from database.executor import DBExecutor
@@ -147,16 +162,6 @@ def persist_sl_geometry(signal_id: int, data: SLGeometryData) -> None:
     
     DBExecutor.execute_non_query(
         INSERT_ENTRY_SL_GEOMETRY,
-        (
-            signal_id,
-            data.direction,
-            data.aoi_far_edge_atr,
-            data.aoi_near_edge_atr,
-            data.aoi_height_atr,
-            data.aoi_age_bars,
-            data.signal_candle_opposite_extreme_atr,
-            data.signal_candle_range_atr,
-            data.signal_candle_body_atr,
-        ),
+        sl_geometry_params(signal_id, data),
         context="persist_sl_geometry",
     )
@@ -0,0 +1,510 @@
+"""Parameter sweep for the replay engine.
+
+Tuning gate thresholds, the score threshold, SL models or R multiples used to
+mean editing the config and rerunning the whole replay, which re-fetches
+candles and recomputes trends/AOIs each time. None of those depend on the
+swept parameters, so a sweep:
+
+1. Loads each symbol's CandleStore once for the whole window
+2. Walks the MarketStateManager timeline once
+3. At each 1H close, builds the symbol-level setup and finds the entry
+   pattern once, then evaluates gates, scoring and exit simulation for
+   every configuration
+
+Results are written to sweep_result, tagged with the configuration's id.
+
+With workers > 1 the symbols are split across worker processes. Each
+worker walks its symbol once for all configs, so no candle is replayed
+twice.
+
+Usage:
+    python -m replay.runner --sweep sweep_grid.json --symbols EURUSD
+
+The grid file is either an object mapping SweepConfig fields to lists of
+values (the cartesian product is swept) or a list of override objects:
+
+    {"min_total_score": [4.0, 4.5], "rr_multiples": [[2], [2, 2.5, 3]]}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, timedelta
+from typing import Any, Iterable, List, Optional, Tuple
+
+from models import AOIZone, TrendDirection
+from entry.gates import GateThresholds, check_all_gates
+from entry.gates.config import MIN_TOTAL_SCORE
+from entry.scoring import calculate_score
+from logger import get_logger
+
+from .config import (
+    REPLAY_SYMBOLS,
+    REPLAY_START_DATE,
+    REPLAY_END_DATE,
+    REPLAY_WORKERS,
+    OUTCOME_WINDOW_BARS,
+    SL_MODELS,
+    RR_MULTIPLES,
+)
+from .signal_detector import EntrySetup
+from .exit_simulator import ExitSimulationRow
+
+logger = get_logger(__name__)
+
+_PRODUCTION_GATES = GateThresholds()
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """One point of the sweep grid.
+
+    Defaults are the production values, so SweepConfig() reproduces the
+    regular replay's gates, scoring and exit simulation.
+    """
+
+    config_id: str = "default"
+
+    # Exit simulation
+    sl_models: Tuple[str, ...] = tuple(SL_MODELS)
+    rr_multiples: Tuple[float, ...] = tuple(RR_MULTIPLES)
+
+    # Gates (see entry/gates/config.py)
+    excluded_conflicted_tf: Optional[str] = _PRODUCTION_GATES.excluded_conflicted_tf
+    max_bullish_daily_position: float = _PRODUCTION_GATES.max_bullish_daily_position
+    max_bullish_weekly_position: float = _PRODUCTION_GATES.max_bullish_weekly_position
+    min_bearish_daily_position: float = _PRODUCTION_GATES.min_bearish_daily_position
+    min_bearish_weekly_position: float = _PRODUCTION_GATES.min_bearish_weekly_position
+    min_obstacle_distance_atr: float = _PRODUCTION_GATES.min_obstacle_distance_atr
+
+    # Scoring
+    min_total_score: float = MIN_TOTAL_SCORE
+
+    def params(self) -> dict[str, Any]:
+        """Swept parameter values (JSON-serializable, without config_id)."""
+        values = asdict(self)
+        values.pop("config_id")
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in values.items()
+        }
+
+    def gate_thresholds(self) -> GateThresholds:
+        """This config's thresholds for the production gates."""
+        return GateThresholds(**{
+            f.name: getattr(self, f.name) for f in fields(GateThresholds)
+        })
+
+    def passes_gates(self, setup: EntrySetup, symbol: str = "") -> bool:
+        """Production gates (entry/gates) with this config's thresholds."""
+        htf = setup.htf_context
+        result = check_all_gates(
+            signal_time=setup.signal_time,
+            symbol=symbol,
+            direction=setup.direction,
+            conflicted_tf=setup.conflicted_tf,
+            htf_range_position_daily=htf.htf_range_position_daily,
+            htf_range_position_weekly=htf.htf_range_position_weekly,
+            distance_to_next_htf_obstacle_atr=htf.distance_to_next_htf_obstacle_atr,
+            thresholds=self.gate_thresholds(),
+        )
+        return result.passed
+
+    def score(self, setup: EntrySetup) -> Optional[float]:
+        """Production total score, or None if below this config's threshold."""
+        result = calculate_score(
+            setup.direction,
+            setup.htf_context.htf_range_position_daily,
+            setup.htf_context.htf_range_position_weekly,
+            min_total_score=self.min_total_score,
+        )
+        return result.total_score if result.passed else None
+
+
+SWEEP_PARAMETERS: Tuple[str, ...] = tuple(
+    f.name for f in fields(SweepConfig) if f.name != "config_id"
+)
+
+
+def make_config_id(config: SweepConfig) -> str:
+    """Stable id derived from the parameter values (same grid -> same ids)."""
+    payload = json.dumps(config.params(), sort_keys=True)
+    return "cfg_" + hashlib.sha1(payload.encode()).hexdigest()[:10]
+
+
+def build_sweep_configs(grid: dict[str, Iterable]) -> List[SweepConfig]:
+    """Expand a {parameter: [values]} grid into configs (cartesian product).
+
+    Parameters not in the grid keep their production defaults. Identical
+    combinations are returned once.
+
+    Raises:
+        ValueError: If the grid names an unknown parameter
+    """
+    unknown = set(grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(
+            f"Unknown sweep parameter(s): {', '.join(sorted(unknown))} "
+            f"(expected any of: {', '.join(SWEEP_PARAMETERS)})"
+        )
+
+    names = list(grid)
+    configs: dict[str, SweepConfig] = {}
+    for values in itertools.product(*(list(grid[name]) for name in names)):
+        overrides = {
+            name: tuple(value) if isinstance(value, list) else value
+            for name, value in zip(names, values)
+        }
+        config = SweepConfig(**overrides)
+        config = replace(config, config_id=make_config_id(config))
+        configs.setdefault(config.config_id, config)
+    return list(configs.values())
+
+
+def load_sweep_configs(path: str) -> List[SweepConfig]:
+    """Read a sweep grid file (see module docstring for the format)."""
+    with open(path, "r", encoding="utf-8") as handle:
+        spec = json.load(handle)
+
+    if isinstance(spec, dict):
+        return build_sweep_configs(spec)
+
+    configs: dict[str, SweepConfig] = {}
+    for overrides in spec:
+        for config in build_sweep_configs({name: [value] for name, value in overrides.items()}):
+            configs.setdefault(config.config_id, config)
+    return list(configs.values())
+
+
+@dataclass
+class SweepSignal:
+    """A config-independent entry candidate at one 1H close."""
+
+    symbol: str
+    signal_time: datetime
+    direction: TrendDirection
+    aoi: AOIZone
+    entry_price: float
+    atr_1h: float
+    conflicted_tf: Optional[str]
+
+
+def sweep_result_params(
+    config_id: str,
+    signal: SweepSignal,
+    final_score: float,
+    trade_id: str,
+    rows: List[ExitSimulationRow],
+) -> List[tuple]:
+    """Build INSERT parameter tuples for sweep_result rows."""
+    return [
+        (
+            config_id,
+            signal.symbol,
+            signal.signal_time,
+            signal.direction.value,
+            signal.aoi.timeframe or "",
+            signal.aoi.lower,
+            signal.aoi.upper,
+            signal.entry_price,
+            signal.atr_1h,
+            final_score,
+            signal.conflicted_tf,
+            trade_id,
+            row.sl_model,
+            row.rr_multiple,
+            row.sl_atr,
+            row.tp_atr,
+            row.exit_reason,
+            row.exit_bar,
+            row.return_atr,
+            row.return_r,
+            row.mfe_atr,
+            row.mae_atr,
+            row.bars_to_sl_hit,
+            row.bars_to_tp_hit,
+            row.is_bad_pre48,
+        )
+        for row in rows
+    ]
+
+
+def run_sweep(
+    configs: List[SweepConfig],
+    symbols: Optional[List[str]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    workers: Optional[int] = None,
+):
+    """Replay every symbol once and evaluate all configs along the way.
+
+    Args:
+        configs: Configurations to evaluate (see build_sweep_configs)
+        symbols: List of forex symbols (default: REPLAY_SYMBOLS)
+        start_date: Replay start date (default: REPLAY_START_DATE)
+        end_date: Replay end date (default: REPLAY_END_DATE)
+        workers: Worker processes to split the symbols across (default: REPLAY_WORKERS)
+
+    Returns:
+        ReplayStats; signals/outcomes are counted per config
+    """
+    from .runner import ReplayStats
+
+    symbols = symbols or REPLAY_SYMBOLS
+    start_date = start_date or REPLAY_START_DATE
+    end_date = end_date or REPLAY_END_DATE
+    workers = max(1, min(workers or REPLAY_WORKERS, len(symbols)))
+
+    stats = ReplayStats()
+
+    logger.info("\n" + "=" * 60)
+    logger.info("🧪 REPLAY PARAMETER SWEEP - Starting")
+    logger.info("=" * 60)
+    logger.info(f"  Configs: {len(configs)}")
+    logger.info(f"  Symbols: {', '.join(symbols)}")
+    logger.info(f"  Window: {start_date.isoformat()} to {end_date.isoformat()}")
+    if workers > 1:
+        logger.info(f"  Workers: {workers} processes, one symbol each at a time")
+    logger.info("=" * 60 + "\n")
+
+    try:
+        _register_configs(configs)
+    except Exception as e:
+        logger.error(f"  ❌ Failed to register sweep configs: {e}")
+        stats.errors += 1
+        return stats
+
+    if workers > 1:
+        stats.merge(_sweep_in_pool(symbols, start_date, end_date, configs, workers))
+    else:
+        for symbol in symbols:
+            stats.merge(_sweep_symbol(symbol, start_date, end_date, configs))
+
+    logger.info("\n" + "=" * 60)
+    logger.info("✅ SWEEP COMPLETE")
+    logger.info(f"  {stats.summary()}")
+    logger.info("=" * 60 + "\n")
+
+    return stats
+
+
+def _register_configs(configs: List[SweepConfig]) -> None:
+    """Store each config's parameters so results can be joined back to them."""
+    from database.executor import DBExecutor
+    from .replay_queries import UPSERT_SWEEP_CONFIG
+
+    for config in configs:
+        DBExecutor.execute_non_query(
+            UPSERT_SWEEP_CONFIG,
+            (config.config_id, json.dumps(config.params(), sort_keys=True)),
+            context="register_sweep_config",
+        )
+
+
+def _sweep_in_pool(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    configs: List[SweepConfig],
+    workers: int,
+):
+    """Sweep symbols in parallel, one worker process per symbol at a time.
+
+    Every worker evaluates all configs along its single walk of the
+    symbol's window. A crashed worker counts as one error for its symbol.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from .runner import ReplayStats, _init_replay_worker
+
+    stats = ReplayStats()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker) as executor:
+        futures = {
+            executor.submit(_sweep_symbol, symbol, start_date, end_date, configs): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                stats.merge(future.result())
+            except Exception as e:
+                logger.error(f"  ❌ Sweep worker for {symbol} crashed: {e}")
+                stats.errors += 1
+
+    return stats
+
+
+def _sweep_symbol(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    configs: List[SweepConfig],
+):
+    """Walk one symbol's replay window once, evaluating every config."""
+    from .runner import ReplayStats, _flush_sink
+    from .candle_store import load_symbol_candles
+    from .timeframe_alignment import TimeframeAligner
+    from .market_state import MarketStateManager
+    from .result_sink import ReplayResultSink
+    from .signal_index import ReplaySignalIndex
+    from .signal_detector import ReplaySignalDetector
+
+    stats = ReplayStats()
+
+    logger.info(f"\n--- 🧪 Sweeping {symbol} ---")
+    try:
+        candle_store = load_symbol_candles(symbol, start_date, end_date)
+        logger.info(f"  ✅ Loaded: {candle_store.summary()}")
+    except Exception as e:
+        logger.error(f"  ❌ Failed to load candles: {e}")
+        stats.errors += 1
+        return stats
+
+    aligner = TimeframeAligner(candle_store)
+    state_manager = MarketStateManager(symbol, candle_store, aligner)
+    sink = ReplayResultSink()
+    # Only prepare_setup is used; nothing is queued through the detector
+    detector = ReplaySignalDetector(symbol, candle_store, sink, ReplaySignalIndex(symbol))
+
+    # Last (signal_time, trade_id) per config, for break + after-break grouping
+    last_trade: dict[str, tuple[datetime, str]] = {}
+
+    for candle_idx in candle_store.get_replay_1h_indices(start_date, end_date):
+        try:
+            candle = candle_store.get_1h_candles().get_candle_at_index(candle_idx)
+            if candle is None:
+                continue
+            current_time = candle["time"]
+            state_manager.update_state(current_time, candle_idx)
+            stats.candles_processed += 1
+
+            setup = detector.prepare_setup(current_time, state_manager.state)
+            if setup is None:
+                continue
+
+            passing = []
+            for config in configs:
+                if not config.passes_gates(setup, symbol):
+                    continue
+                final_score = config.score(setup)
+                if final_score is not None:
+                    passing.append((config, final_score))
+            if not passing:
+                continue
+
+            signal = _find_entry(symbol, setup, state_manager.state.get_tradable_aois())
+            if signal is None:
+                continue
+
+            exit_inputs = _compute_exit_inputs(candle_store, setup, signal)
+            if exit_inputs is None:
+                continue
+            geometry, path_rows = exit_inputs
+
+            for config, final_score in passing:
+                trade_id = _trade_id(last_trade, config.config_id, signal)
+                sim_rows = _simulate_exits(geometry, path_rows, config)
+                sink.add_sweep_results(
+                    sweep_result_params(config.config_id, signal, final_score, trade_id, sim_rows)
+                )
+                stats.signals_inserted += 1
+                if sim_rows:
+                    stats.outcomes_computed += 1
+
+        except Exception as e:
+            logger.error(f"    ❌ Error at candle {candle_idx}: {e}")
+            stats.errors += 1
+
+    _flush_sink(sink, stats)
+    logger.info(f"  ✅ {symbol} complete: {stats.summary()}")
+    return stats
+
+
+def _find_entry(
+    symbol: str,
+    setup: EntrySetup,
+    tradable_aois: List[AOIZone],
+) -> Optional[SweepSignal]:
+    """First tradable AOI with an entry pattern, as the regular replay keeps it.
+
+    The replay stores one signal per symbol and signal time, so later AOIs
+    with a pattern on the same candle are dropped as duplicates.
+    """
+    from entry.pattern_finder import find_entry_pattern
+
+    for aoi in tradable_aois:
+        pattern = find_entry_pattern(setup.candles_1h, aoi, setup.direction)
+        if pattern:
+            return SweepSignal(
+                symbol=symbol,
+                signal_time=pattern.candles[-1].time,
+                direction=setup.direction,
+                aoi=aoi,
+                entry_price=float(pattern.candles[-1].close),
+                atr_1h=float(setup.atr_1h),
+                conflicted_tf=setup.conflicted_tf,
+            )
+    return None
+
+
+def _compute_exit_inputs(candle_store, setup: EntrySetup, signal: SweepSignal):
+    """SL geometry and path extremes for a signal (shared by all configs).
+
+    Returns:
+        (geometry, path_rows), or None without a full outcome window
+    """
+    from .path_extremes import PathExtremesCalculator
+    from .sl_geometry import SLGeometryCalculator
+
+    path_rows = PathExtremesCalculator(
+        candle_store=candle_store,
+        entry_candle_idx=setup.signal_1h_index,
+        entry_price=signal.entry_price,
+        atr_at_entry=signal.atr_1h,
+        direction=signal.direction,
+    ).compute()
+    if len(path_rows) < OUTCOME_WINDOW_BARS:
+        return None
+
+    geometry = SLGeometryCalculator(
+        entry_price=signal.entry_price,
+        atr_at_entry=signal.atr_1h,
+        direction=signal.direction,
+        aoi_low=float(signal.aoi.lower),
+        aoi_high=float(signal.aoi.upper),
+        signal_candle=candle_store.features.candle_at(setup.signal_1h_index),
+        signal_time=signal.signal_time,
+    ).compute()
+    if geometry is None:
+        return None
+
+    return geometry, path_rows
+
+
+def _simulate_exits(geometry, path_rows, config: SweepConfig) -> List[ExitSimulationRow]:
+    from .exit_simulator import ExitSimulator
+
+    return ExitSimulator(
+        geometry=geometry,
+        path_extremes=path_rows,
+        sl_models=config.sl_models,
+        rr_multiples=config.rr_multiples,
+    ).simulate_all()
+
+
+def _trade_id(
+    last_trade: dict[str, tuple[datetime, str]],
+    config_id: str,
+    signal: SweepSignal,
+) -> str:
+    """Reuse the trade_id of this config's signal one hour earlier, else start one."""
+    previous = last_trade.get(config_id)
+    if previous and previous[0] == signal.signal_time - timedelta(hours=1):
+        trade_id = previous[1]
+    else:
+        trade_id = f"{signal.symbol}_{signal.signal_time.strftime('%Y%m%d_%H%M')}"
+    last_trade[config_id] = (signal.signal_time, trade_id)
+    return trade_id
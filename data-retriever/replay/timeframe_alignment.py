@@ -11,6 +11,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+import numpy as np
+
 from .candle_store import CandleStore
 from .config import (
     TIMEFRAME_4H,
@@ -18,6 +20,8 @@ from .config import (
     TIMEFRAME_1W,
 )
 
+HIGHER_TIMEFRAMES = (TIMEFRAME_4H, TIMEFRAME_1D, TIMEFRAME_1W)
+
 
 @dataclass
 class TimeframeCloseState:
@@ -49,12 +53,47 @@ class TimeframeAligner:
     2. Whether any higher timeframe has a NEW close since last check
     
     This ensures trend/AOI calculations only use data available at each moment.
+    
+    Since all candles are preloaded, the last closed 4H/1D/1W index for every
+    1H candle is computed once (the close schedule) and looked up per step.
     """
     
     def __init__(self, candle_store: CandleStore):
         self._store = candle_store
         self._prev_state = TimeframeCloseState()
         self._current_state = TimeframeCloseState()
+        self._schedule: Optional[dict[str, np.ndarray]] = None
+    
+    def get_close_schedule(self) -> dict[str, np.ndarray]:
+        """Map each 1H index to the last closed index of every higher timeframe.
+        
+        Returns:
+            {timeframe: int64 array aligned with the 1H candles}, where -1
+            means no candle of that timeframe has closed yet.
+        """
+        if self._schedule is None:
+            hour_times = self._store.get_1h_candles().time_ns
+            self._schedule = {
+                timeframe: np.searchsorted(
+                    self._store.get(timeframe).time_ns, hour_times, side="right"
+                ).astype(np.int64) - 1
+                for timeframe in HIGHER_TIMEFRAMES
+            }
+        return self._schedule
+    
+    def get_recompute_indices(self, timeframe: str) -> np.ndarray:
+        """Return every 1H index at which `timeframe` has a new close.
+        
+        Matches detect_new_closes_at when the 1H candles are stepped through
+        in order from index 0.
+        """
+        schedule = self.get_close_schedule()[timeframe]
+        if len(schedule) == 0:
+            return np.empty(0, dtype=np.int64)
+        changed = np.flatnonzero(schedule[1:] > schedule[:-1]) + 1
+        if schedule[0] >= 0:
+            changed = np.concatenate(([0], changed))
+        return changed
     
     def get_last_closed_index(self, timeframe: str, as_of_time: datetime) -> Optional[int]:
         """Return index of last closed candle for a timeframe.
@@ -70,6 +109,15 @@ class TimeframeAligner:
         candles = self._store.get(timeframe)
         return candles.get_last_closed_index(as_of_time)
     
+    def get_last_closed_index_at(self, timeframe: str, index_1h: int) -> Optional[int]:
+        """Return index of last closed candle for a timeframe at a 1H index.
+        
+        Same result as get_last_closed_index() with the 1H candle's time,
+        read from the precomputed close schedule.
+        """
+        idx = int(self.get_close_schedule()[timeframe][index_1h])
+        return idx if idx >= 0 else None
+    
     def detect_new_closes(self, as_of_time: datetime) -> NewCloseFlags:
         """Detect which higher timeframes have NEW closes at this time.
         
@@ -83,10 +131,37 @@ class TimeframeAligner:
             NewCloseFlags with True for each TF that has a new close
         """
         # Get current closed indices for each higher timeframe
-        idx_4h = self.get_last_closed_index(TIMEFRAME_4H, as_of_time)
-        idx_1d = self.get_last_closed_index(TIMEFRAME_1D, as_of_time)
-        idx_1w = self.get_last_closed_index(TIMEFRAME_1W, as_of_time)
+        return self._advance(
+            self.get_last_closed_index(TIMEFRAME_4H, as_of_time),
+            self.get_last_closed_index(TIMEFRAME_1D, as_of_time),
+            self.get_last_closed_index(TIMEFRAME_1W, as_of_time),
+        )
+    
+    def detect_new_closes_at(self, index_1h: int) -> NewCloseFlags:
+        """Detect which higher timeframes have NEW closes at a 1H index.
+        
+        Equivalent to detect_new_closes() with the 1H candle's time, using
+        the close schedule instead of searching each timeframe.
         
+        Args:
+            index_1h: Index of the current 1H candle in the candle store
+            
+        Returns:
+            NewCloseFlags with True for each TF that has a new close
+        """
+        return self._advance(
+            self.get_last_closed_index_at(TIMEFRAME_4H, index_1h),
+            self.get_last_closed_index_at(TIMEFRAME_1D, index_1h),
+            self.get_last_closed_index_at(TIMEFRAME_1W, index_1h),
+        )
+    
+    def _advance(
+        self,
+        idx_4h: Optional[int],
+        idx_1d: Optional[int],
+        idx_1w: Optional[int],
+    ) -> NewCloseFlags:
+        """Record the current closed indices and flag the ones that moved."""
         # Compare against previous state
         flags = NewCloseFlags(
             new_4h=self._is_new_close(idx_4h, self._prev_state.idx_4h),
@@ -125,6 +200,39 @@ class TimeframeAligner:
         """Reset aligner state for a new replay run."""
         self._prev_state = TimeframeCloseState()
         self._current_state = TimeframeCloseState()
+    
+    def snapshot_closes(self) -> dict[str, Optional[int]]:
+        """Open times (epoch ns) of the last seen close per timeframe.
+        
+        Times rather than indices, so a checkpoint stays valid if the
+        candles are reloaded with a different history length.
+        """
+        indices = {
+            TIMEFRAME_4H: self._prev_state.idx_4h,
+            TIMEFRAME_1D: self._prev_state.idx_1d,
+            TIMEFRAME_1W: self._prev_state.idx_1w,
+        }
+        return {
+            timeframe: None if idx is None else int(self._store.get(timeframe).time_ns[idx])
+            for timeframe, idx in indices.items()
+        }
+    
+    def restore_closes(self, closes: dict[str, Optional[int]]) -> None:
+        """Restore the last seen closes from snapshot_closes()."""
+        indices = {}
+        for timeframe in HIGHER_TIMEFRAMES:
+            time_ns = closes.get(timeframe)
+            if time_ns is None:
+                indices[timeframe] = None
+            else:
+                count = int(np.searchsorted(self._store.get(timeframe).time_ns, time_ns, side="right"))
+                indices[timeframe] = count - 1 if count > 0 else None
+        self._prev_state = TimeframeCloseState(
+            idx_4h=indices[TIMEFRAME_4H],
+            idx_1d=indices[TIMEFRAME_1D],
+            idx_1w=indices[TIMEFRAME_1W],
+        )
+        self._current_state = self._prev_state
 
 
 def is_4h_boundary(dt: datetime) -> bool:
@@ -8,7 +8,7 @@ from logger import get_logger
 
 logger = get_logger(__name__)
 from configuration.forex_config import TIMEFRAMES
-from externals.data_fetcher import fetch_data
+from externals.data_fetcher import fetch_candle_columns
 
 from .constants import CANDLE_FETCH_BUFFER, OUTCOME_WINDOW_BARS, TIMEFRAME_1H
 
@@ -33,14 +33,14 @@ def fetch_candles_after_signal(
         logger.error(f"  ❌ {TIMEFRAME_1H} timeframe not configured")
         return None
     
-    df = fetch_data(
+    candles = fetch_candle_columns(
         symbol,
         broker_timeframe,
         lookback=lookback,
         timeframe_label=TIMEFRAME_1H,
     )
     
-    if df is None or df.empty:
+    if candles is None or candles.empty:
         return None
     
     # Normalize signal_time to UTC
@@ -52,10 +52,10 @@ def fetch_candles_after_signal(
     
     # Filter to candles AFTER signal_time
     # A candle's 'time' represents its open time
-    future_candles = df[df["time"] > signal_time_utc].copy()
+    future_candles = candles.after(signal_time_utc)
     
     if len(future_candles) < OUTCOME_WINDOW_BARS:
         return None
     
     # Return exactly OUTCOME_WINDOW_BARS candles
-    return future_candles.head(OUTCOME_WINDOW_BARS)
+    return future_candles.head(OUTCOME_WINDOW_BARS).to_frame()
@@ -0,0 +1,51 @@
+"""Benchmark AOI zone candidate search against the original cubic version.
+
+Usage:
+    python tests/benchmark_aoi_candidates.py
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aoi.pipeline import _find_zone_candidates
+from test_aoi_pipeline import make_context, random_swings, reference_find_zone_candidates
+
+SWING_COUNTS = (50, 100, 200, 400)
+REPEATS = 5
+
+
+def _best_time(func, swings, last_bar, context) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(swings, last_bar, context)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(42)
+    context = make_context()
+
+    print(f"{'swings':>8} {'original ms':>12} {'current ms':>12} {'speedup':>8}")
+    for count in SWING_COUNTS:
+        swings = random_swings(rng, count)
+        last_bar = swings[-1].index + 5
+
+        if _find_zone_candidates(swings, last_bar, context) != reference_find_zone_candidates(
+            swings, last_bar, context
+        ):
+            raise SystemExit(f"Results differ at {count} swings")
+
+        original = _best_time(reference_find_zone_candidates, swings, last_bar, context)
+        current = _best_time(_find_zone_candidates, swings, last_bar, context)
+        print(f"{count:>8} {original * 1000:>12.2f} {current * 1000:>12.2f} {original / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the pre-entry V2 NumPy kernels against the original row loops.
+
+Windows match what a replay signal sees: the 50-bar impulse lookback, the
+full 1H history before the signal for AOI freshness and momentum, and the
+4H/1D/1W flip lookbacks.
+
+Usage:
+    python tests/benchmark_pre_entry_context_v2.py
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay.config import PRE_ENTRY_V2_IMPULSE_LOOKBACK
+from test_replay_pre_entry_context_v2 import (
+    FLIP_LOOKBACK,
+    make_store,
+    random_case,
+    reference_aoi_freshness,
+    reference_count_impulses,
+    reference_momentum_chase,
+    reference_trend_flip_time,
+)
+
+SIGNALS = 50
+REPEATS = 3
+
+
+def _best_time(func) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    store = make_store(seed=42)
+    rng = random.Random(42)
+    cases = [random_case(rng, store) for _ in range(SIGNALS)]
+
+    kernels = {
+        "count_impulses": (
+            lambda calc, candles: calc._count_impulses(candles.tail(PRE_ENTRY_V2_IMPULSE_LOOKBACK)),
+            lambda calc, candles: reference_count_impulses(
+                candles.tail(PRE_ENTRY_V2_IMPULSE_LOOKBACK), calc._atr_1h, calc._is_long),
+        ),
+        "aoi_freshness": (
+            lambda calc, candles: calc._compute_aoi_freshness(candles),
+            lambda calc, candles: reference_aoi_freshness(
+                candles, calc._retest_time, calc._aoi_low, calc._aoi_high,
+                calc._atr_1h, calc._is_long),
+        ),
+        "momentum_chase": (
+            lambda calc, candles: calc._compute_momentum_chase(candles),
+            lambda calc, candles: reference_momentum_chase(
+                candles, calc._entry_price, calc._atr_1h, calc._is_long),
+        ),
+        "trend_flip_time": (
+            lambda calc, candles: [calc._find_trend_flip_time(tf) for tf in FLIP_LOOKBACK],
+            lambda calc, candles: [reference_trend_flip_time(store, tf, calc._signal_time, calc._is_long)
+                                   for tf in FLIP_LOOKBACK],
+        ),
+    }
+
+    print(f"{'kernel':>16} {'original ms':>12} {'current ms':>12} {'speedup':>8}   (per signal)")
+    for name, (current_fn, original_fn) in kernels.items():
+        for calc, candles in cases:
+            if current_fn(calc, candles) != original_fn(calc, candles):
+                raise SystemExit(f"{name} differs at {calc._signal_time}")
+
+        original = _best_time(lambda: [original_fn(c, k) for c, k in cases]) / SIGNALS
+        current = _best_time(lambda: [current_fn(c, k) for c, k in cases]) / SIGNALS
+        print(f"{name:>16} {original * 1000:>12.3f} {current * 1000:>12.3f} {original / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
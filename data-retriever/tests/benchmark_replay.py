@@ -0,0 +1,360 @@
+"""Benchmark replay throughput on a synthetic market, without MT5 or Postgres.
+
+Each symbol gets a deterministic 1H random walk with trend regimes, session
+volatility, weekend closures and opening gaps; 4H/1D/1W candles are
+resampled from it. The series are injected through CandleStore.load_candles'
+fetch_func, and DB access goes to an in-memory stand-in, so the numbers
+cover the replay pipeline itself (plus building the rows it would write).
+
+Every scale (symbols x months) runs in a fresh process so peak RSS is per
+scale. Results are written as JSON; pass an earlier file with --compare to
+see the change between commits.
+
+Usage:
+    python tests/benchmark_replay.py
+    python tests/benchmark_replay.py --scales 1x1 4x6 --output bench.json
+    python tests/benchmark_replay.py --compare benchmark_results/replay_<commit>.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import runner
+from replay.candle_store import CandleStore
+from replay.config import (
+    CANDLE_FETCH_BUFFER,
+    LOOKBACK_1W,
+    MT5_INTERVALS,
+    REPLAY_SYMBOLS,
+    TIMEFRAME_1D,
+    TIMEFRAME_1H,
+    TIMEFRAME_1W,
+    TIMEFRAME_4H,
+)
+from replay.replay_queries import (
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+    BATCH_MARK_REPLAY_OUTCOMES_COMPUTED,
+    FETCH_ALL_PENDING_REPLAY_SIGNALS,
+    FETCH_PENDING_REPLAY_SIGNALS,
+)
+
+DEFAULT_SCALES = ("1x1", "2x3", "4x6")
+SEED = 42
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Enough history before START for the weekly lookback
+HISTORY = timedelta(weeks=LOOKBACK_1W + CANDLE_FETCH_BUFFER + 10)
+DAYS_PER_MONTH = 30.44
+
+_TIMEFRAMES = {interval: label for label, interval in MT5_INTERVALS.items()}
+
+
+# =============================================================================
+# Synthetic market
+# =============================================================================
+
+def synthetic_hourly(
+    symbol: str, start: datetime, end: datetime, seed: int = SEED
+) -> pd.DataFrame:
+    """Deterministic 1H candles for `symbol` over [start, end), market hours only.
+
+    The market is closed from Friday 22:00 to Sunday 22:00 UTC. Log returns
+    follow trend regimes (mean length ~150 bars) with fat-tailed noise that
+    is larger in the London/New York sessions. The first bar after a weekend,
+    and a few random bars, open with a gap.
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+
+    times = pd.date_range(start, end, freq="h", inclusive="left")
+    weekday, hour = times.weekday, times.hour
+    closed = (weekday == 5) | ((weekday == 4) & (hour >= 22)) | ((weekday == 6) & (hour < 22))
+    times = times[~closed]
+    count = len(times)
+
+    base_price = (150.0 if "JPY" in symbol else 1.1) * rng.uniform(0.8, 1.2)
+    digits = 3 if "JPY" in symbol else 5
+    vol = 0.001
+
+    # Trend regimes: a third ranging, the rest drifting up or down
+    lengths = rng.geometric(1 / 150, size=count // 20 + 2)
+    drift_per_regime = (
+        rng.choice([-1.0, 0.0, 1.0], size=len(lengths))
+        * rng.uniform(0.05, 0.25, size=len(lengths))
+        * vol
+    )
+    drift = np.repeat(drift_per_regime, lengths)[:count]
+
+    session = np.where((hour[~closed] >= 7) & (hour[~closed] < 17), 1.3, 0.7)
+    returns = drift + vol * session * rng.standard_t(5, size=count) * 0.8
+
+    gaps = np.where(rng.random(count) < 0.002, rng.normal(0, 6 * vol, count), 0.0)
+    after_weekend = np.r_[False, np.diff(times.asi8) > 3600 * 10**9]
+    gaps[after_weekend] += rng.normal(0, 3 * vol, int(after_weekend.sum()))
+
+    # Bar i opens at the previous close moved by its gap and closes after its return
+    log_open = np.log(base_price) + np.cumsum(gaps) + np.r_[0.0, np.cumsum(returns)[:-1]]
+    log_close = log_open + returns
+    opens, closes = np.exp(log_open), np.exp(log_close)
+    wick = vol * 0.5 * session
+    highs = np.maximum(opens, closes) * np.exp(np.abs(rng.normal(0, 1, count)) * wick)
+    lows = np.minimum(opens, closes) * np.exp(-np.abs(rng.normal(0, 1, count)) * wick)
+
+    return pd.DataFrame({
+        "time": times,
+        "open": opens.round(digits),
+        "high": highs.round(digits),
+        "low": lows.round(digits),
+        "close": closes.round(digits),
+        "tick_volume": rng.integers(100, 5000, count),
+    })
+
+
+def resample_candles(hourly: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Aggregate 1H candles into 4H, 1D or 1W (weeks open on Sunday) candles."""
+    times = hourly["time"]
+    if timeframe == TIMEFRAME_4H:
+        keys = times.dt.floor("4h")
+    elif timeframe == TIMEFRAME_1D:
+        keys = times.dt.floor("D")
+    elif timeframe == TIMEFRAME_1W:
+        day = times.dt.floor("D")
+        keys = day - pd.to_timedelta((day.dt.weekday + 1) % 7, unit="D")
+    else:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+
+    grouped = hourly.groupby(keys.rename("bucket"), sort=True)
+    return pd.DataFrame({
+        "time": grouped["time"].first().index,
+        "open": grouped["open"].first().to_numpy(),
+        "high": grouped["high"].max().to_numpy(),
+        "low": grouped["low"].min().to_numpy(),
+        "close": grouped["close"].last().to_numpy(),
+        "tick_volume": grouped["tick_volume"].sum().to_numpy(),
+    })
+
+
+class SyntheticMarket:
+    """Serves synthetic candles as a CandleStore.load_candles fetch_func."""
+
+    def __init__(self, start: datetime, end: datetime, seed: int = SEED):
+        self._start = start
+        self._end = end
+        self._seed = seed
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+
+    def candles(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        key = (symbol, timeframe)
+        if key not in self._frames:
+            hourly = self.candles(symbol, TIMEFRAME_1H) if timeframe != TIMEFRAME_1H else None
+            if hourly is None:
+                frame = synthetic_hourly(symbol, self._start, self._end, self._seed)
+            else:
+                frame = resample_candles(hourly, timeframe)
+            self._frames[key] = frame
+        return self._frames[key]
+
+    def fetch(self, symbol: str, interval: int, lookback: int, end_date: datetime) -> pd.DataFrame:
+        """The last `lookback` candles opened at or before end_date (like copy_rates_from)."""
+        frame = self.candles(symbol, _TIMEFRAMES[interval])
+        stop = int(pd.DatetimeIndex(frame["time"]).searchsorted(pd.Timestamp(end_date), side="right"))
+        return frame.iloc[max(stop - lookback, 0):stop].reset_index(drop=True)
+
+
+# =============================================================================
+# In-memory replay tables
+# =============================================================================
+
+class InMemoryReplayDB:
+    """Stands in for DBExecutor: keeps what replay reads back, counts the rest."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._pending: dict[int, dict] = {}
+        self.rows_written = 0
+        self.transactions = 0
+
+    def fetch_all(self, sql, params=None, context=None, **kwargs):
+        if "nextval" in sql:
+            return [(next(self._ids),) for _ in range(params[0])]
+        if sql in (FETCH_PENDING_REPLAY_SIGNALS, FETCH_ALL_PENDING_REPLAY_SIGNALS):
+            symbol = params[0]
+            return [row for row in self._pending.values() if row["symbol"] == symbol]
+        return []
+
+    def fetch_one(self, sql, params=None, context=None, **kwargs):
+        return None
+
+    def execute_non_query(self, *args, **kwargs):
+        return 1
+
+    def execute_transaction(self, work, context=None, **kwargs):
+        self.transactions += 1
+        cursor = MagicMock()
+        cursor.execute.side_effect = self._execute
+        work(cursor)
+
+    def _execute(self, sql, params):
+        if sql == BATCH_INSERT_REPLAY_ENTRY_SIGNAL:
+            for row in params:
+                self._pending[row[0]] = {
+                    "id": row[0], "symbol": row[1], "signal_time": row[2], "direction": row[3],
+                    "aoi_low": row[9], "aoi_high": row[10], "entry_price": row[12], "atr_1h": row[13],
+                }
+        elif sql == BATCH_MARK_REPLAY_OUTCOMES_COMPUTED:
+            for signal_id in params[0]:
+                self._pending.pop(signal_id, None)
+            return
+        self.rows_written += len(params) if isinstance(params, list) else 1
+
+
+def _execute_values(cursor, sql, rows, page_size=None):
+    cursor.execute(sql, rows)
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scale(symbol_count: int, months: int, seed: int = SEED) -> dict:
+    """Replay `symbol_count` symbols over `months` months of synthetic data."""
+    logging.disable(logging.INFO)
+    symbols = REPLAY_SYMBOLS[:symbol_count]
+    end = START + timedelta(days=round(months * DAYS_PER_MONTH))
+    market = SyntheticMarket(START - HISTORY, end + timedelta(weeks=2), seed)
+    db = InMemoryReplayDB()
+
+    def load_symbol_candles(symbol, start_date, end_date):
+        store = CandleStore(symbol)
+        store.load_candles(start_date, end_date, market.fetch)
+        return store
+
+    with patch.object(runner, "load_symbol_candles", load_symbol_candles), \
+            patch("database.executor.DBExecutor", db), \
+            patch("psycopg2.extras.execute_values", _execute_values):
+        started = time.perf_counter()
+        stats = runner.run_replay(symbols, START, end, workers=1)
+        seconds = time.perf_counter() - started
+
+    return {
+        "scale": f"{len(symbols)}x{months}",
+        "symbols": len(symbols),
+        "months": months,
+        "candles": stats.candles_processed,
+        "signals": stats.signals_inserted,
+        "outcomes": stats.outcomes_computed,
+        "rows_written": db.rows_written,
+        "errors": stats.errors,
+        "seconds": round(seconds, 3),
+        "candles_per_sec": round(stats.candles_processed / seconds, 1),
+        "signals_per_sec": round(stats.signals_inserted / seconds, 2),
+        "peak_rss_mb": None if _peak_rss_mb() is None else round(_peak_rss_mb(), 1),
+        "stages": {
+            name: {"calls": stats.timings.calls[name], "seconds": round(stats.timings.seconds[name], 3)}
+            for name in stats.timings.seconds
+        },
+    }
+
+
+def _parse_scale(text: str) -> tuple[int, int]:
+    symbols, _, months = text.lower().partition("x")
+    try:
+        return int(symbols), int(months)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Scale must look like SYMBOLSxMONTHS, got {text!r}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results: list[dict], baseline: dict) -> None:
+    print(f"{'scale':>8} {'candles':>9} {'signals':>8} {'seconds':>9} "
+          f"{'candles/s':>10} {'signals/s':>10} {'peak MB':>9} {'vs base':>8}")
+    for result in results:
+        base = baseline.get(result["scale"])
+        change = ""
+        if base and base["candles_per_sec"]:
+            change = f"{(result['candles_per_sec'] / base['candles_per_sec'] - 1) * 100:+.1f}%"
+        rss = result["peak_rss_mb"]
+        print(f"{result['scale']:>8} {result['candles']:>9} {result['signals']:>8} "
+              f"{result['seconds']:>9.2f} {result['candles_per_sec']:>10.1f} "
+              f"{result['signals_per_sec']:>10.2f} {'-' if rss is None else f'{rss:.0f}':>9} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-market replay benchmark")
+    parser.add_argument("--scales", nargs="+", type=_parse_scale,
+                        default=[_parse_scale(scale) for scale in DEFAULT_SCALES],
+                        metavar="SYMBOLSxMONTHS", help=f"default: {' '.join(DEFAULT_SCALES)}")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmark_results/replay_<commit>.json)")
+    parser.add_argument("--compare", default=None, metavar="JSON",
+                        help="Earlier results file to compare candles/sec against")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    results = []
+    for symbol_count, months in args.scales:
+        # Fresh process per scale so peak RSS is not carried over
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results.append(executor.submit(run_scale, symbol_count, months, args.seed).result())
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result["scale"]: result for result in json.load(f)["results"]}
+    _print_results(results, baseline)
+
+    output = args.output or os.path.join("benchmark_results", f"replay_{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "start": START.isoformat(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+    if any(result["errors"] for result in results):
+        raise SystemExit("Replay reported errors")
+
+
+if __name__ == "__main__":
+    main()
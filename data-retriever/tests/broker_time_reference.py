@@ -0,0 +1,24 @@
+"""Reference MT5 broker-time conversion for the vectorized ingestion tests.
+
+This is the per-candle conversion the fetcher used before broker offsets
+were looked up in a DST transition table. Tests compare the columnar
+conversion against it.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuration.broker_config import get_broker_utc_offset
+
+
+def convert_mt5_timestamp_to_utc(mt5_timestamp: int) -> datetime:
+    """Convert one MT5 timestamp (broker local time) to a UTC datetime.
+
+    The timestamp is read as if it were UTC, the broker offset in effect
+    at that time (DST included) is looked up, and the offset is subtracted.
+    """
+    assumed_utc = datetime.fromtimestamp(mt5_timestamp, tz=timezone.utc)
+    return assumed_utc - timedelta(hours=get_broker_utc_offset(assumed_utc))
@@ -0,0 +1,85 @@
+"""Synthetic candle data shared by the replay tests.
+
+Random-walk candles with valid OHLC relations, and a CandleStore holding
+1H candles plus the 4H/1D/1W candles resampled from them. Seeds are
+chosen per test so that the replay window produces signals.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.candle_store import CandleStore, TimeframeCandles
+
+# Replay window inside make_replay_store's 320 days of candles
+REPLAY_START = datetime(2024, 9, 1, tzinfo=timezone.utc)
+REPLAY_END = datetime(2024, 10, 15, tzinfo=timezone.utc)
+
+
+def random_candles(
+    count: int,
+    seed: int,
+    freq: str = "h",
+    start: str = "2024-01-01",
+    step: float = 0.001,
+    wick: float = 0.0008,
+    open_gap: float = 0.0002,
+) -> pd.DataFrame:
+    """Random-walk candles starting at 1.1.
+
+    Args:
+        count: Number of candles
+        seed: Seed for numpy's default_rng
+        freq: Candle spacing (pandas frequency)
+        start: Time of the first candle (UTC)
+        step: Std dev of the close-to-close move
+        wick: Std dev of the high/low extension beyond the body
+        open_gap: Std dev of the gap between a close and the next open (0 = none)
+    """
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, step, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    if open_gap:
+        opens = opens + rng.normal(0, open_gap, count)
+
+    upper = np.abs(rng.normal(0, wick, count))
+    lower = np.abs(rng.normal(0, wick, count))
+    return pd.DataFrame({
+        "time": pd.date_range(start, periods=count, freq=freq, tz="UTC"),
+        "open": opens,
+        "high": np.maximum(opens, closes) + upper,
+        "low": np.minimum(opens, closes) - lower,
+        "close": closes,
+    })
+
+
+def resample_candles(hourly: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Higher-timeframe candles built from 1H candles (left-labelled)."""
+    grouped = hourly.set_index("time").resample(rule, label="left", closed="left")
+    return pd.DataFrame({
+        "open": grouped["open"].first(),
+        "high": grouped["high"].max(),
+        "low": grouped["low"].min(),
+        "close": grouped["close"].last(),
+    }).dropna().reset_index()
+
+
+def make_replay_store(
+    symbol: str = "EURUSD",
+    seed: int = 6,
+    hourly: Optional[pd.DataFrame] = None,
+) -> CandleStore:
+    """CandleStore with 320 days of 1H candles and the 4H/1D/1W resamples."""
+    if hourly is None:
+        hourly = random_candles(24 * 320, seed)
+    store = CandleStore(symbol)
+    store._candles["1H"] = TimeframeCandles("1H", hourly)
+    for timeframe, rule in (("4H", "4h"), ("1D", "1D"), ("1W", "7D")):
+        store._candles[timeframe] = TimeframeCandles(timeframe, resample_candles(hourly, rule))
+    return store
@@ -0,0 +1,145 @@
+"""Unit tests for AOI zone candidate search."""
+import os
+import random
+import sys
+import unittest
+from types import SimpleNamespace
+from typing import List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import SwingPoint
+from aoi.pipeline import (
+    AOIZoneCandidate,
+    _calculate_base_zone_score,
+    _find_zone_candidates,
+    _has_sufficient_spacing,
+    calculate_valid_touches,
+)
+
+
+def reference_find_zone_candidates(swings, last_bar_idx, context) -> List[AOIZoneCandidate]:
+    """The original O(n^3) search, kept as the behavioural reference."""
+    pairs = [(int(s.index), float(s.price)) for s in swings]
+    price_sorted = sorted(pairs, key=lambda x: x[1])
+
+    candidates = {}
+    settings = context.settings
+    total = len(price_sorted)
+
+    for i in range(total):
+        lower_idx, lower_price = price_sorted[i]
+
+        for j in range(i + settings.min_touches - 1, total):
+            upper_idx, upper_price = price_sorted[j]
+
+            mid_indices = [
+                idx for (idx, price) in pairs if lower_price <= price <= upper_price
+            ]
+
+            if len(mid_indices) < settings.min_touches:
+                continue
+            if not _has_sufficient_spacing(mid_indices, settings.min_swing_gap_bars):
+                continue
+
+            height = upper_price - lower_price
+
+            if height < context.min_height_price:
+                continue
+            if height > context.max_height_price:
+                break
+
+            touches = calculate_valid_touches(mid_indices, settings.min_swing_gap_bars)
+            base_score = _calculate_base_zone_score(height, touches, upper_idx, last_bar_idx)
+
+            key = (
+                round(lower_price / context.pip_size, 5),
+                round(upper_price / context.pip_size, 5),
+            )
+            existing = candidates.get(key)
+            if not existing or base_score > existing.score:
+                candidates[key] = AOIZoneCandidate(
+                    lower_bound=lower_price,
+                    upper_bound=upper_price,
+                    height=height,
+                    touches=touches,
+                    score=base_score,
+                    last_swing_idx=upper_idx,
+                )
+
+    return list(candidates.values())
+
+
+def random_swings(rng: random.Random, count: int, price_levels: int = 0) -> List[SwingPoint]:
+    """Swings in bar order; `price_levels` > 0 snaps prices to a grid to force ties."""
+    swings = []
+    bar = 0
+    for _ in range(count):
+        bar += rng.randint(1, 8)
+        if price_levels:
+            price = 1.1000 + rng.randrange(price_levels) * 0.0005
+        else:
+            price = round(rng.uniform(1.0900, 1.1100), 5)
+        swings.append(SwingPoint(index=bar, price=price, kind=rng.choice(["H", "L"])))
+    return swings
+
+
+def make_context(min_touches=3, min_gap=4, min_height=0.0005, max_height=0.0060):
+    return SimpleNamespace(
+        pip_size=0.0001,
+        min_height_price=min_height,
+        max_height_price=max_height,
+        settings=SimpleNamespace(min_touches=min_touches, min_swing_gap_bars=min_gap),
+    )
+
+
+class TestFindZoneCandidates(unittest.TestCase):
+
+    def _assert_same(self, swings, context):
+        last_bar = swings[-1].index + 5 if swings else 0
+        self.assertEqual(
+            _find_zone_candidates(swings, last_bar, context),
+            reference_find_zone_candidates(swings, last_bar, context),
+        )
+
+    def test_matches_reference_on_random_swings(self):
+        rng = random.Random(7)
+        for _ in range(150):
+            swings = random_swings(rng, rng.randint(0, 60))
+            context = make_context(
+                min_touches=rng.randint(2, 5),
+                min_gap=rng.randint(1, 10),
+                min_height=rng.choice([0.0, 0.0003, 0.0010]),
+                max_height=rng.choice([0.0020, 0.0060, 0.0300]),
+            )
+            self._assert_same(swings, context)
+
+    def test_matches_reference_with_tied_prices(self):
+        rng = random.Random(11)
+        for _ in range(150):
+            swings = random_swings(rng, rng.randint(1, 50), price_levels=rng.randint(1, 8))
+            context = make_context(
+                min_touches=rng.randint(2, 4),
+                min_gap=rng.randint(1, 6),
+                min_height=0.0,
+                max_height=rng.choice([0.0005, 0.0020]),
+            )
+            self._assert_same(swings, context)
+
+    def test_touches_count_spaced_gaps(self):
+        swings = [
+            SwingPoint(index=0, price=1.1000, kind="L"),
+            SwingPoint(index=10, price=1.1010, kind="H"),
+            SwingPoint(index=12, price=1.1005, kind="L"),
+            SwingPoint(index=30, price=1.1008, kind="H"),
+        ]
+        candidates = _find_zone_candidates(swings, 40, make_context(min_gap=5))
+        widest = [c for c in candidates if c.lower_bound == 1.1000 and c.upper_bound == 1.1010]
+        self.assertEqual(len(widest), 1)
+        # Gaps 10, 2, 18 -> two of them are at least 5 bars
+        self.assertEqual(widest[0].touches, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Unit tests for vectorized MT5 broker-time to UTC conversion."""
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import configuration.broker_config as broker_config
+from broker_time_reference import convert_mt5_timestamp_to_utc
+from externals.data_fetcher import _broker_offset_seconds
+
+
+def _epoch(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def _reference_offsets(seconds: np.ndarray) -> np.ndarray:
+    """Offsets implied by the original per-candle conversion."""
+    utc = pd.Series(seconds).apply(lambda value: int(convert_mt5_timestamp_to_utc(value).timestamp()))
+    return seconds - utc.to_numpy(dtype=np.int64)
+
+
+class TestBrokerTimeConversion(unittest.TestCase):
+
+    def assert_matches_scalar(self, seconds: np.ndarray):
+        np.testing.assert_array_equal(_broker_offset_seconds(seconds), _reference_offsets(seconds))
+
+    def test_hourly_candles_across_years(self):
+        seconds = np.arange(_epoch(2022, 12, 30), _epoch(2025, 1, 3), 3600, dtype=np.int64)
+        self.assert_matches_scalar(seconds)
+
+    def test_every_second_around_dst_switches(self):
+        for year, month, day in ((2024, 3, 31), (2024, 10, 27)):
+            seconds = np.arange(_epoch(year, month, day, 0), _epoch(year, month, day, 4), dtype=np.int64)
+            self.assert_matches_scalar(seconds)
+
+    def test_other_broker_timezones(self):
+        seconds = np.arange(_epoch(2024, 1, 1), _epoch(2025, 1, 1), 1800, dtype=np.int64)
+        for tz_name in ("Asia/Jerusalem", "UTC", "Not/AZone"):
+            with self.subTest(tz_name=tz_name), patch.object(broker_config, "MT5_BROKER_TIMEZONE", tz_name):
+                self.assert_matches_scalar(seconds)
+
+    def test_transition_table(self):
+        starts, offsets = broker_config.get_broker_offset_transitions(2024, 2024)
+        self.assertEqual(list(offsets), [2, 3, 2])
+        self.assertEqual(starts[0], _epoch(2024, 1, 1))
+        # EU switches at 01:00 UTC on the last Sunday of March and October
+        self.assertEqual(list(starts[1:]), [_epoch(2024, 3, 31, 1), _epoch(2024, 10, 27, 1)])
+        self.assertFalse(starts.flags.writeable)
+
+    def test_empty_column(self):
+        offsets = _broker_offset_seconds(np.array([], dtype=np.int64))
+        self.assertEqual(len(offsets), 0)
+        self.assertEqual(offsets.dtype, np.int64)
+
+
+if __name__ == "__main__":
+    unittest.main()
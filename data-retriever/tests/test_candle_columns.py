@@ -0,0 +1,163 @@
+"""Unit tests for columnar MT5 candle ingestion."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import externals.data_fetcher as data_fetcher
+from broker_time_reference import convert_mt5_timestamp_to_utc
+from externals.candle_columns import CandleColumns
+from replay.candle_store import TimeframeCandles
+
+# Record layout returned by MetaTrader5.copy_rates_*
+MT5_RATE_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+START = datetime(2024, 3, 25, tzinfo=timezone.utc)
+
+
+def make_rates(count: int, seed: int = 0) -> np.ndarray:
+    """Hourly broker-time records spanning the March DST switch."""
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, count))
+    rates = np.zeros(count, dtype=MT5_RATE_DTYPE)
+    rates["time"] = int(START.timestamp()) + 3600 * np.arange(count)
+    rates["open"] = np.r_[closes[0], closes[:-1]]
+    rates["high"] = np.maximum(rates["open"], closes) + 0.0005
+    rates["low"] = np.minimum(rates["open"], closes) - 0.0005
+    rates["close"] = closes
+    rates["tick_volume"] = rng.integers(1, 1000, count)
+    rates["spread"] = rng.integers(0, 20, count)
+    return rates
+
+
+def legacy_frame(rates: np.ndarray, historical: bool) -> pd.DataFrame:
+    """DataFrame-first conversion used before columnar ingestion."""
+    df = pd.DataFrame(rates)
+    if historical:
+        df["time"] = df["time"].apply(convert_mt5_timestamp_to_utc)
+    else:
+        from configuration.broker_config import get_broker_utc_offset
+        df["time"] = pd.to_datetime(df["time"] - get_broker_utc_offset() * 3600, unit="s", utc=True)
+    return df
+
+
+def assert_same_frame(test: unittest.TestCase, actual: pd.DataFrame, expected: pd.DataFrame):
+    test.assertEqual(list(actual.columns), list(expected.columns))
+    for name in expected.columns:
+        if name == "time":
+            test.assertEqual(list(actual["time"]), list(expected["time"]))
+        else:
+            test.assertEqual(actual[name].dtype, expected[name].dtype)
+            np.testing.assert_array_equal(actual[name].to_numpy(), expected[name].to_numpy())
+
+
+class TestCandleColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.rates = make_rates(240)
+        self.candles = CandleColumns(self.rates)
+
+    def test_columns_and_slices_are_views(self):
+        self.assertTrue(np.shares_memory(self.candles["close"], self.rates))
+        self.assertTrue(np.shares_memory(self.candles.times, self.rates))
+        self.assertTrue(np.shares_memory(self.candles.tail(10)["high"], self.rates))
+        self.assertTrue(np.shares_memory(self.candles.head(10).records, self.rates))
+        self.assertEqual(self.candles.columns, MT5_RATE_DTYPE.names)
+
+    def test_shift_times_in_place(self):
+        original = self.rates["time"].copy()
+        self.candles.shift_times(7200)
+        np.testing.assert_array_equal(self.rates["time"], original - 7200)
+
+        read_only = make_rates(5)
+        read_only.flags.writeable = False
+        candles = CandleColumns(read_only)
+        candles.shift_times(np.full(5, 3600))
+        np.testing.assert_array_equal(candles.time_seconds, read_only["time"] - 3600)
+
+    def test_time_slices(self):
+        cutoff = START + timedelta(hours=10, minutes=30)
+        self.assertEqual(len(self.candles.up_to(cutoff)), 11)
+        self.assertEqual(len(self.candles.up_to(START + timedelta(hours=10))), 11)
+        self.assertEqual(len(self.candles.after(START + timedelta(hours=10))), 229)
+        self.assertEqual(len(self.candles.after(cutoff.replace(tzinfo=None))), 229)
+        self.assertEqual(len(self.candles.tail(0)), 0)
+        self.assertEqual(len(self.candles.tail(500)), 240)
+
+    def test_to_frame_matches_dataframe_of_records(self):
+        frame = self.candles.to_frame()
+        expected = pd.DataFrame(self.rates)
+        expected["time"] = pd.to_datetime(expected["time"], unit="s", utc=True)
+        assert_same_frame(self, frame, expected)
+
+        empty = CandleColumns(self.rates[:0]).to_frame()
+        self.assertTrue(empty.empty)
+        self.assertEqual(list(empty.columns), list(MT5_RATE_DTYPE.names))
+
+    def test_timeframe_candles_accepts_columns(self):
+        from_columns = TimeframeCandles("1H", self.candles)
+        from_frame = TimeframeCandles("1H", self.candles.to_frame())
+        np.testing.assert_array_equal(from_columns.time_ns, from_frame.time_ns)
+        np.testing.assert_array_equal(from_columns.closes, self.rates["close"])
+        self.assertEqual(len(from_columns), 240)
+
+    def test_timeframe_candles_builds_frame_only_on_access(self):
+        candles = TimeframeCandles("1H", self.candles)
+        self.assertIsNone(candles._frame)
+        self.assertEqual(candles.count_up_to(START + timedelta(hours=9)), 10)
+        self.assertFalse(candles.is_empty)
+        self.assertIsNone(candles._frame)
+
+        frame = candles.candles
+        expected = self.candles.to_frame()
+        self.assertEqual(list(frame.columns), list(expected.columns))
+        np.testing.assert_array_equal(frame["time"].to_numpy(), expected["time"].to_numpy())
+        np.testing.assert_array_equal(frame["tick_volume"], self.rates["tick_volume"])
+        self.assertIs(candles.candles, frame)
+
+    def test_unsorted_columns_are_sorted(self):
+        shuffled = CandleColumns(self.rates[::-1].copy())
+        candles = TimeframeCandles("1H", shuffled)
+        np.testing.assert_array_equal(candles.closes, self.rates["close"])
+        np.testing.assert_array_equal(candles.candles["spread"], self.rates["spread"])
+
+
+class TestFetchCandleColumns(unittest.TestCase):
+
+    def _patched_mt5(self, rates: np.ndarray):
+        fake_mt5 = MagicMock()
+        fake_mt5.copy_rates_range.side_effect = lambda *args: rates.copy()
+        fake_mt5.copy_rates_from_pos.side_effect = lambda *args: rates.copy()
+        fake_mt5.last_error.return_value = (1, "Success")
+        return patch.multiple(data_fetcher, mt5=fake_mt5, initialize_mt5=lambda: True)
+
+    def test_historical_matches_legacy_frame(self):
+        rates = make_rates(300, seed=1)
+        with self._patched_mt5(rates):
+            frame = data_fetcher.fetch_data("EURUSD", 16385, 200, end_date=START + timedelta(days=20))
+            candles = data_fetcher.fetch_candle_columns("EURUSD", 16385, 200, end_date=START + timedelta(days=20))
+        assert_same_frame(self, frame, legacy_frame(rates, historical=True).tail(200))
+        self.assertEqual(len(candles), 200)
+
+    def test_live_trims_to_closed_candles(self):
+        rates = make_rates(48, seed=2)
+        now = START + timedelta(hours=30, minutes=15)
+        with self._patched_mt5(rates):
+            frame = data_fetcher.fetch_data("EURUSD", 16385, 48, timeframe_label="1H", now=now)
+        expected = legacy_frame(rates, historical=False)
+        expected = expected[expected["time"] <= START + timedelta(hours=30)]
+        assert_same_frame(self, frame, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
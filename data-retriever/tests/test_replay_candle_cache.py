@@ -0,0 +1,171 @@
+"""Unit tests for the on-disk replay candle cache."""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from externals.candle_columns import CandleColumns
+from replay import candle_cache
+from replay.candle_cache import CandleCache
+from replay.config import MT5_INTERVALS
+
+_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_HISTORY = 2000
+_H1 = MT5_INTERVALS["1H"]
+
+
+class _FakeSource:
+    """Hourly candle source that records every request it serves."""
+
+    def __init__(self):
+        times = pd.date_range(_START, periods=_HISTORY, freq="h", tz="UTC")
+        closes = 1.1 + np.cumsum(np.full(_HISTORY, 0.0001))
+        self.df = pd.DataFrame({
+            "time": times,
+            "open": closes - 0.00005,
+            "high": closes + 0.0002,
+            "low": closes - 0.0002,
+            "close": closes,
+            "tick_volume": np.arange(_HISTORY, dtype=np.uint64),
+        })
+        self.calls = []
+
+    def __call__(self, symbol, interval, lookback, end_date):
+        self.calls.append((lookback, end_date))
+        end = pd.Timestamp(end_date)
+        return self.df[self.df["time"] <= end].tail(lookback).reset_index(drop=True)
+
+
+class TestCandleCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+        self.source = _FakeSource()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _fetch(self, cache, lookback, end):
+        return cache.fetch("EURUSD", _H1, lookback, end, self.source)
+
+    def test_rerun_is_served_from_disk(self):
+        end = _START + timedelta(hours=1000)
+        first = self._fetch(CandleCache(self.cache_dir), 300, end)
+        self.assertEqual(len(self.source.calls), 1)
+
+        # A fresh instance reads the persisted file without calling the source
+        second = self._fetch(CandleCache(self.cache_dir), 300, end)
+        self.assertEqual(len(self.source.calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+        pd.testing.assert_frame_equal(second, self.source(None, _H1, 300, end), check_dtype=False)
+
+    def test_tail_fetch_requests_only_missing_bars(self):
+        cache = CandleCache(self.cache_dir)
+        self._fetch(cache, 300, _START + timedelta(hours=1000))
+
+        end = _START + timedelta(hours=1100)
+        result = self._fetch(cache, 300, end)
+        lookback, _ = self.source.calls[1]
+        self.assertLess(lookback, 300)
+        self.assertEqual(result["time"].iloc[-1], pd.Timestamp(end))
+        self.assertEqual(len(result), 300)
+
+    def test_head_fetch_extends_history(self):
+        cache = CandleCache(self.cache_dir)
+        end = _START + timedelta(hours=1000)
+        self._fetch(cache, 100, end)
+
+        result = self._fetch(cache, 400, end)
+        self.assertEqual(len(self.source.calls), 2)
+        pd.testing.assert_frame_equal(result, self.source(None, _H1, 400, end), check_dtype=False)
+
+    def test_head_exhausted_stops_refetching(self):
+        cache = CandleCache(self.cache_dir)
+        end = _START + timedelta(hours=50)
+        result = self._fetch(cache, 300, end)
+        self.assertEqual(len(result), 51)
+        # The short page is followed up; only an empty one marks the start
+        self.assertEqual(len(self.source.calls), 2)
+
+        self._fetch(cache, 300, end)
+        self.assertEqual(len(self.source.calls), 2)
+
+    def test_capped_responses_are_not_the_start_of_history(self):
+        def capped_source(symbol, interval, lookback, end_date):
+            return self.source(symbol, interval, min(lookback, 40), end_date)
+
+        end = _START + timedelta(hours=1000)
+        cache = CandleCache(self.cache_dir)
+        result = cache.fetch("EURUSD", _H1, 100, end, capped_source)
+        pd.testing.assert_frame_equal(result, self.source(None, _H1, 100, end), check_dtype=False)
+
+        older = _START + timedelta(hours=500)
+        result = CandleCache(self.cache_dir).fetch("EURUSD", _H1, 100, older, capped_source)
+        pd.testing.assert_frame_equal(result, self.source(None, _H1, 100, older), check_dtype=False)
+
+    def test_gap_fetches_are_paged(self):
+        cache = CandleCache(self.cache_dir)
+        with patch.object(candle_cache, "FETCH_PAGE_CANDLES", 64):
+            self._fetch(cache, 50, _START + timedelta(hours=1000))
+            # Tail gap of ~800 candles, then history older than the cache
+            tail_end = _START + timedelta(hours=1800)
+            tail = self._fetch(cache, 50, tail_end)
+            head_end = _START + timedelta(hours=300)
+            head = self._fetch(cache, 50, head_end)
+
+        self.assertTrue(all(lookback <= 64 for lookback, _ in self.source.calls))
+        self.assertGreater(len(self.source.calls), 20)
+        pd.testing.assert_frame_equal(tail, self.source(None, _H1, 50, tail_end), check_dtype=False)
+        pd.testing.assert_frame_equal(head, self.source(None, _H1, 50, head_end), check_dtype=False)
+        # The cached range has no holes
+        full = CandleCache(self.cache_dir).fetch("EURUSD", _H1, 1500, tail_end, self.source)
+        self.assertTrue((full["time"].diff().dropna() == pd.Timedelta(hours=1)).all())
+
+    def test_only_forming_candles_cached_is_a_miss(self):
+        class _EarlyClock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return _START  # Every source candle is still forming
+
+        cache = CandleCache(self.cache_dir)
+        end = _START + timedelta(hours=1000)
+        with patch.object(candle_cache, "datetime", _EarlyClock):
+            self.assertIsNone(self._fetch(cache, 300, end))
+            self.assertIsNone(self._fetch(cache, 300, end))
+        self.assertEqual(len(self.source.calls), 2)
+
+        # Once the candles have closed, the empty series is replaced by a full fetch
+        result = self._fetch(cache, 300, end)
+        self.assertEqual(self.source.calls[-1], (300, end))
+        pd.testing.assert_frame_equal(result, self.source(None, _H1, 300, end), check_dtype=False)
+
+    def test_accepts_columnar_source(self):
+        def columnar_source(symbol, interval, lookback, end_date):
+            df = self.source(symbol, interval, lookback, end_date)
+            records = np.zeros(len(df), dtype=[
+                ("time", "<i8"), ("open", "<f8"), ("high", "<f8"),
+                ("low", "<f8"), ("close", "<f8"), ("tick_volume", "<u8"),
+            ])
+            records["time"] = df["time"].dt.tz_convert(None).to_numpy(dtype="datetime64[s]").view(np.int64)
+            for name in ("open", "high", "low", "close", "tick_volume"):
+                records[name] = df[name].to_numpy()
+            return CandleColumns(records)
+
+        end = _START + timedelta(hours=1000)
+        cache = CandleCache(self.cache_dir)
+        cache.fetch("EURUSD", _H1, 100, end, columnar_source)
+        result = cache.fetch("EURUSD", _H1, 400, end, columnar_source)
+        pd.testing.assert_frame_equal(result, self.source(None, _H1, 400, end), check_dtype=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Unit tests for the columnar replay candle store."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from externals.candle_columns import CandleColumns
+from replay import candle_store
+from replay.candle_store import CandleStore, TimeframeCandles
+from utils.indicators import calculate_atr
+
+
+def _make_candles(count: int, start: datetime, hours: int = 1) -> pd.DataFrame:
+    times = [start + timedelta(hours=hours * i) for i in range(count)]
+    closes = 1.1 + np.cumsum(np.full(count, 0.0001))
+    return pd.DataFrame({
+        "time": pd.to_datetime(times, utc=True),
+        "open": closes - 0.00005,
+        "high": closes + 0.0002,
+        "low": closes - 0.0002,
+        "close": closes,
+    })
+
+
+class TestTimeframeCandles(unittest.TestCase):
+    """Lookups on TimeframeCandles must match the DataFrame mask semantics."""
+
+    def setUp(self):
+        self.start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+        df = _make_candles(48, self.start)
+        # Shuffle to verify the store sorts on construction
+        self.candles = TimeframeCandles("1H", df.sample(frac=1, random_state=7))
+        self.df = df
+
+    def test_columns_are_sorted_and_typed(self):
+        self.assertEqual(self.candles.time_ns.dtype, np.int64)
+        self.assertTrue(np.all(np.diff(self.candles.time_ns) > 0))
+        np.testing.assert_array_equal(self.candles.closes, self.df["close"].to_numpy())
+
+    def test_get_candles_up_to_matches_mask(self):
+        for offset in (0, 5, 17, 47):
+            as_of = self.start + timedelta(hours=offset, minutes=30)
+            expected = self.df[self.df["time"] <= as_of]
+            result = self.candles.get_candles_up_to(as_of)
+            self.assertEqual(len(result), len(expected))
+            self.assertEqual(result.iloc[-1]["time"], expected.iloc[-1]["time"])
+
+    def test_before_first_candle(self):
+        as_of = self.start - timedelta(hours=1)
+        self.assertTrue(self.candles.get_candles_up_to(as_of).empty)
+        self.assertIsNone(self.candles.get_last_closed_index(as_of))
+
+    def test_last_closed_index(self):
+        as_of = self.start + timedelta(hours=10)
+        self.assertEqual(self.candles.get_last_closed_index(as_of), 10)
+        self.assertEqual(self.candles.get_last_closed_index(as_of + timedelta(minutes=59)), 10)
+
+    def test_find_index_by_time_handles_naive_and_aware(self):
+        target = self.start + timedelta(hours=12)
+        self.assertEqual(self.candles.find_index_by_time(target), 12)
+        self.assertEqual(self.candles.find_index_by_time(target.replace(tzinfo=None)), 12)
+        self.assertEqual(
+            self.candles.find_index_by_time(target.astimezone(timezone(timedelta(hours=2)))), 12
+        )
+        self.assertIsNone(self.candles.find_index_by_time(target + timedelta(minutes=1)))
+
+    def test_get_candles_after_index(self):
+        after = self.candles.get_candles_after_index(10, 5)
+        self.assertEqual(list(after.index), [11, 12, 13, 14, 15])
+
+    def test_empty_store(self):
+        empty = TimeframeCandles("4H")
+        self.assertTrue(empty.is_empty)
+        self.assertEqual(len(empty.time_ns), 0)
+        self.assertIsNone(empty.find_index_by_time(self.start))
+        self.assertTrue(empty.get_candles_up_to(self.start).empty)
+
+    def test_missing_price_column_reads_as_nan(self):
+        candles = TimeframeCandles("1H", self.df.drop(columns="open"))
+        self.assertEqual(len(candles.opens), len(self.df))
+        self.assertTrue(np.isnan(candles.opens).all())
+        np.testing.assert_array_equal(candles.closes, self.df["close"].to_numpy())
+
+
+class TestTimeframeCandlesATR(unittest.TestCase):
+    """atr_at must return exactly what calculate_atr returns on the same slice."""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        count = 260
+        closes = 1.1 + np.cumsum(rng.normal(0, 0.001, count))
+        highs = closes + np.abs(rng.normal(0, 0.001, count))
+        lows = closes - np.abs(rng.normal(0, 0.001, count))
+        # Zero-range candles trigger pandas_ta's epsilon adjustment
+        highs[[40, 200]] = lows[[40, 200]] = closes[[40, 200]]
+        times = pd.date_range("2025-01-06", periods=count, freq="4h", tz="UTC")
+        self.df = pd.DataFrame({
+            "time": times, "open": closes, "high": highs, "low": lows, "close": closes,
+        })
+        self.candles = TimeframeCandles("4H", self.df)
+
+    def test_matches_calculate_atr_for_each_window(self):
+        for window in (15, 140, 180):
+            for index in range(len(self.df)):
+                window_df = self.df.iloc[max(0, index - window + 1):index + 1]
+                self.assertEqual(
+                    self.candles.atr_at(index, window),
+                    calculate_atr(window_df),
+                    msg=f"window={window} index={index}",
+                )
+
+    def test_store_delegates_to_timeframe(self):
+        store = CandleStore("EURUSD")
+        store._candles["4H"] = self.candles
+        self.assertEqual(store.atr_at("4H", 150, 15), self.candles.atr_at(150, 15))
+
+
+class TestCandleStoreReplayIndices(unittest.TestCase):
+    """Replay window indices are derived from the 1H time column."""
+
+    def test_replay_indices_inclusive_window(self):
+        start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+        store = CandleStore("EURUSD")
+        store._candles["1H"] = TimeframeCandles("1H", _make_candles(48, start))
+
+        indices = store.get_replay_1h_indices(
+            start + timedelta(hours=5), start + timedelta(hours=9)
+        )
+        self.assertEqual(indices, [5, 6, 7, 8, 9])
+
+
+
+class TestCandleStorePagedFetch(unittest.TestCase):
+    """Long histories are fetched in pages and stitched into one timeframe."""
+
+    def setUp(self):
+        self.start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+        self.source = _make_candles(100, self.start)
+        self.requests = []
+
+    def _fetch(self, symbol, interval, lookback, end_date):
+        self.requests.append((lookback, end_date))
+        available = self.source[self.source["time"] <= end_date]
+        return available.tail(lookback).reset_index(drop=True)
+
+    def _load(self, lookback: int, end_date: datetime) -> TimeframeCandles:
+        store = CandleStore("EURUSD")
+        with patch.object(candle_store, "FETCH_PAGE_CANDLES", 16):
+            store._fetch_and_store("1H", lookback, self._fetch, end_date)
+        return store.get_1h_candles()
+
+    def test_pages_match_a_single_fetch(self):
+        end = self.start + timedelta(hours=89)
+        candles = self._load(60, end)
+
+        expected = self.source.iloc[30:90].reset_index(drop=True)
+        pd.testing.assert_frame_equal(candles.candles, expected)
+        self.assertTrue(all(lookback <= 16 for lookback, _ in self.requests))
+        # Each page ends at the first candle of the page after it
+        self.assertEqual(self.requests[0], (16, end))
+        self.assertEqual(self.requests[1], (16, self.start + timedelta(hours=74)))
+        self.assertEqual(len(self.requests), 4)
+
+    def test_stops_at_the_start_of_the_source(self):
+        candles = self._load(500, self.start + timedelta(hours=99))
+        pd.testing.assert_frame_equal(candles.candles, self.source)
+
+    def test_column_pages_are_stitched_without_frames(self):
+        def fetch_columns(symbol, interval, lookback, end_date):
+            page = self._fetch(symbol, interval, lookback, end_date)
+            records = np.zeros(len(page), dtype=[
+                ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+            ])
+            records["time"] = [int(t.timestamp()) for t in page["time"]]
+            for column in ("open", "high", "low", "close"):
+                records[column] = page[column]
+            return CandleColumns(records)
+
+        end = self.start + timedelta(hours=89)
+        store = CandleStore("EURUSD")
+        with patch.object(candle_store, "FETCH_PAGE_CANDLES", 16), \
+                patch.object(CandleColumns, "to_frame", side_effect=AssertionError):
+            store._fetch_and_store("1H", 60, fetch_columns, end)
+        candles = store.get_1h_candles()
+
+        expected = self.source.iloc[30:90].reset_index(drop=True)
+        self.assertIsNone(candles._frame)
+        np.testing.assert_array_equal(candles.closes, expected["close"])
+        self.assertEqual(candles.candles["time"].tolist(), expected["time"].tolist())
+
+    def test_short_range_pages_do_not_end_the_history(self):
+        # Like MT5's copy_rates_range: a page covers `lookback` hours, weekends included
+        hourly = _make_candles(24 * 7 * 6, self.start)
+        source = hourly[hourly["time"].dt.dayofweek < 5].reset_index(drop=True)
+
+        def fetch_range(symbol, interval, lookback, end_date):
+            window = (source["time"] > end_date - timedelta(hours=lookback)) & (source["time"] <= end_date)
+            return source[window].reset_index(drop=True)
+
+        end = source["time"].iloc[-1].to_pydatetime()
+        store = CandleStore("EURUSD")
+        with patch.object(candle_store, "FETCH_PAGE_CANDLES", 64):
+            store._fetch_and_store("1H", 500, fetch_range, end)
+
+        expected = source.tail(500).reset_index(drop=True)
+        pd.testing.assert_frame_equal(store.get_1h_candles().candles, expected)
+
+    def test_warns_when_history_starts_after_the_window(self):
+        store = CandleStore("EURUSD")
+        with patch.object(candle_store, "FETCH_PAGE_CANDLES", 16), \
+                patch.object(candle_store.logger, "warning") as warning:
+            store.load_candles(self.start - timedelta(days=2), self.start + timedelta(hours=50), self._fetch)
+            self.assertEqual(warning.call_count, 1)
+
+            warning.reset_mock()
+            store.load_candles(self.start + timedelta(hours=20), self.start + timedelta(hours=50), self._fetch)
+            warning.assert_not_called()
+
+    def test_short_history_is_one_request(self):
+        candles = self._load(10, self.start + timedelta(hours=99))
+        self.assertEqual(len(candles), 10)
+        self.assertEqual(self.requests, [(10, self.start + timedelta(hours=99))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""Unit tests for replay checkpoint and resume."""
+import itertools
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import runner
+from replay import checkpoint as checkpoint_module
+from replay.checkpoint import ReplayProgress, make_run_id
+from replay.outcome_calculator import ReplayOutcomeCalculator, ReplayPendingSignal
+from replay.replay_queries import (
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+    BATCH_INSERT_REPLAY_SIGNAL_OUTCOME,
+    BATCH_MARK_REPLAY_OUTCOMES_COMPUTED,
+    FETCH_ALL_PENDING_REPLAY_SIGNALS,
+    FETCH_PENDING_REPLAY_SIGNALS,
+    FETCH_REPLAY_SIGNAL_INDEX,
+    UPSERT_REPLAY_CHECKPOINT,
+)
+from replay.result_sink import ReplayResultSink
+from replay.timeframe_alignment import TimeframeAligner
+from replay_fixtures import REPLAY_END, REPLAY_START, make_replay_store
+
+
+class _Crash(BaseException):
+    """Simulated process death (not caught by the runner's error handling)."""
+
+
+class _FakeReplayDB:
+    """In-memory stand-in for the replay tables the runner reads and writes."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.signals: dict[int, tuple] = {}
+        self.computed: set[int] = set()
+        self.outcomes: list[tuple] = []
+        self.checkpoints: dict[tuple, tuple] = {}
+        self.transactions = 0
+        self.crash_at_transaction = None
+        self.fail_at_transaction = None
+
+    def fetch_all(self, sql, params=None, context=None, **kwargs):
+        if "nextval" in sql:
+            return [(next(self._ids),) for _ in range(params[0])]
+        if sql == FETCH_REPLAY_SIGNAL_INDEX:
+            return [(row[2], row[0], row[-1], True) for row in self.signals.values()]
+        if sql in (FETCH_PENDING_REPLAY_SIGNALS, FETCH_ALL_PENDING_REPLAY_SIGNALS):
+            return [
+                {
+                    "id": row[0], "symbol": row[1], "signal_time": row[2], "direction": row[3],
+                    "aoi_low": row[9], "aoi_high": row[10], "entry_price": row[12], "atr_1h": row[13],
+                }
+                for signal_id, row in sorted(self.signals.items())
+                if signal_id not in self.computed
+            ]
+        return []
+
+    def fetch_one(self, sql, params=None, context=None, **kwargs):
+        row = self.checkpoints.get(tuple(params))
+        return None if row is None else row[4:]
+
+    def execute_transaction(self, work, context=None, **kwargs):
+        self.transactions += 1
+        if self.transactions == self.crash_at_transaction:
+            raise _Crash()
+        if self.transactions == self.fail_at_transaction:
+            raise RuntimeError("write failed")  # Rolled back, the replay carries on
+        staged = []
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda sql, params: staged.append((sql, params))
+        work(cursor)
+        # Commit
+        for sql, params in staged:
+            if sql == BATCH_INSERT_REPLAY_ENTRY_SIGNAL:
+                self.signals.update((row[0], row) for row in params)
+            elif sql == BATCH_INSERT_REPLAY_SIGNAL_OUTCOME:
+                self.outcomes.extend(params)
+            elif sql == BATCH_MARK_REPLAY_OUTCOMES_COMPUTED:
+                self.computed.update(params[0])
+            elif sql == UPSERT_REPLAY_CHECKPOINT:
+                self.checkpoints[tuple(params[:3])] = params
+
+    def execute_non_query(self, *args, **kwargs):
+        return 1
+
+    def committed_results(self) -> tuple[list, list]:
+        """Signals and outcomes keyed by signal content instead of ids."""
+        signals = sorted((row[2], row[3], row[9], row[10]) for row in self.signals.values())
+        outcomes = sorted(
+            (self.signals[row[1]][2], *row[2:]) for row in self.outcomes
+        )
+        return signals, outcomes
+
+
+class TestCheckpointPieces(unittest.TestCase):
+
+    def test_run_id_is_stable_per_window(self):
+        self.assertEqual(make_run_id(REPLAY_START, REPLAY_END), make_run_id(REPLAY_START, REPLAY_END))
+        self.assertNotEqual(make_run_id(REPLAY_START, REPLAY_END), make_run_id(REPLAY_START, REPLAY_START))
+
+    def test_sink_writes_checkpoint_last_in_flush_transaction(self):
+        db = _FakeReplayDB()
+        progress = ReplayProgress("run_x", "EURUSD", REPLAY_START, REPLAY_END)
+        with patch("database.executor.DBExecutor", db), \
+                patch("psycopg2.extras.execute_values", lambda cur, sql, rows, page_size: cur.execute(sql, rows)):
+            sink = ReplayResultSink(flush_rows=None)
+            for _ in range(3):
+                sink.add_signal(("EURUSD", REPLAY_START) + (None,) * 24)
+            self.assertEqual(db.transactions, 0)  # No automatic flushes
+
+            sink.set_checkpoint(progress.params(10, REPLAY_START, False, {"pending_signals": []}))
+            sink.flush()
+            self.assertEqual(db.transactions, 1)
+            self.assertEqual(len(db.signals), 3)
+
+            # A checkpoint alone is still written
+            sink.set_checkpoint(progress.params(11, REPLAY_END, True, {}))
+            sink.flush()
+            checkpoint = progress.load()
+        self.assertEqual((checkpoint.last_1h_index, checkpoint.completed), (11, True))
+
+    def test_checkpoint_of_another_state_version_is_discarded(self):
+        db = _FakeReplayDB()
+        progress = ReplayProgress("run_x", "EURUSD", REPLAY_START, REPLAY_END)
+        run_id = make_run_id(REPLAY_START, REPLAY_END)
+        with patch("database.executor.DBExecutor", db), \
+                patch("psycopg2.extras.execute_values", lambda cur, sql, rows, page_size: cur.execute(sql, rows)):
+            sink = ReplayResultSink(flush_rows=None)
+            sink.set_checkpoint(progress.params(10, REPLAY_START, False, {"pending_signals": []}))
+            sink.flush()
+            self.assertEqual(progress.load().state, {"pending_signals": []})
+
+            with patch.object(checkpoint_module, "CHECKPOINT_STATE_VERSION", 2):
+                self.assertIsNone(progress.load())
+                # Same run: the stale state is caught on load, not by a new id
+                self.assertEqual(make_run_id(REPLAY_START, REPLAY_END), run_id)
+
+            # State that no longer unpickles
+            key = ("run_x", "EURUSD", REPLAY_START)
+            db.checkpoints[key] = db.checkpoints[key][:7] + (b"not a pickle",)
+            self.assertIsNone(progress.load())
+
+    def test_state_round_trip_resolves_by_time(self):
+        store = make_replay_store()
+        aligner = TimeframeAligner(store)
+        aligner.detect_new_closes_at(2000)
+        closes = aligner.snapshot_closes()
+
+        restored = TimeframeAligner(store)
+        restored.restore_closes(closes)
+        self.assertEqual(restored.get_current_state(), aligner.get_current_state())
+        self.assertFalse(restored.detect_new_closes_at(2000).any_new())
+
+        calculator = ReplayOutcomeCalculator("EURUSD", store, sink=None)
+        signal_time = store.get_1h_candles().candles["time"].iloc[2000].to_pydatetime()
+        calculator.register_signal(ReplayPendingSignal(
+            7, "EURUSD", signal_time, "bullish", 1.1, 0.001, 1.09, 1.095,
+            signal_1h_index=123,  # Stale index from a differently loaded store
+        ))
+        resumed = ReplayOutcomeCalculator("EURUSD", store, sink=None)
+        self.assertEqual(resumed.restore(calculator.snapshot()), 1)
+        self.assertEqual(resumed.snapshot()[0].signal_1h_index, 2000)
+
+
+class TestReplayResume(unittest.TestCase):
+
+    def _replay(self, db: _FakeReplayDB, resume: bool = False) -> runner.ReplayStats:
+        with patch.object(runner, "load_symbol_candles", return_value=self.store), \
+                patch.object(runner, "CHECKPOINT_INTERVAL_HOURS", 100), \
+                patch("database.executor.DBExecutor", db), \
+                patch("psycopg2.extras.execute_values", lambda cur, sql, rows, page_size: cur.execute(sql, rows)), \
+                patch("database.validation.DBValidator.validate_symbol", lambda symbol: symbol):
+            return runner._replay_symbol("EURUSD", REPLAY_START, REPLAY_END, "run_test", resume)
+
+    def setUp(self):
+        self.store = make_replay_store()
+
+    def test_resume_matches_uninterrupted_run(self):
+        uninterrupted = _FakeReplayDB()
+        full_stats = self._replay(uninterrupted)
+        signals, outcomes = uninterrupted.committed_results()
+        self.assertGreater(len(signals), 0)
+        # Every replayed hour went through the aligner stage
+        self.assertEqual(full_stats.timings.calls["aligner"], full_stats.candles_processed)
+        self.assertEqual(full_stats.timings.calls["candle_load"], 1)
+
+        interrupted = _FakeReplayDB()
+        interrupted.crash_at_transaction = 4
+        with self.assertRaises(_Crash):
+            self._replay(interrupted)
+        with patch("database.executor.DBExecutor", interrupted):
+            checkpoint = ReplayProgress("run_test", "EURUSD", REPLAY_START, REPLAY_END).load()
+        self.assertFalse(checkpoint.completed)
+        # Crashed with signals committed and outcomes still pending
+        self.assertGreater(len(interrupted.signals), 0)
+        self.assertLess(len(interrupted.signals), len(signals))
+        self.assertGreater(len(checkpoint.state["pending_signals"]), 0)
+        done = self.store.get_1h_candles().count_up_to(checkpoint.last_candle_time)
+
+        interrupted.crash_at_transaction = None
+        resumed_stats = self._replay(interrupted, resume=True)
+        self.assertEqual(interrupted.committed_results(), (signals, outcomes))
+        # Only hours after the checkpoint were replayed
+        first = self.store.get_replay_1h_indices(REPLAY_START, REPLAY_END)[0]
+        self.assertEqual(resumed_stats.candles_processed, full_stats.candles_processed - (done - first))
+
+        # A completed symbol is skipped entirely
+        transactions = interrupted.transactions
+        self.assertEqual(self._replay(interrupted, resume=True).candles_processed, 0)
+        self.assertEqual(interrupted.transactions, transactions)
+
+    def test_failed_flush_never_checkpoints_past_dropped_rows(self):
+        uninterrupted = _FakeReplayDB()
+        self._replay(uninterrupted)
+        expected = uninterrupted.committed_results()
+
+        failing = _FakeReplayDB()
+        failing.fail_at_transaction = 3
+        stats = self._replay(failing)
+        self.assertGreater(stats.errors, 0)
+        with patch("database.executor.DBExecutor", failing):
+            checkpoint = ReplayProgress("run_test", "EURUSD", REPLAY_START, REPLAY_END).load()
+        # Still the checkpoint of the last successful flush before the failure
+        self.assertFalse(checkpoint.completed)
+        self.assertLess(len(failing.signals), len(expected[0]))
+
+        self._replay(failing, resume=True)
+        self.assertEqual(failing.committed_results(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
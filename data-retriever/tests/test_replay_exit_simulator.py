@@ -0,0 +1,153 @@
+"""Unit tests for the vectorized replay exit simulator."""
+import os
+import random
+import sys
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.exit_simulator import ExitSimulationRow, ExitSimulator, SL_MODEL_RULES
+from replay.path_extremes import PathExtremeRow
+from replay.sl_geometry import SLGeometryData
+
+RR_GRID = [1, 1.5, 2, 2.5, 3]
+
+
+def reference_simulate_one(path, sl_model, rr_multiple, sl_atr, tp_atr):
+    """The original bar-by-bar simulation, kept as the behavioural reference."""
+    bars_to_sl_hit = None
+    bars_to_tp_hit = None
+    mfe_atr = 0.0
+    mae_atr = 0.0
+    is_bad_pre48 = False
+
+    for row in path:
+        if row.mfe_atr_high_low is not None:
+            mfe_atr = max(mfe_atr, row.mfe_atr_high_low)
+        if row.mae_atr_high_low is not None:
+            mae_atr = min(mae_atr, row.mae_atr_high_low)
+        if bars_to_sl_hit is None and row.mae_atr_high_low is not None:
+            if row.mae_atr_high_low <= -sl_atr:
+                bars_to_sl_hit = row.bar_index
+        if bars_to_tp_hit is None and row.mfe_atr_high_low is not None:
+            if row.mfe_atr_high_low >= tp_atr:
+                bars_to_tp_hit = row.bar_index
+        if row.bar_index <= 48 and row.mae_atr_high_low is not None:
+            if row.mae_atr_high_low <= -sl_atr:
+                is_bad_pre48 = True
+
+    if bars_to_sl_hit is not None and bars_to_tp_hit is not None:
+        if bars_to_sl_hit <= bars_to_tp_hit:
+            exit_reason, exit_bar = "SL", bars_to_sl_hit
+        else:
+            exit_reason, exit_bar = "TP", bars_to_tp_hit
+    elif bars_to_sl_hit is not None:
+        exit_reason, exit_bar = "SL", bars_to_sl_hit
+    elif bars_to_tp_hit is not None:
+        exit_reason, exit_bar = "TP", bars_to_tp_hit
+    else:
+        exit_reason, exit_bar = "TIMEOUT", len(path)
+
+    if exit_reason == "SL":
+        return_atr = -sl_atr
+    elif exit_reason == "TP":
+        return_atr = tp_atr
+    else:
+        return_atr = path[-1].return_atr_at_bar if path else 0.0
+
+    return ExitSimulationRow(
+        sl_model=sl_model,
+        rr_multiple=rr_multiple,
+        sl_atr=sl_atr,
+        tp_atr=tp_atr,
+        exit_reason=exit_reason,
+        exit_bar=exit_bar,
+        return_atr=return_atr,
+        return_r=return_atr / sl_atr,
+        mfe_atr=mfe_atr,
+        mae_atr=mae_atr,
+        bars_to_sl_hit=bars_to_sl_hit,
+        bars_to_tp_hit=bars_to_tp_hit,
+        is_bad_pre48=is_bad_pre48,
+    )
+
+
+def random_path(rng: random.Random, bars: int):
+    rows = []
+    price = 0.0
+    mfe_hl, mae_hl = float("-inf"), float("inf")
+    for bar in range(1, bars + 1):
+        price += rng.gauss(0, 0.4)
+        mfe_hl = max(mfe_hl, price + abs(rng.gauss(0, 0.3)))
+        mae_hl = min(mae_hl, price - abs(rng.gauss(0, 0.3)))
+        missing = rng.random() < 0.03
+        rows.append(PathExtremeRow(
+            bar_index=bar,
+            return_atr_at_bar=price,
+            mfe_atr_to_here=mfe_hl,
+            mae_atr_to_here=mae_hl,
+            mfe_atr_high_low=None if missing else mfe_hl,
+            mae_atr_high_low=None if missing else mae_hl,
+        ))
+    return rows
+
+
+def random_geometry(rng: random.Random) -> SLGeometryData:
+    return SLGeometryData(
+        direction="bullish",
+        aoi_far_edge_atr=rng.uniform(-0.2, 2.5),
+        aoi_near_edge_atr=rng.uniform(-0.2, 1.0),
+        aoi_height_atr=1.0,
+        aoi_age_bars=None,
+        signal_candle_opposite_extreme_atr=rng.uniform(0.0, 1.5),
+        signal_candle_range_atr=1.0,
+        signal_candle_body_atr=0.5,
+    )
+
+
+class TestExitSimulator(unittest.TestCase):
+
+    def test_matches_bar_by_bar_reference_on_full_grid(self):
+        rng = random.Random(5)
+        models = list(SL_MODEL_RULES) + ["SL_UNKNOWN"]
+        for _ in range(200):
+            path = random_path(rng, rng.choice([0, 1, 30, 96]))
+            simulator = ExitSimulator(random_geometry(rng), path, models, RR_GRID)
+
+            expected = []
+            for sl_model in models:
+                sl_atr = simulator._resolve_sl(sl_model)
+                if sl_atr is None or sl_atr <= 0:
+                    continue
+                for rr in RR_GRID:
+                    expected.append(reference_simulate_one(path, sl_model, rr, sl_atr, sl_atr * rr))
+
+            self.assertEqual(simulator.simulate_all(), expected)
+
+    def test_resolves_sl_models(self):
+        geometry = random_geometry(random.Random(1))
+        simulator = ExitSimulator(geometry, [])
+        self.assertEqual(simulator._resolve_sl("SL_ATR_0_3"), 0.3)
+        self.assertEqual(simulator._resolve_sl("SL_AOI_FAR"), geometry.aoi_far_edge_atr)
+        self.assertEqual(
+            simulator._resolve_sl("SL_SIGNAL_CANDLE_PLUS_0_25"),
+            geometry.signal_candle_opposite_extreme_atr + 0.25,
+        )
+        self.assertEqual(
+            simulator._resolve_sl("SL_MAX_AOI_ATR_1_0"), max(geometry.aoi_far_edge_atr, 1.0)
+        )
+        self.assertIsNone(simulator._resolve_sl("SL_UNKNOWN"))
+
+    def test_rows_hold_plain_python_values(self):
+        rng = random.Random(9)
+        rows = ExitSimulator(random_geometry(rng), random_path(rng, 96),
+                             ["SL_ATR_0_5"], RR_GRID).simulate_all()
+        for row in rows:
+            self.assertIs(type(row.exit_bar), int)
+            self.assertIs(type(row.is_bad_pre48), bool)
+            self.assertIn(type(row.bars_to_sl_hit), (int, type(None)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Unit tests for the replay feature store."""
+import os
+import sys
+import unittest
+from datetime import timedelta
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.config import LOOKBACK_1H
+from replay.feature_store import FEATURES, register_feature, session_bucket_for_hour
+from replay_fixtures import random_candles
+
+
+def _store() -> CandleStore:
+    store = CandleStore("EURUSD")
+    store._candles["1H"] = TimeframeCandles("1H", random_candles(500, 1, "h", start="2025-01-06", wick=0.0005, open_gap=0))
+    store._candles["1D"] = TimeframeCandles("1D", random_candles(30, 2, "D", start="2025-01-06", wick=0.0005, open_gap=0))
+    return store
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = _store()
+        self.features = self.store.features
+
+    def test_builtin_columns(self):
+        frame = self.store.get_1h_candles().candles
+        np.testing.assert_array_equal(self.features.get("body"), (frame["close"] - frame["open"]).abs())
+        np.testing.assert_array_equal(self.features.get("range"), frame["high"] - frame["low"])
+        self.assertEqual(list(self.features.get("hour_utc")), [t.hour for t in frame["time"]])
+        self.assertEqual(list(self.features.get("session_bucket")),
+                         [session_bucket_for_hour(t.hour) for t in frame["time"]])
+
+        candles_1h = self.store.get_1h_candles()
+        atr = self.features.get("atr")
+        for index in (0, LOOKBACK_1H, 250, 499):
+            self.assertEqual(atr[index], candles_1h.atr_at(index, LOOKBACK_1H))
+
+    def test_session_buckets(self):
+        buckets = [session_bucket_for_hour(hour) for hour in range(24)]
+        self.assertEqual(buckets[3:8], ["post_ny", "pre_london", "pre_london", "pre_london", "london"])
+        self.assertEqual(buckets[11:13], ["london", "ny"])
+        self.assertEqual(buckets[16:18], ["ny", "post_ny"])
+
+    def test_value_at_reads_last_candle_at_or_before_time(self):
+        daily = self.store.get_1d_candles().candles
+        as_of = daily["time"].iloc[25].to_pydatetime() + timedelta(hours=5)
+
+        high = self.features.value_at("high", "1D", as_of)
+        self.assertIs(type(high), float)
+        self.assertEqual(high, daily["high"].iloc[25])
+        self.assertEqual(self.features.value_at("high_max_20", "1D", as_of),
+                         daily["high"].iloc[6:26].max())
+        self.assertEqual(self.features.value_at("low_min_12", "1D", as_of),
+                         daily["low"].iloc[14:26].min())
+        self.assertTrue(np.isnan(self.features.value_at("high_max_20", "1D", daily["time"].iloc[5])))
+        self.assertIsNone(self.features.value_at("high", "1D", daily["time"].iloc[0] - timedelta(days=1)))
+
+    def test_candle_at(self):
+        frame = self.store.get_1h_candles().candles
+        self.assertEqual(self.features.candle_at(10),
+                         {key: float(frame[key].iloc[10]) for key in ("open", "high", "low", "close")})
+        self.assertIsNone(self.features.candle_at(500))
+        self.assertIsNone(self.features.candle_at(-1))
+
+    def test_dependencies_are_resolved_and_cached(self):
+        calls = []
+
+        @register_feature("_test_body_share", depends_on=("body", "range"))
+        def _body_share(candles, bodies, ranges):
+            calls.append(candles.timeframe)
+            return bodies / ranges
+        self.addCleanup(FEATURES.pop, "_test_body_share")
+
+        share = self.features.get("_test_body_share")
+        np.testing.assert_array_equal(share, self.features.get("body") / self.features.get("range"))
+        self.assertIs(self.features.get("_test_body_share"), share)
+        self.features.get("_test_body_share", "1D")
+        self.assertEqual(calls, ["1H", "1D"])
+
+        # Reloading a timeframe drops only that timeframe's columns
+        frame = self.store.get_1h_candles().candles
+        self.store._fetch_and_store("1H", len(frame), lambda *args: frame, None)
+        self.features.get("_test_body_share")
+        self.features.get("_test_body_share", "1D")
+        self.assertEqual(calls, ["1H", "1D", "1H"])
+
+    def test_unknown_and_circular_features(self):
+        with self.assertRaises(KeyError):
+            self.features.get("no_such_feature")
+
+        register_feature("_test_loop_a", depends_on=("_test_loop_b",))(lambda candles, b: b)
+        register_feature("_test_loop_b", depends_on=("_test_loop_a",))(lambda candles, a: a)
+        self.addCleanup(FEATURES.pop, "_test_loop_a")
+        self.addCleanup(FEATURES.pop, "_test_loop_b")
+        with self.assertRaises(ValueError):
+            self.features.get("_test_loop_a")
+        with self.assertRaises(ValueError):
+            register_feature("body")(lambda candles: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Unit tests for the Parquet replay sink."""
+import os
+import re
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import runner
+from replay.checkpoint import make_run_id
+from replay.file_sink import BATCH_TABLES, TABLE_COLUMNS, ParquetResultSink, parse_sink_spec
+from replay_fixtures import REPLAY_END, REPLAY_START, make_replay_store
+
+
+def _signal_row(symbol: str, signal_time: datetime) -> tuple:
+    return (
+        symbol, signal_time, "bullish", "bullish", "bullish", "bearish", 2,
+        "4H", 1.09, 1.095, "tradable", 1.1, 0.001, 3.5, "scored", True,
+        "LAST", "LAST", "1W", 0.4, 1, signal_time.hour, "london", None,
+        "EURUSD_20240901_1000",
+    )
+
+
+class TestParquetResultSink(unittest.TestCase):
+
+    def test_columns_mirror_the_batch_inserts(self):
+        for sql, table in BATCH_TABLES.items():
+            inserted = re.search(r"INSERT INTO \S+\.(\w+) \((.*?)\)", sql, re.S)
+            self.assertEqual(inserted.group(1), table)
+            columns = [name.strip() for name in inserted.group(2).split(",")]
+            self.assertEqual([name for name, _ in TABLE_COLUMNS[table]], columns)
+
+    def test_parse_sink_spec(self):
+        self.assertIsNone(parse_sink_spec(None))
+        self.assertIsNone(parse_sink_spec("postgres"))
+        self.assertEqual(parse_sink_spec("parquet:out/run1"), "out/run1")
+        for spec in ("parquet:", "csv:out"):
+            with self.assertRaises(ValueError):
+                parse_sink_spec(spec)
+
+    def test_flush_writes_tables_and_ids_are_unique_per_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            eurusd = ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END, id_prefetch=2)
+            gbpusd = ParquetResultSink(tmp, "GBPUSD", REPLAY_START, REPLAY_END, id_prefetch=2)
+            ids = [
+                sink.add_signal(_signal_row(symbol, REPLAY_START))
+                for symbol, sink in (
+                    ("EURUSD", eurusd), ("GBPUSD", gbpusd), ("EURUSD", eurusd), ("EURUSD", eurusd),
+                )
+            ]
+            self.assertEqual(len(set(ids)), 4)
+
+            eurusd.add_outcome(ids[0], (72, 1.5, -0.5, 10, 3, "mfe"), [(3, 0.2), (6, 0.4)])
+            self.assertEqual(eurusd.flush(), 6)  # 3 signals + outcome + 2 returns
+            eurusd.add_signal(_signal_row("EURUSD", REPLAY_END))
+            eurusd.flush()
+            gbpusd.flush()
+
+            signals = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+            self.assertEqual(sorted(signals["id"]), sorted(ids + [ids[-1] + 1]))
+            self.assertEqual(str(signals["signal_time"].dt.tz), "UTC")
+            self.assertEqual(set(signals["symbol"]), {"EURUSD", "GBPUSD"})
+            outcomes = pd.read_parquet(os.path.join(tmp, "signal_outcome"))
+            self.assertEqual(outcomes["entry_signal_id"].tolist(), [ids[0]])
+            returns = pd.read_parquet(os.path.join(tmp, "checkpoint_return"))
+            self.assertEqual(returns["signal_outcome_id"].tolist(), outcomes["id"].tolist() * 2)
+
+            # Replaying the same run again replaces its files
+            rerun = ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END)
+            rerun.add_signal(_signal_row("EURUSD", REPLAY_START))
+            rerun.flush()
+            signals = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+            self.assertEqual(signals["symbol"].value_counts().to_dict(), {"EURUSD": 1, "GBPUSD": 1})
+
+    def test_runs_of_another_mode_or_id_are_kept(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sinks = [
+                ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END),
+                ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END, mode="portfolio"),
+                ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END, run_id="run_other"),
+            ]
+            for sink in sinks:
+                sink.add_signal(_signal_row("EURUSD", REPLAY_START))
+                sink.flush()
+
+            signals = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+            run_id = make_run_id(REPLAY_START, REPLAY_END)
+            self.assertEqual(
+                sorted(zip(signals["mode"].astype(str), signals["run"].astype(str))),
+                [("portfolio", run_id), ("replay", run_id), ("replay", "run_other")],
+            )
+
+    def test_failed_write_leaves_no_staged_files(self):
+        import pyarrow.parquet as pq
+
+        write_table = pq.write_table
+
+        def fail_on_outcomes(table, where):
+            if "signal_outcome" not in where:
+                return write_table(table, where)
+            with open(where, "wb") as f:
+                f.write(b"PAR1")
+            raise OSError("disk full")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = ParquetResultSink(tmp, "EURUSD", REPLAY_START, REPLAY_END)
+            signal_id = sink.add_signal(_signal_row("EURUSD", REPLAY_START))
+            sink.add_outcome(signal_id, (72, 1.5, -0.5, 10, 3, "mfe"), [(3, 0.2)])
+            with patch.object(pq, "write_table", side_effect=fail_on_outcomes):
+                with self.assertRaisesRegex(OSError, "disk full"):
+                    sink.flush()
+
+            written = [name for _, _, files in os.walk(tmp) for name in files]
+            self.assertFalse([name for name in written if name.endswith((".tmp", ".parquet"))])
+
+    def test_replay_writes_files_without_touching_the_database(self):
+        store = make_replay_store()
+        db = MagicMock(side_effect=AssertionError("database used"))
+        db.fetch_all.side_effect = AssertionError("database used")
+        db.execute_transaction.side_effect = AssertionError("database used")
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(runner, "load_symbol_candles", return_value=store), \
+                patch("database.executor.DBExecutor", db):
+            stats = runner._replay_symbol("EURUSD", REPLAY_START, REPLAY_END, output_dir=tmp)
+
+            signals = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+            outcomes = pd.read_parquet(os.path.join(tmp, "signal_outcome"))
+            extremes = pd.read_parquet(os.path.join(tmp, "signal_path_extremes"))
+
+        self.assertEqual(stats.errors, 0)
+        self.assertGreater(stats.signals_inserted, 0)
+        self.assertEqual(len(signals), stats.signals_inserted)
+        self.assertEqual(len(outcomes), stats.outcomes_computed)
+        self.assertTrue(set(outcomes["entry_signal_id"]) <= set(signals["id"]))
+        self.assertTrue(set(extremes["entry_signal_id"]) <= set(signals["id"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
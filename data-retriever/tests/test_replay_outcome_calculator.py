@@ -0,0 +1,113 @@
+"""Unit tests for the replay outcome queue."""
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.config import OUTCOME_WINDOW_BARS
+from replay.outcome_calculator import ReplayOutcomeCalculator, ReplayPendingSignal
+from replay_fixtures import random_candles
+
+
+def _store(count: int = 400, skip: int = 0) -> CandleStore:
+    """1H store over the same candles, optionally without the first `skip`."""
+    store = CandleStore("EURUSD")
+    frame = random_candles(count, seed=3).iloc[skip:].reset_index(drop=True)
+    store._candles["1H"] = TimeframeCandles("1H", frame)
+    return store
+
+
+def _signal(store: CandleStore, signal_id: int, index: int) -> ReplayPendingSignal:
+    time = store.get_1h_candles().candles["time"].iloc[index].to_pydatetime()
+    return ReplayPendingSignal(
+        signal_id, "EURUSD", time, "bullish",
+        entry_price=1.1, atr_1h=0.001, aoi_low=1.099, aoi_high=1.101,
+    )
+
+
+class TestReplayOutcomeQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.store = _store()
+        self.computed = []
+        patcher = patch.object(
+            ReplayOutcomeCalculator,
+            "_compute_and_persist_outcome",
+            lambda calc, signal, candles: self.computed.append((signal.id, len(candles))) or True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _calculator(self, store: CandleStore = None) -> ReplayOutcomeCalculator:
+        return ReplayOutcomeCalculator("EURUSD", store or self.store, MagicMock())
+
+    def test_outcomes_come_due_in_eligibility_order(self):
+        calculator = self._calculator()
+        for signal_id, index in ((1, 50), (2, 10), (3, 30)):
+            self.assertTrue(calculator.register_signal(_signal(self.store, signal_id, index)))
+
+        self.assertEqual(calculator.compute_eligible_outcomes(10 + OUTCOME_WINDOW_BARS - 1), 0)
+        self.assertEqual(calculator.compute_eligible_outcomes(30 + OUTCOME_WINDOW_BARS), 2)
+        self.assertEqual(self.computed, [(2, OUTCOME_WINDOW_BARS), (3, OUTCOME_WINDOW_BARS)])
+        self.assertEqual([signal.id for signal in calculator.snapshot()], [1])
+
+    def test_signal_is_registered_once(self):
+        calculator = self._calculator()
+        signal = _signal(self.store, 1, 20)
+        self.assertTrue(calculator.register_signal(signal))
+        self.assertFalse(calculator.register_signal(signal))
+        self.assertEqual(calculator.pending_count, 1)
+
+        calculator.compute_eligible_outcomes(len(self.store.get_1h_candles()) - 1)
+        self.assertEqual(self.computed, [(1, OUTCOME_WINDOW_BARS)])
+        # Once computed, the id may be queued again (e.g. by a recovery)
+        self.assertTrue(calculator.register_signal(signal))
+
+    def test_signal_without_enough_candles_stays_queued(self):
+        calculator = self._calculator()
+        last = len(self.store.get_1h_candles()) - 1
+        calculator.register_signal(_signal(self.store, 1, last - 10))
+
+        self.assertEqual(calculator.compute_eligible_outcomes(last + OUTCOME_WINDOW_BARS), 0)
+        self.assertEqual(self.computed, [])
+        # Still in the snapshot the final pass works from
+        self.assertEqual([signal.id for signal in calculator.snapshot()], [1])
+
+    def test_failed_outcome_stays_queued(self):
+        calculator = self._calculator()
+        for signal_id, index in ((1, 10), (2, 20)):
+            calculator.register_signal(_signal(self.store, signal_id, index))
+
+        def fail(calc, signal, candles):
+            raise RuntimeError("outcome failed")
+
+        with patch.object(ReplayOutcomeCalculator, "_compute_and_persist_outcome", fail):
+            with self.assertRaises(RuntimeError):
+                calculator.compute_eligible_outcomes(20 + OUTCOME_WINDOW_BARS)
+        self.assertEqual([signal.id for signal in calculator.snapshot()], [1, 2])
+
+        # Retried by the next step
+        self.assertEqual(calculator.compute_eligible_outcomes(20 + OUTCOME_WINDOW_BARS), 2)
+        self.assertEqual(calculator.pending_count, 0)
+
+    def test_restore_resolves_indices_in_the_new_store(self):
+        calculator = self._calculator()
+        calculator.register_signal(_signal(self.store, 1, 120))
+        pending = calculator.snapshot()
+        self.assertEqual(pending[0].signal_1h_index, 120)
+
+        # Reloaded with 100 fewer candles of history
+        reloaded = _store(skip=100)
+        resumed = self._calculator(reloaded)
+        self.assertEqual(resumed.restore(pending), 1)
+        self.assertEqual(resumed.snapshot()[0].signal_1h_index, 20)
+        self.assertEqual(resumed.compute_eligible_outcomes(20 + OUTCOME_WINDOW_BARS - 1), 0)
+        self.assertEqual(resumed.compute_eligible_outcomes(20 + OUTCOME_WINDOW_BARS), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Unit tests for the vectorized replay path extremes."""
+import os
+import random
+import sys
+import unittest
+from dataclasses import astuple
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TrendDirection
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.config import OUTCOME_WINDOW_BARS
+from replay.exit_simulator import ExitSimulator
+from replay.path_extremes import (
+    PathExtremeRow,
+    PathExtremes,
+    PathExtremesCalculator,
+    path_extreme_params,
+)
+from replay.sl_geometry import SLGeometryData
+
+
+def reference_path(store, entry_idx, entry_price, atr, direction):
+    """The original candle-by-candle loop, kept as the behavioural reference."""
+    if atr <= 0:
+        return []
+    candles_1h = store.get_1h_candles()
+    max_idx = len(candles_1h.candles) - 1
+    is_long = direction == TrendDirection.BULLISH
+
+    results = []
+    running = [float("-inf"), float("inf"), float("-inf"), float("inf")]
+    for bar_idx in range(1, OUTCOME_WINDOW_BARS + 1):
+        candle_idx = entry_idx + bar_idx
+        if candle_idx > max_idx:
+            break
+        candle = candles_1h.get_candle_at_index(candle_idx)
+        close, high, low = float(candle["close"]), float(candle["high"]), float(candle["low"])
+        if is_long:
+            ret = (close - entry_price) / atr
+            bar_mfe = (high - entry_price) / atr
+            bar_mae = (low - entry_price) / atr
+        else:
+            ret = (entry_price - close) / atr
+            bar_mfe = (entry_price - low) / atr
+            bar_mae = (entry_price - high) / atr
+        running = [
+            max(running[0], ret), min(running[1], ret),
+            max(running[2], bar_mfe), min(running[3], bar_mae),
+        ]
+        results.append(PathExtremeRow(bar_idx, ret, *running))
+    return results
+
+
+def _store(count: int) -> CandleStore:
+    rng = np.random.default_rng(4)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    store = CandleStore("EURUSD")
+    store._candles["1H"] = TimeframeCandles("1H", pd.DataFrame({
+        "time": pd.date_range("2025-01-01", periods=count, freq="h", tz="UTC"),
+        "open": opens,
+        "high": np.maximum(opens, closes) + np.abs(rng.normal(0, 0.0005, count)),
+        "low": np.minimum(opens, closes) - np.abs(rng.normal(0, 0.0005, count)),
+        "close": closes,
+    }))
+    return store
+
+
+class TestPathExtremesCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.store = _store(400)
+
+    def test_matches_candle_loop(self):
+        rng = random.Random(2)
+        for _ in range(100):
+            # Includes entries near the end of the store (short paths)
+            entry_idx = rng.randrange(0, 400)
+            direction = rng.choice([TrendDirection.BULLISH, TrendDirection.BEARISH])
+            entry_price = float(self.store.get_1h_candles().closes[entry_idx])
+            atr = rng.choice([0.0, 0.0012, 0.003])
+
+            path = PathExtremesCalculator(self.store, entry_idx, entry_price, atr, direction).compute()
+            expected = reference_path(self.store, entry_idx, entry_price, atr, direction)
+
+            self.assertEqual(list(path), expected)
+            self.assertEqual(
+                path_extreme_params(7, path),
+                [(7, *astuple(row)) for row in expected],
+            )
+
+    def test_rows_are_built_lazily_with_python_types(self):
+        path = PathExtremesCalculator(
+            self.store, 10, 1.1, 0.001, TrendDirection.BULLISH
+        ).compute()
+        self.assertIsInstance(path, PathExtremes)
+        self.assertEqual(len(path), OUTCOME_WINDOW_BARS)
+        last = path[-1]
+        self.assertIs(type(last.bar_index), int)
+        self.assertIs(type(last.mae_atr_high_low), float)
+        self.assertEqual(path[1:3], [path[1], path[2]])
+
+    def test_exit_simulator_reads_arrays_directly(self):
+        path = PathExtremesCalculator(
+            self.store, 50, 1.1, 0.001, TrendDirection.BEARISH
+        ).compute()
+        geometry = SLGeometryData("bearish", 1.0, 0.2, 0.8, None, 0.6, 1.0, 0.4)
+        self.assertEqual(
+            ExitSimulator(geometry, path).simulate_all(),
+            ExitSimulator(geometry, list(path)).simulate_all(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Unit tests for portfolio replay under the live trade limits."""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import runner
+from replay.candle_store import TimeframeCandles
+from replay.outcome_calculator import ReplayPendingSignal
+from replay.portfolio import PortfolioConstraints
+from replay_fixtures import REPLAY_END, REPLAY_START, make_replay_store
+
+_T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _flat_candles(highs: list, lows: list) -> TimeframeCandles:
+    return TimeframeCandles("1H", pd.DataFrame({
+        "time": pd.date_range(_T0, periods=len(highs), freq="h"),
+        "open": 1.0,
+        "high": highs,
+        "low": lows,
+        "close": 1.0,
+    }))
+
+
+def _signal(symbol: str, hours: int, direction: str = "bullish", signal_id: int = 1) -> ReplayPendingSignal:
+    # Entry 1.0, far AOI edge 0.1 ATR away: SL 0.35 ATR, TP 0.7 ATR (RR 2)
+    return ReplayPendingSignal(
+        signal_id, symbol, _T0 + timedelta(hours=hours), direction,
+        entry_price=1.0, atr_1h=0.01, aoi_low=0.999, aoi_high=1.001,
+    )
+
+
+class _RecordingPortfolio(PortfolioConstraints):
+    """Keeps every position it opens."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.positions = []
+
+    def open(self, signal, candles_1h):
+        position = super().open(signal, candles_1h)
+        self.positions.append(position)
+        return position
+
+
+class TestPortfolioConstraints(unittest.TestCase):
+
+    def test_position_closes_on_first_sl_or_tp_hit(self):
+        # Long: SL at 0.9965, TP at 1.007; the TP is reached at hour 3
+        candles = _flat_candles([1.001, 1.002, 1.003, 1.008, 1.0], [0.999] * 5)
+        portfolio = PortfolioConstraints(max_active_trades=5, min_interval_minutes=0)
+        position = portfolio.open(_signal("EURUSD", 0), candles)
+        self.assertEqual(position.close_ns, pd.Timestamp(_T0 + timedelta(hours=3)).value)
+        self.assertEqual(len(portfolio.active_positions(_T0 + timedelta(hours=2))), 1)
+        self.assertEqual(portfolio.active_positions(_T0 + timedelta(hours=3)), [])
+
+        # Short: SL at 1.0035, the hit on the signal candle itself does not count
+        candles = _flat_candles([1.004, 1.001, 1.004], [0.999] * 3)
+        position = portfolio.open(_signal("GBPUSD", 0, "bearish"), candles)
+        self.assertEqual(position.close_ns, pd.Timestamp(_T0 + timedelta(hours=2)).value)
+
+    def test_global_limit_counts_positions_across_symbols(self):
+        candles = _flat_candles([1.001] * 10, [0.999] * 10)  # Never hits SL/TP
+        portfolio = PortfolioConstraints(max_active_trades=2, min_interval_minutes=0)
+        for symbol in ("EURUSD", "GBPUSD"):
+            self.assertTrue(portfolio.admit(symbol, _T0))
+            portfolio.open(_signal(symbol, 0), candles)
+
+        self.assertFalse(portfolio.admit("USDJPY", _T0 + timedelta(hours=5)))
+        # Another AOI of a scan that already opened a trade is still admitted
+        self.assertTrue(portfolio.admit("EURUSD", _T0))
+        self.assertEqual((portfolio.blocked_global, portfolio.blocked_interval), (1, 0))
+
+    def test_position_without_a_hit_closes_at_the_max_hold(self):
+        candles = _flat_candles([1.001] * 10, [0.999] * 10)  # Never hits SL/TP
+        portfolio = PortfolioConstraints(max_active_trades=1, min_interval_minutes=0, max_hold_bars=4)
+        position = portfolio.open(_signal("EURUSD", 0), candles)
+        self.assertTrue(position.timed_out)
+        self.assertEqual(position.close_ns, pd.Timestamp(_T0 + timedelta(hours=4)).value)
+        self.assertFalse(portfolio.admit("GBPUSD", _T0 + timedelta(hours=3)))
+        self.assertTrue(portfolio.admit("GBPUSD", _T0 + timedelta(hours=4)))
+
+        # Data ending inside the hold closes the position at the last candle
+        position = portfolio.open(_signal("USDJPY", 7), candles)
+        self.assertEqual(position.close_ns, pd.Timestamp(_T0 + timedelta(hours=9)).value)
+
+    def test_blocked_signal_counts_once_for_all_its_aois(self):
+        candles = _flat_candles([1.001] * 10, [0.999] * 10)
+        portfolio = PortfolioConstraints(max_active_trades=1, min_interval_minutes=600)
+        portfolio.open(_signal("EURUSD", 0), candles)
+        for _ in range(3):  # Three AOIs with a pattern on the same candle
+            self.assertFalse(portfolio.admit("GBPUSD", _T0 + timedelta(hours=2)))
+        self.assertFalse(portfolio.admit("GBPUSD", _T0 + timedelta(hours=3)))
+        self.assertEqual(portfolio.blocked_global, 2)
+
+        portfolio = PortfolioConstraints(max_active_trades=5, min_interval_minutes=600)
+        portfolio.open(_signal("EURUSD", 0), candles)
+        for _ in range(3):
+            self.assertFalse(portfolio.admit("EURUSD", _T0 + timedelta(hours=2)))
+        self.assertEqual(portfolio.blocked_interval, 1)
+
+    def test_symbol_interval_counts_closed_trades(self):
+        candles = _flat_candles([1.001, 1.01, 1.0, 1.0, 1.0], [0.999] * 5)  # TP at hour 1
+        portfolio = PortfolioConstraints(max_active_trades=5, min_interval_minutes=210)
+        portfolio.open(_signal("EURUSD", 0), candles)
+
+        self.assertFalse(portfolio.admit("EURUSD", _T0 + timedelta(hours=3)))
+        self.assertTrue(portfolio.admit("GBPUSD", _T0 + timedelta(hours=3)))
+        self.assertTrue(portfolio.admit("EURUSD", _T0 + timedelta(hours=4)))
+        self.assertEqual(portfolio.blocked, 1)
+
+
+class TestPortfolioReplay(unittest.TestCase):
+
+    def _replay(self, portfolio: PortfolioConstraints, output_dir: str) -> runner.ReplayStats:
+        stores = {symbol: make_replay_store(symbol, seed) for symbol, seed in self.symbols.items()}
+        db = MagicMock(side_effect=AssertionError("database used"))
+        db.fetch_all.side_effect = AssertionError("database used")
+        with patch.object(runner, "load_symbol_candles", side_effect=lambda symbol, *args: stores[symbol]), \
+                patch.object(runner, "PortfolioConstraints", return_value=portfolio), \
+                patch("database.executor.DBExecutor", db):
+            return runner._replay_portfolio(list(self.symbols), REPLAY_START, REPLAY_END, output_dir=output_dir)
+
+    def setUp(self):
+        self.symbols = {"EURUSD": 6, "GBPUSD": 20, "AUDUSD": 21, "NZDUSD": 22}
+
+    def test_unconstrained_portfolio_matches_per_symbol_replays(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = self._replay(PortfolioConstraints(max_active_trades=100, min_interval_minutes=0), tmp)
+            together = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+
+        separate = []
+        for symbol, seed in self.symbols.items():
+            with tempfile.TemporaryDirectory() as tmp, \
+                    patch.object(runner, "load_symbol_candles", return_value=make_replay_store(symbol, seed)):
+                runner._replay_symbol(symbol, REPLAY_START, REPLAY_END, output_dir=tmp)
+                separate.append(pd.read_parquet(os.path.join(tmp, "entry_signal")))
+        separate = pd.concat(separate)
+
+        self.assertEqual(stats.errors, 0)
+        self.assertEqual(stats.signals_blocked, 0)
+        self.assertGreater(len(set(together["symbol"])), 1)
+        columns = ["symbol", "signal_time", "direction", "aoi_low", "aoi_high", "trade_id"]
+        self.assertEqual(
+            sorted(together[columns].itertuples(index=False)),
+            sorted(separate[columns].itertuples(index=False)),
+        )
+
+    def test_limits_apply_across_symbols(self):
+        portfolio = _RecordingPortfolio(max_active_trades=1, min_interval_minutes=240)
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = self._replay(portfolio, tmp)
+            signals = pd.read_parquet(os.path.join(tmp, "entry_signal"))
+            outcomes = pd.read_parquet(os.path.join(tmp, "signal_outcome"))
+
+        self.assertEqual(stats.errors, 0)
+        self.assertGreater(stats.signals_blocked, 0)
+        self.assertEqual(stats.signals_blocked, portfolio.blocked)
+        self.assertEqual(len(signals), stats.signals_inserted)
+        self.assertEqual(portfolio.trades_opened, stats.signals_inserted)
+        self.assertEqual(len(outcomes), stats.outcomes_computed)
+
+        # With one slot, a scan only opens trades once every earlier trade is closed
+        scans = sorted({(position.open_ns, position.symbol): position for position in portfolio.positions}.items())
+        for (_, earlier), (_, later) in zip(scans, scans[1:]):
+            self.assertIsNotNone(earlier.close_ns)
+            self.assertGreaterEqual(later.open_ns, earlier.close_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
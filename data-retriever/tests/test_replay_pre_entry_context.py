@@ -0,0 +1,155 @@
+"""Unit tests for the precomputed pre-entry context (V1)."""
+import os
+import random
+import sys
+import unittest
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TrendDirection
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.config import (
+    PRE_ENTRY_IMPULSE_BARS,
+    PRE_ENTRY_LARGE_BAR_WINDOW,
+    PRE_ENTRY_LONG_ATR_WINDOW,
+    PRE_ENTRY_LOOKBACK_BARS,
+)
+from replay.pre_entry_context import PreEntryContextCalculator, PreEntryContextData
+
+
+def _mean_true_range(window: pd.DataFrame):
+    highs, lows, closes = window["high"].values, window["low"].values, window["close"].values
+    prev_closes = np.roll(closes, 1)
+    true_ranges = np.maximum(highs - lows, np.maximum(np.abs(highs - prev_closes),
+                                                      np.abs(lows - prev_closes)))[1:]
+    return float(np.mean(true_ranges)) if len(true_ranges) else None
+
+
+def reference_context(frame, signal_time, direction, aoi_low, aoi_high):
+    """The original per-signal DataFrame computation, kept as the behavioural reference."""
+    is_long = direction == TrendDirection.BULLISH
+    before = frame[frame["time"] < signal_time]
+    if len(before) < PRE_ENTRY_LOOKBACK_BARS:
+        return None
+    main = before.tail(PRE_ENTRY_LOOKBACK_BARS)
+    long_window = before.tail(PRE_ENTRY_LONG_ATR_WINDOW)
+    impulse = before.tail(PRE_ENTRY_IMPULSE_BARS)
+    large = before.tail(PRE_ENTRY_LARGE_BAR_WINDOW)
+
+    pre_atr = _mean_true_range(main)
+    if pre_atr is None or pre_atr <= 0:
+        return None
+    sign = 1 if is_long else -1
+    opens, highs, lows, closes = (main[c].values for c in ("open", "high", "low", "close"))
+
+    ctx = PreEntryContextData(PRE_ENTRY_LOOKBACK_BARS, PRE_ENTRY_IMPULSE_BARS, pre_atr=pre_atr)
+    if len(long_window) >= PRE_ENTRY_LONG_ATR_WINDOW // 2:
+        long_atr = _mean_true_range(long_window)
+        if long_atr and long_atr > 0:
+            ctx.pre_atr_ratio = pre_atr / long_atr
+    total_range = main["high"].max() - main["low"].min()
+    ctx.pre_range_atr = float(total_range / pre_atr)
+    ctx.pre_range_to_atr_ratio = ctx.pre_range_atr / PRE_ENTRY_LOOKBACK_BARS
+
+    ctx.pre_net_move_atr = float(sign * (main.iloc[-1]["close"] - main.iloc[0]["open"]) / pre_atr)
+    ctx.pre_total_move_atr = float(np.sum(np.abs(closes - opens))) / pre_atr
+    if ctx.pre_total_move_atr > 0:
+        ctx.pre_efficiency = abs(ctx.pre_net_move_atr) / ctx.pre_total_move_atr
+    counter = np.sum(closes < opens) if is_long else np.sum(closes > opens)
+    ctx.pre_counter_bar_ratio = float(counter / len(main))
+
+    inside = (highs >= aoi_low) & (lows <= aoi_high)
+    ctx.pre_bars_in_aoi = int(np.sum(inside))
+    touches, was_inside = 0, False
+    for is_inside in inside:
+        if is_inside and not was_inside:
+            touches += 1
+        was_inside = is_inside
+    ctx.pre_aoi_touch_count = touches
+    last_close = main.iloc[-1]["close"]
+    ctx.pre_last_touch_distance_atr = float(
+        min(abs(last_close - aoi_low), abs(last_close - aoi_high)) / pre_atr)
+
+    raw_impulse = sign * (impulse.iloc[-1]["close"] - impulse.iloc[0]["open"])
+    ctx.pre_impulse_net_atr = float(raw_impulse / pre_atr)
+    impulse_move = float(np.sum(np.abs(impulse["close"].values - impulse["open"].values)))
+    if impulse_move > 0:
+        ctx.pre_impulse_efficiency = float(abs(raw_impulse) / impulse_move)
+
+    avg_body = float(np.mean(np.abs(closes - opens)))
+    if avg_body > 0:
+        large_bodies = np.abs(large["close"].values - large["open"].values)
+        ctx.pre_large_bar_ratio = float(np.sum(large_bodies > avg_body) / len(large))
+
+    total_overlap = 0.0
+    for i in range(1, len(main)):
+        total_overlap += max(0.0, min(highs[i], highs[i - 1]) - max(lows[i], lows[i - 1]))
+    micro_range = highs.max() - lows.min()
+    if micro_range > 0:
+        ctx.pre_overlap_ratio = float(total_overlap / micro_range)
+        total_wick = float(np.sum(highs - np.maximum(opens, closes))
+                           + np.sum(np.minimum(opens, closes) - lows))
+        ctx.pre_wick_ratio = float(total_wick / micro_range)
+    return ctx
+
+
+def make_store(count: int, seed: int, tick: float = 0.0) -> CandleStore:
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    highs = np.maximum(opens, closes) + np.abs(rng.normal(0, 0.0005, count))
+    lows = np.minimum(opens, closes) - np.abs(rng.normal(0, 0.0005, count))
+    if tick:
+        opens, highs, lows, closes = (np.round(a / tick) * tick for a in (opens, highs, lows, closes))
+    store = CandleStore("EURUSD")
+    store._candles["1H"] = TimeframeCandles("1H", pd.DataFrame({
+        "time": pd.date_range("2025-01-06", periods=count, freq="h", tz="UTC"),
+        "open": opens, "high": highs, "low": lows, "close": closes,
+    }))
+    return store
+
+
+class TestPreEntryContextCalculator(unittest.TestCase):
+
+    def _check(self, store, seed, cases):
+        rng = random.Random(seed)
+        frame = store.get_1h_candles().candles
+        for _ in range(cases):
+            # Covers too-short history, partial and full long ATR windows
+            idx = rng.randrange(0, len(frame))
+            signal_time = frame["time"].iloc[idx].to_pydatetime()
+            if rng.random() < 0.2:
+                signal_time += timedelta(minutes=30)
+            anchor = float(frame["close"].iloc[max(0, idx - rng.randrange(1, 20))])
+            aoi_low = anchor - rng.uniform(0.0, 0.002)
+            aoi_high = anchor + rng.uniform(0.0, 0.002)
+            direction = rng.choice([TrendDirection.BULLISH, TrendDirection.BEARISH])
+
+            actual = PreEntryContextCalculator(store, signal_time, direction, aoi_low, aoi_high).compute()
+            expected = reference_context(frame, signal_time, direction, aoi_low, aoi_high)
+            self.assertEqual(actual, expected)
+
+    def test_matches_dataframe_computation(self):
+        self._check(make_store(600, seed=1), seed=4, cases=400)
+
+    def test_matches_with_flat_and_tied_candles(self):
+        # Coarse ticks give zero-body bars, equal highs/lows and exact AOI-edge touches
+        self._check(make_store(300, seed=2, tick=0.0005), seed=5, cases=300)
+
+    def test_features_are_built_once_and_reset_on_reload(self):
+        store = make_store(100, seed=3)
+        features = store.get_pre_entry_features()
+        self.assertIs(store.get_pre_entry_features(), features)
+
+        frame = store.get_1h_candles().candles
+        store._fetch_and_store("1H", len(frame), lambda *args: frame, None)
+        self.assertIsNot(store.get_pre_entry_features(), features)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+"""Unit tests for the vectorized pre-entry context V2 kernels."""
+import os
+import random
+import sys
+import unittest
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TrendDirection
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.config import (
+    PRE_ENTRY_V2_IMPULSE_LOOKBACK,
+    PRE_ENTRY_V2_IMPULSE_THRESHOLD_ATR,
+    PRE_ENTRY_V2_LARGE_BAR_MULTIPLIER,
+)
+from replay.pre_entry_context_v2 import PreEntryContextV2Calculator
+
+FLIP_LOOKBACK = {"4H": (lambda s: s.get_4h_candles(), 50),
+                 "1D": (lambda s: s.get_1d_candles(), 30),
+                 "1W": (lambda s: s.get_1w_candles(), 20)}
+
+
+# -----------------------------------------------------------------------------
+# The original row-by-row loops, kept as the behavioural reference
+# -----------------------------------------------------------------------------
+
+def reference_count_impulses(candles, atr, is_long):
+    if len(candles) < 2:
+        return 0
+    threshold = PRE_ENTRY_V2_IMPULSE_THRESHOLD_ATR * atr
+    impulse_count = 0
+    current_run = 0.0
+    for i in range(1, len(candles)):
+        move = float(candles.iloc[i]["close"]) - float(candles.iloc[i - 1]["close"])
+        if not is_long:
+            move = -move
+        if move > 0:
+            current_run += move
+        else:
+            if current_run >= threshold:
+                impulse_count += 1
+            current_run = 0.0
+    if current_run >= threshold:
+        impulse_count += 1
+    return impulse_count
+
+
+def reference_aoi_freshness(candles_1h, retest_time, aoi_low, aoi_high, atr, is_long):
+    result = {"bars_since": None, "reaction": None}
+    candles = candles_1h[candles_1h["time"] < retest_time].copy()
+    if len(candles) < 2:
+        return result
+
+    last_touch_idx = None
+    for i in range(len(candles) - 1, -1, -1):
+        row = candles.iloc[i]
+        if ((row["low"] <= aoi_high and row["low"] >= aoi_low)
+                or (row["high"] <= aoi_high and row["high"] >= aoi_low)):
+            last_touch_idx = i
+            break
+    if last_touch_idx is None:
+        return result
+    result["bars_since"] = len(candles) - 1 - last_touch_idx
+
+    exit_idx = None
+    for i in range(last_touch_idx + 1, len(candles)):
+        row = candles.iloc[i]
+        if row["high"] < aoi_low or row["low"] > aoi_high:
+            exit_idx = i
+            break
+    if exit_idx is None:
+        return result
+
+    next_touch_idx = None
+    for i in range(exit_idx + 1, len(candles)):
+        row = candles.iloc[i]
+        if row["high"] >= aoi_low and row["low"] <= aoi_high:
+            next_touch_idx = i
+            break
+
+    reaction_end = next_touch_idx if next_touch_idx else len(candles)
+    reaction_candles = candles.iloc[exit_idx:reaction_end]
+    exit_close = float(candles.iloc[exit_idx]["close"])
+    if is_long:
+        mfe = float(reaction_candles["high"].max()) - exit_close
+    else:
+        mfe = exit_close - float(reaction_candles["low"].min())
+    result["reaction"] = mfe / atr
+    return result
+
+
+def reference_momentum_chase(candles, entry_price, atr, is_long):
+    if len(candles) < 10:
+        return None
+    recent = candles.tail(50)
+    avg_body = float(np.mean(np.abs(recent["close"].values - recent["open"].values)))
+    if avg_body <= 0:
+        return None
+    threshold = PRE_ENTRY_V2_LARGE_BAR_MULTIPLIER * avg_body
+    for i in range(len(candles) - 1, -1, -1):
+        row = candles.iloc[i]
+        if abs(row["close"] - row["open"]) >= threshold:
+            is_bullish = row["close"] > row["open"]
+            if is_long == is_bullish:
+                return abs(entry_price - float(row["close"])) / atr
+    return None
+
+
+def reference_trend_flip_time(store, timeframe, signal_time, is_long):
+    getter, lookback = FLIP_LOOKBACK[timeframe]
+    tf_candles = getter(store).get_candles_up_to(signal_time)
+    if tf_candles is None or len(tf_candles) < 3:
+        return None
+    tf_candles = tf_candles.tail(lookback)
+    for i in range(len(tf_candles) - 2, 1, -1):
+        current, prev, prev2 = tf_candles.iloc[i], tf_candles.iloc[i - 1], tf_candles.iloc[i - 2]
+        if is_long:
+            if prev["low"] < prev2["low"] and current["low"] > prev["low"]:
+                return pd.Timestamp(current["time"]).to_pydatetime()
+        else:
+            if prev["high"] > prev2["high"] and current["high"] < prev["high"]:
+                return pd.Timestamp(current["time"]).to_pydatetime()
+    return pd.Timestamp(tf_candles.iloc[0]["time"]).to_pydatetime()
+
+
+# -----------------------------------------------------------------------------
+# Synthetic data
+# -----------------------------------------------------------------------------
+
+def make_frame(count: int, freq: str, seed: int, tick: float = 0.0) -> pd.DataFrame:
+    """Random-walk OHLC; a non-zero tick rounds prices to create ties."""
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.001, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    highs = np.maximum(opens, closes) + np.abs(rng.normal(0, 0.0005, count))
+    lows = np.minimum(opens, closes) - np.abs(rng.normal(0, 0.0005, count))
+    if tick:
+        opens, highs, lows, closes = (np.round(a / tick) * tick for a in (opens, highs, lows, closes))
+    return pd.DataFrame({
+        "time": pd.date_range("2025-01-06", periods=count, freq=freq, tz="UTC"),
+        "open": opens, "high": highs, "low": lows, "close": closes,
+    })
+
+
+def make_store(seed: int, tick: float = 0.0) -> CandleStore:
+    store = CandleStore("EURUSD")
+    for timeframe, freq, count in (("1H", "h", 2400), ("4H", "4h", 600),
+                                   ("1D", "D", 100), ("1W", "7D", 15)):
+        store._candles[timeframe] = TimeframeCandles(timeframe, make_frame(count, freq, seed, tick))
+    return store
+
+
+def make_calculator(store, signal_time, direction, entry_price, atr, aoi_low, aoi_high,
+                    retest_bars: int = 1) -> PreEntryContextV2Calculator:
+    return PreEntryContextV2Calculator(
+        candle_store=store,
+        signal_time=signal_time,
+        retest_time=signal_time - timedelta(hours=retest_bars),
+        direction=direction,
+        entry_price=entry_price,
+        atr_1h=atr,
+        aoi_low=aoi_low,
+        aoi_high=aoi_high,
+        aoi_timeframe="4H",
+        state=None,
+    )
+
+
+def random_case(rng: random.Random, store: CandleStore):
+    """A random signal with 1H history strictly before it and an AOI near price."""
+    frame = store.get_1h_candles().candles
+    signal_idx = rng.randrange(60, len(frame))
+    signal_time = frame["time"].iloc[signal_idx].to_pydatetime()
+    candles_before = frame.iloc[:signal_idx]
+    entry_price = float(frame["close"].iloc[signal_idx - 1])
+    anchor = float(frame["close"].iloc[signal_idx - rng.randrange(1, 60)])
+    aoi_low = anchor - rng.uniform(0.0, 0.002)
+    aoi_high = anchor + rng.uniform(0.0, 0.002)
+    calculator = make_calculator(
+        store, signal_time,
+        rng.choice([TrendDirection.BULLISH, TrendDirection.BEARISH]),
+        entry_price, rng.choice([0.0008, 0.0015, 0.003]),
+        aoi_low, aoi_high, retest_bars=rng.randrange(0, 4),
+    )
+    return calculator, candles_before
+
+
+class TestPreEntryContextV2Kernels(unittest.TestCase):
+
+    def _check_cases(self, store, seed, cases):
+        rng = random.Random(seed)
+        for _ in range(cases):
+            calc, candles = random_case(rng, store)
+            window = candles.tail(rng.choice([2, 10, PRE_ENTRY_V2_IMPULSE_LOOKBACK, 150]))
+
+            self.assertEqual(
+                calc._count_impulses(window),
+                reference_count_impulses(window, calc._atr_1h, calc._is_long),
+            )
+            self.assertEqual(
+                calc._compute_aoi_freshness(candles),
+                reference_aoi_freshness(candles, calc._retest_time, calc._aoi_low,
+                                        calc._aoi_high, calc._atr_1h, calc._is_long),
+            )
+            self.assertEqual(
+                calc._compute_momentum_chase(window),
+                reference_momentum_chase(window, calc._entry_price, calc._atr_1h, calc._is_long),
+            )
+            for timeframe in FLIP_LOOKBACK:
+                self.assertEqual(
+                    calc._find_trend_flip_time(timeframe),
+                    reference_trend_flip_time(store, timeframe, calc._signal_time, calc._is_long),
+                )
+
+    def test_matches_row_loops_on_random_walks(self):
+        self._check_cases(make_store(seed=1), seed=7, cases=150)
+
+    def test_matches_row_loops_with_price_ties(self):
+        # Coarse ticks give zero moves, equal lows/highs and exact AOI-edge touches
+        self._check_cases(make_store(seed=2, tick=0.0005), seed=8, cases=150)
+
+    def test_short_histories(self):
+        store = make_store(seed=3)
+        early = store.get_1w_candles().candles["time"].iloc[1].to_pydatetime()
+        calc = make_calculator(store, early, TrendDirection.BULLISH, 1.1, 0.001, 1.09, 1.11)
+        self.assertIsNone(calc._find_trend_flip_time("1W"))
+        self.assertIsNone(calc._find_trend_flip_time("1M"))
+
+        frame = store.get_1h_candles().candles
+        self.assertEqual(calc._count_impulses(frame.head(1)), 0)
+        self.assertIsNone(calc._compute_momentum_chase(frame.head(9)))
+        self.assertEqual(calc._compute_aoi_freshness(frame.head(1)),
+                         {"bars_since": None, "reaction": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
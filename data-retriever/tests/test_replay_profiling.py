@@ -0,0 +1,96 @@
+"""Unit tests for replay stage timings and per-symbol profiles."""
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.profiling import StageTimings, collect, profile_to, stage
+
+
+class TestStageTimings(unittest.TestCase):
+
+    def test_stages_are_noops_without_a_collector(self):
+        timings = StageTimings()
+        with stage("aligner"):
+            pass
+        self.assertEqual(timings.calls, {})
+
+        with collect(timings):
+            with stage("aligner"):
+                pass
+        with stage("aligner"):
+            pass
+        self.assertEqual(timings.calls, {"aligner": 1})
+
+    def test_nested_stage_time_is_exclusive(self):
+        timings = StageTimings()
+        with collect(timings):
+            with stage("pattern_scan"):
+                time.sleep(0.02)
+                with stage("db_writes"):
+                    time.sleep(0.05)
+            with stage("pattern_scan"):
+                pass
+
+        self.assertEqual(timings.calls, {"pattern_scan": 2, "db_writes": 1})
+        self.assertGreaterEqual(timings.seconds["db_writes"], 0.05)
+        self.assertLess(timings.seconds["pattern_scan"], 0.05)
+        self.assertAlmostEqual(
+            timings.total_seconds,
+            timings.seconds["pattern_scan"] + timings.seconds["db_writes"],
+        )
+
+    def test_stage_is_recorded_when_the_block_raises(self):
+        timings = StageTimings()
+        with collect(timings):
+            with self.assertRaises(ValueError):
+                with stage("outcomes"):
+                    raise ValueError("boom")
+            with stage("aligner"):
+                pass
+        self.assertEqual(timings.calls, {"outcomes": 1, "aligner": 1})
+
+    def test_merge_and_report(self):
+        worker_a = StageTimings()
+        worker_a.add("aligner", 1.0, calls=4)
+        worker_a.add("custom", 0.5)
+        worker_b = StageTimings()
+        worker_b.add("aligner", 2.0, calls=6)
+        worker_b.add("candle_load", 1.5)
+
+        merged = StageTimings()
+        merged.merge(worker_a)
+        merged.merge(worker_b)
+        self.assertEqual(merged.calls, {"aligner": 10, "custom": 1, "candle_load": 1})
+        self.assertAlmostEqual(merged.total_seconds, 5.0)
+
+        rows = merged.report().splitlines()
+        # Pipeline order first, unknown stages after, then the total
+        self.assertEqual([row.split()[0] for row in rows],
+                         ["Stage", "candle_load", "aligner", "custom", "total"])
+        self.assertIn("60.0%", rows[2])
+        self.assertIn("300.000", rows[2])
+        self.assertIn("no stage timings", StageTimings().report())
+
+
+class TestProfileTo(unittest.TestCase):
+
+    def test_writes_a_loadable_pstats_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profiles", "EURUSD.pstats")
+            with profile_to(path):
+                sorted(range(1000), key=lambda x: -x)
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_none_disables_profiling(self):
+        with profile_to(None):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Unit tests for the buffered replay result sink."""
+import itertools
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.result_sink import ReplayResultSink
+from replay.replay_queries import (
+    BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+    BATCH_INSERT_REPLAY_SIGNAL_OUTCOME,
+    BATCH_INSERT_EXIT_SIMULATIONS,
+    BATCH_MARK_REPLAY_OUTCOMES_COMPUTED,
+)
+
+_SIGNAL_TIME = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+
+
+class TestReplayResultSink(unittest.TestCase):
+
+    def setUp(self):
+        self._ids = itertools.count(1)
+        self.db = MagicMock()
+        self.db.fetch_all.side_effect = lambda sql, params, context: [
+            (next(self._ids),) for _ in range(params[0])
+        ]
+        self.cursor = MagicMock()
+        self.db.execute_transaction.side_effect = lambda work, context: work(self.cursor)
+
+        patcher = patch("database.executor.DBExecutor", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        values_patcher = patch("psycopg2.extras.execute_values")
+        self.execute_values = values_patcher.start()
+        self.addCleanup(values_patcher.stop)
+
+    def test_ids_are_prefetched_in_blocks(self):
+        sink = ReplayResultSink(flush_rows=1000, id_prefetch=10)
+        ids = [
+            sink.add_signal(("EURUSD", _SIGNAL_TIME + timedelta(hours=i)))
+            for i in range(12)
+        ]
+        self.assertEqual(len(set(ids)), 12)
+        self.assertEqual(self.db.fetch_all.call_count, 2)
+
+    def test_flush_writes_parents_first_in_one_transaction(self):
+        sink = ReplayResultSink(flush_rows=1000)
+        signal_id = sink.add_signal(("EURUSD", _SIGNAL_TIME))
+        sink.add_outcome(signal_id, (96, 1.0, -0.5, 3, 7, "mfe"))
+        sink.add_exit_simulations(signal_id, [(signal_id, "SL", 2.0)])
+
+        self.assertEqual(sink.flush(), 3)
+        self.assertEqual(self.db.execute_transaction.call_count, 1)
+        written = [c.args[1] for c in self.execute_values.call_args_list]
+        self.assertEqual(written, [
+            BATCH_INSERT_REPLAY_ENTRY_SIGNAL,
+            BATCH_INSERT_REPLAY_SIGNAL_OUTCOME,
+            BATCH_INSERT_EXIT_SIMULATIONS,
+        ])
+        self.cursor.execute.assert_called_once_with(
+            BATCH_MARK_REPLAY_OUTCOMES_COMPUTED, ([signal_id],)
+        )
+        self.assertEqual(sink.pending_rows, 0)
+        self.assertEqual(sink.flush(), 0)
+
+    def test_size_threshold_triggers_flush(self):
+        sink = ReplayResultSink(flush_rows=2)
+        sink.add_signal(("EURUSD", _SIGNAL_TIME))
+        self.db.execute_transaction.assert_not_called()
+        sink.add_signal(("EURUSD", _SIGNAL_TIME + timedelta(hours=1)))
+        self.db.execute_transaction.assert_called_once()
+
+    def test_failed_flush_drops_children_of_lost_signals(self):
+        sink = ReplayResultSink(flush_rows=1000)
+        signal_id = sink.add_signal(("EURUSD", _SIGNAL_TIME))
+        self.db.execute_transaction.side_effect = RuntimeError("db down")
+
+        with self.assertRaises(RuntimeError):
+            sink.flush()
+        self.assertEqual(sink.pending_rows, 0)
+        self.assertFalse(sink.add_outcome(signal_id, (96, 1.0, -0.5, 3, 7, "mfe")))
+        self.assertEqual(sink.pending_rows, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Unit tests for candle stores shared between worker processes."""
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import runner
+from replay.candle_store import CandleStore
+from replay.shared_candles import SharedCandleStore, attach_candle_store
+from replay_fixtures import REPLAY_END, REPLAY_START, make_replay_store, random_candles
+
+
+def _make_store() -> CandleStore:
+    hourly = random_candles(24 * 320, seed=6)
+    # Extra columns stay in the publisher's frame but are not shared
+    hourly["tick_volume"] = np.random.default_rng(6).integers(1, 100, len(hourly))
+    return make_replay_store(hourly=hourly)
+
+
+def _attached_summary(handle) -> tuple:
+    store = attach_candle_store(handle)
+    candles = store.get_4h_candles()
+    return (
+        store.summary(),
+        float(candles.closes.sum()),
+        int(candles.time_ns[-1]),
+        np.shares_memory(candles.candles["close"].to_numpy(), candles.closes),
+    )
+
+
+class TestSharedCandleStore(unittest.TestCase):
+
+    def test_attached_store_views_the_published_columns(self):
+        store = _make_store()
+        with SharedCandleStore(store) as shared:
+            attached = attach_candle_store(shared.handle)
+            self.assertEqual(attached.summary(), store.summary())
+
+            for timeframe in ("1H", "4H", "1D"):
+                original, view = store.get(timeframe), attached.get(timeframe)
+                np.testing.assert_array_equal(view.time_ns, original.time_ns)
+                np.testing.assert_array_equal(view.highs, original.highs)
+                pd.testing.assert_frame_equal(
+                    view.candles,
+                    original.candles[["time", "open", "high", "low", "close"]],
+                    check_dtype=False,  # Times are always held as ns
+                )
+                # Frame adapter and lookups use the block itself, read-only
+                self.assertTrue(np.shares_memory(view.candles["time"].array._ndarray, view.time_ns))
+                self.assertTrue(np.shares_memory(view.candles["low"].to_numpy(), view.lows))
+                self.assertFalse(view.opens.flags.writeable)
+
+            when = store.get_1h_candles().candles["time"].iloc[5000]
+            self.assertEqual(attached.get_1h_candles().find_index_by_time(when), 5000)
+            self.assertEqual(
+                attached.atr_at("4H", 1000, window=50),
+                store.atr_at("4H", 1000, window=50),
+            )
+            del attached, view
+
+        # Timeframes without candles stay empty
+        with SharedCandleStore(CandleStore("EURUSD")) as shared:
+            attached = attach_candle_store(shared.handle)
+            self.assertTrue(attached.get_1w_candles().is_empty)
+            self.assertEqual(attached.summary(), {"1H": 0, "4H": 0, "1D": 0, "1W": 0})
+            del attached
+
+    def test_workers_attach_without_loading(self):
+        store = _make_store()
+        with SharedCandleStore(store) as shared, ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(_attached_summary, [shared.handle] * 2))
+        expected = (
+            store.summary(),
+            float(store.get_4h_candles().closes.sum()),
+            int(store.get_4h_candles().time_ns[-1]),
+            True,
+        )
+        self.assertEqual(results, [expected, expected])
+
+    def test_replay_on_an_attached_store_matches(self):
+        store = _make_store()
+        outputs = []
+        with SharedCandleStore(store) as shared:
+            for candles in (store, attach_candle_store(shared.handle)):
+                with tempfile.TemporaryDirectory() as tmp, \
+                        patch.object(runner, "load_symbol_candles", return_value=candles):
+                    stats = runner._replay_symbol("EURUSD", REPLAY_START, REPLAY_END, output_dir=tmp)
+                    self.assertGreater(stats.signals_inserted, 0)
+                    outputs.append(pd.read_parquet(os.path.join(tmp, "entry_signal")).drop(columns="id"))
+            del candles
+        pd.testing.assert_frame_equal(outputs[0], outputs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Unit tests for the in-memory replay signal index."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.signal_index import ReplaySignalIndex
+
+_T0 = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+
+
+class TestReplaySignalIndex(unittest.TestCase):
+
+    def _load(self, rows):
+        index = ReplaySignalIndex("EURUSD")
+        with patch("database.executor.DBExecutor") as db:
+            db.fetch_all.return_value = rows
+            loaded = index.load(_T0, _T0 + timedelta(days=1))
+        return index, loaded
+
+    def test_load_separates_current_models_from_trade_grouping(self):
+        index, loaded = self._load([
+            (_T0, 1, "EURUSD_20250304_1000", True),
+            # Other model version: groups trades but is not a duplicate
+            (_T0 + timedelta(hours=1), 2, "EURUSD_20250304_1000", False),
+        ])
+        self.assertEqual(loaded, 1)
+        self.assertEqual(index.get_signal_id(_T0), 1)
+        self.assertIsNone(index.get_signal_id(_T0 + timedelta(hours=1)))
+        self.assertEqual(index.get_trade_id(_T0 + timedelta(hours=1)), "EURUSD_20250304_1000")
+
+    def test_first_row_wins_like_the_select(self):
+        index, _ = self._load([
+            (_T0, 1, "first", True),
+            (_T0, 2, "second", True),
+        ])
+        self.assertEqual(index.get_signal_id(_T0), 1)
+        self.assertEqual(index.get_trade_id(_T0), "first")
+
+    def test_added_signals_are_visible_and_times_normalized(self):
+        index = ReplaySignalIndex("EURUSD")
+        index.add(_T0, 7, "EURUSD_20250304_1000")
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.get_signal_id(_T0.replace(tzinfo=None)), 7)
+        self.assertEqual(
+            index.get_trade_id(_T0.astimezone(timezone(timedelta(hours=3)))),
+            "EURUSD_20250304_1000",
+        )
+        self.assertIsNone(index.get_signal_id(_T0 + timedelta(hours=1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Unit tests for the replay parameter sweep."""
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TrendDirection
+from replay import runner
+from entry.gates import GateThresholds, check_all_gates
+from entry.scoring import calculate_score
+from replay.lightweight_htf_context import LightweightHTFContext
+from replay.signal_detector import EntrySetup
+from replay.sweep import SweepConfig, build_sweep_configs, load_sweep_configs, run_sweep
+from replay_fixtures import REPLAY_END, REPLAY_START, make_replay_store
+
+_T0 = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def _random_setup(rng: random.Random) -> EntrySetup:
+    def maybe(value):
+        return None if rng.random() < 0.05 else value
+
+    return EntrySetup(
+        direction=rng.choice([TrendDirection.BULLISH, TrendDirection.BEARISH]),
+        candles_1h=None,
+        signal_1h_index=0,
+        signal_time=_T0 + timedelta(hours=rng.randrange(24 * 7)),
+        atr_1h=0.001,
+        trend_snapshot={},
+        trend_alignment=2,
+        conflicted_tf=rng.choice([None, "4H", "1W"]),
+        htf_context=LightweightHTFContext(
+            htf_range_position_daily=maybe(rng.random()),
+            htf_range_position_weekly=maybe(rng.random()),
+            distance_to_next_htf_obstacle_atr=maybe(rng.uniform(0, 4)),
+        ),
+    )
+
+
+class TestSweepConfig(unittest.TestCase):
+
+    def test_default_config_matches_production_gates_and_score(self):
+        rng = random.Random(3)
+        config = SweepConfig()
+        for _ in range(2000):
+            setup = _random_setup(rng)
+            htf = setup.htf_context
+            gates = check_all_gates(
+                signal_time=setup.signal_time,
+                symbol="EURUSD",
+                direction=setup.direction,
+                conflicted_tf=setup.conflicted_tf,
+                htf_range_position_daily=htf.htf_range_position_daily,
+                htf_range_position_weekly=htf.htf_range_position_weekly,
+                distance_to_next_htf_obstacle_atr=htf.distance_to_next_htf_obstacle_atr,
+            )
+            self.assertEqual(config.passes_gates(setup), gates.passed)
+            if not gates.passed:
+                continue
+
+            score = calculate_score(
+                setup.direction,
+                htf.htf_range_position_daily,
+                htf.htf_range_position_weekly,
+            )
+            expected = score.total_score if score.passed else None
+            self.assertEqual(config.score(setup), expected)
+
+    def test_overridden_thresholds_reach_the_production_gates(self):
+        rng = random.Random(5)
+        config = SweepConfig(
+            excluded_conflicted_tf="1W",
+            max_bullish_daily_position=0.6,
+            min_bearish_weekly_position=0.3,
+            min_obstacle_distance_atr=2.5,
+            min_total_score=5.0,
+        )
+        thresholds = GateThresholds(
+            excluded_conflicted_tf="1W",
+            max_bullish_daily_position=0.6,
+            min_bearish_weekly_position=0.3,
+            min_obstacle_distance_atr=2.5,
+        )
+        self.assertEqual(config.gate_thresholds(), thresholds)
+
+        differs = 0
+        for _ in range(2000):
+            setup = _random_setup(rng)
+            htf = setup.htf_context
+            gates = check_all_gates(
+                signal_time=setup.signal_time,
+                symbol="EURUSD",
+                direction=setup.direction,
+                conflicted_tf=setup.conflicted_tf,
+                htf_range_position_daily=htf.htf_range_position_daily,
+                htf_range_position_weekly=htf.htf_range_position_weekly,
+                distance_to_next_htf_obstacle_atr=htf.distance_to_next_htf_obstacle_atr,
+                thresholds=thresholds,
+            )
+            self.assertEqual(config.passes_gates(setup), gates.passed)
+            differs += gates.passed != SweepConfig().passes_gates(setup)
+            if gates.passed:
+                score = calculate_score(
+                    setup.direction,
+                    htf.htf_range_position_daily,
+                    htf.htf_range_position_weekly,
+                    min_total_score=5.0,
+                )
+                self.assertEqual(config.score(setup), score.total_score if score.passed else None)
+        self.assertGreater(differs, 0)
+
+    def test_grid_expands_to_distinct_stable_ids(self):
+        grid = {"min_total_score": [4.0, 4.5, 5.0], "rr_multiples": [[2], [2, 3]]}
+        configs = build_sweep_configs(grid)
+        self.assertEqual(len(configs), 6)
+        self.assertEqual(len({c.config_id for c in configs}), 6)
+        self.assertEqual(
+            [c.config_id for c in configs],
+            [c.config_id for c in build_sweep_configs(grid)],
+        )
+        self.assertIn(SweepConfig(rr_multiples=(2, 3), min_total_score=4.5).params(),
+                      [c.params() for c in configs])
+
+    def test_unknown_parameter_is_rejected(self):
+        with self.assertRaises(ValueError):
+            build_sweep_configs({"min_score": [4.0]})
+
+    def test_list_file_deduplicates_configs(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            stricter = {"min_total_score": SweepConfig().min_total_score + 0.5}
+            json.dump([stricter, stricter, {}], handle)
+        self.addCleanup(os.remove, handle.name)
+
+        configs = load_sweep_configs(handle.name)
+        self.assertEqual(len(configs), 2)
+
+
+
+class TestParallelSweep(unittest.TestCase):
+
+    @unittest.skipUnless(
+        multiprocessing.get_start_method() == "fork", "workers inherit the test's patches only when forked"
+    )
+    def test_parallel_sweep_matches_a_single_process(self):
+        configs = build_sweep_configs({"min_total_score": [3.0, 4.0, 4.5], "rr_multiples": [[2], [2, 3]]})
+        seeds = {"EURUSD": 6, "GBPUSD": 7}
+        db = MagicMock()
+        db.fetch_all.side_effect = lambda sql, params=None, **kwargs: []
+        results = []
+        for workers in (1, 2):
+            with patch("replay.candle_store.load_symbol_candles",
+                       side_effect=lambda symbol, *args: make_replay_store(symbol, seeds[symbol])), \
+                    patch.object(runner, "_init_replay_worker", lambda: None), \
+                    patch("database.executor.DBExecutor", db), \
+                    patch("psycopg2.extras.execute_values", MagicMock()):
+                stats = run_sweep(configs, symbols=list(seeds), start_date=REPLAY_START,
+                                  end_date=REPLAY_END, workers=workers)
+            results.append((stats.candles_processed, stats.signals_inserted, stats.outcomes_computed, stats.errors))
+        self.assertGreater(results[0][1], 0)
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
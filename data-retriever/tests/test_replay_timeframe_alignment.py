@@ -0,0 +1,63 @@
+"""Unit tests for the replay timeframe close schedule."""
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay.candle_store import CandleStore, TimeframeCandles
+from replay.timeframe_alignment import TimeframeAligner
+
+
+def _frame(start: str, periods: int, freq: str) -> pd.DataFrame:
+    times = pd.date_range(start, periods=periods, freq=freq, tz="UTC")
+    closes = np.linspace(1.1, 1.2, periods)
+    return pd.DataFrame({
+        "time": times, "open": closes, "high": closes, "low": closes, "close": closes,
+    })
+
+
+class TestTimeframeAlignerSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CandleStore("EURUSD")
+        # 1H starts before the first 4H/1D/1W candle to cover the "none closed" case
+        self.store._candles["1H"] = TimeframeCandles("1H", _frame("2025-01-05 20:00", 24 * 21, "h"))
+        self.store._candles["4H"] = TimeframeCandles("4H", _frame("2025-01-06", 6 * 20, "4h"))
+        self.store._candles["1D"] = TimeframeCandles("1D", _frame("2025-01-06", 20, "D"))
+        self.store._candles["1W"] = TimeframeCandles("1W", _frame("2025-01-06", 3, "7D"))
+
+    def test_schedule_matches_time_lookups(self):
+        aligner = TimeframeAligner(self.store)
+        hours = self.store.get_1h_candles()
+        for index in range(len(hours)):
+            as_of = hours.get_candle_at_index(index)["time"]
+            for timeframe in ("4H", "1D", "1W"):
+                self.assertEqual(
+                    aligner.get_last_closed_index_at(timeframe, index),
+                    aligner.get_last_closed_index(timeframe, as_of),
+                )
+
+    def test_new_close_flags_match_time_based_detection(self):
+        by_time = TimeframeAligner(self.store)
+        by_index = TimeframeAligner(self.store)
+        hours = self.store.get_1h_candles()
+        # Start mid-window, as a replay chunk would
+        for index in range(30, len(hours)):
+            as_of = hours.get_candle_at_index(index)["time"]
+            self.assertEqual(by_index.detect_new_closes_at(index), by_time.detect_new_closes(as_of))
+
+    def test_recompute_indices(self):
+        aligner = TimeframeAligner(self.store)
+        indices = aligner.get_recompute_indices("1D")
+        # First 1D candle opens 4 hours into the 1H series, then one per day
+        self.assertEqual(list(indices[:3]), [4, 28, 52])
+        self.assertEqual(len(indices), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import sys
 from typing import Union
 
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -42,3 +44,99 @@ def calculate_atr(
         return 0.0
     
     return float(current_atr)
+
+
+def windowed_atr_series(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    window: int,
+    length: int = 14,
+) -> np.ndarray:
+    """Calculate, for every candle, the ATR of the `window` candles ending there.
+    
+    Element i equals calculate_atr(data.iloc[max(0, i - window + 1):i + 1], length),
+    computed for all i in one vectorized pass. pandas_ta's RMA depends on where
+    the slice starts, so this replays pandas' EWM recurrence across all windows
+    at once instead of running one long exponential average.
+    
+    Args:
+        high, low, close: Candle columns in time order
+        window: Number of candles passed to calculate_atr at each point
+        length: ATR period length (default: 14)
+    
+    Returns:
+        Float array of ATR values, 0.0 where calculate_atr would return 0.0
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    result = np.zeros(n, dtype=np.float64)
+    
+    # At least `length` true ranges are needed (the first candle has none)
+    if n <= length or window <= length:
+        return result
+    
+    # pandas.ewm(alpha=...) converts alpha to com and back; mirror it exactly
+    com = 1.0 / (1.0 / length) - 1.0
+    decay = 1.0 - 1.0 / (1.0 + com)
+    
+    high_low = high - low
+    prev_close = close[:-1]
+    high_prev = np.abs(high[1:] - prev_close)
+    prev_low = np.abs(prev_close - low[1:])
+    
+    def true_range(hl: np.ndarray) -> np.ndarray:
+        tr = np.full(n, np.nan)
+        tr[1:] = np.maximum(np.maximum(np.abs(hl[1:]), high_prev), prev_low)
+        return tr
+    
+    # pandas_ta adds epsilon to every high-low range when a slice has a zero one
+    is_zero = high_low == 0
+    true_ranges = [true_range(high_low)]
+    if is_zero.any():
+        true_ranges.append(true_range(high_low + sys.float_info.epsilon))
+    zero_counts = np.concatenate(([0], np.cumsum(is_zero)))
+    
+    # Windows starting at candle 0 (fewer than `window` candles): one expanding pass
+    head = min(window - 1, n)
+    for tr in true_ranges:
+        weighted = tr[1]
+        old_weight = 1.0
+        head_values = np.zeros(head, dtype=np.float64)
+        for i in range(2, head):
+            old_weight *= decay
+            if weighted != tr[i]:
+                weighted = (old_weight * weighted + tr[i]) / (old_weight + 1.0)
+            old_weight += 1.0
+            if i >= length:
+                head_values[i] = weighted
+        if tr is true_ranges[0]:
+            result[:head] = head_values
+        else:
+            has_zero = zero_counts[1:head + 1] > 0
+            result[:head] = np.where(has_zero, head_values, result[:head])
+    
+    # Full windows: all share the same weights, so step through them together
+    full = n - window + 1
+    if full <= 0:
+        return result
+    ranges = window - 1
+    for tr in true_ranges:
+        weighted = tr[1:1 + full].copy()
+        old_weight = 1.0
+        for j in range(1, ranges):
+            old_weight *= decay
+            current = tr[1 + j:1 + j + full]
+            changed = weighted != current
+            updated = (old_weight * weighted + current) / (old_weight + 1.0)
+            weighted = np.where(changed, updated, weighted)
+            old_weight += 1.0
+        if tr is true_ranges[0]:
+            result[window - 1:] = weighted
+        else:
+            has_zero = (zero_counts[window:] - zero_counts[:full]) > 0
+            result[window - 1:] = np.where(has_zero, weighted, result[window - 1:])
+    
+    return result